@@ -35,10 +35,12 @@ from gramps.gen.const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
 import os
 import sys
+import time
 
 import logging
 
 LOG = logging.getLogger(".grampscli")
+STARTUP = logging.getLogger(".startup")
 #-------------------------------------------------------------------------
 #
 # GRAMPS  modules
@@ -353,12 +355,18 @@ def startcli(errors, argparser):
     climanager = CLIManager(dbstate, setloader=True, user=user)
 
     #load the plugins
+    start = time.time()
     climanager.do_reg_plugins(dbstate, uistate=None)
+    STARTUP.debug("Registered the plugins in %.3f seconds",
+                  time.time() - start)
     # handle the arguments
+    start = time.time()
     from .arghandler import ArgHandler
     handler = ArgHandler(dbstate, argparser, climanager)
     # create a manager to manage the database
     
     handler.handle_args_cli()
+    STARTUP.debug("Handled the arguments in %.3f seconds",
+                  time.time() - start)
     
     sys.exit(0)
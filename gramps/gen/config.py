@@ -152,6 +152,10 @@ register('behavior.welcome', 100)
 register('behavior.web-search-url', 'http://google.com/#&q=%(text)s')
 register('behavior.addons-url', "http://svn.code.sf.net/p/gramps-addons/code/trunk/")
 
+register('database.filter-workers', 0)
+register('database.object-cache-size', 10000)
+register('database.proxy-cache-size', 10000)
+
 register('export.proxy-order', [
         ["privacy", 0], 
         ["living", 0], 
@@ -159,6 +163,7 @@ register('export.proxy-order', [
         ["note", 0], 
         ["reference", 0],
         ])
+register('export.xml-workers', 0)
 
 register('geography.center-lon', 0.0)
 register('geography.lock', False)
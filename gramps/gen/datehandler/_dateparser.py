@@ -31,6 +31,7 @@ date parsing class. The default base class provides parsing for English.
 #-------------------------------------------------------------------------
 import re
 import calendar
+from collections import OrderedDict
 
 #-------------------------------------------------------------------------
 #
@@ -58,6 +59,15 @@ from ._datestrings import DateStrings
 _max_days  = [ 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31 ]
 _leap_days = [ 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31 ]
 
+# The common forms of dates parsed without the chain of expressions: a year,
+# an ISO date and a day, month name and year
+_year_form = re.compile(r"(\d{1,4})$")
+_iso_form  = re.compile(r"(\d{1,4})-(\d{1,2})-(\d{1,2})$")
+_text_form = re.compile(r"(\d{1,2})\s+([^\W\d_]+)\s+(\d{1,4})$")
+
+# The state of a new Date
+_new_date = Date().serialize()
+
 def gregorian_valid(date_tuple):
     """ Checks if date_tuple is a valid date in Gregorian Calendar  """
     day = date_tuple[0]
@@ -305,6 +315,17 @@ class DateParser(object):
         # see init_strings, so there is no need to override this if you have no aliases
         # for "today".
         # We also secretly support "$T" like in some reports.
+
+    memo_size = 10000
+    """
+    Number of texts whose parsed dates are remembered, 0 to remember none.
+    """
+
+    fast_forms = True
+    """
+    Whether the common forms of dates are parsed without the chain of
+    expressions.
+    """
     
     _langs = set()
     def __init_prefix_tables(self):
@@ -332,6 +353,12 @@ class DateParser(object):
                 _generate_variants(zip(ds.calendar)))
 
     def __init__(self):
+        self._memo = OrderedDict()
+        self._memo_langs = 0
+        self._today_used = False
+        # the common forms known to be parsed like the chain does, by form
+        # ("year", "iso" or the month name)
+        self._common_forms = {}
         self.init_strings()
         self.parser = {
             Date.CAL_GREGORIAN : self._parse_gregorian,
@@ -639,6 +666,7 @@ class DateParser(object):
 
         match = self._today.match(text)
         if match:
+            self._today_used = True
             today = Today()
             if cal:
                 today = today.to_calendar(cal)
@@ -831,9 +859,101 @@ class DateParser(object):
     def set_date(self, date, text):
         """
         Parses the text and sets the date according to the parsing.
+
+        The dates parsed into new dates are remembered, for the last
+        memo_size texts, and set again without parsing.
+        """
+        if self._memo_langs != len(DateParser._langs):
+            # the month names of another language were added
+            self._memo.clear()
+            self._common_forms.clear()
+            self._memo_langs = len(DateParser._langs)
+        if not self.memo_size or date.serialize() != _new_date:
+            self._set_date(date, text)
+            return
+        data = self._memo.get(text)
+        if data is not None:
+            self._memo.move_to_end(text)
+            date.unserialize(data)
+            return
+        self._today_used = False
+        self._set_date(date, text)
+        if not self._today_used:
+            self._memo[text] = date.serialize()
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+    def match_common_form(self, text):
+        """
+        Try matching a year, an ISO date or a day, month name and year.
+
+        Return the form ("year", "iso" or the month name) and the date value,
+        or (None, None) for other texts, partial or invalid dates.
+        """
+        match = _year_form.match(text)
+        if match:
+            y = int(match.group(1))
+            if y == 0:
+                return (None, None)
+            return ("year", (0, 0, y, False))
+        match = _iso_form.match(text)
+        if match:
+            form = "iso"
+            (y, m, d) = map(int, match.groups())
+        else:
+            match = _text_form.match(text)
+            if not match:
+                return (None, None)
+            form = match.group(2).lower()
+            m = self.month_to_int.get(form)
+            if m is None:
+                return (None, None)
+            (d, y) = (int(match.group(1)), int(match.group(3)))
+        if 0 in (d, m, y) or not gregorian_valid((d, m, y)):
+            return (None, None)
+        return (form, (d, m, y, False))
+
+    def _set_date(self, date, text):
+        """
+        Parses the text and sets the date according to the parsing.
+
+        A common form of date is set directly once the chain of expressions
+        was seen to parse it the same way.
         """
         text = text.strip() # otherwise spaces can make it a bad date
         date.set_text_value(text)
+        if not self.fast_forms:
+            self._set_date_chain(date, text)
+            return
+        (form, value) = self.match_common_form(text)
+        if form is None:
+            self._set_date_chain(date, text)
+        elif self._common_forms.get(form):
+            self._set_common_form(date, value)
+        elif form in self._common_forms:
+            self._set_date_chain(date, text)
+        else:
+            common = Date(date)
+            try:
+                self._set_common_form(common, value)
+            except DateError:
+                common = None
+            self._set_date_chain(date, text)
+            self._common_forms[form] = (common is not None and
+                                        date.serialize() == common.serialize())
+
+    def _set_common_form(self, date, value):
+        """
+        Set the date to a regular gregorian date.
+        """
+        date.set(Date.QUAL_NONE, Date.MOD_NONE, Date.CAL_GREGORIAN, value,
+                 newyear=Date.NEWYEAR_JAN1)
+
+    def _set_date_chain(self, date, text):
+        """
+        Parses the text with the chain of expressions and sets the date
+        according to the parsing.
+        """
         qual = Date.QUAL_NONE
         cal  = Date.CAL_GREGORIAN
         newyear = Date.NEWYEAR_JAN1
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Benchmark of the date parsers of all languages.
+
+Times the parsing of dates with the chain of expressions only, with the
+common forms and with the memo, for the parser of every language, or of the
+languages given::
+
+    python3 -m gramps.gen.datehandler.test.dateparser_benchmark [lang ...]
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import sys
+import time
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from .. import LANG_TO_PARSER
+from .._datestrings import DateStrings
+
+ROUNDS = 5
+
+def texts(parser):
+    """
+    Dates as typed in a language: years, ISO dates, days with month names
+    and a few qualified dates.
+    """
+    ds = DateStrings(parser._locale)
+    months = [month for month in ds.long_months[1:] + ds.short_months[1:]
+              if month]
+    result = ["%d" % year for year in range(1750, 1950)]
+    result.extend("%d-%02d-%02d" % (year, month, 1 + year % 28)
+                  for year in range(1800, 1900) for month in (1, 6, 11))
+    result.extend("%d %s %d" % (1 + year % 28, month, year)
+                  for year in range(1850, 1860) for month in months)
+    result.extend("%s %d" % (word, year) for year in range(1850, 1860)
+                  for word in ("abt", "bef", "aft", "est"))
+    result.extend("bet %d and %d" % (year, year + 10)
+                  for year in range(1850, 1860))
+    return result
+
+def run(parser, corpus):
+    """
+    Return the time in microseconds to parse a date of the corpus.
+    """
+    best = None
+    for count in range(ROUNDS):
+        start = time.perf_counter()
+        for text in corpus:
+            parser.parse(text)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best * 1e6 / len(corpus)
+
+def benchmark(parser_class):
+    """
+    Return the time to parse a date with the chain of expressions, with the
+    common forms and with the memo.
+    """
+    parser = parser_class()
+    corpus = texts(parser)
+    parser.memo_size = 0
+    parser.fast_forms = False
+    chain = run(parser, corpus)
+    parser.fast_forms = True
+    fast = run(parser, corpus)
+    parser.memo_size = len(corpus)
+    memo = run(parser, corpus)
+    return (len(corpus), chain, fast, memo)
+
+def main(langs):
+    parsers = {}
+    for lang, parser_class in sorted(LANG_TO_PARSER.items()):
+        if not langs or lang in langs:
+            parsers.setdefault(parser_class, lang)
+    print("%-16s %-14s %6s %9s %9s %9s" % ("parser", "lang", "dates",
+                                           "chain us", "fast us", "memo us"))
+    for parser_class, lang in sorted(parsers.items(),
+                                     key=lambda item: item[1]):
+        (count, chain, fast, memo) = benchmark(parser_class)
+        print("%-16s %-14s %6d %9.2f %9.2f %9.2f" % (
+            parser_class.__name__, lang, count, chain, fast, memo))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -121,5 +121,76 @@ class Test_generate_variants(unittest.TestCase):
         v = self.month_variants[5]
         self.assertIn("Maj", v)
 
+class MemoTest(unittest.TestCase):
+    """
+    The memo and the common forms give the dates parsed by the chain of
+    expressions, in every language.
+    """
+    def setUp(self):
+        from .. import LANG_TO_PARSER
+        self.parsers = sorted(set(LANG_TO_PARSER.values()),
+                              key=lambda parser: parser.__name__)
+
+    def texts(self, parser, days=(0, 5, 31)):
+        words = sorted(word for word in parser.month_to_int
+                       if word.isalpha())
+        texts = ["1850", "0", "07", "0850", " 1850 ", "10000", "1850/1",
+                 "1850-03-04", "1850-3-4", "0-1-1", "1850-02-30",
+                 "1900-02-29", "2000-02-29", "1850-13-01", "04.03.1850",
+                 "abt 1850", "bet 1850 and 1860", "from 1850 to 1860",
+                 "est 5 jan 1850", "5 jan 1850 (julian)", "today", "text"]
+        texts.extend("%d %s 1850" % (day, word)
+                     for word in words for day in days)
+        texts.extend("5 %s %s 1850" % (word, word) for word in words[:20])
+        return texts
+
+    def chain(self, parser, method, *args):
+        """
+        Call the method of the parser without the memo and the common forms.
+        """
+        parser.memo_size = 0
+        parser.fast_forms = False
+        try:
+            return method(*args)
+        finally:
+            del parser.memo_size
+            del parser.fast_forms
+
+    def test_parse(self):
+        for parser_class in self.parsers:
+            parser = parser_class()
+            texts = self.texts(parser)
+            for text in texts + texts:
+                expected = self.chain(parser, parser.parse, text)
+                self.assertEqual(parser.parse(text).serialize(),
+                                 expected.serialize(),
+                                 msg=(parser_class.__name__, text))
+
+    def test_set_date(self):
+        for parser_class in self.parsers:
+            parser = parser_class()
+            for text in self.texts(parser, days=(5,)) * 2:
+                for data in ((0, 0, 0, (1, 2, 1800, False), "", 0, 0),
+                             (0, 0, 0, (0, 0, 0, False), "text", 0, 0),
+                             (1, 4, 1, (1, 2, 1800, False, 3, 4, 1810, False),
+                              "", 0, 2)):
+                    date = Date()
+                    date.unserialize(data)
+                    parser.set_date(date, text)
+                    expected = Date()
+                    expected.unserialize(data)
+                    self.chain(parser, parser.set_date, expected, text)
+                    self.assertEqual(date.serialize(), expected.serialize(),
+                                     msg=(parser_class.__name__, text))
+
+    def test_memo_size(self):
+        parser = self.parsers[0]()
+        parser.memo_size = 3
+        for text in ("1850", "1851", "1852", "1853", "1851"):
+            parser.parse(text)
+        self.assertEqual(list(parser._memo), ["1852", "1853", "1851"])
+        parser.parse("today")
+        self.assertNotIn("today", parser._memo)
+
 if __name__ == "__main__":
     unittest.main()
@@ -41,10 +41,21 @@ The database consists of a table of "pickled" tuples. Each of the
 primary tables is "walked", and the pickled tuple is extracted, and
 written to the backup file.
 
-Restoring the data is just as simple. The backup file is parsed an
-entry at a time, and inserted into the associated database table. The
-derived tables are built automatically as the items are entered into
-db.
+The backup files are compressed. A full backup writes one base file per
+table. Later backups are incremental: they append a numbered increment
+file per table, holding only the records added or changed (according to
+their change time) since the previous backup, and the handles of the
+records removed since then. An index file keeps the time of the last
+backup, the number of increments and the handles present at that time.
+Once there are too many increments, or they grow too large compared to
+the base files, the next backup is a full one again (compaction). The
+metadata table is small and always saved in full.
+
+Restoring the data is just as simple. The base file and then each
+increment are parsed an entry at a time, and inserted into (or removed
+from) the associated database table. The derived tables are built
+automatically as the items are entered into db. Base files written by
+older versions, without compression or index, are restored as well.
 """
 
 #-------------------------------------------------------------------------
@@ -53,7 +64,9 @@ db.
 #
 #-------------------------------------------------------------------------
 import os
+import gzip
 import pickle
+import time
 
 #------------------------------------------------------------------------
 #
@@ -72,23 +85,50 @@ from .write import FAMILY_TBL, PLACES_TBL, SOURCES_TBL, MEDIA_TBL, \
 import logging
 LOG = logging.getLogger(".Backup")
 
-def backup(database):
+#------------------------------------------------------------------------
+#
+# Constants
+#
+#------------------------------------------------------------------------
+BACKUP_INDEX = "backup_index"
+INDEX_VERSION = 1
+MAX_INCREMENTS = 10
+COMPRESS_LEVEL = 6
+
+# Position of the change time in the serialized primary objects
+CHANGE_INDEX = {
+    PERSON_TBL:    17,
+    FAMILY_TBL:    12,
+    PLACES_TBL:    15,
+    SOURCES_TBL:   8,
+    CITATIONS_TBL: 9,
+    REPO_TBL:      7,
+    NOTE_TBL:      5,
+    MEDIA_TBL:     9,
+    EVENTS_TBL:    10,
+    TAG_TBL:       4,
+    }
+
+def backup(database, full=False):
     """
     Exports the database to a set of backup files. These files consist
-    of the pickled database tables, one file for each table.
+    of the pickled database tables, one file for each table, followed by
+    the increments written by later backups.
 
     The heavy lifting is done by the private :py:func:`__do__export` function.
     The purpose of this function is to catch any exceptions that occur.
 
     :param database: database instance to backup
     :type database: DbDir
+    :param full: write a full backup, even if an incremental one is possible
+    :type full: bool
     """
     try:
-        __do_export(database)
+        __do_export(database, full)
     except (OSError, IOError) as msg:
         raise DbException(str(msg))
 
-def __mk_backup_name(database, base):
+def __mk_backup_name(database, base, increment=0):
     """
     Return the backup name of the database table
 
@@ -96,10 +136,14 @@ def __mk_backup_name(database, base):
     :type database: DbDir
     :param base: base name of the table
     :type base: str
+    :param increment: number of the increment, 0 for the base file
+    :type increment: int
     """
+    if increment:
+        base = "%s.%d" % (base, increment)
     return os.path.join(database.get_save_path(), base + ".gbkp")
 
-def __mk_tmp_name(database, base):
+def __mk_tmp_name(database, base, increment=0):
     """
     Return the temporary backup name of the database table
 
@@ -107,43 +151,224 @@ def __mk_tmp_name(database, base):
     :type database: DbDir
     :param base: base name of the table
     :type base: str
+    :param increment: number of the increment, 0 for the base file
+    :type increment: int
+    """
+    return __mk_backup_name(database, base, increment) + ".new"
+
+def __read_index(database):
     """
-    return os.path.join(database.get_save_path(), base + ".gbkp.new")
+    Return the backup index, or None if there is no usable one, for
+    instance because the last backup was written by an older version.
 
-def __do_export(database):
+    :param database: database instance 
+    :type database: DbDir
+    """
+    try:
+        with gzip.open(__mk_backup_name(database, BACKUP_INDEX), 'rb') as fp:
+            index = pickle.load(fp)
+    except Exception:
+        return None
+    if not isinstance(index, dict) or index.get('version') != INDEX_VERSION:
+        return None
+    return index
+
+def __write_index(database, index):
+    """
+    Write the backup index, replacing the old one.
+
+    :param database: database instance 
+    :type database: DbDir
+    :param index: time of the backup, number of increments and the handles
+                  of each table
+    :type index: dict
+    """
+    with __open_tmp_file(database, BACKUP_INDEX) as fp:
+        pickle.dump(index, fp, 2)
+    __replace(__mk_tmp_name(database, BACKUP_INDEX),
+              __mk_backup_name(database, BACKUP_INDEX))
+
+def __open_tmp_file(database, base, increment=0):
+    """
+    Open the compressed temporary backup file of the database table
+
+    :param database: database instance 
+    :type database: DbDir
+    :param base: base name of the table
+    :type base: str
+    :param increment: number of the increment, 0 for the base file
+    :type increment: int
+    """
+    return gzip.open(__mk_tmp_name(database, base, increment), 'wb',
+                     COMPRESS_LEVEL)
+
+def __replace(old_name, new_name):
+    """
+    Rename old_name to new_name, removing the file new_name if it exists.
+    """
+    if os.path.isfile(new_name):
+        os.unlink(new_name)
+    os.rename(old_name, new_name)
+
+def __need_full_export(database, index):
+    """
+    Return True if the next backup must be a full one: there is no index,
+    the tables changed, or the increments are too many or too large.
+
+    :param database: database instance 
+    :type database: DbDir
+    :param index: the backup index
+    :type index: dict
+    """
+    if index is None or index['increments'] >= MAX_INCREMENTS:
+        return True
+    bases = [base for (base, tbl) in __build_tbl_map(database)
+             if base != META]
+    if set(bases) != set(index['keys']):
+        return True
+    base_size = increment_size = 0
+    for base in bases:
+        base_size += os.path.getsize(__mk_backup_name(database, base))
+        for number in range(1, index['increments'] + 1):
+            name = __mk_backup_name(database, base, number)
+            if os.path.isfile(name):
+                increment_size += os.path.getsize(name)
+    return increment_size * 2 > base_size
+
+def __iter_table(tbl):
+    """
+    Yield the (key, pickled data) pairs of a database table.
+
+    :param tbl: Berkeley db database table
+    :type tbl: Berkeley db database table
+    """
+    cursor = tbl.cursor()
+    try:
+        data = cursor.first()
+        while data:
+            yield data
+            data = cursor.next()
+    finally:
+        cursor.close()
+
+def __do_export(database, full):
+    """
+    Save the database, incrementally if possible.
+
+    :param database: database instance to backup
+    :type database: DbDir
+    :param full: write a full backup, even if an incremental one is possible
+    :type full: bool
+    """
+    index = __read_index(database)
+    if full or __need_full_export(database, index):
+        __do_full_export(database, index)
+    else:
+        __do_incremental_export(database, index)
+
+def __do_full_export(database, index):
     """
     Loop through each table of the database, saving the pickled data
-    a file.
+    in a new base file. The increments of the previous backup are removed.
 
     :param database: database instance to backup
     :type database: DbDir
+    :param index: the index of the previous backup, or None
+    :type index: dict
     """
+    backup_time = int(time.time())
+    keys = {}
     try:
         for (base, tbl) in __build_tbl_map(database):
-            backup_name = __mk_tmp_name(database, base)
-            backup_table = open(backup_name, 'wb')
-    
-            cursor = tbl.cursor()
-            data = cursor.first()
-            while data:
-                pickle.dump(data, backup_table, 2)
-                data = cursor.next()
-            cursor.close()
-            backup_table.close()
-    except (IOError,OSError):
+            table_keys = set()
+            with __open_tmp_file(database, base) as backup_table:
+                for key, data in __iter_table(tbl):
+                    table_keys.add(key)
+                    pickle.dump((key, data), backup_table, 2)
+            if base != META:
+                keys[base] = table_keys
+    except (IOError, OSError):
         return
 
+    # The old increments do not apply to the new base files
+    index_name = __mk_backup_name(database, BACKUP_INDEX)
+    if os.path.isfile(index_name):
+        os.unlink(index_name)
     for (base, tbl) in __build_tbl_map(database):
-        new_name = __mk_backup_name(database, base)
-        old_name = __mk_tmp_name(database, base)
-        if os.path.isfile(new_name):
-            os.unlink(new_name)
-        os.rename(old_name, new_name)
+        __replace(__mk_tmp_name(database, base),
+                  __mk_backup_name(database, base))
+        if index is not None:
+            for number in range(1, index['increments'] + 1):
+                name = __mk_backup_name(database, base, number)
+                if os.path.isfile(name):
+                    os.unlink(name)
+
+    __write_index(database, {'version': INDEX_VERSION,
+                             'time': backup_time,
+                             'increments': 0,
+                             'keys': keys})
+
+def __do_incremental_export(database, index):
+    """
+    Loop through each table of the database, saving the records added or
+    changed since the last backup, and the keys of the removed records, in
+    a new increment file. Tables without changes get no increment file.
+    The metadata is saved in full.
+
+    :param database: database instance to backup
+    :type database: DbDir
+    :param index: the index of the previous backup
+    :type index: dict
+    """
+    backup_time = int(time.time())
+    since = index['time']
+    number = index['increments'] + 1
+    keys = {}
+    changed = []
+    try:
+        for (base, tbl) in __build_tbl_map(database):
+            if base == META:
+                with __open_tmp_file(database, base) as backup_table:
+                    for data in __iter_table(tbl):
+                        pickle.dump(data, backup_table, 2)
+                continue
+
+            old_keys = index['keys'][base]
+            table_keys = keys[base] = set()
+            change_index = CHANGE_INDEX[base]
+            count = 0
+            with __open_tmp_file(database, base, number) as backup_table:
+                for key, data in __iter_table(tbl):
+                    table_keys.add(key)
+                    if (key not in old_keys or
+                            pickle.loads(data)[change_index] >= since):
+                        pickle.dump((key, data), backup_table, 2)
+                        count += 1
+                for key in old_keys - table_keys:
+                    pickle.dump((key, None), backup_table, 2)
+                    count += 1
+            if count:
+                changed.append(base)
+            else:
+                os.unlink(__mk_tmp_name(database, base, number))
+    except (IOError, OSError):
+        return
+
+    __replace(__mk_tmp_name(database, META), __mk_backup_name(database, META))
+    for base in changed:
+        __replace(__mk_tmp_name(database, base, number),
+                  __mk_backup_name(database, base, number))
+
+    __write_index(database, {'version': INDEX_VERSION,
+                             'time': backup_time,
+                             'increments': number,
+                             'keys': keys})
 
 def restore(database):
     """
     Restores the database to a set of backup files. These files consist
-    of the pickled database tables, one file for each table.
+    of the pickled database tables, one file for each table, and the
+    increments of the later backups.
 
     The heavy lifting is done by the private :py:func:`__do__restore` function.
     The purpose of this function is to catch any exceptions that occur.
@@ -159,36 +384,63 @@ def restore(database):
 def __do_restore(database):
     """
     Loop through each table of the database, restoring the pickled data
-    to the appropriate database file.
+    of the base file and of the increments to the appropriate database file.
 
     :param database: database instance to backup
     :type database: DbDir
     """
+    index = __read_index(database)
+    increments = index['increments'] if index else 0
     for (base, tbl) in __build_tbl_map(database):
-        backup_name = __mk_backup_name(database, base)
-        backup_table = open(backup_name, 'rb')
-        __load_tbl_txn(database, backup_table, tbl)
+        __load_tbl_txn(database, __mk_backup_name(database, base), tbl)
+        if base != META:
+            for number in range(1, increments + 1):
+                backup_name = __mk_backup_name(database, base, number)
+                if os.path.isfile(backup_name):
+                    __load_tbl_txn(database, backup_name, tbl)
 
     database.rebuild_secondary()
 
-def __load_tbl_txn(database, backup_table, tbl):
+def __open_backup_file(backup_name):
     """
-    Return the temporary backup name of the database table
+    Open a backup file, which is compressed unless it was written by an
+    older version.
+
+    :param backup_name: name of the backup file
+    :type backup_name: str
+    """
+    backup_table = open(backup_name, 'rb')
+    if backup_table.read(2) == b'\x1f\x8b':
+        backup_table.close()
+        return gzip.open(backup_name, 'rb')
+    backup_table.seek(0)
+    return backup_table
+
+def __load_tbl_txn(database, backup_name, tbl):
+    """
+    Load the records of a backup file into the database table. A record
+    without data removes the record from the table.
 
     :param database: database instance 
     :type database: DbDir
-    :param backup_table: file containing the backup data
-    :type backup_table: file
+    :param backup_name: name of the file containing the backup data
+    :type backup_name: str
     :param tbl: Berkeley db database table
     :type tbl: Berkeley db database table
     """
+    backup_table = __open_backup_file(backup_name)
     try:
         while True:
-            data = pickle.load(backup_table)
+            key, data = pickle.load(backup_table)
             txn = database.env.txn_begin()
-            tbl.put(data[0], data[1], txn=txn)
+            if data is not None:
+                tbl.put(key, data, txn=txn)
+            elif tbl.get(key, txn=txn) is not None:
+                tbl.delete(key, txn=txn)
             txn.commit()
     except EOFError:
+        pass
+    finally:
         backup_table.close()
 
 def __build_tbl_map(database):
@@ -557,6 +557,14 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
+    def get_person_summary(self):
+        """
+        Return the PersonSummary table of the people of the database, kept
+        up to date as the database changes, or None if the database does not
+        keep one.
+        """
+        return None
+
     def get_source_attribute_types(self):
         """
         Return a list of all Attribute types associated with Source/Citation
@@ -736,6 +744,15 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
+    def get_sort_key_index(self, table, name):
+        """
+        Return the sorted (sort_key, handle) list stored under name for the
+        objects of table, and the set of handles of the objects that were
+        added, changed or deleted since it was stored. Return None if the
+        database does not keep such lists, or has none for table and name.
+        """
+        return None
+
     def get_source_bookmarks(self):
         """
         Return the list of Source handles in the bookmarks.
@@ -1204,6 +1221,13 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
+    def set_sort_key_index(self, table, name, keys):
+        """
+        Store the sorted (sort_key, handle) list of the objects of table
+        under name, if the database can keep such lists.
+        """
+        pass
+
     def set_undo_callback(self, callback):
         """
         Define the callback function that is called whenever an undo operation
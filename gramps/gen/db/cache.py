@@ -0,0 +1,110 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+# gen/db/cache.py
+
+"""
+Bounded cache of serialized primary objects, used by the database
+``get_<object>_from_handle`` methods.
+
+The cache holds the serialized tuple of an object, not the object itself.
+Every lookup still builds a fresh object, so callers may modify what they
+get back without affecting the cache or other callers.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+from collections import OrderedDict
+
+#-------------------------------------------------------------------------
+#
+# DbObjectCache class
+#
+#-------------------------------------------------------------------------
+class DbObjectCache(object):
+    """
+    Length-limited LRU cache of serialized objects for one primary table,
+    keyed by handle (bytes).
+
+    A size of zero disables the cache.
+    """
+    def __init__(self, size=0):
+        self.size = max(size, 0)
+        self.hits = 0
+        self.misses = 0
+        self.__data = OrderedDict()
+
+    def __len__(self):
+        return len(self.__data)
+
+    def __contains__(self, handle):
+        return handle in self.__data
+
+    def get(self, handle):
+        """
+        Return the serialized data cached for handle, or None.
+        """
+        try:
+            data = self.__data.pop(handle)
+        except KeyError:
+            self.misses += 1
+            return None
+        self.__data[handle] = data
+        self.hits += 1
+        return data
+
+    def put(self, handle, data):
+        """
+        Store the serialized data for handle, dropping the least recently
+        used entry if the cache is full.
+        """
+        if not self.size:
+            return
+        self.__data.pop(handle, None)
+        self.__data[handle] = data
+        if len(self.__data) > self.size:
+            self.__data.popitem(last=False)
+
+    def discard(self, handle):
+        """
+        Remove handle from the cache, if present.
+        """
+        self.__data.pop(handle, None)
+
+    def clear(self):
+        """
+        Remove all entries. The hit and miss counters are kept.
+        """
+        self.__data.clear()
+
+    def resize(self, size):
+        """
+        Change the maximum number of entries, dropping old ones if needed.
+        """
+        self.size = max(size, 0)
+        while len(self.__data) > self.size:
+            self.__data.popitem(last=False)
+
+    def get_stats(self):
+        """
+        Return a tuple (hits, misses, number of cached entries).
+        """
+        return (self.hits, self.misses, len(self.__data))
@@ -63,7 +63,8 @@ class Cursor(object):
     def __enter__(self):
         return self
     def __iter__(self):
-        return self
+        for handle in list(self.model.keys()):
+            yield (handle, self.func(handle))
     def __next__(self):
         for handle in self.model.keys():
             return (handle, self.func(handle))
@@ -800,6 +801,11 @@ class DictionaryDb(DbWriteBase, DbReadBase):
             return self.family_map[handle].serialize()
         return None
 
+    def get_raw_event_data(self, handle):
+        if handle in self.event_map:
+            return self.event_map[handle].serialize()
+        return None
+
     def get_raw_citation_data(self, handle):
         if handle in self.citation_map:
             return self.citation_map[handle].serialize()
@@ -71,11 +71,13 @@ from .dbconst import *
 from ..utils.callback import Callback
 from ..utils.cast import conv_dbstr_to_unicode
 from . import (BsddbBaseCursor, DbReadBase)
+from .cache import DbObjectCache
 from ..utils.id import create_id
 from ..errors import DbError
 from ..constfunc import handle2internal, get_env_var
 from ..const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
+from ..config import config
 
 LOG = logging.getLogger(DBLOGNAME)
 LOG = logging.getLogger(".citation")
@@ -463,6 +465,11 @@ class DbBsddbRead(DbReadBase, Callback):
         self.txn = None
         self.has_changed = False
 
+        cache_size = config.get('database.object-cache-size')
+        self._object_cache = dict(
+            (table["class_func"].__name__, DbObjectCache(cache_size))
+            for table in self._tables.values())
+
     def set_prefixes(self, person, media, family, source, citation, place,
                      event, repository, note):
         self.set_person_id_prefix(person)
@@ -541,6 +548,7 @@ class DbBsddbRead(DbReadBase, Callback):
         self.basedb = None
         #remove links to functions
         self.disconnect_all()
+        self.clear_object_cache()
         for key in self._tables:
             for subkey in self._tables[key]:
                 self._tables[key][subkey] = None
@@ -678,13 +686,48 @@ class DbBsddbRead(DbReadBase, Callback):
     def get_from_handle(self, handle, class_type, data_map):
         if isinstance(handle, str):
             handle = handle.encode('utf-8')
-        data = data_map.get(handle)
+        cache = self._object_cache[class_type.__name__]
+        data = cache.get(handle)
+        if data is None:
+            data = data_map.get(handle)
+            if data:
+                cache.put(handle, data)
         if data:
             newobj = class_type()
             newobj.unserialize(data)
             return newobj
         return None
 
+    def get_object_cache_stats(self):
+        """
+        Return a dictionary mapping each primary class name (e.g. "Person")
+        to a tuple (hits, misses, number of cached entries) of its object
+        cache.
+        """
+        return dict((key, cache.get_stats())
+                    for key, cache in self._object_cache.items())
+
+    def clear_object_cache(self, class_name=None):
+        """
+        Empty the object cache of the given primary class, or of all classes
+        if class_name is None.
+        """
+        if class_name is None:
+            for cache in self._object_cache.values():
+                cache.clear()
+        else:
+            self._object_cache[class_name].clear()
+
+    def _discard_cached_handles(self, class_name, handles):
+        """
+        Remove the given handles from the object cache of a primary class.
+        """
+        cache = self._object_cache[class_name]
+        for handle in handles:
+            if isinstance(handle, str):
+                handle = handle.encode('utf-8')
+            cache.discard(handle)
+
     def get_from_name_and_handle(self, table_name, handle):
         """
         Returns a gen.lib object (or None) given table_name and
@@ -0,0 +1,257 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+# gen/db/sortkeys.py
+
+"""
+Sort key indexes of the list views, kept with the database.
+
+A list view sorts all rows of a table on one column. Computing the sort key
+of every row means reading and unserializing the whole table, which is slow
+on large databases. The view can therefore store its sorted
+(sort_key, handle) list in an index file of the database directory, named
+after the table and a name of the view's choice.
+
+Every commit appends the handles of the changed objects to a change log of
+the table. An index file records the length of the change log when it was
+written, so that when it is read again the handles logged since can be
+returned with it, and only the sort keys of those rows have to be computed
+again. Changes that are not logged, such as a batch transaction, remove the
+index files of all tables.
+
+When the database is closed, the modification times and sizes of the table
+files are stored with the indexes. The indexes are only used again if the
+table files did not change since, as changes made while the database was
+closed are not logged.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import os
+import pickle
+import logging
+_LOG = logging.getLogger(".sortkeys")
+
+#-------------------------------------------------------------------------
+#
+# Constants
+#
+#-------------------------------------------------------------------------
+SORTKEY_PREFIX = "sortkeys-"
+SORTKEY_STAMPS = "sortkeys.pkl"
+INDEX_VERSION = 1
+# size in bytes above which a change log and the indexes of its table are
+# thrown away, so that the indexes are built again from the table
+MAX_LOG_SIZE = 4 * 1024 * 1024
+
+def table_stamps(path):
+    """
+    Return the modification times and sizes of the table files in path.
+    """
+    stamps = []
+    try:
+        for name in sorted(os.listdir(path)):
+            if name.endswith('.db'):
+                stat = os.stat(os.path.join(path, name))
+                stamps.append((name, stat.st_mtime_ns, stat.st_size))
+    except OSError:
+        return None
+    return stamps
+
+#-------------------------------------------------------------------------
+#
+# SortKeyStore class
+#
+#-------------------------------------------------------------------------
+class SortKeyStore(object):
+    """
+    The sort key index files and change logs of one database directory.
+
+    The store must be created before the table files are opened, and closed
+    after they are closed. A read-only store returns the indexes, but does
+    not write any file.
+    """
+    def __init__(self, path, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self.__tables = set()
+        for name in self.__files():
+            if name.endswith('.idx'):
+                self.__tables.add(name[len(SORTKEY_PREFIX):].split('-', 1)[0])
+        if not self.__tables:
+            return
+
+        stamps_name = os.path.join(self.path, SORTKEY_STAMPS)
+        try:
+            with open(stamps_name, 'rb') as stamps_file:
+                stamps = pickle.load(stamps_file)
+        except (IOError, OSError):
+            stamps = None
+        except Exception as msg:
+            _LOG.warning("Sort key stamps %s are damaged: %s",
+                         stamps_name, msg)
+            stamps = None
+        if not self.readonly:
+            # the stamps are written again by close; without them, the
+            # indexes are not used after a crash
+            try:
+                os.unlink(stamps_name)
+            except OSError:
+                stamps = None
+        if stamps is None or stamps != table_stamps(self.path):
+            # the tables were changed without logging the changes
+            self.clear()
+            self.__tables.clear()
+
+    def __files(self):
+        try:
+            return [name for name in os.listdir(self.path)
+                    if name.startswith(SORTKEY_PREFIX)]
+        except OSError:
+            return []
+
+    def __log_name(self, table):
+        return os.path.join(self.path, '%s%s.log' % (SORTKEY_PREFIX, table))
+
+    def __index_name(self, table, name):
+        return os.path.join(self.path,
+                            '%s%s-%s.idx' % (SORTKEY_PREFIX, table, name))
+
+    def log_changes(self, table, handles):
+        """
+        Record that the objects with the given handles were added, changed
+        or deleted in table. Nothing is written if the table has no index.
+        """
+        if self.readonly or table not in self.__tables or not handles:
+            return
+        handles = [handle.decode('utf-8') if isinstance(handle, bytes)
+                   else handle for handle in handles]
+        try:
+            with open(self.__log_name(table), 'ab') as log:
+                pickle.dump(handles, log, pickle.HIGHEST_PROTOCOL)
+                size = log.tell()
+        except (IOError, OSError) as msg:
+            _LOG.warning("Can't log changes of the %s table: %s", table, msg)
+            self.clear(table)
+            return
+        if size > MAX_LOG_SIZE:
+            self.clear(table)
+
+    def clear(self, table=None):
+        """
+        Remove the indexes and the change log of table, or of all tables if
+        table is None.
+        """
+        if self.readonly:
+            return
+        for name in self.__files():
+            table_name = name[len(SORTKEY_PREFIX):].split('-', 1)[0]
+            if table is None or table_name in (table, table + '.log'):
+                try:
+                    os.unlink(os.path.join(self.path, name))
+                except OSError as msg:
+                    _LOG.warning("Can't remove sort key file %s: %s",
+                                 name, msg)
+        if table is None:
+            self.__tables.clear()
+        else:
+            self.__tables.discard(table)
+
+    def load(self, table, name):
+        """
+        Return the sorted (sort_key, handle) list stored for table and name,
+        and the set of handles of the objects that were changed since it was
+        stored. Return None if there is no such index, or if it can not be
+        used any more.
+        """
+        if table not in self.__tables:
+            return None
+        try:
+            with open(self.__index_name(table, name), 'rb') as index:
+                version, offset, keys = pickle.load(index)
+        except (IOError, OSError):
+            return None
+        except Exception as msg:
+            _LOG.warning("Sort key index %s-%s is damaged: %s",
+                         table, name, msg)
+            return None
+        if version != INDEX_VERSION:
+            return None
+
+        changed = set()
+        try:
+            with open(self.__log_name(table), 'rb') as log:
+                log.seek(0, os.SEEK_END)
+                if log.tell() < offset:
+                    return None
+                log.seek(offset)
+                while True:
+                    try:
+                        changed.update(pickle.load(log))
+                    except EOFError:
+                        break
+        except (IOError, OSError):
+            if offset:
+                return None
+        except Exception as msg:
+            _LOG.warning("Change log of the %s table is damaged: %s",
+                         table, msg)
+            self.clear(table)
+            return None
+        return keys, changed
+
+    def save(self, table, name, keys):
+        """
+        Store the sorted (sort_key, handle) list for table and name.
+        """
+        if self.readonly:
+            return
+        filename = self.__index_name(table, name)
+        try:
+            log_name = self.__log_name(table)
+            offset = (os.path.getsize(log_name)
+                      if os.path.isfile(log_name) else 0)
+            with open(filename + '.new', 'wb') as index:
+                pickle.dump((INDEX_VERSION, offset, keys), index,
+                            pickle.HIGHEST_PROTOCOL)
+            os.replace(filename + '.new', filename)
+        except (IOError, OSError) as msg:
+            _LOG.warning("Can't write sort key index %s-%s: %s",
+                         table, name, msg)
+            return
+        self.__tables.add(table)
+
+    def close(self):
+        """
+        Store the modification times and sizes of the table files with the
+        indexes. To be called when the table files are closed.
+        """
+        if self.readonly or not self.__tables:
+            return
+        stamps_name = os.path.join(self.path, SORTKEY_STAMPS)
+        try:
+            with open(stamps_name + '.new', 'wb') as stamps_file:
+                pickle.dump(table_stamps(self.path), stamps_file,
+                            pickle.HIGHEST_PROTOCOL)
+            os.replace(stamps_name + '.new', stamps_name)
+        except (IOError, OSError) as msg:
+            _LOG.warning("Can't write sort key stamps %s: %s",
+                         stamps_name, msg)
@@ -0,0 +1,459 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+# gen/db/summary.py
+
+"""
+Summary table of the people of a database.
+
+The person views, the sort routines and some gramplets show the same values
+of every person: the displayed and sorted names, the birth and death dates
+and places, the names of the spouses and a few counts. Most of these values
+are read from other objects (events, places, families and notes), so
+computing them for all the people of a large database reads the database
+many times over.
+
+The summary table keeps these values by person handle. The row of a person
+is computed the first time it is asked for, and the handles of all the
+objects read on the way are recorded with it. When an object is added,
+changed or deleted, the rows of the people that read it are dropped, and
+are computed again when they are next asked for.
+
+A database that keeps a summary table drops the rows when it commits or
+undoes changes, rather than from its signals, which may be disabled. It
+stores the table with its tables when it is closed. The stored table is
+only used again if the table files were not changed since, and if the
+values were displayed with the same settings.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import os
+import pickle
+import logging
+_LOG = logging.getLogger(".summary")
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from ..lib import (EventType, EventRoleType, FamilyRelType, ChildRefType,
+                   NoteType)
+from ..display.name import displayer as name_displayer
+from ..display.place import displayer as place_displayer
+from ..datehandler import displayer as date_displayer, get_date, get_date_valid
+from ..utils.db import get_birth_or_fallback
+from ..const import GRAMPS_LOCALE as glocale
+from ..constfunc import handle2internal
+from .sortkeys import table_stamps
+
+#-------------------------------------------------------------------------
+#
+# Constants
+#
+#-------------------------------------------------------------------------
+SUMMARY_FILE = "summary.pkl"
+SUMMARY_VERSION = 1
+
+# The tables whose objects the rows are computed from
+SUMMARY_TABLES = ('person', 'family', 'event', 'place', 'note')
+
+# The values of a row
+SUMMARY_NAME = 0            # displayed name, from the raw name data
+SUMMARY_SORT_NAME = 1       # sorted name, from the raw name data
+SUMMARY_SORTED_NAME = 2     # sorted name, from the name object
+SUMMARY_LAST_NAME = 3       # surname, given name and suffix
+SUMMARY_GENDER = 4
+SUMMARY_BIRTH = 5           # see event_date
+SUMMARY_DEATH = 6
+SUMMARY_BIRTH_PLACE = 7     # see event_place
+SUMMARY_DEATH_PLACE = 8
+SUMMARY_BIRTH_SORTVAL = 9   # sort value of the birth or fallback event
+SUMMARY_SPOUSES = 10        # displayed names of the spouses
+SUMMARY_PARENTS = 11        # number of parents in the main family
+SUMMARY_MARRIAGES = 12      # number of families of married type
+SUMMARY_CHILDREN = 13       # number of children by birth
+SUMMARY_TODO = 14           # number of To Do notes
+SUMMARY_SURNAMES = 15       # stripped surnames of all the names
+SUMMARY_GROUP_NAMES = 16    # stripped group names of all the names
+SUMMARY_INCOMPLETE = 17     # number of names without first name or surname
+SUMMARY_DISCONNECTED = 18   # True if without parents and families
+SUMMARY_NO_BIRTH_DATE = 19  # True if the birth event has no date
+SUMMARY_MEDIA = 20          # number of media references
+
+BIRTH_FALLBACKS = [EventType.BAPTISM, EventType.CHRISTEN]
+DEATH_FALLBACKS = [EventType.BURIAL, EventType.CREMATION,
+                   EventType.CAUSE_DEATH]
+
+#-------------------------------------------------------------------------
+#
+# Values of a person
+#
+#-------------------------------------------------------------------------
+def event_date(db, person, index, fallbacks):
+    """
+    Return the date of the event of person at index in the event reference
+    list, or else of the first event of a fallback type with a date in which
+    the person has the primary role.
+
+    The date is given as (sort value, text, valid, fallback), fallback
+    being True for the date of a fallback event. None is returned if there
+    is no such event, or if the event at index can not be read.
+    """
+    if index != -1:
+        try:
+            ref = person.get_event_ref_list()[index]
+            event = db.get_event_from_handle(ref.ref)
+            return (event.get_date_object().get_sort_value(),
+                    get_date(event), get_date_valid(event), False)
+        except (IndexError, AttributeError):
+            return None
+
+    for ref in person.get_event_ref_list():
+        event = db.get_event_from_handle(ref.ref)
+        date_str = get_date(event)
+        if (event.get_type() in fallbacks
+                and ref.get_role() == EventRoleType.PRIMARY
+                and date_str != ""):
+            return (event.get_date_object().get_sort_value(),
+                    date_str, get_date_valid(event), True)
+    return None
+
+def event_place(db, person, index, fallbacks):
+    """
+    Return the place title of the event of person at index in the event
+    reference list, or else of the first event of a fallback type with a
+    place in which the person has the primary role.
+
+    The place is given as (title, fallback), fallback being True for the
+    place of a fallback event. None is returned if there is no such event,
+    or if the event at index can not be read.
+    """
+    if index != -1:
+        try:
+            ref = person.get_event_ref_list()[index]
+            event = db.get_event_from_handle(ref.ref)
+            if event:
+                title = place_displayer.display_event(db, event)
+                if title:
+                    return (title, False)
+        except (IndexError, AttributeError):
+            return None
+
+    for ref in person.get_event_ref_list():
+        event = db.get_event_from_handle(ref.ref)
+        if (event.get_type() in fallbacks and
+                ref.get_role() == EventRoleType.PRIMARY):
+            title = place_displayer.display_event(db, event)
+            if title:
+                return (title, True)
+    return None
+
+def spouse_names(db, person):
+    """
+    Return the displayed names of the spouses of person, separated by
+    commas.
+    """
+    names = []
+    for family_handle in person.get_family_handle_list():
+        family = db.get_family_from_handle(family_handle)
+        for spouse_handle in [family.get_father_handle(),
+                              family.get_mother_handle()]:
+            if spouse_handle and spouse_handle != person.handle:
+                spouse = db.get_person_from_handle(spouse_handle)
+                names.append(name_displayer.display(spouse))
+    return ", ".join(names)
+
+def name_statistics(person):
+    """
+    Return the stripped surnames of all the names of person, and the number
+    of names without a first name or without a surname.
+    """
+    surnames = []
+    incomplete = 0
+    for name in [person.get_primary_name()] + person.get_alternate_names():
+        surnames.append(name.get_surname().strip())
+        if name.get_first_name().strip() == "":
+            incomplete += 1
+        elif name.get_surname_list():
+            for surname in name.get_surname_list():
+                if surname.get_surname().strip() == "":
+                    incomplete += 1
+        else:
+            incomplete += 1
+    return surnames, incomplete
+
+def group_names(person):
+    """
+    Return the set of the stripped group names of all the names of person.
+    """
+    return set(name.get_group_name().strip()
+               for name in [person.get_primary_name()] +
+                           person.get_alternate_names())
+
+def summarize(db, person):
+    """
+    Return the summary row of person.
+    """
+    name = person.get_primary_name()
+    raw_name = name.serialize()
+
+    parents = 0
+    if person.get_parent_family_handle_list():
+        family = db.get_family_from_handle(
+            person.get_parent_family_handle_list()[0])
+        if family.get_father_handle():
+            parents += 1
+        if family.get_mother_handle():
+            parents += 1
+
+    marriages = 0
+    children = 0
+    for family_handle in person.get_family_handle_list():
+        family = db.get_family_from_handle(family_handle)
+        if int(family.get_relationship()) == FamilyRelType.MARRIED:
+            marriages += 1
+        for child_ref in family.get_child_ref_list():
+            if (child_ref.get_father_relation() == ChildRefType.BIRTH and
+                    child_ref.get_mother_relation() == ChildRefType.BIRTH):
+                children += 1
+
+    todo = 0
+    for note_handle in person.get_note_list():
+        note = db.get_note_from_handle(note_handle)
+        if int(note.get_type()) == NoteType.TODO:
+            todo += 1
+
+    birth = get_birth_or_fallback(db, person)
+    birth_ref = person.get_birth_ref()
+    if birth_ref:
+        no_birth_date = not get_date(db.get_event_from_handle(birth_ref.ref))
+    else:
+        no_birth_date = True
+
+    surnames, incomplete = name_statistics(person)
+    return (name_displayer.raw_display_name(raw_name),
+            name_displayer.raw_sorted_name(raw_name),
+            name_displayer.sorted_name(name),
+            name.get_surname() + name.get_first_name() + name.get_suffix(),
+            person.get_gender(),
+            event_date(db, person, person.birth_ref_index, BIRTH_FALLBACKS),
+            event_date(db, person, person.death_ref_index, DEATH_FALLBACKS),
+            event_place(db, person, person.birth_ref_index, BIRTH_FALLBACKS),
+            event_place(db, person, person.death_ref_index, DEATH_FALLBACKS),
+            birth.get_date_object().get_sort_value() if birth else 0,
+            spouse_names(db, person),
+            parents,
+            marriages,
+            children,
+            todo,
+            surnames,
+            group_names(person),
+            incomplete,
+            (not person.get_main_parents_family_handle() and
+             not person.get_family_handle_list()),
+            no_birth_date,
+            len(person.get_media_list()))
+
+def summary_settings():
+    """
+    Return the settings that the values of the rows depend on.
+    """
+    return (SUMMARY_VERSION, glocale.lang,
+            name_displayer.get_default_format(),
+            name_displayer.get_name_format(True, False, False),
+            date_displayer.__class__.__name__, date_displayer.format,
+            place_displayer.default_format)
+
+#-------------------------------------------------------------------------
+#
+# _RecordingDb class
+#
+#-------------------------------------------------------------------------
+class _RecordingDb(object):
+    """
+    Give access to a database, recording the handles of the objects read.
+    """
+    def __init__(self, db):
+        self.db = db
+        self.handles = set()
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+    def get_person_from_handle(self, handle):
+        self.handles.add(handle)
+        return self.db.get_person_from_handle(handle)
+
+    def get_family_from_handle(self, handle):
+        self.handles.add(handle)
+        return self.db.get_family_from_handle(handle)
+
+    def get_event_from_handle(self, handle):
+        self.handles.add(handle)
+        return self.db.get_event_from_handle(handle)
+
+    def get_place_from_handle(self, handle):
+        self.handles.add(handle)
+        return self.db.get_place_from_handle(handle)
+
+    def get_note_from_handle(self, handle):
+        self.handles.add(handle)
+        return self.db.get_note_from_handle(handle)
+
+#-------------------------------------------------------------------------
+#
+# PersonSummary class
+#
+#-------------------------------------------------------------------------
+class PersonSummary(object):
+    """
+    The summary rows of the people of a database, by person handle.
+
+    If path is given, the table is read from the directory path, if it is
+    still valid, and written there by close, unless readonly is True.
+    """
+    def __init__(self, db, path=None, readonly=False):
+        self.db = db
+        self.path = path
+        self.readonly = readonly
+        self.__settings = summary_settings()
+        self.__rows = {}
+        # handles of the objects read by each row, and the reverse
+        self.__reads = {}
+        self.__readers = {}
+        self.__changed = False
+        # modification times of the table files when the table was stored
+        self.__stamps = None
+        if path is not None:
+            self.__load()
+
+    def __len__(self):
+        return len(self.__rows)
+
+    def __contains__(self, handle):
+        return handle2internal(handle) in self.__rows
+
+    def get(self, handle):
+        """
+        Return the summary row of the person with the given handle.
+        """
+        handle = handle2internal(handle)
+        row = self.__rows.get(handle)
+        if row is None:
+            db = _RecordingDb(self.db)
+            row = summarize(db, db.get_person_from_handle(handle))
+            self.__add(handle, row, db.handles)
+        return row
+
+    def __add(self, handle, row, reads):
+        self.__rows[handle] = row
+        self.__reads[handle] = reads
+        for read in reads:
+            self.__readers.setdefault(read, set()).add(handle)
+        self.__changed = True
+
+    def __remove(self, handle):
+        del self.__rows[handle]
+        for read in self.__reads.pop(handle):
+            readers = self.__readers[read]
+            readers.discard(handle)
+            if not readers:
+                del self.__readers[read]
+        self.__changed = True
+
+    def discard(self, handles):
+        """
+        Drop the rows of the people that read the objects with the given
+        handles. To be called when the objects are added, changed or
+        deleted.
+        """
+        for handle in map(handle2internal, handles):
+            for reader in list(self.__readers.get(handle, ())):
+                self.__remove(reader)
+            if handle in self.__rows:
+                self.__remove(handle)
+
+    def clear(self):
+        """
+        Drop all the rows. Used as callback of the rebuild signals.
+        """
+        if self.__rows:
+            self.__changed = True
+        self.__rows.clear()
+        self.__reads.clear()
+        self.__readers.clear()
+
+    def check_settings(self):
+        """
+        Drop all the rows if the settings they were computed with have
+        changed.
+        """
+        settings = summary_settings()
+        if settings != self.__settings:
+            self.clear()
+            self.__settings = settings
+
+    def __load(self):
+        """
+        Read the stored table, if the table files did not change since it
+        was written.
+        """
+        filename = os.path.join(self.path, SUMMARY_FILE)
+        try:
+            with open(filename, 'rb') as summary:
+                version, settings, stamps, rows, reads = pickle.load(summary)
+        except (IOError, OSError):
+            return
+        except Exception as msg:
+            _LOG.warning("Person summary %s is damaged: %s", filename, msg)
+            return
+        if (version != SUMMARY_VERSION or settings != self.__settings or
+                stamps is None or stamps != table_stamps(self.path)):
+            return
+        for handle, row in rows.items():
+            self.__add(handle, row, reads[handle])
+        self.__changed = False
+        self.__stamps = stamps
+
+    def close(self):
+        """
+        Write the table, if it was changed. To be called when the table
+        files are closed.
+        """
+        if self.path is None or self.readonly:
+            return
+        stamps = table_stamps(self.path)
+        if not self.__changed and stamps == self.__stamps:
+            return
+        filename = os.path.join(self.path, SUMMARY_FILE)
+        try:
+            with open(filename + '.new', 'wb') as summary:
+                pickle.dump((SUMMARY_VERSION, self.__settings, stamps,
+                             self.__rows, self.__reads),
+                            summary, pickle.HIGHEST_PROTOCOL)
+            os.replace(filename + '.new', filename)
+        except (IOError, OSError) as msg:
+            _LOG.warning("Can't write person summary %s: %s", filename, msg)
+            return
+        self.__changed = False
+        self.__stamps = stamps
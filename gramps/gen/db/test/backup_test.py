@@ -0,0 +1,168 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for backup.py """
+
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import unittest
+
+from ..backup import backup, restore, MAX_INCREMENTS
+from ...lib import Person
+
+class Table(object):
+    """
+    Dictionary with the part of the Berkeley db table interface used by
+    the backup.
+    """
+    def __init__(self):
+        self.data = {}
+
+    def cursor(self):
+        return Cursor(sorted(self.data.items()))
+
+    def put(self, key, data, txn=None):
+        self.data[key] = data
+
+    def get(self, key, txn=None):
+        return self.data.get(key)
+
+    def delete(self, key, txn=None):
+        del self.data[key]
+
+class Cursor(object):
+    def __init__(self, items):
+        self.items = iter(items)
+
+    def first(self):
+        return next(self.items, None)
+
+    def next(self):
+        return next(self.items, None)
+
+    def close(self):
+        pass
+
+class Shelf(object):
+    def __init__(self):
+        self.db = Table()
+
+class Txn(object):
+    def commit(self):
+        pass
+
+class Env(object):
+    def txn_begin(self):
+        return Txn()
+
+class Database(object):
+    def __init__(self, path):
+        self.path = path
+        self.env = Env()
+        for name in ('person_map', 'family_map', 'place_map', 'source_map',
+                     'citation_map', 'repository_map', 'note_map',
+                     'media_map', 'event_map', 'tag_map', 'metadata'):
+            setattr(self, name, Shelf())
+
+    def get_save_path(self):
+        return self.path
+
+    def rebuild_secondary(self):
+        pass
+
+    def add_person(self, handle, change=0):
+        person = Person()
+        person.set_handle(handle)
+        person.change = change
+        self.person_map.db.put(handle.encode(),
+                               pickle.dumps(person.serialize(), 2))
+
+class BackupTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.db = Database(self.path)
+        for number in range(500):
+            self.db.add_person('H%03d' % number)
+        self.db.metadata.db.put(b'version', pickle.dumps(17, 2))
+        backup(self.db)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def restored(self):
+        database = Database(self.path)
+        restore(database)
+        return database
+
+    def test_full_backup_restores(self):
+        self.assertFalse(os.path.isfile(os.path.join(self.path,
+                                                     'person.1.gbkp')))
+        database = self.restored()
+        self.assertEqual(database.person_map.db.data,
+                         self.db.person_map.db.data)
+        self.assertEqual(database.metadata.db.data,
+                         self.db.metadata.db.data)
+
+    def test_increment_holds_changes_only(self):
+        self.db.add_person('H001', int(time.time()))
+        self.db.add_person('D')
+        self.db.person_map.db.delete(b'H002')
+        backup(self.db)
+        name = os.path.join(self.path, 'person.1.gbkp')
+        size = os.path.getsize(os.path.join(self.path, 'person.gbkp'))
+        self.assertTrue(0 < os.path.getsize(name) < size)
+        self.assertFalse(os.path.isfile(os.path.join(self.path,
+                                                     'family.1.gbkp')))
+        database = self.restored()
+        self.assertEqual(database.person_map.db.data,
+                         self.db.person_map.db.data)
+
+    def test_compaction(self):
+        for number in range(MAX_INCREMENTS):
+            self.db.add_person('X%d' % number)
+            backup(self.db)
+        self.assertTrue(os.path.isfile(
+            os.path.join(self.path, 'person.%d.gbkp' % MAX_INCREMENTS)))
+        backup(self.db)
+        self.assertFalse(os.path.isfile(
+            os.path.join(self.path, 'person.1.gbkp')))
+        database = self.restored()
+        self.assertEqual(database.person_map.db.data,
+                         self.db.person_map.db.data)
+
+    def test_restore_old_backup(self):
+        for name in os.listdir(self.path):
+            os.unlink(os.path.join(self.path, name))
+        for name, tbl in (('person', self.db.person_map.db),
+                          ('meta_data', self.db.metadata.db)):
+            with open(os.path.join(self.path, name + '.gbkp'), 'wb') as fp:
+                for item in sorted(tbl.data.items()):
+                    pickle.dump(item, fp, 2)
+        for name in ('family', 'place', 'source', 'citation', 'repo', 'note',
+                     'media', 'event', 'tag'):
+            open(os.path.join(self.path, name + '.gbkp'), 'wb').close()
+        database = self.restored()
+        self.assertEqual(database.person_map.db.data,
+                         self.db.person_map.db.data)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the database object cache """
+
+import unittest
+
+from ..cache import DbObjectCache
+from ..read import DbBsddbRead
+from ...lib import Person
+
+class DbObjectCacheTest(unittest.TestCase):
+
+    def test_hit_and_miss_counters(self):
+        cache = DbObjectCache(10)
+        self.assertIsNone(cache.get(b'a'))
+        cache.put(b'a', (1,))
+        self.assertEqual(cache.get(b'a'), (1,))
+        self.assertEqual(cache.get_stats(), (1, 1, 1))
+
+    def test_least_recently_used_is_dropped(self):
+        cache = DbObjectCache(2)
+        cache.put(b'a', (1,))
+        cache.put(b'b', (2,))
+        cache.get(b'a')
+        cache.put(b'c', (3,))
+        self.assertIn(b'a', cache)
+        self.assertNotIn(b'b', cache)
+        self.assertIn(b'c', cache)
+
+    def test_zero_size_disables_cache(self):
+        cache = DbObjectCache(0)
+        cache.put(b'a', (1,))
+        self.assertEqual(len(cache), 0)
+
+    def test_discard_and_resize(self):
+        cache = DbObjectCache(3)
+        for key in (b'a', b'b', b'c'):
+            cache.put(key, (key,))
+        cache.discard(b'b')
+        self.assertNotIn(b'b', cache)
+        cache.resize(1)
+        self.assertEqual(len(cache), 1)
+        self.assertIn(b'c', cache)
+
+class DbReadCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = DbBsddbRead()
+        person = Person()
+        person.set_handle('H0001')
+        person.add_family_handle('F0001')
+        self.db.person_map = {b'H0001': person.serialize()}
+
+    def test_repeated_fetch_is_a_hit(self):
+        self.db.get_person_from_handle('H0001')
+        self.db.get_person_from_handle('H0001')
+        self.assertEqual(self.db.get_object_cache_stats()['Person'],
+                         (1, 1, 1))
+
+    def test_cached_data_is_not_shared(self):
+        person = self.db.get_person_from_handle('H0001')
+        person.add_family_handle('F0002')
+        person = self.db.get_person_from_handle('H0001')
+        self.assertEqual(person.get_family_handle_list(), ['F0001'])
+
+    def test_discard_handles(self):
+        self.db.get_person_from_handle('H0001')
+        self.db._discard_cached_handles('Person', ['H0001'])
+        self.assertEqual(self.db.get_object_cache_stats()['Person'][2], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -23,6 +23,7 @@ import logging
 import time
 
 from .. import DbTxn
+from ..write import sort_in_runs
 from ...lib import Person, Event, Source, Citation
 
 logger = logging.getLogger('Gramps.GrampsDbBase_Test')
@@ -147,6 +148,24 @@ class ReferenceMapTest(GrampsDbBaseTest):
         self.assertEqual(len(references), 1, 
                          "len(references) == %s " % str(len(references)))
 
+    def test_bulk_load(self):
+        """check that the reference map is built again at the end of a
+        batch transaction in bulk load mode."""
+
+        citation = self._add_source()
+        old_person = self._add_person_with_sources([citation])
+
+        with DbTxn("Bulk load", self._db, batch=True,
+                   bulk_load=True) as tran:
+            person = Person()
+            person.add_citation(citation.get_handle())
+            self._db.add_person(person, tran)
+            self._db.remove_person(old_person.get_handle(), tran)
+
+        references = list(self._db.find_backlink_handles(citation.get_handle()))
+
+        self.assertEqual(references, [(Person.__name__, person.get_handle())])
+
     def perf_simple_search_speed(self):
 
         num_sources = 100
@@ -209,6 +228,18 @@ class ReferenceMapTest(GrampsDbBaseTest):
         self.assertLess(with_reference_map, without_reference_map / 10, 
                         "Reference_map should an order of magnitude faster.")
 
+class SortInRunsTest(unittest.TestCase):
+
+    def test_sort_in_runs(self):
+        """check that rows sorted in several runs are merged in order."""
+
+        rows = [(str(number * 7919 % 1000).encode('utf-8'), number)
+                for number in range(1000)]
+        self.assertEqual(list(sort_in_runs(iter(rows), run_size=64)),
+                         sorted(rows))
+        self.assertEqual(list(sort_in_runs(iter(rows))), sorted(rows))
+        self.assertEqual(list(sort_in_runs(iter([]), run_size=64)), [])
+
 def testSuite():
     suite = unittest.makeSuite(ReferenceMapTest,'test')
     return suite
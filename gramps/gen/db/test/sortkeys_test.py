@@ -0,0 +1,105 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for sortkeys.py """
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from .. import sortkeys
+from ..sortkeys import SortKeyStore
+
+KEYS = [('a', 'H1'), ('b', 'H2'), ('c', 'H3')]
+
+class SortKeyStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store = SortKeyStore(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_no_index(self):
+        self.assertIsNone(self.store.load('person', 'name'))
+        self.store.log_changes('person', [b'H1'])
+        self.store.close()
+        self.assertEqual(os.listdir(self.path), [])
+
+    def test_changes_since_save(self):
+        self.store.log_changes('person', ['H0'])
+        self.store.save('person', 'name', KEYS)
+        self.assertEqual(self.store.load('person', 'name'), (KEYS, set()))
+        self.store.log_changes('person', [b'H1', b'H4'])
+        self.store.log_changes('family', [b'F1'])
+        self.store.close()
+        # a new store, as when the database is opened again
+        store = SortKeyStore(self.path)
+        self.assertEqual(store.load('person', 'name'), (KEYS, {'H1', 'H4'}))
+        store.save('person', 'name', KEYS)
+        self.assertEqual(store.load('person', 'name'), (KEYS, set()))
+
+    def test_clear(self):
+        self.store.save('person', 'name', KEYS)
+        self.store.save('event', 'date', KEYS)
+        self.store.clear('person')
+        self.assertIsNone(self.store.load('person', 'name'))
+        self.assertEqual(self.store.load('event', 'date'), (KEYS, set()))
+        self.store.clear()
+        self.assertIsNone(self.store.load('event', 'date'))
+
+    def test_long_log_removes_index(self):
+        size = sortkeys.MAX_LOG_SIZE
+        sortkeys.MAX_LOG_SIZE = 100
+        try:
+            self.store.save('person', 'name', KEYS)
+            for number in range(20):
+                self.store.log_changes('person', ['H%d' % number])
+        finally:
+            sortkeys.MAX_LOG_SIZE = size
+        self.assertIsNone(SortKeyStore(self.path).load('person', 'name'))
+
+    def test_changed_tables(self):
+        with open(os.path.join(self.path, 'person.db'), 'wb') as table:
+            table.write(b'person')
+        self.store.save('person', 'name', KEYS)
+        self.store.close()
+        with open(os.path.join(self.path, 'person.db'), 'ab') as table:
+            table.write(b'changed')
+        self.assertIsNone(SortKeyStore(self.path).load('person', 'name'))
+        self.assertEqual(os.listdir(self.path), ['person.db'])
+
+    def test_not_closed(self):
+        self.store.save('person', 'name', KEYS)
+        self.store.close()
+        # as when the database was not closed after it was opened again
+        SortKeyStore(self.path)
+        self.assertIsNone(SortKeyStore(self.path).load('person', 'name'))
+
+    def test_readonly(self):
+        self.store.save('person', 'name', KEYS)
+        self.store.close()
+        store = SortKeyStore(self.path, readonly=True)
+        store.log_changes('person', ['H1'])
+        store.save('person', 'name', [])
+        self.assertEqual(store.load('person', 'name'), (KEYS, set()))
+
+if __name__ == "__main__":
+    unittest.main()
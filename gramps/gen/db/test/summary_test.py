@@ -0,0 +1,217 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for summary.py """
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from .. import DbTxn
+from ..summary import (PersonSummary, SUMMARY_FILE, SUMMARY_NAME,
+                       SUMMARY_BIRTH, SUMMARY_DEATH, SUMMARY_BIRTH_PLACE,
+                       SUMMARY_DEATH_PLACE, SUMMARY_SPOUSES, SUMMARY_PARENTS,
+                       SUMMARY_MARRIAGES, SUMMARY_CHILDREN, SUMMARY_TODO,
+                       SUMMARY_SURNAMES, SUMMARY_GROUP_NAMES, SUMMARY_GENDER,
+                       SUMMARY_INCOMPLETE, SUMMARY_DISCONNECTED,
+                       SUMMARY_NO_BIRTH_DATE)
+from ...lib import Person, Family, EventType, FamilyRelType, Note, NoteType
+from ...sort import Sort
+from .grampsdbtestbase import GrampsDbBaseTest
+from .tree import Tree
+
+class PersonSummaryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = tree = Tree()
+        self.london = tree.place('London')
+        self.father = tree.person('John', 'Smith', Person.MALE)
+        self.mother = tree.person('Mary', 'Jones', Person.FEMALE)
+        self.child = tree.person('', 'Smith')
+        self.birth = tree.event(EventType.BIRTH, 1850, self.london)
+        self.father.add_event_ref(self.birth)
+        self.father.set_birth_ref(self.birth)
+        self.burial = tree.event(EventType.BURIAL, 1920, self.london)
+        self.father.add_event_ref(self.burial)
+        self.family = tree.family(self.father, self.mother, [self.child])
+        note = Note()
+        note.set_handle(tree.handle('N'))
+        note.set_type(NoteType.TODO)
+        tree.db.note_map[note.handle] = note
+        self.father.add_note(note.handle)
+        self.summary = PersonSummary(tree.db)
+
+    def test_row(self):
+        row = self.summary.get(self.father.handle)
+        self.assertEqual(row[SUMMARY_NAME], 'Smith, John')
+        self.assertEqual(row[SUMMARY_BIRTH][1:], ('1850', True, False))
+        self.assertEqual(row[SUMMARY_DEATH][1:], ('1920', True, True))
+        self.assertEqual(row[SUMMARY_BIRTH_PLACE], ('London', False))
+        self.assertEqual(row[SUMMARY_DEATH_PLACE], ('London', True))
+        self.assertEqual(row[SUMMARY_SPOUSES], 'Jones, Mary')
+        self.assertEqual(row[SUMMARY_PARENTS], 0)
+        self.assertEqual(row[SUMMARY_MARRIAGES], 1)
+        self.assertEqual(row[SUMMARY_CHILDREN], 1)
+        self.assertEqual(row[SUMMARY_TODO], 1)
+        self.assertEqual(row[SUMMARY_GROUP_NAMES], set(['Smith']))
+        self.assertFalse(row[SUMMARY_NO_BIRTH_DATE])
+        self.assertFalse(row[SUMMARY_DISCONNECTED])
+
+        row = self.summary.get(self.child.handle)
+        self.assertIsNone(row[SUMMARY_BIRTH])
+        self.assertIsNone(row[SUMMARY_BIRTH_PLACE])
+        self.assertEqual(row[SUMMARY_PARENTS], 2)
+        self.assertEqual(row[SUMMARY_SURNAMES], ['Smith'])
+        self.assertEqual(row[SUMMARY_INCOMPLETE], 1)
+        self.assertTrue(row[SUMMARY_NO_BIRTH_DATE])
+
+    def test_discard(self):
+        for person in (self.father, self.mother, self.child):
+            self.summary.get(person.handle)
+        self.assertEqual(len(self.summary), 3)
+        self.london.set_title('Paris')
+        self.summary.discard([self.london.handle])
+        self.assertNotIn(self.father.handle, self.summary)
+        self.assertIn(self.mother.handle, self.summary)
+        self.assertEqual(self.summary.get(self.father.handle)
+                         [SUMMARY_BIRTH_PLACE], ('Paris', False))
+
+        # the spouse name of the mother was read from the father
+        self.summary.discard([self.father.handle])
+        self.assertNotIn(self.father.handle, self.summary)
+        self.assertNotIn(self.mother.handle, self.summary)
+        self.assertIn(self.child.handle, self.summary)
+        self.summary.clear()
+        self.assertEqual(len(self.summary), 0)
+
+    def test_sort(self):
+        sort = Sort(self.tree.db)
+        self.assertIsNone(sort.summary)
+        handles = list(self.tree.db.person_map)
+        keys = [(sort.by_last_name_key(handle),
+                 sort.by_sorted_name_key(handle),
+                 sort.by_birthdate_key(handle)) for handle in handles]
+        sort.summary = self.summary
+        self.assertEqual(keys, [(sort.by_last_name_key(handle),
+                                 sort.by_sorted_name_key(handle),
+                                 sort.by_birthdate_key(handle))
+                                for handle in handles])
+        # the sort keys do not compute rows, but use the stored ones
+        self.assertEqual(len(self.summary), 0)
+        for handle in handles:
+            self.summary.get(handle)
+        self.assertEqual(keys, [(sort.by_last_name_key(handle),
+                                 sort.by_sorted_name_key(handle),
+                                 sort.by_birthdate_key(handle))
+                                for handle in handles])
+
+class PersonSummaryFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.table = os.path.join(self.path, 'person.db')
+        with open(self.table, 'wb') as table:
+            table.write(b'person')
+        self.tree = Tree()
+        self.person = self.tree.person('John', 'Smith')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_reload(self):
+        summary = PersonSummary(self.tree.db, self.path)
+        summary.get(self.person.handle)
+        summary.close()
+        summary = PersonSummary(self.tree.db, self.path)
+        self.assertIn(self.person.handle, summary)
+
+    def test_readonly(self):
+        summary = PersonSummary(self.tree.db, self.path, readonly=True)
+        summary.get(self.person.handle)
+        summary.close()
+        self.assertFalse(os.path.exists(os.path.join(self.path,
+                                                     SUMMARY_FILE)))
+
+    def test_changed_tables(self):
+        summary = PersonSummary(self.tree.db, self.path)
+        summary.get(self.person.handle)
+        summary.close()
+        with open(self.table, 'ab') as table:
+            table.write(b'changed')
+        summary = PersonSummary(self.tree.db, self.path)
+        self.assertNotIn(self.person.handle, summary)
+
+class DatabaseSummaryTest(GrampsDbBaseTest):
+    """
+    The database drops the summary rows when it commits or undoes changes,
+    also with its signals disabled, as during the edits of a dialog that
+    may be abandoned.
+    """
+    def setUp(self):
+        GrampsDbBaseTest.setUp(self)
+        self._db.disable_signals()
+        self.person = Person()
+        self.family = Family()
+        with DbTxn("Add Person", self._db) as trans:
+            self._db.add_person(self.person, trans)
+            self._db.add_family(self.family, trans)
+            self.person.add_family_handle(self.family.handle)
+            self.family.set_father_handle(self.person.handle)
+            self._db.commit_person(self.person, trans)
+            self._db.commit_family(self.family, trans)
+        self.summary = self._db.get_person_summary()
+
+    def tearDown(self):
+        self._db.enable_signals()
+        GrampsDbBaseTest.tearDown(self)
+
+    def set_relationship(self, relationship, batch=False):
+        with DbTxn("Edit Family", self._db, batch=batch) as trans:
+            self.family.set_relationship(FamilyRelType(relationship))
+            self._db.commit_family(self.family, trans)
+
+    def test_commit(self):
+        self.assertEqual(self.summary.get(self.person.handle)
+                         [SUMMARY_MARRIAGES], 0)
+        self.set_relationship(FamilyRelType.MARRIED)
+        self.assertNotIn(self.person.handle, self.summary)
+        self.assertEqual(self.summary.get(self.person.handle)
+                         [SUMMARY_MARRIAGES], 1)
+
+    def test_batch_commit(self):
+        self.summary.get(self.person.handle)
+        self.set_relationship(FamilyRelType.MARRIED, batch=True)
+        self.assertEqual(len(self.summary), 0)
+
+    def test_undo(self):
+        with DbTxn("Edit Person", self._db) as trans:
+            self.person.set_gender(Person.FEMALE)
+            self._db.commit_person(self.person, trans)
+        self.assertEqual(self.summary.get(self.person.handle)
+                         [SUMMARY_GENDER], Person.FEMALE)
+        self._db.undo()
+        self.assertNotIn(self.person.handle, self.summary)
+        self.assertEqual(self.summary.get(self.person.handle)
+                         [SUMMARY_GENDER], Person.UNKNOWN)
+        self._db.redo()
+        self.assertEqual(self.summary.get(self.person.handle)
+                         [SUMMARY_GENDER], Person.FEMALE)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Family trees built in a dictionary database, for the unittests.
+"""
+
+from ..dictionary import DictionaryDb
+from ...lib import (Person, Family, ChildRef, Event, EventRef, EventType,
+                    FamilyRelType, Place, Surname)
+
+class Tree(object):
+    """
+    Family tree kept in a dictionary database.
+    """
+    def __init__(self):
+        self.db = DictionaryDb()
+        self.number = 0
+
+    def handle(self, prefix):
+        self.number += 1
+        return '%s%d' % (prefix, self.number)
+
+    def place(self, title):
+        place = Place()
+        place.set_handle(self.handle('L'))
+        place.set_title(title)
+        self.db.place_map[place.handle] = place
+        return place
+
+    def event(self, event_type, year=None, place=None, text=None):
+        """
+        Add an event, dated in year or with the date text, and return a
+        reference to it.
+        """
+        event = Event()
+        event.set_handle(self.handle('E'))
+        event.set_type(event_type)
+        if year is not None:
+            event.get_date_object().set_yr_mon_day(year, 0, 0)
+        elif text is not None:
+            event.get_date_object().set_text_value(text)
+        if place is not None:
+            event.set_place_handle(place.handle)
+        self.db.event_map[event.handle] = event
+        ref = EventRef()
+        ref.ref = event.handle
+        return ref
+
+    def person(self, first=None, surname=None, gender=Person.UNKNOWN,
+               birth=None, death=None):
+        """
+        Add a person, named if first or surname is given, with birth and
+        death events in the given years.
+        """
+        person = Person()
+        person.set_handle(self.handle('P'))
+        person.set_gender(gender)
+        if first is not None or surname is not None:
+            name = person.get_primary_name()
+            name.set_first_name(first or '')
+            name.add_surname(Surname())
+            name.get_primary_surname().set_surname(surname or '')
+        if birth is not None:
+            ref = self.event(EventType.BIRTH, birth)
+            person.add_event_ref(ref)
+            person.set_birth_ref(ref)
+        if death is not None:
+            ref = self.event(EventType.DEATH, death)
+            person.add_event_ref(ref)
+            person.set_death_ref(ref)
+        self.db.person_map[person.handle] = person
+        return person
+
+    def family(self, father, mother, children,
+               relationship=FamilyRelType.MARRIED):
+        """
+        Add a family of the parents, either of which may be None, and their
+        children.
+        """
+        family = Family()
+        family.set_handle(self.handle('F'))
+        family.set_relationship(FamilyRelType(relationship))
+        for parent in (father, mother):
+            if parent is not None:
+                parent.add_family_handle(family.handle)
+        if father is not None:
+            family.set_father_handle(father.handle)
+        if mother is not None:
+            family.set_mother_handle(mother.handle)
+        for child in children:
+            ref = ChildRef()
+            ref.ref = child.handle
+            family.add_child_ref(ref)
+            child.add_parent_family_handle(family.handle)
+        self.db.family_map[family.handle] = family
+        return family
@@ -313,6 +313,8 @@ class DbUndo(object):
         """
         Helper method to undo/redo the changes made
         """
+        self.db.sort_key_store.log_changes(signal_root, [handle])
+        self.db.person_summary.discard([handle])
         try:
             if data is None:
                 emit(signal_root + '-delete', ([handle2internal(handle)],))
@@ -36,6 +36,9 @@ import os
 import time
 import bisect
 import io
+import heapq
+import tempfile
+from itertools import islice
 from functools import wraps
 import logging
 from sys import maxsize, getfilesystemencoding, version_info
@@ -75,6 +78,8 @@ from . import (DbBsddbRead, DbWriteBase, BSDDBTxn,
                     find_byte_surname, find_surname_name, DbUndoBSDDB as DbUndo,
                     exceptions)
 from .dbconst import *
+from .sortkeys import SortKeyStore
+from .summary import PersonSummary, SUMMARY_TABLES
 from ..utils.callback import Callback
 from ..utils.cast import conv_dbstr_to_unicode
 from ..utils.id import create_id
@@ -124,6 +129,11 @@ REF_MAP     = "reference_map"
 REF_PRI     = "primary_map"
 REF_REF     = "referenced_map"
 
+# number of references written per transaction when the reference map is
+# built again, and number of references sorted in memory at a time
+REFERENCE_CHUNK = 10000
+REFERENCE_RUN = 200000
+
 DBERRS      = (db.DBRunRecoveryError, db.DBAccessError, 
                db.DBPageNotFoundError, db.DBInvalidArgError)
 
@@ -387,6 +397,32 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         self.update_python_version = False
         self.update_pickle_version = False
 
+        # Keep the object cache in step with changes made outside of
+        # commit_base and the remove methods, e.g. by undo and redo
+        for key, obj_name in KEY_TO_NAME_MAP.items():
+            class_name = KEY_TO_CLASS_MAP[key]
+            for suffix in ('-update', '-delete'):
+                self.connect(obj_name + suffix,
+                             self.__make_cache_discard(class_name))
+            self.connect(obj_name + '-rebuild',
+                         self.__make_cache_clear(class_name))
+
+    def __make_cache_discard(self, class_name):
+        """
+        Return a signal callback removing the handles from the object cache.
+        """
+        def discard(handles):
+            self._discard_cached_handles(class_name, handles)
+        return discard
+
+    def __make_cache_clear(self, class_name):
+        """
+        Return a signal callback emptying the object cache of a class.
+        """
+        def clear():
+            self.clear_object_cache(class_name)
+        return clear
+
     def catch_db_error(func):
         """
         Decorator function for catching database errors.  If *func* throws
@@ -739,6 +775,12 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
                                  force_schema_upgrade:
             _LOG.debug("Make backup in case there is a schema upgrade")
             self.__make_zip_backup(name)
+
+        # The stored person summary and sort key indexes are checked against
+        # the table files, so they must be read before they are opened
+        self.person_summary = PersonSummary(self, self.full_name,
+                                            self.readonly)
+        self.sort_key_store = SortKeyStore(self.full_name, self.readonly)
         
         # Set up database environment
         self.env = db.DBEnv()
@@ -849,6 +891,7 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
                 version_file.write(version)
             _LOG.debug("Updated bsddb version file to %s" % str(db.version()))
 
+        upgraded = self.update_python_version or self.update_pickle_version
         if self.update_python_version:
             versionpath = os.path.join(name, "pythonversion.txt")
             version = str(version_info[0])
@@ -879,6 +922,7 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
                        (oldschema, newschema))
             if force_schema_upgrade == True:
                 self.gramps_upgrade(callback)
+                upgraded = True
                 versionpath = os.path.join(name, str(SCHVERSFN))
                 with open(versionpath, "w") as version_file:
                     version = str(_DBVERSION)
@@ -902,6 +946,15 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         # Open undo database
         self.__open_undodb()
         self.db_is_open = True
+        # Upgrades write the tables directly, so start with an empty cache
+        self.clear_object_cache()
+        if upgraded:
+            self.sort_key_store.clear()
+            self.person_summary.clear()
+        # Changed objects are dropped from the person summary as they are
+        # committed or undone, since the signals may be disabled
+        for obj_name in SUMMARY_TABLES:
+            self.connect(obj_name + '-rebuild', self.person_summary.clear)
 
         if callback:
             callback(87)
@@ -909,6 +962,89 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         self.abort_possible = True
         return 1
 
+    @catch_db_error
+    def open_snapshot(self, name):
+        """
+        Open the tables of the database in directory name read-only, while
+        another process keeps the database open.
+
+        The database environment is private to the process that loaded the
+        database, and recovering or checkpointing it from another process,
+        as :meth:`load` does, could damage the database. The tables are
+        opened without environment instead. The other process must call
+        :meth:`flush` first, and must not change the database until the
+        snapshot is closed.
+        """
+        if self.db_is_open:
+            self.close()
+
+        self.readonly = True
+        self.full_name = os.path.abspath(name)
+        self.path = self.full_name
+        self.brief_name = os.path.basename(name)
+
+        self.metadata = self.__open_shelf(self.full_name, META)
+        self.genderStats = GenderStats(self.metadata.get(b'gender_stats',
+                                                         default=None))
+        db_maps = [
+                    ("family_map",     FAMILY_TBL,  db.DB_HASH),
+                    ("place_map",      PLACES_TBL,  db.DB_HASH),
+                    ("source_map",     SOURCES_TBL, db.DB_HASH),
+                    ("citation_map",   CITATIONS_TBL, db.DB_HASH),
+                    ("media_map",      MEDIA_TBL,   db.DB_HASH),
+                    ("event_map",      EVENTS_TBL,  db.DB_HASH),
+                    ("person_map",     PERSON_TBL,  db.DB_HASH),
+                    ("repository_map", REPO_TBL,    db.DB_HASH),
+                    ("note_map",       NOTE_TBL,    db.DB_HASH),
+                    ("tag_map",        TAG_TBL,     db.DB_HASH),
+                    ("reference_map",  REF_MAP,     db.DB_BTREE),
+                  ]
+        for (dbmap, dbname, dbtype) in db_maps:
+            setattr(self, dbmap, self.__open_shelf(self.full_name, dbname,
+                                                   dbtype))
+        self.name_group = self.__open_db(self.full_name, NAME_GROUP,
+                                         db.DB_HASH, db.DB_DUP)
+        self.__connect_secondary()
+        self.__load_metadata()
+
+        self.db_is_open = True
+        self.clear_object_cache()
+        self.sort_key_store = SortKeyStore(self.full_name, self.readonly)
+        self.person_summary = PersonSummary(self)
+        return 1
+
+    @catch_db_error
+    def flush(self):
+        """
+        Write the pages changed in the cache of the database environment to
+        the table files, so that other processes can open a snapshot of the
+        database with :meth:`open_snapshot`.
+        """
+        if self.db_is_open and self.env is not None:
+            self.env.txn_checkpoint()
+            self.env.memp_sync()
+
+    def __close_snapshot(self):
+        """
+        Close the tables opened by :meth:`open_snapshot`.
+        """
+        for dbmap in (self.metadata, self.name_group, self.surnames,
+                      self.parents, self.id_trans, self.fid_trans,
+                      self.eid_trans, self.rid_trans, self.nid_trans,
+                      self.oid_trans, self.sid_trans, self.cid_trans,
+                      self.pid_trans, self.tag_trans,
+                      self.reference_map_primary_map,
+                      self.reference_map_referenced_map, self.reference_map,
+                      self.person_map, self.family_map, self.repository_map,
+                      self.note_map, self.place_map, self.source_map,
+                      self.citation_map, self.media_map, self.event_map,
+                      self.tag_map):
+            dbmap.close()
+        self.secondary_connected = False
+        self.metadata = None
+        self.db_is_open = False
+        DbBsddbRead.close(self)
+
     def __open_undodb(self):
         """
         Open the undo database
@@ -1336,6 +1472,22 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         
         This will be a slow process for large databases.
         """
+        with DbTxn(_("Rebuild reference map"), self, batch=True,
+                                    no_magic=True):
+            self.__rebuild_reference_map(callback)
+
+    def __rebuild_reference_map(self, callback=None):
+        """
+        Build the reference map and its indices again from the primary
+        objects.
+
+        The references of all objects are collected and written in the order
+        of their keys, so that the new reference map is filled in one pass,
+        without looking up existing rows. The indices are built afterwards,
+        when they are associated with the reference map.
+        """
+        if callback is None:
+            callback = lambda value: None
 
         # First, remove the reference map and related tables
 
@@ -1354,55 +1506,68 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
                 pass
             callback(index+1)
 
-        # Open reference_map and primary map
         self.reference_map  = self.__open_shelf(self.full_name, REF_MAP, 
                                   dbtype=db.DB_BTREE)
-        
-        self.reference_map_primary_map = self.__open_db(self.full_name,
-                                            REF_PRI, db.DB_BTREE, db.DB_DUP)
-
-        self.reference_map.associate(self.reference_map_primary_map,
-                                     find_primary_handle, DBFLAGS_O)
+        callback(4)
 
         # Make a tuple of the functions and classes that we need for
         # each of the primary object tables.
 
-        with DbTxn(_("Rebuild reference map"), self, batch=True,
-                                    no_magic=True) as transaction:
-            callback(4)
-
-            primary_table = (
-                            (self.get_person_cursor, Person),
-                            (self.get_family_cursor, Family),
-                            (self.get_event_cursor, Event),
-                            (self.get_place_cursor, Place),
-                            (self.get_source_cursor, Source),
-                            (self.get_citation_cursor, Citation),
-                            (self.get_media_cursor, MediaObject),
-                            (self.get_repository_cursor, Repository),
-                            (self.get_note_cursor, Note),
-                            (self.get_tag_cursor, Tag),
-                            )
-                         
-            # Now we use the functions and classes defined above
-            # to loop through each of the primary object tables.
-        
+        primary_table = (
+                        (self.get_person_cursor, Person),
+                        (self.get_family_cursor, Family),
+                        (self.get_event_cursor, Event),
+                        (self.get_place_cursor, Place),
+                        (self.get_source_cursor, Source),
+                        (self.get_citation_cursor, Citation),
+                        (self.get_media_cursor, MediaObject),
+                        (self.get_repository_cursor, Repository),
+                        (self.get_note_cursor, Note),
+                        (self.get_tag_cursor, Tag),
+                        )
+
+        # Now we use the functions and classes defined above
+        # to collect the references of each of the primary object tables.
+
+        def references():
             for cursor_func, class_func in primary_table:
-                logging.info("Rebuilding %s reference map" %
-                                class_func.__name__)
+                logging.info("Rebuilding %s reference map"
+                             % class_func.__name__)
+                class_key = CLASS_TO_KEY_MAP[class_func.__name__]
                 with cursor_func() as cursor:
                     for found_handle, val in cursor:
                         obj = class_func()
                         obj.unserialize(val)
-                        with BSDDBTxn(self.env) as txn:
-                            self.update_reference_map(obj, transaction, txn.txn)
+                        handle = obj.handle
+                        for (ref_class_name, ref_handle) in \
+                                set(obj.get_referenced_handles_recursively()):
+                            yield (str((handle, ref_handle)).encode('utf-8'),
+                                   ((class_key, handle),
+                                    (CLASS_TO_KEY_MAP[ref_class_name],
+                                     ref_handle)))
+
+        rows = sort_in_runs(references())
+        while True:
+            chunk = list(islice(rows, REFERENCE_CHUNK))
+            if not chunk:
+                break
+            with BSDDBTxn(self.env, self.reference_map) as txn:
+                for key, data in chunk:
+                    txn.put(key, data)
+        callback(5)
+
+        # Associating the indices with the reference map builds them
 
-            callback(5)
+        flags = DBFLAGS_R if self.readonly else DBFLAGS_O
+        self.reference_map_primary_map = self.__open_db(self.full_name,
+                                            REF_PRI, db.DB_BTREE, db.DB_DUP)
+
+        self.reference_map.associate(self.reference_map_primary_map,
+                                     find_primary_handle, flags=flags)
 
         self.reference_map_referenced_map = self.__open_db(self.full_name,
             REF_REF, db.DB_BTREE, db.DB_DUP|db.DB_DUPSORT)
 
-        flags = DBFLAGS_R if self.readonly else DBFLAGS_O
         self.reference_map.associate(self.reference_map_referenced_map,
                                      find_referenced_handle, flags=flags)
         callback(6)
@@ -1473,6 +1638,10 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
     def close(self):
         if not self.db_is_open:
             return
+        if self.env is None:
+            # opened by open_snapshot
+            self.__close_snapshot()
+            return
         if self.txn:
             self.transaction_abort(self.transaction)
         self.env.txn_checkpoint()
@@ -1510,6 +1679,8 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         self.tag_map.close()
         self.env.close()
         self.__close_undodb()
+        self.person_summary.close()
+        self.sort_key_store.close()
 
         self.person_map     = None
         self.family_map     = None
@@ -1688,10 +1859,12 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
 
         if isinstance(handle, str):
             handle = handle.encode('utf-8')
+        self._discard_cached_handles(KEY_TO_CLASS_MAP[key], [handle])
         if transaction.batch:
             with BSDDBTxn(self.env, data_map) as txn:
-                self.delete_primary_from_reference_map(handle, transaction,
-                                                        txn=txn.txn)
+                if not getattr(transaction, 'bulk_load', False):
+                    self.delete_primary_from_reference_map(handle, transaction,
+                                                           txn=txn.txn)
                 txn.delete(handle)
         else:
             self.delete_primary_from_reference_map(handle, transaction,
@@ -1713,10 +1886,12 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         self.remove_from_surname_list(person)
         if isinstance(handle, str):
             handle = handle.encode('utf-8')
+        self._discard_cached_handles(Person.__name__, [handle])
         if transaction.batch:
             with BSDDBTxn(self.env, self.person_map) as txn:            
-                self.delete_primary_from_reference_map(handle, transaction,
-                                                       txn=txn.txn)
+                if not getattr(transaction, 'bulk_load', False):
+                    self.delete_primary_from_reference_map(handle, transaction,
+                                                           txn=txn.txn)
                 txn.delete(handle)
         else:
             self.delete_primary_from_reference_map(handle, transaction,
@@ -1889,7 +2064,8 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         if isinstance(handle, str):
             handle = handle.encode('utf-8')
 
-        self.update_reference_map(obj, transaction, self.txn)
+        if not getattr(transaction, 'bulk_load', False):
+            self.update_reference_map(obj, transaction, self.txn)
 
         new_data = obj.serialize()
         old_data = None
@@ -1898,6 +2074,7 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
             op = TXNUPD if old_data else TXNADD
             transaction.add(key, op, handle, old_data, new_data)
         data_map.put(handle, new_data, txn=self.txn)
+        self._discard_cached_handles(KEY_TO_CLASS_MAP[key], [handle])
         return old_data
         
     def commit_person(self, person, transaction, change_time=None):
@@ -2133,14 +2310,19 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
     def get_from_handle(self, handle, class_type, data_map):
         if isinstance(handle, str):
             handle = handle.encode('utf-8')
-        try:
-            data = data_map.get(handle, txn=self.txn)
-        except:
-            data = None
-            # under certain circumstances during a database reload,
-            # data_map can be none. If so, then don't report an error
-            if data_map:
-                _LOG.error("Failed to get from handle", exc_info=True)
+        cache = self._object_cache[class_type.__name__]
+        data = cache.get(handle)
+        if data is None:
+            try:
+                data = data_map.get(handle, txn=self.txn)
+            except:
+                data = None
+                # under certain circumstances during a database reload,
+                # data_map can be none. If so, then don't report an error
+                if data_map:
+                    _LOG.error("Failed to get from handle", exc_info=True)
+            if data:
+                cache.put(handle, data)
         if data:
             newobj = class_type()
             newobj.unserialize(data)
@@ -2157,6 +2339,12 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         no_magic
           Boolean, defaults to False, indicating if secondary indices should be
           disconnected.
+        bulk_load
+          Boolean, defaults to False, only used by a batch transaction. If
+          True, the commits do not maintain the reference map, which is built
+          again from all objects when the transaction ends. This is faster
+          when many objects are added, as by the import of a large file, but
+          the reference map can not be used during the transaction.
         """
         if self.txn is not None:
             msg = self.transaction.get_description()
@@ -2213,6 +2401,7 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         if self.readonly:
             return
 
+        self.__log_changes(transaction)
         if self.txn is not None:
             assert msg != ''
             self.bsddbtxn.commit()
@@ -2231,6 +2420,48 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         self.__after_commit(transaction)
         self.has_changed = True
 
+    def __log_changes(self, transaction):
+        """
+        Record the objects changed by the transaction in the change logs of
+        the sort key indexes, and drop the person summary rows that read
+        them. A batch transaction does not keep track of the changes, so the
+        indexes and the summary rows are all removed.
+        """
+        if transaction.batch:
+            self.sort_key_store.clear()
+            self.person_summary.clear()
+            return
+        for obj_type, obj_name in KEY_TO_NAME_MAP.items():
+            handles = [handle for trans_type in (TXNADD, TXNUPD, TXNDEL)
+                       for handle, data in transaction.get((obj_type,
+                                                            trans_type), [])]
+            self.sort_key_store.log_changes(obj_name, handles)
+            if obj_name in SUMMARY_TABLES:
+                self.person_summary.discard(handles)
+
+    def get_person_summary(self):
+        """
+        Return the PersonSummary table of the people of the database.
+        """
+        self.person_summary.check_settings()
+        return self.person_summary
+
+    def get_sort_key_index(self, table, name):
+        """
+        Return the sorted (sort_key, handle) list stored under name for the
+        objects of table, and the set of handles of the objects that were
+        added, changed or deleted since. Return None if there is no such
+        list.
+        """
+        return self.sort_key_store.load(table, name)
+
+    def set_sort_key_index(self, table, name, keys):
+        """
+        Store the sorted (sort_key, handle) list of the objects of table
+        under name.
+        """
+        self.sort_key_store.save(table, name, keys)
+
     def __emit(self, transaction, obj_type, trans_type, obj, suffix):
         """
         Define helper function to do the actual emits
@@ -2262,6 +2493,8 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
             self.bsddbtxn.abort()
             self.bsddbtxn = None
             self.txn = None
+        # The cache may hold data read inside the aborted transaction
+        self.clear_object_cache()
         if not transaction.batch:
             # It can occur that the listview is already updated because of
             # the "model-treeview automatic update" combined with a
@@ -2286,6 +2519,11 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         if transaction.batch:
             self.env.txn_checkpoint()
 
+            bulk_load = getattr(transaction, 'bulk_load', False)
+            if bulk_load:
+                # the commits left the reference map as it was
+                self.__rebuild_reference_map()
+
             if not getattr(transaction, 'no_magic', False):
                 # create new secondary indices to replace the ones removed
 
@@ -2295,11 +2533,14 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
                 self.person_map.associate(self.surnames, find_byte_surname,
                                           DBFLAGS_O)
 
-                self.reference_map_referenced_map = self.__open_db(self.full_name,
-                    REF_REF, db.DB_BTREE, db.DB_DUP|db.DB_DUPSORT)
+                if not bulk_load:
+                    self.reference_map_referenced_map = self.__open_db(
+                        self.full_name, REF_REF, db.DB_BTREE,
+                        db.DB_DUP|db.DB_DUPSORT)
 
-                self.reference_map.associate(self.reference_map_referenced_map,
-                                             find_referenced_handle, DBFLAGS_O)
+                    self.reference_map.associate(
+                        self.reference_map_referenced_map,
+                        find_referenced_handle, DBFLAGS_O)
 
             # Only build surname list after surname index is surely back
             self.build_surname_list()
@@ -2447,6 +2688,60 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         """
         return DbTxn
 
+def sort_in_runs(rows, run_size=REFERENCE_RUN):
+    """
+    Return an iterator over rows, in sorted order.
+
+    The rows are sorted in runs of run_size rows. If there is more than one
+    run, the sorted runs are kept in temporary files and merged, so that no
+    more than run_size rows are held in memory at a time.
+    """
+    runs = []
+    try:
+        run = []
+        for row in rows:
+            run.append(row)
+            if len(run) >= run_size:
+                runs.append(__dump_run(run))
+                run = []
+        if not runs:
+            run.sort()
+            for row in run:
+                yield row
+            return
+        runs.append(__dump_run(run))
+        del run
+        for row in heapq.merge(*[__load_run(run_file) for run_file in runs]):
+            yield row
+    finally:
+        for run_file in runs:
+            run_file.close()
+
+def __dump_run(run):
+    """
+    Sort the rows of run and write them to a temporary file, which is
+    returned rewound.
+    """
+    run.sort()
+    run_file = tempfile.TemporaryFile()
+    for start in range(0, len(run), REFERENCE_CHUNK):
+        pickle.dump(run[start:start + REFERENCE_CHUNK], run_file,
+                    pickle.HIGHEST_PROTOCOL)
+    run_file.seek(0)
+    return run_file
+
+def __load_run(run_file):
+    """
+    Return an iterator over the rows written to run_file by __dump_run.
+    """
+    while True:
+        try:
+            rows = pickle.load(run_file)
+        except EOFError:
+            return
+        for row in rows:
+            yield row
+
 def _mkname(path, name):
     return os.path.join(path, name + DBEXT)
 
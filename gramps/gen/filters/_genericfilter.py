@@ -24,6 +24,16 @@
 Package providing filtering framework for GRAMPS.
 """
 
+#------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#------------------------------------------------------------------------
+from collections import OrderedDict
+import time
+import logging
+LOG = logging.getLogger(".filter")
+
 #------------------------------------------------------------------------
 #
 # Gramps imports
@@ -39,6 +49,52 @@ from ..lib.repo import Repository
 from ..lib.mediaobj import MediaObject
 from ..lib.note import Note
 from ..lib.tag import Tag
+from ._parallelfilter import get_worker_count, check_parallel
+
+#-------------------------------------------------------------------------
+#
+# Rule ordering
+#
+#-------------------------------------------------------------------------
+_MIN_CHANCE = 0.001
+
+def _and_rank(rule):
+    """
+    Expected cost of finding an object the rule rejects. Rules that are
+    cheap and reject most objects are tried first in 'and' filters.
+    """
+    return rule.cost / max(1.0 - rule.selectivity, _MIN_CHANCE)
+
+def _or_rank(rule):
+    """
+    Expected cost of finding an object the rule matches. Rules that are
+    cheap and match most objects are tried first in 'or' and 'one' filters.
+    """
+    return rule.cost / max(rule.selectivity, _MIN_CHANCE)
+
+class _RuleStats(object):
+    """
+    Call, match and time counters of one rule, for :meth:`GenericFilter.explain`.
+    """
+    def __init__(self, rule):
+        self.rule = rule
+        self.calls = 0
+        self.matches = 0
+        self.time = 0.0
+
+    def wrap(self, test):
+        """
+        Return test wrapped so that its calls are counted.
+        """
+        def counted_test(db, obj):
+            start = time.perf_counter()
+            result = test(db, obj)
+            self.time += time.perf_counter() - start
+            self.calls += 1
+            if result:
+                self.matches += 1
+            return result
+        return counted_test
 
 #-------------------------------------------------------------------------
 #
@@ -65,6 +121,7 @@ class GenericFilter(object):
             self.comment = ''
             self.logical_op = 'and'
             self.invert = False
+        self.__stats = None
 
     def match(self, handle, db):
         """
@@ -122,23 +179,78 @@ class GenericFilter(object):
     def get_cursor(self, db):
         return db.get_person_cursor()
 
+    def get_handles(self, db):
+        return db.get_person_handles()
+
     def make_obj(self):
         return Person()
 
     def find_from_handle(self, db, handle):
         return db.get_person_from_handle(handle)
 
+    def find_raw_from_handle(self, db, handle):
+        return db.get_raw_person_data(handle)
+
+    def get_rule_order(self):
+        """
+        Return the rules in the order in which they are tried.
+
+        The order follows the cost and selectivity of the rules: in 'and'
+        filters the rules that reject objects most cheaply come first, in
+        'or' and 'one' filters the rules that match them most cheaply. All
+        rules of an 'xor' filter are always tried, so they keep the order in
+        which they were added. Rules with equal rank keep that order too.
+        """
+        if self.logical_op in ('or', 'one'):
+            return sorted(self.flist, key=_or_rank)
+        elif self.logical_op == 'xor':
+            return self.flist[:]
+        return sorted(self.flist, key=_and_rank)
+
+    def __make_test(self, rule, test):
+        if self.__stats is None:
+            return test
+        return self.__stats[rule].wrap(test)
+
+    def get_raw_tests(self):
+        """
+        Return the apply_raw methods of the rules, in the order in which
+        they are tried, if all of the rules can be applied to serialized
+        data, otherwise None.
+        """
+        rules = self.get_rule_order()
+        tests = [rule.get_apply_raw() for rule in rules]
+        if all(tests):
+            return [self.__make_test(rule, test)
+                    for rule, test in zip(rules, tests)]
+        return None
+
+    def get_tests(self):
+        """
+        Return the apply methods of the rules, in the order in which they
+        are tried.
+        """
+        return [self.__make_test(rule, rule.apply)
+                for rule in self.get_rule_order()]
+
     def check_func(self, db, id_list, task, cb_progress=None, tupleind=None):
         final_list = []
-        
+        tests = self.get_raw_tests()
+        raw = tests is not None
+        if not raw:
+            tests = self.get_tests()
+
         if id_list is None:
             with self.get_cursor(db) as cursor:
                 for handle, data in cursor:
-                    person = self.make_obj()
-                    person.unserialize(data)
+                    if raw:
+                        obj = data
+                    else:
+                        obj = self.make_obj()
+                        obj.unserialize(data)
                     if cb_progress:
                         cb_progress()
-                    if task(db, person) != self.invert:
+                    if task(db, obj, tests) != self.invert:
                         final_list.append(handle)
         else:
             for data in id_list:
@@ -146,37 +258,59 @@ class GenericFilter(object):
                     handle = data
                 else:
                     handle = data[tupleind]
-                person = self.find_from_handle(db, handle)
+                if raw:
+                    obj = self.find_raw_from_handle(db, handle)
+                else:
+                    obj = self.find_from_handle(db, handle)
                 if cb_progress:
                     cb_progress()
-                if task(db, person) != self.invert:
+                if task(db, obj, tests) != self.invert:
                     final_list.append(data)
         return final_list
 
     def check_and(self, db, id_list, cb_progress=None, tupleind=None):
+        """
+        Rules that can work on serialized data are tried first, so that an
+        object is only built when all of them match and other rules remain.
+        """
         final_list = []
-        flist = self.flist
+        raw_tests = []
+        tests = []
+        for rule in self.get_rule_order():
+            apply_raw = rule.get_apply_raw()
+            if apply_raw:
+                raw_tests.append(self.__make_test(rule, apply_raw))
+            else:
+                tests.append(self.__make_test(rule, rule.apply))
 
         if id_list is None:
             with self.get_cursor(db) as cursor:
                 for handle, data in cursor:
-                    person = self.make_obj()
-                    person.unserialize(data)
                     if cb_progress:
                         cb_progress()
-                    val = all(rule.apply(db, person) for rule in flist)
+                    val = all(test(db, data) for test in raw_tests)
+                    if val and tests:
+                        obj = self.make_obj()
+                        obj.unserialize(data)
+                        val = all(test(db, obj) for test in tests)
                     if val != self.invert:
                         final_list.append(handle)
         else:
+            if tests:
+                tests = self.get_tests()
             for data in id_list:
                 if tupleind is None:
                     handle = data
                 else:
                     handle = data[tupleind]
-                person = self.find_from_handle(db, handle)
                 if cb_progress:
                     cb_progress()
-                val = all(rule.apply(db, person) for rule in flist if person)
+                if tests:
+                    obj = self.find_from_handle(db, handle)
+                    val = all(test(db, obj) for test in tests if obj)
+                else:
+                    obj = self.find_raw_from_handle(db, handle)
+                    val = all(test(db, obj) for test in raw_tests if obj)
                 if val != self.invert:
                     final_list.append(data)
         return final_list
@@ -193,23 +327,29 @@ class GenericFilter(object):
         return self.check_func(db, id_list, self.xor_test, cb_progress,
                                 tupleind)
 
-    def xor_test(self, db, person):
+    def __get_tests(self, tests):
+        if tests is None:
+            return self.get_tests()
+        return tests
+
+    def xor_test(self, db, person, tests=None):
         test = False
-        for rule in self.flist:
-            test = test ^ rule.apply(db, person)
+        for apply_rule in self.__get_tests(tests):
+            test = test ^ apply_rule(db, person)
         return test
 
-    def one_test(self, db, person):
+    def one_test(self, db, person, tests=None):
         found_one = False
-        for rule in self.flist:
-            if rule.apply(db, person):
+        for apply_rule in self.__get_tests(tests):
+            if apply_rule(db, person):
                 if found_one:
                     return False    # There can be only one!
                 found_one = True
         return found_one
 
-    def or_test(self, db, person):
-        return any(rule.apply(db, person) for rule in self.flist) 
+    def or_test(self, db, person, tests=None):
+        return any(apply_rule(db, person)
+                   for apply_rule in self.__get_tests(tests))
 
     def get_check_func(self):
         try:
@@ -240,14 +380,63 @@ class GenericFilter(object):
                 if id_list not given, all items in the database that 
                 match the filter are returned as a list of handles
         """
+        if LOG.isEnabledFor(logging.DEBUG):
+            res, report = self.__explain_apply(db, id_list, cb_progress,
+                                               tupleind)
+            LOG.debug(report)
+            return res
+        return self.__apply(db, id_list, cb_progress, tupleind)
+
+    def __apply(self, db, id_list, cb_progress, tupleind):
         m = self.get_check_func()
         for rule in self.flist:
             rule.requestprepare(db)
-        res = m(db, id_list, cb_progress, tupleind)
+        res = None
+        workers = get_worker_count(db) if self.__stats is None else 0
+        if workers:
+            if id_list is not None:
+                id_list = list(id_list)
+            res = check_parallel(self, db, workers, id_list, cb_progress,
+                                 tupleind)
+        if res is None:
+            res = m(db, id_list, cb_progress, tupleind)
         for rule in self.flist:
             rule.requestreset()
         return res
 
+    def explain(self, db, id_list=None, cb_progress=None, tupleind=None):
+        """
+        Apply the filter like :meth:`apply`, and return a text report of
+        the order in which the rules were tried and, for each rule, how
+        often it was called, how often it matched and the time spent in it.
+
+        The same report is logged by :meth:`apply` when debug output is on
+        for the ".filter" logger.
+        """
+        return self.__explain_apply(db, id_list, cb_progress, tupleind)[1]
+
+    def __explain_apply(self, db, id_list, cb_progress, tupleind):
+        self.__stats = OrderedDict((rule, _RuleStats(rule))
+                                   for rule in self.get_rule_order())
+        try:
+            start = time.perf_counter()
+            res = self.__apply(db, id_list, cb_progress, tupleind)
+            total = time.perf_counter() - start
+            lines = ["Filter '%s': %s%s, %d matches in %.3f s" %
+                     (self.name, 'not ' if self.invert else '',
+                      self.logical_op, len(res), total)]
+            for index, stats in enumerate(self.__stats.values()):
+                rule = stats.rule
+                lines.append("%3d. %s (cost %g, selectivity %g%s): "
+                             "%d calls, %d matches, %.3f s" %
+                             (index + 1, rule.__class__.__name__, rule.cost,
+                              rule.selectivity,
+                              ', raw' if rule.get_apply_raw() else '',
+                              stats.calls, stats.matches, stats.time))
+        finally:
+            self.__stats = None
+        return res, "\n".join(lines)
+
 class GenericFamilyFilter(GenericFilter):
 
     def __init__(self, source=None):
@@ -256,12 +445,18 @@ class GenericFamilyFilter(GenericFilter):
     def get_cursor(self, db):
         return db.get_family_cursor()
 
+    def get_handles(self, db):
+        return db.get_family_handles()
+
     def make_obj(self):
         return Family()
 
     def find_from_handle(self, db, handle):
         return db.get_family_from_handle(handle)
 
+    def find_raw_from_handle(self, db, handle):
+        return db.get_raw_family_data(handle)
+
 class GenericEventFilter(GenericFilter):
 
     def __init__(self, source=None):
@@ -270,11 +465,17 @@ class GenericEventFilter(GenericFilter):
     def get_cursor(self, db):
         return db.get_event_cursor()
 
+    def get_handles(self, db):
+        return db.get_event_handles()
+
     def make_obj(self):
         return Event()
 
     def find_from_handle(self, db, handle):
         return db.get_event_from_handle(handle)
+
+    def find_raw_from_handle(self, db, handle):
+        return db.get_raw_event_data(handle)
    
 class GenericSourceFilter(GenericFilter):
 
@@ -284,12 +485,18 @@ class GenericSourceFilter(GenericFilter):
     def get_cursor(self, db):
         return db.get_source_cursor()
 
+    def get_handles(self, db):
+        return db.get_source_handles()
+
     def make_obj(self):
         return Source()
 
     def find_from_handle(self, db, handle):
         return db.get_source_from_handle(handle)
 
+    def find_raw_from_handle(self, db, handle):
+        return db.get_raw_source_data(handle)
+
 class GenericCitationFilter(GenericFilter):
 
     def __init__(self, source=None):
@@ -298,12 +505,18 @@ class GenericCitationFilter(GenericFilter):
     def get_cursor(self, db):
         return db.get_citation_cursor()
 
+    def get_handles(self, db):
+        return db.get_citation_handles()
+
     def make_obj(self):
         return Citation()
 
     def find_from_handle(self, db, handle):
         return db.get_citation_from_handle(handle)
 
+    def find_raw_from_handle(self, db, handle):
+        return db.get_raw_citation_data(handle)
+
 class GenericPlaceFilter(GenericFilter):
 
     def __init__(self, source=None):
@@ -312,12 +525,18 @@ class GenericPlaceFilter(GenericFilter):
     def get_cursor(self, db):
         return db.get_place_cursor()
 
+    def get_handles(self, db):
+        return db.get_place_handles()
+
     def make_obj(self):
         return Place()
 
     def find_from_handle(self, db, handle):
         return db.get_place_from_handle(handle)
 
+    def find_raw_from_handle(self, db, handle):
+        return db.get_raw_place_data(handle)
+
 class GenericMediaFilter(GenericFilter):
 
     def __init__(self, source=None):
@@ -326,12 +545,18 @@ class GenericMediaFilter(GenericFilter):
     def get_cursor(self, db):
         return db.get_media_cursor()
 
+    def get_handles(self, db):
+        return db.get_media_object_handles()
+
     def make_obj(self):
         return MediaObject()
 
     def find_from_handle(self, db, handle):
         return db.get_object_from_handle(handle)
 
+    def find_raw_from_handle(self, db, handle):
+        return db.get_raw_object_data(handle)
+
 class GenericRepoFilter(GenericFilter):
 
     def __init__(self, source=None):
@@ -340,12 +565,18 @@ class GenericRepoFilter(GenericFilter):
     def get_cursor(self, db):
         return db.get_repository_cursor()
 
+    def get_handles(self, db):
+        return db.get_repository_handles()
+
     def make_obj(self):
         return Repository()
 
     def find_from_handle(self, db, handle):
         return db.get_repository_from_handle(handle)
 
+    def find_raw_from_handle(self, db, handle):
+        return db.get_raw_repository_data(handle)
+
 class GenericNoteFilter(GenericFilter):
 
     def __init__(self, source=None):
@@ -354,12 +585,18 @@ class GenericNoteFilter(GenericFilter):
     def get_cursor(self, db):
         return db.get_note_cursor()
 
+    def get_handles(self, db):
+        return db.get_note_handles()
+
     def make_obj(self):
         return Note()
 
     def find_from_handle(self, db, handle):
         return db.get_note_from_handle(handle)
 
+    def find_raw_from_handle(self, db, handle):
+        return db.get_raw_note_data(handle)
+
 
 def GenericFilterFactory(namespace):
     if namespace == 'Person':
@@ -0,0 +1,217 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Evaluation of a filter in a pool of worker processes.
+
+The handles to test are split into chunks that are handed to the workers.
+Each worker opens a read-only snapshot of the database tables, see
+:meth:`DbBsddb.open_snapshot`, and applies the filter to its chunks. The
+rules are prepared once, in the calling process, and the prepared filter is
+sent to the workers, so that data such as the ancestor sets of the lineage
+rules is not computed again in every worker.
+
+This is only used when the 'database.filter-workers' setting is 2 or more.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import io
+import multiprocessing
+import multiprocessing.util
+import pickle
+import logging
+LOG = logging.getLogger(".filter")
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from ..config import config
+
+#-------------------------------------------------------------------------
+#
+# Constants
+#
+#-------------------------------------------------------------------------
+CHUNK_SIZE = 2000
+_DB_ID = 'db'
+
+#-------------------------------------------------------------------------
+#
+# Pickling of a prepared filter
+#
+#-------------------------------------------------------------------------
+class _FilterPickler(pickle.Pickler):
+    """
+    Pickler that leaves out the database, which the worker replaces by its
+    own connection.
+    """
+    def __init__(self, stream, db):
+        pickle.Pickler.__init__(self, stream, pickle.HIGHEST_PROTOCOL)
+        self.db = db
+
+    def persistent_id(self, obj):
+        if obj is self.db:
+            return _DB_ID
+        return None
+
+class _FilterUnpickler(pickle.Unpickler):
+    def __init__(self, stream, db):
+        pickle.Unpickler.__init__(self, stream)
+        self.db = db
+
+    def persistent_load(self, pid):
+        if pid == _DB_ID:
+            return self.db
+        raise pickle.UnpicklingError("unknown persistent id %r" % (pid,))
+
+def _dump(filt, db):
+    """
+    Return the prepared filter and the custom filters it may refer to, as a
+    pickle.
+    """
+    import gramps.gen.filters
+    stream = io.BytesIO()
+    _FilterPickler(stream, db).dump((filt, gramps.gen.filters.CustomFilters))
+    return stream.getvalue()
+
+#-------------------------------------------------------------------------
+#
+# Worker side
+#
+#-------------------------------------------------------------------------
+_worker_args = None
+_worker_state = None
+
+def _init_worker(path, payload):
+    global _worker_args, _worker_state
+    _worker_args = (path, payload)
+    _worker_state = None
+
+def _open_worker():
+    """
+    Open a snapshot of the database and load the prepared filter.
+
+    The handles to the database inherited from the calling process must not
+    be used after the fork, so the worker opens the tables itself.
+    """
+    import gramps.gen.filters
+    from ..db import DbBsddb
+    path, payload = _worker_args
+    db = DbBsddb()
+    db.open_snapshot(path)
+    multiprocessing.util.Finalize(None, db.close, exitpriority=10)
+    filt, custom_filters = _FilterUnpickler(io.BytesIO(payload), db).load()
+    gramps.gen.filters.CustomFilters = custom_filters
+    return db, filt
+
+def _check_chunk(handles):
+    """
+    Return the positions of the handles that match the filter.
+    """
+    global _worker_state
+    if _worker_state is None:
+        _worker_state = _open_worker()
+    db, filt = _worker_state
+    items = list(enumerate(handles))
+    return [index for index, handle
+            in filt.get_check_func()(db, items, tupleind=1)]
+
+#-------------------------------------------------------------------------
+#
+# Calling side
+#
+#-------------------------------------------------------------------------
+def get_worker_count(db):
+    """
+    Return the number of worker processes to use for filtering db, or 0 if
+    the filter must be applied in this process.
+
+    The database must be a Gramps database on disk, without open
+    transaction, not a proxy, and the platform must be able to fork.
+    """
+    workers = config.get('database.filter-workers')
+    if workers < 2:
+        return 0
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return 0
+    try:
+        from ..db.write import DbBsddb
+    except ImportError:
+        return 0
+    if (not isinstance(db, DbBsddb) or not db.is_open() or
+            not db.get_save_path() or db.txn is not None):
+        return 0
+    return workers
+
+def check_parallel(filt, db, workers, id_list, cb_progress=None,
+                   tupleind=None):
+    """
+    Apply the prepared filter filt to db in workers processes.
+
+    id_list must be a list or None, as for :meth:`GenericFilter.apply`.
+    Return the matching items in the order of id_list, or in the order of
+    the database handles if id_list is None. Return None if the filter
+    could not be run in the workers, in which case it must be applied here.
+    """
+    if id_list is None:
+        handles = items = filt.get_handles(db)
+    elif tupleind is None:
+        handles = items = id_list
+    else:
+        items = id_list
+        handles = [data[tupleind] for data in id_list]
+    if len(handles) < 2 * CHUNK_SIZE:
+        return None
+
+    try:
+        payload = _dump(filt, db)
+    except (pickle.PicklingError, TypeError, AttributeError) as msg:
+        LOG.debug("Filter '%s' is applied in one process: %s",
+                  filt.get_name(), msg)
+        return None
+
+    chunks = [handles[start:start + CHUNK_SIZE]
+              for start in range(0, len(handles), CHUNK_SIZE)]
+    # the workers read the table files, not the cache of this process
+    db.flush()
+    final_list = []
+    context = multiprocessing.get_context('fork')
+    pool = context.Pool(min(workers, len(chunks)), _init_worker,
+                        (db.get_save_path(), payload))
+    try:
+        for number, matches in enumerate(pool.imap(_check_chunk, chunks)):
+            offset = number * CHUNK_SIZE
+            final_list.extend(items[offset + index] for index in matches)
+            if cb_progress:
+                for dummy in range(len(chunks[number])):
+                    cb_progress()
+        pool.close()
+    except Exception as msg:
+        LOG.warning("Filter '%s' failed in the worker processes: %s",
+                    filt.get_name(), msg)
+        pool.terminate()
+        return None
+    finally:
+        pool.join()
+    return final_list
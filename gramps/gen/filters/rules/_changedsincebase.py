@@ -53,6 +53,8 @@ class ChangedSinceBase(Rule):
                     "date/time (yyyy-mm-dd hh:mm:ss) or in range, if a second " \
                     "date/time is given."
     category    = _('General filters')
+    cost        = 1
+    selectivity = 0.1
 
     def add_time(self, date):
         if re.search("\d.*\s+\d{1,2}:\d{2}:\d{2}", date):
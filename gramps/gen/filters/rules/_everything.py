@@ -44,9 +44,14 @@ class Everything(Rule):
     name        = 'Every object'
     category    = _('General filters')
     description = 'Matches every object in the database'
+    cost        = 1
+    selectivity = 1.0
 
     def is_empty(self):
         return True
 
     def apply(self, db, obj):
         return True
+
+    def apply_raw(self, db, data):
+        return True
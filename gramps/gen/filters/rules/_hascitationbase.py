@@ -53,6 +53,8 @@ class HasCitationBase(Rule):
     description = _("Matches citations with particular parameters")
     category    = _('Citation/source filters')
     allow_regex = True
+    cost        = 100
+    selectivity = 0.1
 
     def prepare(self, db):
         self.date = None
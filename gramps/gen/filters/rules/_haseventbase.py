@@ -55,6 +55,8 @@ class HasEventBase(Rule):
     description =  "Matches events with particular parameters"
     category    = _('Event filters')
     allow_regex = True
+    cost        = 100
+    selectivity = 0.1
     
     def prepare(self, db):
         self.date = None
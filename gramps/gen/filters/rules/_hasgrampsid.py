@@ -46,6 +46,8 @@ class HasGrampsId(Rule):
     name        = 'Object with <Id>'
     description = "Matches objects with a specified Gramps ID"
     category    = _('General filters')
+    cost        = 1
+    selectivity = 0.01
 
     def apply(self, db, obj):
         """
@@ -53,3 +55,6 @@ class HasGrampsId(Rule):
         return true if the rule passes, false otherwise.
         """
         return obj.gramps_id == self.list[0]
+
+    def apply_raw(self, db, data):
+        return data[1] == self.list[0]
@@ -49,6 +49,8 @@ class HasLDSBase(Rule):
     name        = 'Objects with LDS events'
     description = "Matches objects with LDS events"
     category    = _('General filters')
+    cost        = 1
+    selectivity = 0.1
     
     def prepare(self, db):
         # things we want to do just once, not for every handle
@@ -46,6 +46,8 @@ class HasNoteRegexBase(Rule):
                    "or match a regular expression")
     category    = _('General filters')
     allow_regex = True
+    cost        = 100
+    selectivity = 0.1
 
     def apply(self, db, person):
         for handle in person.get_note_list():
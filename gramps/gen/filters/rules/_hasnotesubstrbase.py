@@ -44,6 +44,8 @@ class HasNoteSubstrBase(Rule):
     description = "Matches objects whose notes contain text matching a " \
                     "substring"
     category    = _('General filters')
+    cost        = 100
+    selectivity = 0.1
 
     def apply(self, db, person):
         notelist = person.get_note_list()
@@ -43,6 +43,7 @@ class HasReferenceCountBase(Rule):
     name        = 'Objects with a reference count of <count>'
     description = "Matches objects with a certain reference count"
     category    = _('General filters')
+    cost        = 100
 
 
     def prepare(self, db):
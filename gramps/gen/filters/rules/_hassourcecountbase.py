@@ -47,6 +47,7 @@ class HasSourceCountBase(Rule):
     description = "Matches objects that have a certain number of sources " \
                    "connected to it (actually citations are counted)"
     category    = _('Citation/source filters')
+    cost        = 1
 
     def prepare(self, db):
         # things we want to do just once, not for every handle
@@ -46,6 +46,8 @@ class HasSourceOfBase(Rule):
     name        = 'Object with the <source>'
     category    = _('Citation/source filters')
     description = 'Matches objects who have a particular source'
+    cost        = 100
+    selectivity = 0.1
     
     def prepare(self,db):
         if self.list[0] == '':
@@ -50,6 +50,8 @@ class HasTagBase(Rule):
     name        = 'Objects with the <tag>'
     description = "Matches objects with the given tag"
     category    = _('General filters')
+    cost        = 1
+    selectivity = 0.1
 
     def prepare(self, db):
         """
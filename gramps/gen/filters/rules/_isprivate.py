@@ -40,6 +40,8 @@ class IsPrivate(Rule):
     name        = 'Objects marked private'
     description = "Matches objects that are indicated as private"
     category    = _('General filters')
+    cost        = 1
+    selectivity = 0.1
 
     def apply(self, db, obj):
         return obj.get_privacy()
@@ -37,6 +37,8 @@ class IsPublic(Rule):
     name        = 'Objects not marked private'
     description = "Matches objects that are not indicated as private"
     category    = _('General filters')
+    cost        = 1
+    selectivity = 0.9
 
     def apply(self, db, obj):
         return not obj.get_privacy()
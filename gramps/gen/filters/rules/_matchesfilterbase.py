@@ -55,6 +55,7 @@ class MatchesFilterBase(Rule):
     name        = 'Objects matching the <filter>'
     description = "Matches objects matched by the specified filter name"
     category    = _('General filters')
+    cost        = 100
 
     def prepare(self, db):
         if gramps.gen.filters.CustomFilters:
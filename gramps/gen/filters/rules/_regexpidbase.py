@@ -51,6 +51,11 @@ class RegExpIdBase(Rule):
                    "or matches a regular expression"
     category    = _('General filters')
     allow_regex = True
+    cost        = 1
+    selectivity = 0.1
 
     def apply(self, db, obj):
         return self.match_substring(0, obj.gramps_id)
+
+    def apply_raw(self, db, data):
+        return self.match_substring(0, data[1])
@@ -54,6 +54,14 @@ class Rule(object):
     description = _('No description')
     allow_regex = False
 
+    # Hints used by GenericFilter to decide which rules to try first.
+    # cost is the rough time of one apply call: 1 when it looks at a single
+    # field, or at data gathered in prepare, 10 when it searches the lists
+    # of the object, 100 when it reads other objects from the database.
+    # selectivity is the expected fraction of objects that match.
+    cost        = 10
+    selectivity = 0.5
+
     def __init__(self, arg, use_regex=False):
         self.list = []
         self.regex = []
@@ -135,6 +143,42 @@ class Rule(object):
         """Apply the rule to some database entry; must be overwritten."""
         return True
 
+    def get_apply_raw(self):
+        """
+        Return the apply_raw method of the rule, or None if the rule can only
+        be applied to objects.
+
+        A rule that only needs a few fields of an object can define
+        apply_raw(db, data) next to apply, taking the serialized data of the
+        object instead of the object itself. The filter then does not need to
+        build the object. apply_raw is ignored in subclasses that override
+        apply without overriding apply_raw too.
+        """
+        if 'apply' in self.__dict__:
+            return None
+        for cls in type(self).__mro__:
+            if 'apply_raw' in cls.__dict__:
+                return self.apply_raw
+            if 'apply' in cls.__dict__:
+                return None
+        return None
+
+    def __getstate__(self):
+        """
+        Replace the match_substring method by a flag when pickled, so that
+        prepared rules can be sent to other processes.
+        """
+        state = self.__dict__.copy()
+        state['match_substring'] = self.match_substring == self.match_regex
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if state['match_substring']:
+            self.match_substring = self.match_regex
+        else:
+            self.match_substring = self.__match_substring
+
     def display_values(self):
         """Return the labels and values of this rule."""
         l_v = ( '%s="%s"' % (_(self.labels[ix]), self.list[ix])
@@ -53,6 +53,7 @@ class HasSource(HasSourceBase):
     description = _("Matches citations with a source of a particular "
                     "value")
     category    = _('Source filters')
+    cost        = 100
     
     def apply(self, dbase, citation):
         source = dbase.get_source_from_handle(
@@ -47,6 +47,7 @@ class HasSourceIdOf(HasGrampsId):
     description = _("Matches a citation with a source with a specified Gramps "
                     "ID")
     category    = _('Source filters')
+    cost        = 100
 
     def apply(self, dbase, citation):
         source = dbase.get_source_from_handle(
@@ -53,6 +53,7 @@ class HasSourceNoteRegexp(HasNoteRegexBase):
     description = _("Matches citations whose source notes contain a substring "
                     "or match a regular expression")
     category    = _('Source filters')
+    cost        = 100
 
     def apply(self, db, citation):
         source = db.get_source_from_handle(citation.get_reference_handle())
@@ -49,6 +49,7 @@ class RegExpSourceIdOf(RegExpIdBase):
     description = _("Matches citations whose source has a Gramps ID that "
                     "matches the regular expression")
     category    = _('Source filters')
+    cost        = 100
 
     def apply(self, dbase, citation):
         source = dbase.get_source_from_handle(
@@ -50,6 +50,8 @@ class HasData(Rule):
     description = _("Matches events with data of a particular value")
     category    = _('General filters')
     allow_regex = True
+    cost        = 100
+    selectivity = 0.1
     
     def prepare(self, dbase):
         self.event_type = self.list[0]
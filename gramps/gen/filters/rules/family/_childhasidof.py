@@ -48,4 +48,5 @@ class ChildHasIdOf(RegExpIdBase):
                     "Gramps ID")
     category    = _('Child filters')
     base_class = RegExpIdBase
+    cost        = 100
     apply = child_base
@@ -47,4 +47,5 @@ class ChildHasNameOf(HasNameOf):
                     "(partial) name")
     category    = _('Child filters')
     base_class = HasNameOf
+    cost        = 100
     apply = child_base
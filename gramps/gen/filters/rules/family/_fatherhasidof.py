@@ -48,4 +48,5 @@ class FatherHasIdOf(RegExpIdBase):
                     "Gramps ID")
     category    = _('Father filters')
     base_class = RegExpIdBase
+    cost        = 100
     apply = father_base
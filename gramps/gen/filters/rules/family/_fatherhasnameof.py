@@ -47,4 +47,5 @@ class FatherHasNameOf(HasNameOf):
                     "(partial) name")
     category    = _('Father filters')
     base_class = HasNameOf
+    cost        = 100
     apply = father_base
@@ -45,6 +45,8 @@ class HasTwins(Rule):
     name        = _('Families with twins')
     description = _("Matches families with twins")
     category    = _('Child filters')
+    cost        = 100
+    selectivity = 0.05
 
     def apply(self, db, family):
         date_list = []
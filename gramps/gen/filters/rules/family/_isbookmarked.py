@@ -44,6 +44,8 @@ class IsBookmarked(Rule):
     name        = _('Bookmarked families')
     category    = _('General filters')
     description = _("Matches the families on the bookmark list")
+    cost        = 1
+    selectivity = 0.01
 
     def prepare(self, db):
         self.bookmarks = db.get_family_bookmarks().get()
@@ -48,4 +48,5 @@ class MotherHasIdOf(RegExpIdBase):
                     "Gramps ID")
     category    = _('Mother filters')
     base_class = RegExpIdBase
+    cost        = 100
     apply = mother_base
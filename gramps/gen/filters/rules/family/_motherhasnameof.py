@@ -47,4 +47,5 @@ class MotherHasNameOf(HasNameOf):
                     "(partial) name")
     category    = _('Mother filters')
     base_class = HasNameOf
+    cost        = 100
     apply = mother_base
@@ -47,4 +47,5 @@ class RegExpChildName(RegExpName):
                     "that matches a specified regular expression")
     category    = _('Child filters')
     base_class = RegExpName
+    cost        = 100
     apply = child_base
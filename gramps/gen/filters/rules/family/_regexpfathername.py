@@ -47,4 +47,5 @@ class RegExpFatherName(RegExpName):
                     "matching a specified regular expression")
     category    = _('Father filters')
     base_class = RegExpName
+    cost        = 100
     apply = father_base
@@ -47,4 +47,5 @@ class RegExpMotherName(RegExpName):
                     "matching a specified regular expression")
     category    = _('Mother filters')
     base_class = RegExpName
+    cost        = 100
     apply = mother_base
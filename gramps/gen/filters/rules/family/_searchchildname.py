@@ -47,4 +47,5 @@ class SearchChildName(SearchName):
                     "(partial) name")
     category    = _('Child filters')
     base_class = SearchName
+    cost        = 100
     apply = child_base
@@ -47,4 +47,5 @@ class SearchFatherName(SearchName):
                     "(partial) name")
     category    = _('Father filters')
     base_class = SearchName
+    cost        = 100
     apply = father_base
@@ -47,4 +47,5 @@ class SearchMotherName(SearchName):
                     "(partial) name")
     category    = _('Mother filters')
     base_class = SearchName
+    cost        = 100
     apply = mother_base
@@ -45,7 +45,13 @@ class Disconnected(Rule):
     category    = _('General filters')
     description = _('Matches people that have no family relationships '
                     'to any other person in the database')
+    cost        = 1
+    selectivity = 0.1
 
     def apply(self,db,person):
         return not (person.get_parent_family_handle_list()
                 or person.get_family_handle_list())
+
+    def apply_raw(self, db, data):
+        # parent family and family handle lists
+        return not (data[9] or data[8])
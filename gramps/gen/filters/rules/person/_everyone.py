@@ -44,9 +44,14 @@ class Everyone(Rule):
     name        = _('Everyone')
     category    = _('General filters')
     description = _('Matches everyone in the database')
+    cost        = 1
+    selectivity = 1.0
 
     def is_empty(self):
         return True
 
     def apply(self,db,person):
         return True
+
+    def apply_raw(self, db, data):
+        return True
@@ -43,6 +43,7 @@ class FamilyWithIncompleteEvent(Rule):
     description = _("Matches people with missing date or "
                     "place in an event of the family")
     category    = _('Event filters')
+    cost        = 100
 
     def apply(self,db,person):
         for family_handle in person.get_family_handle_list():
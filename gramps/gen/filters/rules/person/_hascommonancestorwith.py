@@ -23,6 +23,8 @@
 # Standard Python modules
 #
 #-------------------------------------------------------------------------
+from collections import deque
+
 from ....const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
 
@@ -31,7 +33,9 @@ _ = glocale.translation.gettext
 # GRAMPS modules
 #
 #-------------------------------------------------------------------------
-from ....utils.db import for_each_ancestor
+from ....utils.lineage import (get_parent_family_handles,
+                               get_family_parent_handles,
+                               get_family_child_handles, iter_descendants)
 from .. import Rule
 
 #-------------------------------------------------------------------------
@@ -47,61 +51,51 @@ class HasCommonAncestorWith(Rule):
     category    = _("Ancestral filters")
     description = _("Matches people that have a common ancestor "
                     "with a specified person")
+    cost        = 1
+    selectivity = 0.1
 
     def prepare(self, db):
         self.db = db
-        # For each(!) person we keep track of who their ancestors
-        # are, in a set(). So we only have to compute a person's
-        # ancestor list once.
-        # Start with filling the cache for root person (gramps_id in self.list[0])
-        self.ancestor_cache = {}
         root_person = db.get_person_from_gramps_id(self.list[0])
         if root_person:
-            self.add_ancs(db, root_person)
             self.with_people = [root_person.handle]
         else:
             self.with_people = []
+        self.init_matches(db)
 
-    def add_ancs(self, db, person):
-        if person and person.handle not in self.ancestor_cache:
-            self.ancestor_cache[person.handle] = set()
-            # We are going to compare ancestors of one person with that of
-            # another person; if that other person is an ancestor and itself
-            # has no ancestors is must be included, this is achieved by the
-            # little trick of making a person his own ancestor.
-            self.ancestor_cache[person.handle].add(person.handle)
-        else:
-            return
+    def init_matches(self, db):
+        """
+        Collect everybody that has a common ancestor with the people in
+        self.with_people, i.e. the descendants of all of their ancestors.
 
-        for fam_handle in person.get_parent_family_handle_list():
-            parentless_fam = True
-            fam = db.get_family_from_handle(fam_handle)
-            if fam:
-                for par_handle in (fam.get_father_handle(), fam.get_mother_handle()):
-                    if par_handle:
-                        parentless_fam = False
-                        par = db.get_person_from_handle(par_handle)
-                        if par and par.handle not in self.ancestor_cache:
-                            self.add_ancs(db, par)
-                        if par:
-                            self.ancestor_cache[person.handle] |= self.ancestor_cache[par.handle]
-                if parentless_fam:
-                    self.ancestor_cache[person.handle].add(fam_handle)
+        A person counts as his own ancestor, so that ancestors without
+        parents are matched too. In the same way a family without parents
+        counts as an ancestor of its children.
+        """
+        ancestors = set(self.with_people)
+        # children of the ancestor families without parents
+        siblings = set()
+        todo = deque(self.with_people)
+        while todo:
+            handle = todo.popleft()
+            for fam_handle in get_parent_family_handles(db, handle):
+                parents = get_family_parent_handles(db, fam_handle)
+                if parents is None:
+                    continue
+                if not parents:
+                    siblings.update(get_family_child_handles(db, fam_handle))
+                for par_handle in parents:
+                    if par_handle not in ancestors:
+                        ancestors.add(par_handle)
+                        todo.append(par_handle)
+        self.matches = set(handle for (handle, gen) in
+                           iter_descendants(db, ancestors | siblings, 0))
 
     def reset(self):
-        self.ancestor_cache = {}
-
-    def has_common_ancestor(self, other):
-        for handle in self.with_people:
-            if ((handle in self.ancestor_cache and 
-                 self.ancestor_cache[handle]) & 
-                (other and other.handle in self.ancestor_cache and 
-                 self.ancestor_cache[other.handle])):
-                return True
-        return False
+        self.matches = set()
 
     def apply(self, db, person):
-        if person and person.handle not in self.ancestor_cache:
-            self.add_ancs(db, person)
+        return person.handle in self.matches
 
-        return self.has_common_ancestor(person)
+    def apply_raw(self, db, data):
+        return data[0] in self.matches
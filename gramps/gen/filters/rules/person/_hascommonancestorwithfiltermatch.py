@@ -31,7 +31,6 @@ _ = glocale.translation.gettext
 # GRAMPS modules
 #
 #-------------------------------------------------------------------------
-from ....utils.db import for_each_ancestor
 from ._hascommonancestorwith import HasCommonAncestorWith
 from ._matchesfilter import MatchesFilter
 
@@ -50,26 +49,11 @@ class HasCommonAncestorWithFilterMatch(HasCommonAncestorWith):
                     "with anybody matched by a filter")
     category    = _("Ancestral filters")
 
-    def __init__(self, list, use_regex=False):
-        HasCommonAncestorWith.__init__(self, list, use_regex)
-        self.ancestor_cache = {}
-
     def prepare(self, db):
         self.db = db
-        # For each(!) person we keep track of who their ancestors
-        # are, in a set(). So we only have to compute a person's
-        # ancestor list once.
-        # Start with filling the cache for root person (gramps_id in self.list[0])
-        self.ancestor_cache = {}
-        self.with_people = []
         filt = MatchesFilter(self.list)
         filt.requestprepare(db)
-        for handle in db.iter_person_handles():
-            person = db.get_person_from_handle(handle)
-            if person and filt.apply(db, person):
-                #store all people in the filter so as to compare later
-                self.with_people.append(person.handle)
-                #fill list of ancestor of person if not present yet
-                if handle not in self.ancestor_cache:
-                    self.add_ancs(db, person)
+        self.with_people = [person.handle for person in db.iter_people()
+                            if filt.apply(db, person)]
         filt.requestreset()
+        self.init_matches(db)
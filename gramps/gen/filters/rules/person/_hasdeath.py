@@ -50,6 +50,8 @@ class HasDeath(Rule):
     description = _("Matches people with death data of a particular value")
     category    = _('Event filters')
     allow_regex = True
+    cost        = 100
+    selectivity = 0.1
     
     def prepare(self, db):
         if self.list[0]:
@@ -47,6 +47,8 @@ class HasFamilyAttribute(Rule):
                     "of a particular value")
     category    = _('General filters')
     allow_regex = True
+    cost        = 100
+    selectivity = 0.1
     
     def apply(self,db,person):
         if not self.list[0]:
@@ -53,6 +53,8 @@ class HasFamilyEvent(Rule):
     description = _("Matches people with a family event of a particular value")
     category    = _('Event filters')
     allow_regex = True
+    cost        = 100
+    selectivity = 0.1
     
     def prepare(self,db):
         self.date = None
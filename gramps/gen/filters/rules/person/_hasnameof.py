@@ -58,6 +58,7 @@ class HasNameOf(Rule):
     description = _("Matches people with a specified (partial) name")
     category    = _('General filters')
     allow_regex = True
+    selectivity = 0.1
 
     def apply(self, db, person):
         for name in [person.get_primary_name()] + person.get_alternate_names():
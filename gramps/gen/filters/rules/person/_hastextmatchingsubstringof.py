@@ -50,6 +50,8 @@ class HasTextMatchingSubstringOf(Rule):
                     "matching a substring")
     category    = _('General filters')
     allow_regex = True
+    cost        = 100
+    selectivity = 0.1
 
     def prepare(self,db):
         self.db = db
@@ -45,6 +45,11 @@ class HasUnknownGender(Rule):
     name        = _('People with unknown gender')
     category    = _('General filters')
     description = _('Matches all people with unknown gender')
+    cost        = 1
+    selectivity = 0.05
 
     def apply(self,db,person):
         return person.gender == Person.UNKNOWN
+
+    def apply_raw(self, db, data):
+        return data[2] == Person.UNKNOWN
@@ -42,6 +42,7 @@ class HaveChildren(Rule):
     name        = _('People with children')
     description = _("Matches people who have children")
     category    = _('Family filters')
+    cost        = 100
 
     def apply(self,db,person):
         for family_handle in person.get_family_handle_list():
@@ -31,6 +31,7 @@ _ = glocale.translation.gettext
 # GRAMPS modules
 #
 #-------------------------------------------------------------------------
+from ....utils.lineage import iter_ancestors
 from .. import Rule
 
 #-------------------------------------------------------------------------
@@ -45,6 +46,8 @@ class IsAncestorOf(Rule):
     name        = _('Ancestors of <person>')
     category    = _("Ancestral filters")
     description = _("Matches people that are ancestors of a specified person")
+    cost        = 1
+    selectivity = 0.1
 
     def prepare(self, db):
         """Assume that if 'Inclusive' not defined, assume inclusive"""
@@ -66,21 +69,16 @@ class IsAncestorOf(Rule):
     def apply(self, db, person):
         return person.handle in self.map
 
-    def init_ancestor_list(self, db, person,first):
+    def apply_raw(self, db, data):
+        return data[0] in self.map
+
+    def init_ancestor_list(self, db, person, first):
         if not person:
             return
-        if person.handle in self.map:
-            return
-        if not first:
-            self.map.add(person.handle)
-        
-        fam_id = person.get_main_parents_family_handle()
-        fam = db.get_family_from_handle(fam_id)
-        if fam:
-            f_id = fam.get_father_handle()
-            m_id = fam.get_mother_handle()
-        
-            if f_id:
-                self.init_ancestor_list(db,db.get_person_from_handle(f_id),0)
-            if m_id:
-                self.init_ancestor_list(db,db.get_person_from_handle(m_id),0)
+        self.add_ancestors(db, [person.handle], first)
+
+    def add_ancestors(self, db, handles, first):
+        """Add the ancestors of the people with the given handles to the
+        map, including the people themselves if first is false"""
+        self.map.update(handle for (handle, gen) in
+                        iter_ancestors(db, handles, 1 if first else 0))
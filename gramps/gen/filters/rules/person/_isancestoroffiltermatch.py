@@ -62,9 +62,8 @@ class IsAncestorOfFilterMatch(IsAncestorOf):
             
         filt = MatchesFilter(self.list[0:1])
         filt.requestprepare(db)
-        for person in db.iter_people():
-            if filt.apply(db, person):
-                self.init_ancestor_list(db, person, first)
+        self.add_ancestors(db, [person.handle for person in db.iter_people()
+                                if filt.apply(db, person)], first)
         filt.requestreset()
 
     def reset(self):
@@ -72,3 +71,6 @@ class IsAncestorOfFilterMatch(IsAncestorOf):
 
     def apply(self,db,person):
         return person.handle in self.map
+
+    def apply_raw(self, db, data):
+        return data[0] in self.map
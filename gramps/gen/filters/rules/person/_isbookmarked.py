@@ -45,6 +45,8 @@ class IsBookmarked(Rule):
     name        = _('Bookmarked people')
     category    = _('General filters')
     description = _("Matches the people on the bookmark list")
+    cost        = 1
+    selectivity = 0.01
 
     def prepare(self,db):
         self.bookmarks = db.get_bookmarks().get()
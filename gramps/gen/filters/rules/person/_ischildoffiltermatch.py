@@ -47,6 +47,8 @@ class IsChildOfFilterMatch(Rule):
     name        = _('Children of <filter> match')
     category    = _('Family filters')
     description = _("Matches children of anybody matched by a filter")
+    cost        = 1
+    selectivity = 0.1
 
     def prepare(self,db):
         self.db = db
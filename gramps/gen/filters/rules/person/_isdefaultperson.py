@@ -44,6 +44,8 @@ class IsDefaultPerson(Rule):
     name        = _('Default person')
     category    = _('General filters')
     description = _("Matches the default person")
+    cost        = 1
+    selectivity = 0.01
 
     def prepare(self,db):
         p = db.get_default_person()
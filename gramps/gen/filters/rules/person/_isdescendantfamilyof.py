@@ -51,6 +51,8 @@ class IsDescendantFamilyOf(Rule):
     category    = _('Descendant filters')
     description = _("Matches people that are descendants or the spouse "
                     "of a descendant of a specified person")
+    cost        = 1
+    selectivity = 0.1
     
     def prepare(self,db):
         self.db = db
@@ -31,6 +31,7 @@ _ = glocale.translation.gettext
 # GRAMPS modules
 #
 #-------------------------------------------------------------------------
+from ....utils.lineage import iter_descendants
 from .. import Rule
 
 #-------------------------------------------------------------------------
@@ -46,6 +47,8 @@ class IsDescendantOf(Rule):
     name        = _('Descendants of <person>')
     category    = _('Descendant filters')
     description = _('Matches all descendants for the specified person')
+    cost        = 1
+    selectivity = 0.1
 
     def prepare(self, db):
         self.db = db
@@ -66,15 +69,16 @@ class IsDescendantOf(Rule):
     def apply(self, db, person):
         return person.handle in self.map
 
+    def apply_raw(self, db, data):
+        return data[0] in self.map
+
     def init_list(self, person, first):
         if not person:
             return
-        if not first:
-            self.map.add(person.handle)
-        
-        for fam_id in person.get_family_handle_list():
-            fam = self.db.get_family_from_handle(fam_id)
-            if fam:
-                for child_ref in fam.get_child_ref_list():
-                    self.init_list(
-                        self.db.get_person_from_handle(child_ref.ref), 0)
+        self.add_descendants([person.handle], first)
+
+    def add_descendants(self, handles, first):
+        """Add the descendants of the people with the given handles to the
+        map, including the people themselves if first is false"""
+        self.map.update(handle for (handle, gen) in
+                        iter_descendants(self.db, handles, 1 if first else 0))
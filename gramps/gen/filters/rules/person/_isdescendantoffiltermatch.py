@@ -62,9 +62,8 @@ class IsDescendantOfFilterMatch(IsDescendantOf):
 
         filt = MatchesFilter(self.list[0:1])
         filt.requestprepare(db)
-        for person in db.iter_people():
-            if filt.apply(db, person):
-                self.init_list(person, first)
+        self.add_descendants([person.handle for person in db.iter_people()
+                              if filt.apply(db, person)], first)
         filt.requestreset()
 
     def reset(self):
@@ -72,3 +71,6 @@ class IsDescendantOfFilterMatch(IsDescendantOf):
 
     def apply(self,db,person):
         return person.handle in self.map
+
+    def apply_raw(self, db, data):
+        return data[0] in self.map
@@ -48,6 +48,8 @@ class IsDuplicatedAncestorOf(Rule):
     category    = _("Ancestral filters")
     description = _("Matches people that are ancestors twice or more "
                     "of a specified person")
+    cost        = 1
+    selectivity = 0.01
 
     def prepare(self, db):
         self.db = db
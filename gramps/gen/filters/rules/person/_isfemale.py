@@ -45,6 +45,11 @@ class IsFemale(Rule):
     name        = _('Females')
     category    = _('General filters')
     description = _('Matches all females')
+    cost        = 1
+    selectivity = 0.5
 
     def apply(self,db,person):
         return person.gender == Person.FEMALE
+
+    def apply_raw(self, db, data):
+        return data[2] == Person.FEMALE
@@ -31,6 +31,7 @@ _ = glocale.translation.gettext
 # GRAMPS modules
 #
 #-------------------------------------------------------------------------
+from ....utils.lineage import iter_ancestors
 from .. import Rule
 
 #-------------------------------------------------------------------------
@@ -47,6 +48,8 @@ class IsLessThanNthGenerationAncestorOf(Rule):
     category    = _("Ancestral filters")
     description = _("Matches people that are ancestors "
                     "of a specified person not more than N generations away")
+    cost        = 1
+    selectivity = 0.1
 
     def prepare(self,db):
         self.db = db
@@ -63,24 +66,10 @@ class IsLessThanNthGenerationAncestorOf(Rule):
     def apply(self,db,person):
         return person.handle in self.map
 
-    def init_ancestor_list(self, handle,gen):
-#        if p.get_handle() in self.map:
-#            loop_error(self.orig,p)
-        if not handle:
-            return
-        if gen:
-            self.map.add(handle)
-            if gen >= int(self.list[1]):
-                return
-        
-        p = self.db.get_person_from_handle(handle)
-        fam_id = p.get_main_parents_family_handle()
-        fam = self.db.get_family_from_handle(fam_id)
-        if fam:
-            f_id = fam.get_father_handle()
-            m_id = fam.get_mother_handle()
-        
-            if f_id:
-                self.init_ancestor_list(f_id,gen+1)
-            if m_id:
-                self.init_ancestor_list(m_id,gen+1)
+    def apply_raw(self, db, data):
+        return data[0] in self.map
+
+    def init_ancestor_list(self, handle, gen):
+        max_gen = max(int(self.list[1]), 1)
+        self.map.update(anc_handle for (anc_handle, anc_gen) in
+                        iter_ancestors(self.db, [handle], 1, max_gen))
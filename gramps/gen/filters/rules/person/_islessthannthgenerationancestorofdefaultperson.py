@@ -31,6 +31,7 @@ _ = glocale.translation.gettext
 # GRAMPS modules
 #
 #-------------------------------------------------------------------------
+from ....utils.lineage import iter_ancestors
 from .. import Rule
 
 #-------------------------------------------------------------------------
@@ -49,6 +50,8 @@ class IsLessThanNthGenerationAncestorOfDefaultPerson(Rule):
     category    = _('Ancestral filters')
     description = _("Matches ancestors of the default person "
                     "not more than N generations away")
+    cost        = 1
+    selectivity = 0.1
 
     def prepare(self,db):
         self.db = db
@@ -62,26 +65,10 @@ class IsLessThanNthGenerationAncestorOfDefaultPerson(Rule):
             self.apply = lambda db,p: False
 
     def init_ancestor_list(self, handle, gen):
-#        if p.get_handle() in self.map:
-#            loop_error(self.orig,p)
-        if not handle:
-            return
-        if gen:
-            self.map.add(handle)
-            if gen >= int(self.list[0]):
-                return
-        
-        p = self.db.get_person_from_handle(handle)
-        fam_id = p.get_main_parents_family_handle()
-        fam = self.db.get_family_from_handle(fam_id)
-        if fam:
-            f_id = fam.get_father_handle()
-            m_id = fam.get_mother_handle()
-        
-            if f_id:
-                self.init_ancestor_list(f_id, gen+1)
-            if m_id:
-                self.init_ancestor_list(m_id, gen+1)
+        # gen is 1 for the person itself
+        max_gen = max(int(self.list[0]) - gen, 0)
+        self.map.update(anc_handle for (anc_handle, anc_gen) in
+                        iter_ancestors(self.db, [handle], 0, max_gen))
 
     def apply_real(self,db,person):
         return person.handle in self.map
@@ -31,6 +31,7 @@ _ = glocale.translation.gettext
 # GRAMPS modules
 #
 #-------------------------------------------------------------------------
+from ....utils.lineage import iter_descendants
 from .. import Rule
 
 #-------------------------------------------------------------------------
@@ -48,6 +49,8 @@ class IsLessThanNthGenerationDescendantOf(Rule):
     category    = _('Descendant filters')
     description = _("Matches people that are descendants of a "
                     "specified person not more than N generations away")
+    cost        = 1
+    selectivity = 0.1
 
     def prepare(self,db):
         self.db = db
@@ -64,17 +67,12 @@ class IsLessThanNthGenerationDescendantOf(Rule):
     def apply(self, db, person):
         return person.handle in self.map
 
-    def init_list(self,person,gen):
+    def apply_raw(self, db, data):
+        return data[0] in self.map
+
+    def init_list(self, person, gen):
         if not person:
             return
-        if gen:
-            self.map.add(person.handle)
-            if gen >= int(self.list[1]):
-                return
-
-        for fam_id in person.get_family_handle_list():
-            fam = self.db.get_family_from_handle(fam_id)
-            if fam:
-                for child_ref in fam.get_child_ref_list():
-                    self.init_list(
-                        self.db.get_person_from_handle(child_ref.ref), gen+1)
+        max_gen = max(int(self.list[1]), 1)
+        self.map.update(handle for (handle, desc_gen) in
+                        iter_descendants(self.db, [person.handle], 1, max_gen))
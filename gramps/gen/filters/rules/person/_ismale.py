@@ -45,6 +45,11 @@ class IsMale(Rule):
     name        = _('Males')
     category    = _('General filters')
     description = _('Matches all males')
+    cost        = 1
+    selectivity = 0.5
 
     def apply(self,db,person):
         return person.gender == Person.MALE
+
+    def apply_raw(self, db, data):
+        return data[2] == Person.MALE
@@ -47,6 +47,8 @@ class IsParentOfFilterMatch(Rule):
     name        = _('Parents of <filter> match')
     category    = _('Family filters')
     description = _("Matches parents of anybody matched by a filter")
+    cost        = 1
+    selectivity = 0.1
 
     def prepare(self,db):
         self.db = db
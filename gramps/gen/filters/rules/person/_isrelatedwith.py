@@ -45,6 +45,7 @@ class IsRelatedWith(Rule):
     name        = _('People related to <Person>')
     category    = _("Relationship filters")
     description = _("Matches people related to a specified person")
+    cost        = 1
 
     def prepare(self, db):
         """prepare so the rule can be executed efficiently
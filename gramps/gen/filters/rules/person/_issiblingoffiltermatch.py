@@ -46,6 +46,8 @@ class IsSiblingOfFilterMatch(Rule):
     name        = _('Siblings of <filter> match')
     category    = _('Family filters')
     description = _("Matches siblings of anybody matched by a filter")
+    cost        = 1
+    selectivity = 0.1
 
     def prepare(self,db):
         self.db = db
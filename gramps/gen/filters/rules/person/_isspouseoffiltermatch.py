@@ -47,6 +47,8 @@ class IsSpouseOfFilterMatch(Rule):
     name        = _('Spouses of <filter> match')
     description = _("Matches people married to anybody matching a filter")
     category    = _('Family filters')
+    cost        = 100
+    selectivity = 0.1
 
     def prepare(self,db):
         self.filt = MatchesFilter (self.list)
@@ -45,6 +45,11 @@ class MatchIdOf(Rule):
     name        = _('Person with <Id>')
     description = _("Matches person with a specified Gramps ID")
     category    = _('General filters')
+    cost        = 1
+    selectivity = 0.01
 
     def apply(self,db,person):
         return person.gramps_id.find(self.list[0]) !=-1
+
+    def apply_raw(self, db, data):
+        return data[1].find(self.list[0]) != -1
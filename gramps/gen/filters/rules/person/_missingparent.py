@@ -45,6 +45,7 @@ class MissingParent(Rule):
                     " in a family with less than two parents"
                     " or are not children in any family.")
     category    = _('Family filters')
+    cost        = 100
 
     def apply(self,db,person):
         families = person.get_parent_family_handle_list()
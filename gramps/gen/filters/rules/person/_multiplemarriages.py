@@ -42,6 +42,12 @@ class MultipleMarriages(Rule):
     name        = _('People with multiple marriage records')
     description = _("Matches people who have more than one spouse")
     category    = _('Family filters')
+    cost        = 1
+    selectivity = 0.1
 
     def apply(self,db,person):
         return len(person.get_family_handle_list()) > 1
+
+    def apply_raw(self, db, data):
+        # family handle list
+        return len(data[8]) > 1
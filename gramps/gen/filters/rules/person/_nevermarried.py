@@ -42,6 +42,11 @@ class NeverMarried(Rule):
     name        = _('People with no marriage records')
     description = _("Matches people who have no spouse")
     category    = _('Family filters')
+    cost        = 1
 
     def apply(self,db,person):
         return len(person.get_family_handle_list()) == 0
+
+    def apply_raw(self, db, data):
+        # family handle list
+        return len(data[8]) == 0
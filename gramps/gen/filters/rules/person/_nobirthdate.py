@@ -42,6 +42,7 @@ class NoBirthdate(Rule):
     name        = _('People without a known birth date')
     description = _("Matches people without a known birthdate")
     category    = _('General filters')
+    cost        = 100
 
     def apply(self,db,person):
         birth_ref = person.get_birth_ref()
@@ -48,6 +48,8 @@ class RelationshipPathBetween(Rule):
     description = _("Matches the ancestors of two persons back "
                     "to a common ancestor, producing the relationship "
                     "path between two persons.")
+    cost        = 1
+    selectivity = 0.01
 
     def prepare(self, db):
         self.db = db
@@ -46,6 +46,7 @@ class SearchName(Rule):
     name        = _('People matching the <name>')
     description = _("Matches people with a specified (partial) name")
     category    = _('General filters')
+    selectivity = 0.1
 
     def apply(self, db, person):
         src = self.list[0].upper()
@@ -0,0 +1,170 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for GenericFilter """
+
+import io
+import unittest
+
+from gramps.gen.lib import Person
+from gramps.gen.filters import GenericFilter
+from gramps.gen.filters.rules import Rule
+from gramps.gen.filters.rules.person import IsMale, HasIdOf, RegExpIdOf
+from gramps.gen.filters._parallelfilter import (_dump, _FilterUnpickler,
+                                                get_worker_count)
+
+class Cursor(list):
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        pass
+
+class PersonDb(object):
+    """
+    Minimal database counting how many Person objects are built.
+    """
+    def __init__(self, people):
+        self.people = dict((person.handle, person.serialize())
+                           for person in people)
+        self.objects_built = 0
+
+    def get_person_cursor(self):
+        return Cursor(sorted(self.people.items()))
+
+    def get_raw_person_data(self, handle):
+        return self.people.get(handle)
+
+    def get_person_from_handle(self, handle):
+        self.objects_built += 1
+        return Person(self.people[handle])
+
+class HasNoFamily(Rule):
+    """ Object only rule """
+    def apply(self, db, person):
+        return not person.get_family_handle_list()
+
+class IsInPreparedSet(Rule):
+    """ Rule keeping the database and a set built in prepare """
+    def prepare(self, db):
+        self.db = db
+        self.handles = set(['H1'])
+
+    def apply(self, db, person):
+        return person.handle in self.handles
+
+class IsMaleAgain(IsMale):
+    """ Overrides apply only, so apply_raw of IsMale must not be used """
+    def apply(self, db, person):
+        return False
+
+class GenericFilterTest(unittest.TestCase):
+
+    def setUp(self):
+        people = []
+        for num, gender in enumerate((Person.MALE, Person.FEMALE,
+                                      Person.MALE)):
+            person = Person()
+            person.set_handle('H%d' % num)
+            person.set_gramps_id('I%d' % num)
+            person.set_gender(gender)
+            people.append(person)
+        people[2].add_family_handle('F0')
+        self.db = PersonDb(people)
+
+    def make_filter(self, op, *rules):
+        filt = GenericFilter()
+        filt.set_logical_op(op)
+        for rule in rules:
+            filt.add_rule(rule)
+        return filt
+
+    def test_get_apply_raw(self):
+        self.assertIsNotNone(IsMale([]).get_apply_raw())
+        self.assertIsNone(HasNoFamily([]).get_apply_raw())
+        self.assertIsNone(IsMaleAgain([]).get_apply_raw())
+
+    def test_raw_rules_build_no_objects(self):
+        for op in ('and', 'or', 'one', 'xor'):
+            filt = self.make_filter(op, IsMale([]), HasIdOf(['I2']))
+            filt.apply(self.db, ['H0', 'H1', 'H2'])
+        self.assertEqual(self.db.objects_built, 0)
+
+    def test_and_with_object_rule(self):
+        filt = self.make_filter('and', HasNoFamily([]), IsMale([]))
+        self.assertEqual(filt.apply(self.db), ['H0'])
+        self.assertEqual(filt.apply(self.db, ['H0', 'H1', 'H2']), ['H0'])
+        filt.set_invert(True)
+        self.assertEqual(filt.apply(self.db), ['H1', 'H2'])
+
+    def test_mixed_rules(self):
+        rules = (IsMale([]), HasIdOf(['I2']), HasNoFamily([]))
+        expected = {'or': ['H0', 'H1', 'H2'],
+                    'one': ['H1'],
+                    'xor': ['H1']}
+        for op, handles in expected.items():
+            filt = self.make_filter(op, *rules)
+            self.assertEqual(filt.apply(self.db), handles)
+
+    def test_rule_order(self):
+        rules = (HasNoFamily([]), HasIdOf(['I2']), IsMale([]))
+        names = lambda filt: [rule.__class__.__name__
+                              for rule in filt.get_rule_order()]
+        self.assertEqual(names(self.make_filter('and', *rules)),
+                         ['HasIdOf', 'IsMale', 'HasNoFamily'])
+        self.assertEqual(names(self.make_filter('or', *rules)),
+                         ['IsMale', 'HasNoFamily', 'HasIdOf'])
+        self.assertEqual(names(self.make_filter('xor', *rules)),
+                         ['HasNoFamily', 'HasIdOf', 'IsMale'])
+
+    def test_explain(self):
+        filt = self.make_filter('and', IsMale([]), HasIdOf(['I2']))
+        lines = filt.explain(self.db).split('\n')
+        self.assertEqual(len(lines), 3)
+        self.assertIn('1 matches', lines[0])
+        self.assertIn('HasIdOf', lines[1])
+        self.assertIn('3 calls, 1 matches', lines[1])
+        self.assertIn('1 calls, 1 matches', lines[2])
+
+    def test_subclass_overriding_apply(self):
+        filt = self.make_filter('and', IsMaleAgain([]))
+        self.assertEqual(filt.apply(self.db), [])
+
+class ParallelFilterTest(unittest.TestCase):
+
+    def test_prepared_filter_is_sent_without_database(self):
+        filt = GenericFilter()
+        filt.add_rule(IsInPreparedSet([]))
+        filt.add_rule(RegExpIdOf(['I1']))
+        db = object()
+        worker_db = object()
+        for rule in filt.flist:
+            rule.requestprepare(db)
+        payload = _dump(filt, db)
+        copy = _FilterUnpickler(io.BytesIO(payload), worker_db).load()[0]
+        rule, id_rule = copy.flist
+        self.assertIs(rule.db, worker_db)
+        self.assertEqual(rule.handles, set(['H1']))
+        self.assertEqual(rule.nrprepare, 1)
+        self.assertTrue(id_rule.match_substring(0, 'I10'))
+        self.assertFalse(id_rule.match_substring(0, 'I20'))
+
+    def test_disabled_by_default(self):
+        self.assertEqual(get_worker_count(object()), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -192,10 +192,11 @@ class Place(CitationBase, NoteBase, MediaBase, UrlBase, PrimaryObject):
         :type data: tuple
         """
         (self.handle, self.gramps_id, self.title, self.long, self.lat,
-         placeref_list, self.name, self.alt_names, the_type, self.code,
+         placeref_list, self.name, alt_names, the_type, self.code,
          alt_loc, urls, media_list, citation_list, note_list,
          self.change, tag_list, self.private) = data
 
+        self.alt_names = list(alt_names)
         self.place_type = PlaceType()
         self.place_type.unserialize(the_type)
         self.alt_loc = [Location().unserialize(al) for al in alt_loc]
@@ -38,9 +38,11 @@ importers, exporters, quick reports, and document generators.
 import os
 import sys
 import re
+import time
 import logging
 LOG = logging.getLogger('.' + __name__)
 LOG.progagate = True
+STARTUP = logging.getLogger('.startup')
 from ..const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
 
@@ -116,19 +118,31 @@ class BasePluginManager(object):
         if not os.path.isdir(direct):
             return False # return value is True for error
         
-        for (dirpath, dirnames, filenames) in os.walk(direct):
-            root, subdir = os.path.split(dirpath)
-            if subdir.startswith("."): 
-                dirnames[:] = []
-                continue
-            for dirname in dirnames:
-                # Skip hidden and system directories:
-                if dirname.startswith(".") or dirname in ["po", "locale"]:
-                    dirnames.remove(dirname)
+        start = time.time()
+        manifest = self.__pgr.manifest
+        dirs = manifest.get_dirs(direct)
+        if dirs is None:
+            dirs = []
+            for (dirpath, dirnames, filenames) in os.walk(direct):
+                root, subdir = os.path.split(dirpath)
+                if subdir.startswith("."): 
+                    dirnames[:] = []
+                    continue
+                for dirname in dirnames:
+                    # Skip hidden and system directories:
+                    if dirname.startswith(".") or dirname in ["po", "locale"]:
+                        dirnames.remove(dirname)
+                dirs.append((dirpath, sorted(name for name in filenames
+                                             if name.endswith(".gpr.py"))))
+            manifest.set_dirs(direct, dirs)
+        for dirpath, filenames in dirs:
             # if the path has not already been loaded, save it in the 
             # registereddir_list list for use on reloading.
             self.__registereddir_set.add(dirpath)
-            self.__pgr.scan_dir(dirpath)
+            self.__pgr.scan_dir(dirpath, filenames)
+        manifest.save()
+        STARTUP.debug("Registered the plugins of %d directories of %s in "
+                      "%.3f seconds", len(dirs), direct, time.time() - start)
 
         if load_on_reg:
             # Run plugins that request to be loaded on startup and
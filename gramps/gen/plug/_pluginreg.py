@@ -34,6 +34,10 @@ import sys
 import re
 import traceback
 import io
+import ast
+import pickle
+import logging
+LOG = logging.getLogger('.' + __name__)
 
 #-------------------------------------------------------------------------
 #
@@ -41,7 +45,7 @@ import io
 #
 #-------------------------------------------------------------------------
 from ...version import VERSION as GRAMPSVERSION, VERSION_TUPLE
-from ..const import IMAGE_DIR
+from ..const import IMAGE_DIR, PLUGIN_MANIFEST
 from ..const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
 
@@ -1040,6 +1044,149 @@ def make_environment(**kwargs):
     env.update(kwargs)
     return env
 
+#-------------------------------------------------------------------------
+#
+# Plugin manifest
+#
+#-------------------------------------------------------------------------
+MANIFEST_VERSION = 1
+
+def only_registers(stream, filename):
+    """
+    Return True if the code of a registration file does nothing else than
+    assigning values and calling functions, like register, so that the
+    plugins it registers only depend on the file itself.
+    """
+    try:
+        tree = ast.parse(stream, filename)
+    except (SyntaxError, ValueError):
+        return False
+    return all(isinstance(node, (ast.Assign, ast.Expr)) for node in tree.body)
+
+class PluginManifest(object):
+    """
+    The plugins registered by the registration files, kept in a file from
+    one start of Gramps to the next.
+
+    For every registration file, the manifest keeps the time of its last
+    modification and its size, with the pickled :class:`PluginData` it
+    registered, which are used instead of executing the file again as long
+    as it does not change. A registration file doing more than registering
+    plugins, e.g. importing a module to find out whether a plugin can be
+    used, is executed at every start.
+
+    The manifest also keeps the directories found when walking a plugin
+    directory, with the times of their last modification, so that the
+    directory needs not be walked again as long as no file is added or
+    removed. Everything is thrown away when the version of Gramps or Python,
+    or the language of the translations, changes.
+    """
+    def __init__(self, filename=None):
+        self.filename = filename
+        self.__key = (MANIFEST_VERSION, GRAMPSVERSION, sys.version_info[:2],
+                      tuple(glocale.language))
+        self.__files = {}
+        self.__dirs = {}
+        self.__changed = False
+        if filename is None:
+            return
+        try:
+            with open(filename, 'rb') as manifest:
+                key, files, dirs = pickle.load(manifest)
+        except (IOError, OSError):
+            return
+        except Exception as msg:
+            LOG.warning("Plugin manifest %s is damaged: %s", filename, msg)
+            return
+        if key == self.__key:
+            self.__files = files
+            self.__dirs = dirs
+
+    def get_dirs(self, direct):
+        """
+        Return the list of (directory, registration file names) stored for
+        the plugin directory direct, or None if there is none, or if a file
+        was added to or removed from one of the directories since.
+        """
+        entry = self.__dirs.get(direct)
+        if entry is None:
+            return None
+        try:
+            for dirpath, mtime, filenames in entry:
+                if os.stat(dirpath).st_mtime_ns != mtime:
+                    return None
+        except OSError:
+            return None
+        return [(dirpath, filenames) for dirpath, mtime, filenames in entry]
+
+    def set_dirs(self, direct, dirs):
+        """
+        Store the list of (directory, registration file names) found in the
+        plugin directory direct.
+        """
+        try:
+            self.__dirs[direct] = [(dirpath, os.stat(dirpath).st_mtime_ns,
+                                    filenames) for dirpath, filenames in dirs]
+        except OSError:
+            self.__dirs.pop(direct, None)
+        self.__changed = True
+
+    def get(self, filename):
+        """
+        Return the list of :class:`PluginData` registered by the registration
+        file, or None if the file is not in the manifest or was changed.
+        """
+        entry = self.__files.get(filename)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return None
+        if (stat.st_mtime_ns, stat.st_size) != entry[0]:
+            return None
+        try:
+            return pickle.loads(entry[1])
+        except Exception as msg:
+            LOG.warning("Plugin manifest entry of %s is damaged: %s",
+                        filename, msg)
+            return None
+
+    def put(self, filename, stream, plugins):
+        """
+        Store the list of :class:`PluginData` registered by the registration
+        file, whose code is stream, if the file only registers plugins.
+        """
+        self.__changed = True
+        if not only_registers(stream, filename):
+            self.__files.pop(filename, None)
+            return
+        try:
+            stat = os.stat(filename)
+            data = pickle.dumps(plugins, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            self.__files.pop(filename, None)
+            return
+        self.__files[filename] = ((stat.st_mtime_ns, stat.st_size), data)
+
+    def save(self):
+        """
+        Write the manifest to its file, if it changed.
+        """
+        if (not self.__changed or self.filename is None or
+                not os.path.isdir(os.path.dirname(self.filename))):
+            return
+        try:
+            with open(self.filename + '.new', 'wb') as manifest:
+                pickle.dump((self.__key, self.__files, self.__dirs), manifest,
+                            pickle.HIGHEST_PROTOCOL)
+            os.replace(self.filename + '.new', self.filename)
+        except (IOError, OSError) as msg:
+            LOG.warning("Can't write plugin manifest %s: %s",
+                        self.filename, msg)
+            return
+        self.__changed = False
+
 #-------------------------------------------------------------------------
 #
 # PluginRegister
@@ -1071,15 +1218,20 @@ class PluginRegister(object):
         if __debug__:
             self.stable_only = False
         self.__plugindata  = []
+        self.manifest = PluginManifest(PLUGIN_MANIFEST)
 
     def add_plugindata(self, plugindata):
         self.__plugindata.append(plugindata)
         
-    def scan_dir(self, dir):
+    def scan_dir(self, dir, filenames=None):
         """
         The dir name will be scanned for plugin registration code, which will
         be loaded in :class:`PluginData` objects if they satisfy some checks.
-        
+        The plugins of the registration files that did not change are taken
+        from the manifest.
+
+        :param filenames: the names of the registration files in dir, if
+                          they are known
         :returns: A list with :class:`PluginData` objects
         """
         # if the directory does not exist, do nothing
@@ -1088,14 +1240,20 @@ class PluginRegister(object):
         
         ext = r".gpr.py"
         extlen = -len(ext)
-        pymod = re.compile(r"^(.*)\.py$")
         
-        for filename in os.listdir(dir):
+        if filenames is None:
+            filenames = os.listdir(dir)
+        for filename in filenames:
             name = os.path.split(filename)[1]
             if not name[extlen:] == ext:
                 continue
             lenpd = len(self.__plugindata)
             full_filename = os.path.join(dir, filename)
+            plugins = self.manifest.get(full_filename)
+            if plugins is not None:
+                self.__plugindata.extend(plugins)
+                self.__check_plugins(dir, filename, lenpd)
+                continue
             fd = io.open(full_filename, "r", encoding='utf-8')
             stream = fd.read()
             fd.close()
@@ -1125,57 +1283,68 @@ class PluginRegister(object):
                             {'filename' : filename})
                 print("".join(traceback.format_exception(*sys.exc_info())))
                 self.__plugindata = self.__plugindata[:lenpd]
-            #check if: 
-            #  1. plugin exists, if not remove, otherwise set module name
-            #  2. plugin not stable, if stable_only=True, remove
-            #  3. TOOL_DEBUG only if __debug__ True
-            rmlist = []
-            ind = lenpd-1
-            for plugin in self.__plugindata[lenpd:]:
-                ind += 1
-                plugin.directory = dir
-                if not valid_plugin_version(plugin.gramps_target_version):
-                    print(_('ERROR: Plugin file %(filename)s has a version of '
-                            '"%(gramps_target_version)s" which is invalid for Gramps '
-                            '"%(gramps_version)s".' % 
-                            {'filename': os.path.join(dir, plugin.fname),
-                             'gramps_version': GRAMPSVERSION,
-                             'gramps_target_version': plugin.gramps_target_version,}
-                            ))
-                    rmlist.append(ind)
-                    continue
-                if not plugin.status == STABLE and self.stable_only:
-                    rmlist.append(ind)
-                    continue
-                if plugin.ptype == TOOL and plugin.category == TOOL_DEBUG \
-                and not __debug__:
-                    rmlist.append(ind)
-                    continue
-                if plugin.fname is None:
-                    continue
-                match = pymod.match(plugin.fname)
-                if not match:
-                    rmlist.append(ind)
-                    print(_('ERROR: Wrong python file %(filename)s in register file '
-                            '%(regfile)s')  % {
-                               'filename': os.path.join(dir, plugin.fname),
-                               'regfile': os.path.join(dir, filename)
-                            })
-                    continue
-                if not os.path.isfile(os.path.join(dir, plugin.fname)):
-                    rmlist.append(ind)
-                    print(_('ERROR: Python file %(filename)s in register file '
-                            '%(regfile)s does not exist')  % {
-                               'filename': os.path.join(dir, plugin.fname),
-                               'regfile': os.path.join(dir, filename)
-                            })
-                    continue
-                module = match.groups()[0]
-                plugin.mod_name = module
-                plugin.fpath = dir
-            rmlist.reverse()
-            for ind in rmlist:
-                del self.__plugindata[ind]
+            else:
+                self.manifest.put(full_filename, stream,
+                                  self.__plugindata[lenpd:])
+            self.__check_plugins(dir, filename, lenpd)
+
+    def __check_plugins(self, dir, filename, lenpd):
+        """
+        Check the plugins registered by the registration file filename of
+        directory dir, from position lenpd of the plugin data on.
+        """
+        pymod = re.compile(r"^(.*)\.py$")
+        #check if: 
+        #  1. plugin exists, if not remove, otherwise set module name
+        #  2. plugin not stable, if stable_only=True, remove
+        #  3. TOOL_DEBUG only if __debug__ True
+        rmlist = []
+        ind = lenpd-1
+        for plugin in self.__plugindata[lenpd:]:
+            ind += 1
+            plugin.directory = dir
+            if not valid_plugin_version(plugin.gramps_target_version):
+                print(_('ERROR: Plugin file %(filename)s has a version of '
+                        '"%(gramps_target_version)s" which is invalid for Gramps '
+                        '"%(gramps_version)s".' % 
+                        {'filename': os.path.join(dir, plugin.fname),
+                         'gramps_version': GRAMPSVERSION,
+                         'gramps_target_version': plugin.gramps_target_version,}
+                        ))
+                rmlist.append(ind)
+                continue
+            if not plugin.status == STABLE and self.stable_only:
+                rmlist.append(ind)
+                continue
+            if plugin.ptype == TOOL and plugin.category == TOOL_DEBUG \
+            and not __debug__:
+                rmlist.append(ind)
+                continue
+            if plugin.fname is None:
+                continue
+            match = pymod.match(plugin.fname)
+            if not match:
+                rmlist.append(ind)
+                print(_('ERROR: Wrong python file %(filename)s in register file '
+                        '%(regfile)s')  % {
+                           'filename': os.path.join(dir, plugin.fname),
+                           'regfile': os.path.join(dir, filename)
+                        })
+                continue
+            if not os.path.isfile(os.path.join(dir, plugin.fname)):
+                rmlist.append(ind)
+                print(_('ERROR: Python file %(filename)s in register file '
+                        '%(regfile)s does not exist')  % {
+                           'filename': os.path.join(dir, plugin.fname),
+                           'regfile': os.path.join(dir, filename)
+                        })
+                continue
+            module = match.groups()[0]
+            plugin.mod_name = module
+            plugin.fpath = dir
+        rmlist.reverse()
+        for ind in rmlist:
+            del self.__plugindata[ind]
 
     def get_plugin(self, id):
         """
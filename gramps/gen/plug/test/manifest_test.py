@@ -0,0 +1,104 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the plugin manifest of _pluginreg.py """
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from .._pluginreg import PluginManifest, PluginData, only_registers
+
+REGISTER = """register(TOOL,
+    id = 'test',
+    name = _('Test'),
+    fname = 'test.py',
+    )
+"""
+
+CONDITIONAL = """try:
+    import unknown_module
+except ImportError:
+    pass
+""" + REGISTER
+
+class PluginManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'plugins')
+        os.mkdir(self.path)
+        self.gpr = os.path.join(self.path, 'test.gpr.py')
+        self.write(REGISTER)
+        self.plugin = PluginData()
+        self.plugin.id = 'test'
+        self.plugin.fname = 'test.py'
+        self.filename = os.path.join(self.tmp, 'plugins.pkl')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write(self, stream):
+        with open(self.gpr, 'w') as gpr:
+            gpr.write(stream)
+
+    def test_only_registers(self):
+        self.assertTrue(only_registers(REGISTER, self.gpr))
+        self.assertFalse(only_registers(CONDITIONAL, self.gpr))
+        self.assertFalse(only_registers("register(", self.gpr))
+
+    def test_round_trip(self):
+        manifest = PluginManifest(self.filename)
+        self.assertIsNone(manifest.get(self.gpr))
+        manifest.put(self.gpr, REGISTER, [self.plugin])
+        manifest.set_dirs(self.path, [(self.path, ['test.gpr.py'])])
+        manifest.save()
+        manifest = PluginManifest(self.filename)
+        plugins = manifest.get(self.gpr)
+        self.assertEqual([(plugin.id, plugin.fname) for plugin in plugins],
+                         [('test', 'test.py')])
+        self.assertEqual(manifest.get_dirs(self.path),
+                         [(self.path, ['test.gpr.py'])])
+
+    def test_changed_file(self):
+        manifest = PluginManifest(self.filename)
+        manifest.put(self.gpr, REGISTER, [self.plugin])
+        self.write(REGISTER + "\n")
+        self.assertIsNone(manifest.get(self.gpr))
+
+    def test_changed_dir(self):
+        manifest = PluginManifest(self.filename)
+        manifest.set_dirs(self.path, [(self.path, ['test.gpr.py'])])
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertIsNone(manifest.get_dirs(self.path))
+
+    def test_conditional(self):
+        manifest = PluginManifest(self.filename)
+        manifest.put(self.gpr, CONDITIONAL, [self.plugin])
+        self.assertIsNone(manifest.get(self.gpr))
+
+    def test_damaged(self):
+        with open(self.filename, 'wb') as manifest:
+            manifest.write(b'damaged')
+        manifest = PluginManifest(self.filename)
+        self.assertIsNone(manifest.get(self.gpr))
+
+if __name__ == "__main__":
+    unittest.main()
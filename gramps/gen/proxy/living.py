@@ -27,10 +27,10 @@ Proxy class for the Gramps databases. Filter out all living people.
 # GRAMPS libraries
 #
 #-------------------------------------------------------------------------
-from .proxybase import ProxyDbBase
+from .proxybase import ProxyDbBase, memoize_include
 from ..lib import (Date, Person, Name, Surname, NameOriginType, Family, Source,
                    Citation, Event, MediaObject, Place, Repository, Note, Tag)
-from ..utils.alive import probably_alive
+from ..utils.alive import probably_alive, probably_alive_ranges
 from ..config import config
 
 #-------------------------------------------------------------------------
@@ -77,6 +77,11 @@ class LivingProxyDb(ProxyDbBase):
         else:
             self.current_date = None
         self.years_after_death = years_after_death
+        # handle -> True if the person is considered living
+        self.__living = {}
+        # the estimated dates of all people, found when all of them are
+        # looked at
+        self.__ranges = None
         # need to update _tables with these functions
         self._tables['Person'].update(
             {
@@ -164,6 +169,9 @@ class LivingProxyDb(ProxyDbBase):
         Finds a Person in the database from the passed Gramps ID.
         If no such Person exists, None is returned.
         """
+        return self.get_cached_object(Person, handle, self.__get_person)
+
+    def __get_person(self, handle):
         person = self.db.get_person_from_handle(handle)
         if person and self.__is_living(person):
             if self.mode == self.MODE_EXCLUDE_ALL:
@@ -177,6 +185,9 @@ class LivingProxyDb(ProxyDbBase):
         Finds a Family in the database from the passed handle.
         If no such Family exists, None is returned.
         """
+        return self.get_cached_object(Family, handle, self.__get_family)
+
+    def __get_family(self, handle):
         family = self.db.get_family_from_handle(handle)
         family = self.__remove_living_from_family(family)
         return family
@@ -185,6 +196,7 @@ class LivingProxyDb(ProxyDbBase):
         """
         Protected version of iter_people
         """
+        self.__load_ranges()
         for person in filter(None, self.db.iter_people()):
             if self.__is_living(person):
                 if self.mode == self.MODE_EXCLUDE_ALL: 
@@ -217,12 +229,56 @@ class LivingProxyDb(ProxyDbBase):
         family = self.__remove_living_from_family(family)
         return family
 
+    @memoize_include('Person')
     def include_person(self, handle):
         if self.mode == self.MODE_EXCLUDE_ALL:
             person = self.get_unfiltered_person(handle)
             if person and self.__is_living(person):
                 return False
         return True        
+
+    def get_raw_include_func(self, class_name):
+        """
+        Return a function of the serialized data of a person that returns
+        True if the person is included. The living status of the person is
+        remembered on the way.
+        """
+        if class_name != 'Person':
+            return None
+        self.__load_ranges()
+        return self.__include_raw_person
+
+    def __include_raw_person(self, data):
+        person = Person.create(data)
+        living = self.__living[person.handle] = bool(
+            probably_alive(person, self.db, self.current_date,
+                           self.years_after_death, ranges=self.__ranges))
+        return not (living and self.mode == self.MODE_EXCLUDE_ALL)
+
+    def iter_person_handles(self):
+        """
+        Return an iterator over database handles, one handle for each Person in
+        the database.
+        """
+        self.__load_ranges()
+        return ProxyDbBase.iter_person_handles(self)
+
+    def __load_ranges(self):
+        """
+        Estimate the dates of all people at once, when they are all going to
+        be looked at.
+        """
+        if self.__ranges is None:
+            self.__ranges = probably_alive_ranges(self.db)
+
+    def clear_cache(self):
+        """
+        Forget the living status of the people, as well as the cached data
+        of :class:`ProxyDbBase`.
+        """
+        self.__living.clear()
+        self.__ranges = None
+        ProxyDbBase.clear_cache(self)
         
     def get_default_person(self):
         """returns the default Person of the database"""
@@ -280,11 +336,16 @@ class LivingProxyDb(ProxyDbBase):
         Returns False if the person is not considered living.
         """
         person_handle = person.get_handle()
-        unfil_person = self.get_unfiltered_person(person_handle)
-        return probably_alive( unfil_person,
+        living = self.__living.get(person_handle)
+        if living is None:
+            unfil_person = self.get_unfiltered_person(person_handle)
+            living = self.__living[person_handle] = bool(
+                probably_alive(unfil_person,
                                self.db,
                                self.current_date,
-                               self.years_after_death )
+                               self.years_after_death,
+                               ranges=self.__ranges))
+        return living
     
     def __remove_living_from_family(self, family):
         """
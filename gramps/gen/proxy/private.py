@@ -43,7 +43,20 @@ from ..lib import (MediaRef, Attribute, Address, EventRef,
                    Person, Name, Source, RepoRef, MediaObject, Place, Event, 
                    Family, ChildRef, Repository, LdsOrd, Surname, Citation,
                    SrcAttribute, Note, Tag)
-from .proxybase import ProxyDbBase
+from .proxybase import ProxyDbBase, memoize_include
+
+# position of the privacy flag in the serialized data of the primary objects
+_PRIVACY_INDEX = {
+    'Person': 19,
+    'Family': -1,
+    'Event': -1,
+    'Source': -1,
+    'Citation': -1,
+    'Place': -1,
+    'Media': -1,
+    'Repository': -1,
+    'Note': -1,
+    }
 
 class PrivateProxyDb(ProxyDbBase):
     """
@@ -142,6 +155,10 @@ class PrivateProxyDb(ProxyDbBase):
         Finds a Person in the database from the passed Gramps ID.
         If no such Person exists, None is returned.
         """
+        return self.get_cached_object(Person, handle,
+                                      self.__get_person)
+
+    def __get_person(self, handle):
         person = self.db.get_person_from_handle(handle)
         if person and not person.get_privacy():
             return sanitize_person(self.db, person)
@@ -152,6 +169,10 @@ class PrivateProxyDb(ProxyDbBase):
         Finds a Source in the database from the passed Gramps ID.
         If no such Source exists, None is returned.
         """
+        return self.get_cached_object(Source, handle,
+                                      self.__get_source)
+
+    def __get_source(self, handle):
         source = self.db.get_source_from_handle(handle)
         if source and not source.get_privacy():
             return sanitize_source(self.db, source)
@@ -162,6 +183,10 @@ class PrivateProxyDb(ProxyDbBase):
         Finds a Citation in the database from the passed Gramps ID.
         If no such Citation exists, None is returned.
         """
+        return self.get_cached_object(Citation, handle,
+                                      self.__get_citation)
+
+    def __get_citation(self, handle):
         citation = self.db.get_citation_from_handle(handle)
         if citation and not citation.get_privacy():
             return sanitize_citation(self.db, citation)
@@ -172,6 +197,10 @@ class PrivateProxyDb(ProxyDbBase):
         Finds an Object in the database from the passed Gramps ID.
         If no such Object exists, None is returned.
         """
+        return self.get_cached_object(MediaObject, handle,
+                                      self.__get_object)
+
+    def __get_object(self, handle):
         media = self.db.get_object_from_handle(handle)
         if media and not media.get_privacy():
             return sanitize_media(self.db, media)
@@ -182,6 +211,10 @@ class PrivateProxyDb(ProxyDbBase):
         Finds a Place in the database from the passed Gramps ID.
         If no such Place exists, None is returned.
         """
+        return self.get_cached_object(Place, handle,
+                                      self.__get_place)
+
+    def __get_place(self, handle):
         place = self.db.get_place_from_handle(handle)
         if place and not place.get_privacy():
             return sanitize_place(self.db, place)
@@ -192,6 +225,10 @@ class PrivateProxyDb(ProxyDbBase):
         Finds a Event in the database from the passed Gramps ID.
         If no such Event exists, None is returned.
         """
+        return self.get_cached_object(Event, handle,
+                                      self.__get_event)
+
+    def __get_event(self, handle):
         event = self.db.get_event_from_handle(handle)
         if event and not event.get_privacy():
             return sanitize_event(self.db, event)
@@ -202,6 +239,10 @@ class PrivateProxyDb(ProxyDbBase):
         Finds a Family in the database from the passed Gramps ID.
         If no such Family exists, None is returned.
         """
+        return self.get_cached_object(Family, handle,
+                                      self.__get_family)
+
+    def __get_family(self, handle):
         family = self.db.get_family_from_handle(handle)
         if family and not family.get_privacy():
             return sanitize_family(self.db, family)
@@ -212,6 +253,10 @@ class PrivateProxyDb(ProxyDbBase):
         Finds a Repository in the database from the passed Gramps ID.
         If no such Repository exists, None is returned.
         """
+        return self.get_cached_object(Repository, handle,
+                                      self.__get_repository)
+
+    def __get_repository(self, handle):
         repository = self.db.get_repository_from_handle(handle)
         if repository and not repository.get_privacy():
             return sanitize_repository(self.db, repository)
@@ -319,6 +364,7 @@ class PrivateProxyDb(ProxyDbBase):
 
     # Define predicate functions for use by default iterator methods
     
+    @memoize_include('Person')
     def include_person(self, handle):
         """
         Predicate returning True if object is to be included, else False
@@ -326,6 +372,7 @@ class PrivateProxyDb(ProxyDbBase):
         obj = self.get_unfiltered_person(handle)
         return obj and not obj.get_privacy()
     
+    @memoize_include('Family')
     def include_family(self, handle):
         """
         Predicate returning True if object is to be included, else False
@@ -333,6 +380,7 @@ class PrivateProxyDb(ProxyDbBase):
         obj = self.get_unfiltered_family(handle)
         return obj and not obj.get_privacy()
     
+    @memoize_include('Event')
     def include_event(self, handle):
         """
         Predicate returning True if object is to be included, else False
@@ -340,6 +388,7 @@ class PrivateProxyDb(ProxyDbBase):
         obj = self.get_unfiltered_event(handle)
         return obj and not obj.get_privacy()
     
+    @memoize_include('Source')
     def include_source(self, handle):
         """
         Predicate returning True if object is to be included, else False
@@ -347,6 +396,7 @@ class PrivateProxyDb(ProxyDbBase):
         obj = self.get_unfiltered_source(handle)
         return obj and not obj.get_privacy()
     
+    @memoize_include('Citation')
     def include_citation(self, handle):
         """
         Predicate returning True if object is to be included, else False
@@ -354,6 +404,7 @@ class PrivateProxyDb(ProxyDbBase):
         obj = self.get_unfiltered_citation(handle)
         return obj and not obj.get_privacy()
     
+    @memoize_include('Place')
     def include_place(self, handle):
         """
         Predicate returning True if object is to be included, else False
@@ -361,6 +412,7 @@ class PrivateProxyDb(ProxyDbBase):
         obj = self.get_unfiltered_place(handle)
         return obj and not obj.get_privacy()
     
+    @memoize_include('Media')
     def include_media_object(self, handle):
         """
         Predicate returning True if object is to be included, else False
@@ -368,6 +420,7 @@ class PrivateProxyDb(ProxyDbBase):
         obj = self.get_unfiltered_object(handle)
         return obj and not obj.get_privacy()
     
+    @memoize_include('Repository')
     def include_repository(self, handle):
         """
         Predicate returning True if object is to be included, else False
@@ -375,6 +428,7 @@ class PrivateProxyDb(ProxyDbBase):
         obj = self.get_unfiltered_repository(handle)
         return obj and not obj.get_privacy()
     
+    @memoize_include('Note')
     def include_note(self, handle):
         """
         Predicate returning True if object is to be included, else False
@@ -382,6 +436,16 @@ class PrivateProxyDb(ProxyDbBase):
         obj = self.get_unfiltered_note(handle)
         return obj and not obj.get_privacy()
 
+    def get_raw_include_func(self, class_name):
+        """
+        Return a function of the serialized data of an object of class_name
+        that returns True if the object is not private.
+        """
+        if class_name not in _PRIVACY_INDEX:
+            return None
+        index = _PRIVACY_INDEX[class_name]
+        return lambda data: not data[index]
+
     def get_default_person(self):
         """returns the default Person of the database"""
         person = self.db.get_default_person()
@@ -28,6 +28,9 @@ Proxy class for the Gramps databases. Filter out all data marked private.
 # Python modules
 #
 #-------------------------------------------------------------------------
+import functools
+import itertools
+import pickle
 import types
 
 #-------------------------------------------------------------------------
@@ -36,6 +39,32 @@ import types
 #
 #-------------------------------------------------------------------------
 from ..db.base import DbReadBase, DbWriteBase
+from ..db.cache import DbObjectCache
+from ..config import config
+
+# cached value of an object that the proxy does not include
+_EXCLUDED = b''
+# numbers identifying the proxies in the object cache they share
+_PROXY_SERIALS = itertools.count()
+
+def memoize_include(class_name):
+    """
+    Decorator for the include predicates of a proxy. The results are kept in
+    the include index of the proxy, so that the predicate is evaluated at
+    most once per handle.
+    """
+    def decorator(predicate):
+        @functools.wraps(predicate)
+        def memoized(self, handle):
+            if isinstance(handle, bytes):
+                handle = handle.decode('utf-8')
+            index = self.include_index.setdefault(class_name, {})
+            included = index.get(handle)
+            if included is None:
+                included = index[handle] = bool(predicate(self, handle))
+            return included
+        return memoized
+    return decorator
 
 class ProxyCursor(object):
     """
@@ -83,6 +112,17 @@ class ProxyDbBase(DbReadBase):
 
     Real database proxy classes can inherit from this class to make sure the
     database interface is properly implemented.
+
+    A proxy assumes that the database does not change while it is used, as
+    during a report or an export, and remembers what it has worked out:
+
+    * the include index: for each class name, a dictionary of handle to the
+      include decision, filled by the predicates decorated with
+      :func:`memoize_include` as handles are tested, or for a whole table at
+      once by :meth:`build_include_index` when its handles are iterated;
+    * the objects returned by :meth:`get_cached_object`. The proxies
+      stacked on the same database share one cache for them, limited to
+      'database.proxy-cache-size' entries.
     """
 
     def __init__(self, db):
@@ -92,6 +132,15 @@ class ProxyDbBase(DbReadBase):
         self.db = self.basedb = db
         while isinstance(self.basedb, ProxyDbBase):
             self.basedb = self.basedb.db
+        if isinstance(db, ProxyDbBase):
+            self.proxy_cache = db.proxy_cache
+        else:
+            self.proxy_cache = DbObjectCache(
+                config.get('database.proxy-cache-size'))
+        self.proxy_serial = next(_PROXY_SERIALS)
+        self.include_index = {}
+        # the classes whose include index was built from the whole table
+        self.indexed_classes = set()
         self.name_formats = db.name_formats
         self.bookmarks = db.bookmarks
         self.family_bookmarks = db.family_bookmarks
@@ -142,6 +191,69 @@ class ProxyDbBase(DbReadBase):
         # Call function to determine if object should be included or not
         return obj.include()
         
+    def get_raw_include_func(self, class_name):
+        """
+        Return a function of the serialized data of an object of class_name
+        that returns True if the object is included, or None if the
+        decision can not be made from the data alone. Proxies that
+        override the include predicates override this as well.
+        """
+        return None
+
+    def build_include_index(self, class_name):
+        """
+        Fill the include index of class_name in one pass over the raw cursor
+        of the base database, using the function returned by
+        :meth:`get_raw_include_func`.
+
+        Return False if the proxy can not decide from the raw data.
+        """
+        if class_name in self.indexed_classes:
+            return True
+        include_raw = self.get_raw_include_func(class_name)
+        if include_raw is None:
+            return False
+        index = self.include_index.setdefault(class_name, {})
+        get_cursor = getattr(self.basedb, 'get_%s_cursor' % class_name.lower())
+        with get_cursor() as cursor:
+            for handle, data in cursor:
+                index[data[0]] = bool(include_raw(data))
+        self.indexed_classes.add(class_name)
+        return True
+
+    def get_cached_object(self, class_func, handle, get_object):
+        """
+        Return the object of class class_func returned by get_object(handle).
+        get_object is only called the first time; later calls return a new
+        copy of the object, unless it dropped out of the cache.
+        """
+        if isinstance(handle, bytes):
+            handle = handle.decode('utf-8')
+        key = (self.proxy_serial, class_func.__name__, handle)
+        data = self.proxy_cache.get(key)
+        if data is None:
+            obj = get_object(handle)
+            if obj is None:
+                self.proxy_cache.put(key, _EXCLUDED)
+            else:
+                self.proxy_cache.put(key, pickle.dumps(
+                    obj.serialize(), pickle.HIGHEST_PROTOCOL))
+            return obj
+        if data == _EXCLUDED:
+            return None
+        return class_func.create(pickle.loads(data))
+
+    def clear_cache(self):
+        """
+        Forget the include decisions and the cached objects of the proxy and
+        of the proxies below it, as needed when the database has changed.
+        """
+        self.include_index.clear()
+        self.indexed_classes.clear()
+        self.proxy_cache.clear()
+        if isinstance(self.db, ProxyDbBase):
+            self.db.clear_cache()
+
     # Define default predicates for each object type
     
     include_person = \
@@ -309,6 +421,7 @@ class ProxyDbBase(DbReadBase):
         Return an iterator over database handles, one handle for each Person in
         the database.
         """
+        self.build_include_index('Person')
         return filter(self.include_person, self.db.iter_person_handles())
         
     def iter_family_handles(self):
@@ -316,6 +429,7 @@ class ProxyDbBase(DbReadBase):
         Return an iterator over database handles, one handle for each Family in
         the database.
         """
+        self.build_include_index('Family')
         return filter(self.include_family, self.db.iter_family_handles())
 
     def iter_event_handles(self):
@@ -323,6 +437,7 @@ class ProxyDbBase(DbReadBase):
         Return an iterator over database handles, one handle for each Event in
         the database.
         """
+        self.build_include_index('Event')
         return filter(self.include_event, self.db.iter_event_handles())
 
     def iter_source_handles(self):
@@ -330,6 +445,7 @@ class ProxyDbBase(DbReadBase):
         Return an iterator over database handles, one handle for each Source in
         the database.
         """
+        self.build_include_index('Source')
         return filter(self.include_source, self.db.iter_source_handles())       
 
     def iter_citation_handles(self):
@@ -337,6 +453,7 @@ class ProxyDbBase(DbReadBase):
         Return an iterator over database handles, one handle for each Citation 
         in the database.
         """
+        self.build_include_index('Citation')
         return filter(self.include_citation, self.db.iter_citation_handles())       
 
     def iter_place_handles(self):
@@ -344,6 +461,7 @@ class ProxyDbBase(DbReadBase):
         Return an iterator over database handles, one handle for each Place in
         the database.
         """
+        self.build_include_index('Place')
         return filter(self.include_place, self.db.iter_place_handles())
      
     def iter_media_object_handles(self):
@@ -351,6 +469,7 @@ class ProxyDbBase(DbReadBase):
         Return an iterator over database handles, one handle for each Media
         Object in the database.
         """
+        self.build_include_index('Media')
         return filter(self.include_media_object, self.db.iter_media_object_handles())
 
     def iter_repository_handles(self):
@@ -358,6 +477,7 @@ class ProxyDbBase(DbReadBase):
         Return an iterator over database handles, one handle for each 
         Repository in the database.
         """
+        self.build_include_index('Repository')
         return filter(self.include_repository, self.db.iter_repository_handles())
 
     def iter_note_handles(self):
@@ -365,6 +485,7 @@ class ProxyDbBase(DbReadBase):
         Return an iterator over database handles, one handle for each Note in
         the database.
         """
+        self.build_include_index('Note')
         return filter(self.include_note, self.db.iter_note_handles())
 
     def iter_tag_handles(self):
@@ -372,6 +493,7 @@ class ProxyDbBase(DbReadBase):
         Return an iterator over database handles, one handle for each Tag in
         the database.
         """
+        self.build_include_index('Tag')
         return filter(self.include_tag, self.db.iter_tag_handles())
 
     @staticmethod
@@ -800,34 +922,44 @@ class ProxyDbBase(DbReadBase):
         return self.db.get_url_types()
 
     def get_raw_person_data(self, handle):
-        return self.get_person_from_handle(handle).serialize()
+        obj = self.get_person_from_handle(handle)
+        return obj.serialize() if obj else None
 
     def get_raw_family_data(self, handle):
-        return self.get_family_from_handle(handle).serialize()
+        obj = self.get_family_from_handle(handle)
+        return obj.serialize() if obj else None
 
     def get_raw_object_data(self, handle):
-        return self.get_object_from_handle(handle).serialize()
+        obj = self.get_object_from_handle(handle)
+        return obj.serialize() if obj else None
 
     def get_raw_place_data(self, handle):
-        return self.get_place_from_handle(handle).serialize()
+        obj = self.get_place_from_handle(handle)
+        return obj.serialize() if obj else None
 
     def get_raw_event_data(self, handle):
-        return self.get_event_from_handle(handle).serialize()
+        obj = self.get_event_from_handle(handle)
+        return obj.serialize() if obj else None
 
     def get_raw_source_data(self, handle):
-        return self.get_source_from_handle(handle).serialize()
+        obj = self.get_source_from_handle(handle)
+        return obj.serialize() if obj else None
 
     def get_raw_citation_data(self, handle):
-        return self.get_citation_from_handle(handle).serialize()
+        obj = self.get_citation_from_handle(handle)
+        return obj.serialize() if obj else None
 
     def get_raw_repository_data(self, handle):
-        return self.get_repository_from_handle(handle).serialize()
+        obj = self.get_repository_from_handle(handle)
+        return obj.serialize() if obj else None
 
     def get_raw_note_data(self, handle):
-        return self.get_note_from_handle(handle).serialize()
+        obj = self.get_note_from_handle(handle)
+        return obj.serialize() if obj else None
 
     def get_raw_tag_data(self, handle):
-        return self.get_tag_from_handle(handle).serialize()
+        obj = self.get_tag_from_handle(handle)
+        return obj.serialize() if obj else None
 
     def has_person_handle(self, handle):
         """
@@ -0,0 +1,144 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the caches of the proxy databases """
+
+import unittest
+
+from ...lib import Person, Name, Surname
+from ...db.base import DbReadBase
+from .. import PrivateProxyDb
+from ..private import _PRIVACY_INDEX
+
+class Cursor(object):
+    def __init__(self, items):
+        self.items = items
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def __iter__(self):
+        return iter(self.items)
+
+class Database(DbReadBase):
+    """
+    Minimal database holding people, counting the objects it builds.
+    """
+    def __init__(self):
+        DbReadBase.__init__(self)
+        self.name_formats = []
+        for name in ('bookmarks', 'family_bookmarks', 'event_bookmarks',
+                     'place_bookmarks', 'source_bookmarks',
+                     'citation_bookmarks', 'repo_bookmarks',
+                     'media_bookmarks', 'note_bookmarks'):
+            setattr(self, name, [])
+        self.people = {}
+        self.reads = 0
+
+    def add_person(self, handle, surname, private=False):
+        person = Person()
+        person.set_handle(handle)
+        name = Name()
+        name.set_surname_list([Surname()])
+        name.get_primary_surname().set_surname(surname)
+        person.set_primary_name(name)
+        person.set_privacy(private)
+        self.people[handle] = person.serialize()
+
+    def get_person_from_handle(self, handle):
+        self.reads += 1
+        if handle in self.people:
+            return Person.create(self.people[handle])
+        return None
+
+    def get_person_cursor(self):
+        return Cursor([(handle.encode('utf-8'), data)
+                       for handle, data in sorted(self.people.items())])
+
+    def iter_person_handles(self):
+        return iter(sorted(self.people))
+
+class ProxyCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = Database()
+        self.db.add_person('A', 'Smith')
+        self.db.add_person('B', 'Jones', private=True)
+        self.db.add_person('C', 'Brown')
+        self.proxy = PrivateProxyDb(self.db)
+
+    def test_privacy_index(self):
+        person = Person()
+        person.set_privacy(True)
+        data = person.serialize()
+        self.assertTrue(data[_PRIVACY_INDEX['Person']])
+        person.set_privacy(False)
+        self.assertFalse(person.serialize()[_PRIVACY_INDEX['Person']])
+
+    def test_include_is_memoized(self):
+        self.assertEqual(list(self.proxy.iter_person_handles()), ['A', 'C'])
+        reads = self.db.reads
+        self.assertEqual(list(self.proxy.iter_person_handles()), ['A', 'C'])
+        self.assertFalse(self.proxy.include_person(b'B'))
+        self.assertEqual(self.db.reads, reads)
+
+    def test_build_include_index(self):
+        self.assertTrue(self.proxy.build_include_index('Person'))
+        self.assertFalse(self.proxy.build_include_index('Tag'))
+        self.assertEqual(self.proxy.include_index['Person'],
+                         {'A': True, 'B': False, 'C': True})
+        self.assertEqual(list(self.proxy.iter_person_handles()), ['A', 'C'])
+        self.assertEqual(self.db.reads, 0)
+
+    def test_iter_builds_include_index(self):
+        self.assertEqual(list(self.proxy.iter_person_handles()), ['A', 'C'])
+        self.assertEqual(self.proxy.include_index['Person'],
+                         {'A': True, 'B': False, 'C': True})
+        self.assertEqual(self.db.reads, 0)
+        self.proxy.clear_cache()
+        self.assertEqual(self.proxy.include_index, {})
+        self.assertEqual(list(self.proxy.iter_person_handles()), ['A', 'C'])
+        self.assertEqual(self.db.reads, 0)
+
+    def test_cached_objects_are_copies(self):
+        person = self.proxy.get_person_from_handle('A')
+        person.get_primary_name().get_primary_surname().set_surname('Doe')
+        self.assertIsNone(self.proxy.get_person_from_handle('B'))
+        reads = self.db.reads
+        for dummy in range(2):
+            person = self.proxy.get_person_from_handle('A')
+            self.assertEqual(person.get_primary_name().get_surname(), 'Smith')
+            self.assertIsNone(self.proxy.get_person_from_handle('B'))
+        self.assertEqual(self.db.reads, reads)
+
+    def test_stacked_proxies_share_cache(self):
+        proxy = PrivateProxyDb(self.proxy)
+        self.assertIs(proxy.proxy_cache, self.proxy.proxy_cache)
+        self.assertEqual(proxy.get_person_from_handle('A').handle, 'A')
+        self.assertEqual(len(proxy.proxy_cache), 2)
+        proxy.clear_cache()
+        self.assertEqual(len(self.proxy.proxy_cache), 0)
+        reads = self.db.reads
+        proxy.get_person_from_handle('A')
+        self.assertEqual(self.db.reads, reads + 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -390,15 +390,18 @@ class RelationshipCalculator(object):
     PARTNER_EX_UNMARRIED   = 6
     PARTNER_EX_CIVIL_UNION = 7
     PARTNER_EX_UNKNOWN_REL = 8
+
+    # number of ancestor maps kept while connected to the database signals
+    MAX_STORED_MAPS = 20
     
     def __init__(self):
         self.signal_keys = []
         self.state_signal_key = None
         self.storemap = False
         self.dirtymap = True
-        self.stored_map = None
-        self.map_handle = None
-        self.map_meta = None
+        self.__maps = {}
+        self.__closest_maps = {}
+        self.__parent_families = {}
         self.__db_connected = False
         self.depth = 15
         try:
@@ -784,7 +787,22 @@ class RelationshipCalculator(object):
         :param only_birth: if True only parents with birth relation are 
                            considered
         :type only_birth:  bool
+
+        If all_dist is False, the ancestors of both people are searched a
+        generation at a time, and the search stops at the closest common
+        ancestor. If several common ancestors are equally close, one of them
+        is returned.
+
+        While the calculator is connected to the database signals, the parent
+        families of the people searched and the ancestor maps of the first
+        people are kept until the data changes, so that relationships to the
+        same person are found quickly.
         """
+        if self.dirtymap or not self.storemap:
+            self.__maps = {}
+            self.__closest_maps = {}
+            self.__parent_families = {}
+            self.dirtymap = False
         #data storage to communicate with recursive functions
         self.__maxDepthReached = False
         self.__loopDetected = False
@@ -798,39 +816,37 @@ class RelationshipCalculator(object):
         secondRel  = -1
         self.__msg = []
         
+        if not all_dist:
+            return self.__find_closest_common(db, orig_person.handle,
+                                              other_person.handle)
+
         common = []
         firstMap = {}
         secondMap = {}
         rank = 9999999
 
+        key = (orig_person.handle, self.__max_depth, all_families, only_birth)
         try:
-            if (self.storemap and self.stored_map is not None 
-                    and self.map_handle == orig_person.handle 
-                    and not self.dirtymap): 
-                firstMap = self.stored_map
+            if key in self.__maps:
+                firstMap, meta = self.__maps[key]
                 self.__maxDepthReached, self.__loopDetected, \
-                 self.__all_families,\
-                 self.__all_dist, self.__only_birth,\
-                 self.__crosslinks, self.__msg = self.map_meta
+                 self.__crosslinks, self.__msg = meta
                 self.__msg = list(self.__msg)
             else:
-                self.__apply_filter(db, orig_person, '', [], firstMap)
-                self.map_meta = (self.__maxDepthReached,
-                                 self.__loopDetected, 
-                                 self.__all_families,
-                                 self.__all_dist, self.__only_birth,
-                                 self.__crosslinks, list(self.__msg))
-            self.__apply_filter(db, other_person, '', [], secondMap,
+                self.__apply_filter(db, orig_person.handle, '', [], firstMap)
+                if self.storemap:
+                    if len(self.__maps) >= self.MAX_STORED_MAPS:
+                        del self.__maps[next(iter(self.__maps))]
+                    self.__maps[key] = (firstMap, (self.__maxDepthReached,
+                                                   self.__loopDetected,
+                                                   self.__crosslinks,
+                                                   list(self.__msg)))
+            self.__apply_filter(db, other_person.handle, '', [], secondMap,
                                     stoprecursemap = firstMap)
         except RuntimeError:
             return (-1, None, -1, [], -1, []) , \
                             [_("Relationship loop detected")] + self.__msg
 
-        if self.storemap:
-            self.stored_map = firstMap
-            self.dirtymap = False
-            self.map_handle = orig_person.handle
-            
         for person_handle in secondMap :
             if person_handle in firstMap :
                 com = []
@@ -903,7 +919,233 @@ class RelationshipCalculator(object):
         else :
             return [(-1, None, '', [], '', [])], self.__msg
     
-    def __apply_filter(self, db, person, rel_str, rel_fam, pmap,
+    def __find_closest_common(self, db, orig_handle, other_handle):
+        """
+        Return the closest common ancestor of two people, as
+        get_relationship_distance_new does with all_dist False.
+
+        The ancestors of both people are searched breadth first, each time
+        a generation further on the side searched least far, and only the
+        shortest path to each relative is kept. The search stops when no
+        ancestor still to be found can be closer than the common ancestor
+        found. While connected to the database signals, all the ancestors
+        of the first person are found once and kept, and only the ancestors
+        of the second person are searched.
+        """
+        if self.storemap:
+            closest, self.__maxDepthReached = self.__get_closest_map(
+                db, orig_handle)
+            maps = (closest, {other_handle: ('', [])})
+            ancestors = (None, {other_handle: ('', [])})
+            generations = [[], [other_handle]]
+        else:
+            #the closest path to each relative found, and the path to each
+            #ancestor searched, which differ if a sibling is also an ancestor
+            maps = ({orig_handle: ('', [])}, {other_handle: ('', [])})
+            ancestors = ({orig_handle: ('', [])}, {other_handle: ('', [])})
+            generations = [[orig_handle], [other_handle]]
+        depths = [0, 0]
+        best = None
+        if other_handle in maps[0]:
+            rel_str, rel_fam = maps[0][other_handle]
+            best = (len(rel_str), other_handle, rel_str, rel_fam, '', [])
+
+        while generations[0] or generations[1]:
+            searched = [depth if generation else self.__max_depth
+                        for depth, generation in zip(depths, generations)]
+            side = 0 if searched[0] <= searched[1] else 1
+            if best is not None and best[0] <= searched[side] + 1:
+                break
+            if depths[side] + 1 >= self.__max_depth:
+                #the next generation is beyond the maximum depth
+                if any(self.__get_parents(db, handle)[0]
+                       for handle in generations[side]):
+                    self.__maxDepthReached = True
+                generations[side] = []
+                continue
+            pmap, othermap = maps[side], maps[1 - side]
+            #siblings of the first person are related through the family
+            #without parents, but have no ancestors to search
+            generations[side], added = self.__search_generation(
+                db, generations[side], pmap, ancestors[side], side == 0)
+            depths[side] += 1
+            for handle in added:
+                if handle in othermap:
+                    new_str, new_fam = pmap[handle]
+                    other_str, other_fam = othermap[handle]
+                    rank = len(new_str) + len(other_str)
+                    if best is None or rank < best[0]:
+                        if side == 0:
+                            best = (rank, handle, new_str, new_fam,
+                                    other_str, other_fam)
+                        else:
+                            best = (rank, handle, other_str, other_fam,
+                                    new_str, new_fam)
+
+        if self.__maxDepthReached and best is None:
+            self.__msg += [_('Family Tree reaches back more than the maximum '
+                        '%d generations searched.\nIt is possible that '
+                        'relationships have been missed') % (self.__max_depth)]
+        if best is None:
+            return (-1, None, '', [], '', []), self.__msg
+        return best, self.__msg
+
+    def __get_closest_map(self, db, handle):
+        """
+        Return the shortest path to each of the ancestors of the person with
+        the given handle, and to the siblings through families without
+        parents, as a dictionary, and whether the maximum depth was reached.
+        The maps are kept until the data changes.
+        """
+        key = (handle, self.__max_depth, self.__all_families,
+               self.__only_birth)
+        if key in self.__closest_maps:
+            return self.__closest_maps[key]
+        pmap = {handle: ('', [])}
+        searchmap = {handle: ('', [])}
+        generation = [handle]
+        depth = 0
+        max_depth_reached = False
+        while generation:
+            if depth + 1 >= self.__max_depth:
+                max_depth_reached = any(self.__get_parents(db, person)[0]
+                                        for person in generation)
+                break
+            generation = self.__search_generation(db, generation, pmap,
+                                                  searchmap, True)[0]
+            depth += 1
+        if len(self.__closest_maps) >= self.MAX_STORED_MAPS:
+            del self.__closest_maps[next(iter(self.__closest_maps))]
+        self.__closest_maps[key] = (pmap, max_depth_reached)
+        return pmap, max_depth_reached
+
+    def __search_generation(self, db, generation, pmap, searchmap, siblings):
+        """
+        Look up the parents of a generation of relatives, and their siblings
+        through families without parents if siblings is True.
+
+        The paths to the relatives are taken from searchmap. The relatives
+        not in pmap yet are added to it, the parents not in searchmap yet
+        are added to it. Return the parents added to searchmap, which are the
+        next generation to search, and the relatives added to pmap.
+        """
+        found = []
+        added = []
+        for handle in generation:
+            rel_str, rel_fam = searchmap[handle]
+            parents, sibs = self.__get_parents(db, handle)
+            new = [(phandle, rel_str + addstr, rel_fam + [fam], True)
+                   for phandle, addstr, fam in parents]
+            if siblings:
+                new += [(chandle, rel_str + self.REL_SIBLING,
+                         rel_fam + [fam], False)
+                        for children, fam in sibs
+                        for chandle in children]
+            for phandle, new_str, new_fam, search in new:
+                if self.__get_parent_families(db, phandle) is None:
+                    continue
+                if search and phandle not in searchmap:
+                    searchmap[phandle] = (new_str, new_fam)
+                    found.append(phandle)
+                if phandle not in pmap:
+                    pmap[phandle] = (new_str, new_fam)
+                    added.append(phandle)
+        return found, added
+
+    def __get_parent_families(self, db, handle):
+        """
+        Return the parent families of the person with the given handle, in
+        the order of the person's parent family list, as a list of
+        (father_handle, mother_handle, child_relations, child_handles)
+        tuples, where child_relations is the (mother_relation,
+        father_relation) of the person and child_handles are the other
+        children. A family that is not in the database is None. Return None
+        if the person is not in the database.
+        """
+        if handle in self.__parent_families:
+            return self.__parent_families[handle]
+        person = db.get_person_from_handle(handle)
+        if person is None:
+            families = None
+        else:
+            families = []
+            for family_handle in person.get_parent_family_handle_list():
+                family = db.get_family_from_handle(family_handle)
+                if not family:
+                    families.append(None)
+                    continue
+                childrel = None
+                children = []
+                for ref in family.get_child_ref_list():
+                    if ref.ref != handle:
+                        children.append(ref.ref)
+                    elif childrel is None:
+                        childrel = (ref.get_mother_relation(),
+                                    ref.get_father_relation())
+                families.append((family.father_handle, family.mother_handle,
+                                 childrel, children))
+        self.__parent_families[handle] = families
+        return families
+
+    def __get_parents(self, db, handle):
+        """
+        Return the parents to search of the person with the given handle,
+        and the children of the families without parents.
+
+        The parents are a list of (parent_handle, rel_str, fam) tuples, where
+        rel_str is the relation to the parent and fam is the number of the
+        family, or a list of numbers if the parent is in several of the
+        families. The children are a list of (child_handles, fam) tuples.
+        Return None if the person is not in the database.
+        """
+        families = self.__get_parent_families(db, handle)
+        if families is None:
+            return None
+        if not self.__all_families:
+            #the main parent family is the first one
+            families = families[:1]
+        parentstodo = {}
+        order = []
+        siblings = []
+        fam = 0
+        for family in families:
+            if family is None:
+                continue
+            fhandle, mhandle, childrel, children = family
+            if childrel is not None:
+                for phandle, rel, rel_notbirth, childrel_type in [
+                        (fhandle, self.REL_FATHER, self.REL_FATHER_NOTBIRTH,
+                         childrel[1]),
+                        (mhandle, self.REL_MOTHER, self.REL_MOTHER_NOTBIRTH,
+                         childrel[0])]:
+                    if not phandle:
+                        continue
+                    if phandle not in parentstodo:
+                        if childrel_type == ChildRefType.BIRTH:
+                            addstr = rel
+                        elif not self.__only_birth:
+                            addstr = rel_notbirth
+                        else:
+                            addstr = ''
+                        if addstr:
+                            parentstodo[phandle] = [addstr, fam]
+                            order.append(phandle)
+                    else:
+                        #parent in several families, update family list
+                        famlist = parentstodo[phandle][1]
+                        if not isinstance(famlist, list):
+                            if fam != famlist:
+                                parentstodo[phandle][1] = [famlist, fam]
+                        elif fam not in famlist:
+                            parentstodo[phandle][1] = famlist + [fam]
+            if not fhandle and not mhandle:
+                siblings.append((children, fam))
+            fam += 1
+        parents = [(phandle,) + tuple(parentstodo[phandle])
+                   for phandle in order]
+        return parents, siblings
+
+    def __apply_filter(self, db, handle, rel_str, rel_fam, pmap,
                             depth=1, stoprecursemap=None):
         """
         Typically this method is called recursively in two ways:
@@ -918,7 +1160,10 @@ class RelationshipCalculator(object):
         will be looked up anyway an stored if common. At end the doubles
         are filtered out
         """
-        if person is None or not person.handle :
+        if not handle:
+            return
+        parents = self.__get_parents(db, handle)
+        if parents is None:
             return
         
         if depth > self.__max_depth:
@@ -933,34 +1178,35 @@ class RelationshipCalculator(object):
         store = True                            #normally we store all parents
         if stoprecursemap:
             store = False                       #but not if a stop map given
-            if person.handle in stoprecursemap:
+            if handle in stoprecursemap:
                 commonancestor = True
                 store = True
 
         #add person to the map, take into account that person can be obtained 
         #from different sides 
-        if person.handle in pmap:
+        if handle in pmap:
             #person is already a grandparent in another branch, we already have
             # had lookup of all parents, we call that a crosslink
             if not stoprecursemap:
                 self.__crosslinks = True
-            pmap[person.handle][0] += [rel_str]
-            pmap[person.handle][1] += [rel_fam]
+            pmap[handle][0] += [rel_str]
+            pmap[handle][1] += [rel_fam]
             #check if there is no loop father son of his son, ...
             # loop means person is twice reached, same rel_str in begin
-            for rel1 in pmap[person.handle][0]: 
-                for rel2 in pmap[person.handle][0] :
+            for rel1 in pmap[handle][0]: 
+                for rel2 in pmap[handle][0] :
                     if len(rel1) < len(rel2) and \
                             rel1 == rel2[:len(rel1)]:
                         #loop, keep one message in storage!
                         self.__loopDetected = True
+                        person = db.get_person_from_handle(handle)
                         self.__msg += [_("Relationship loop detected:") + " " + 
                                        _("Person %(person)s connects to himself via %(relation)s")  % 
                                        {'person' : person.get_primary_name().get_name(), 
                                         'relation' : rel2[len(rel1):] }]
                         return
         elif store:
-            pmap[person.handle] = [[rel_str], [rel_fam]]
+            pmap[handle] = [[rel_str], [rel_fam]]
             
         #having added person to the pmap, we only look up recursively to 
         # parents if this person is not common relative
@@ -969,82 +1215,26 @@ class RelationshipCalculator(object):
             #don't continue search, great speedup!
             return 
 
-        family_handles = []
-        main = person.get_main_parents_family_handle()
-        if main :
-            family_handles = [main]
-        if self.__all_families :
-            family_handles = person.get_parent_family_handle_list() 
-            
-        try:
-            parentstodo = {}
-            fam = 0
-            for family_handle in family_handles :
+        parents, siblings = parents
+        if stoprecursemap is None:
+            #family without parents, add brothers for orig person
+            #other person has recusemap, and will stop when seeing
+            #the brother.
+            addstr = self.REL_SIBLING
+            for child_list, fam in siblings:
                 rel_fam_new = rel_fam + [fam]
-                family = db.get_family_from_handle(family_handle)
-                if not family:
-                    continue
-                #obtain childref for this person
-                childrel = [(ref.get_mother_relation(), 
-                             ref.get_father_relation()) for ref in 
-                                family.get_child_ref_list() 
-                                if ref.ref == person.handle]
-                fhandle = family.father_handle
-                mhandle = family.mother_handle
-                for data in [(fhandle, self.REL_FATHER, 
-                                self.REL_FATHER_NOTBIRTH, childrel[0][1]), 
-                             (mhandle, self.REL_MOTHER, 
-                                self.REL_MOTHER_NOTBIRTH, childrel[0][0])]:
-                    if data[0] and data[0] not in parentstodo :
-                        persontodo = db.get_person_from_handle(data[0])
-                        if data[3] == ChildRefType.BIRTH :
-                            addstr = data[1]
-                        elif not self.__only_birth :
-                            addstr = data[2]
-                        else :
-                            addstr = ''
-                        if addstr :
-                            parentstodo[data[0]] = (persontodo, 
-                                                    rel_str + addstr,
-                                                    rel_fam_new)
-                    elif data [0] and data[0] in parentstodo:
-                        #this person is already scheduled to research
-                        #update family list
-                        famlist = parentstodo[data[0]][2]
-                        if not isinstance(famlist[-1], list) and \
-                                not fam == famlist[-1]:
-                            famlist = famlist[:-1] + [[famlist[-1]]]
-                        if isinstance(famlist[-1], list) and \
-                                fam not in famlist[-1] :
-                            famlist = famlist[:-1] + [famlist[-1] + [fam]]
-                            parentstodo[data[0]] = (parentstodo[data[0]][0],
-                                                    parentstodo[data[0]][1],
-                                                    famlist
-                                                    )
-                if not fhandle and not mhandle and stoprecursemap is None:
-                    #family without parents, add brothers for orig person
-                    #other person has recusemap, and will stop when seeing
-                    #the brother.
-                    child_list = [ref.ref for ref in family.get_child_ref_list()
-                          if ref.ref != person.handle]
-                    addstr = self.REL_SIBLING
-                    for chandle in child_list :
-                        if chandle in pmap :
-                            pmap[chandle][0] += [rel_str + addstr]
-                            pmap[chandle][1] += [rel_fam_new]
-                            #person is already a grandparent in another branch
-                        else:
-                            pmap[chandle] = [[rel_str+addstr], [rel_fam_new]]
-                fam += 1
-
-            for handle, data in parentstodo.items():
-                self.__apply_filter(db, data[0],
-                                data[1], data[2],
-                                pmap, depth, stoprecursemap)
-        except:
-            import traceback
-            traceback.print_exc()
-            return
+                for chandle in child_list :
+                    if chandle in pmap :
+                        pmap[chandle][0] += [rel_str + addstr]
+                        pmap[chandle][1] += [rel_fam_new]
+                        #person is already a grandparent in another branch
+                    else:
+                        pmap[chandle] = [[rel_str+addstr], [rel_fam_new]]
+
+        for phandle, addstr, fam in parents:
+            self.__apply_filter(db, phandle,
+                            rel_str + addstr, rel_fam + [fam],
+                            pmap, depth, stoprecursemap)
 
     def collapse_relations(self, relations):
         """
@@ -1820,7 +2010,9 @@ class RelationshipCalculator(object):
         dbstate.disconnect(self.state_signal_key)
         list(map(dbstate.db.disconnect, self.signal_keys))
         self.storemap = False
-        self.stored_map = None
+        self.__maps = {}
+        self.__closest_maps = {}
+        self.__parent_families = {}
 
     def _dbchange_callback(self, db):
         """
@@ -1833,9 +2025,10 @@ class RelationshipCalculator(object):
 
     def _datachange_callback(self, list=[]):
         """
-        When data in database changes, the map can no  longer be used. 
-        As the map might be in use or might be generated at the moment, 
-        this method sets a dirty flag. Before reusing the map, this flag 
+        When data in database changes, the maps and the parent families
+        can no longer be used. 
+        As the maps might be in use or might be generated at the moment, 
+        this method sets a dirty flag. Before reusing the maps, this flag 
         will be checked
         """
         self.dirtymap = True
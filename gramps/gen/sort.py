@@ -41,6 +41,8 @@ from .utils.db import get_birth_or_fallback
 from .display.name import displayer as _nd
 from .display.place import displayer as _pd
 from .const import GRAMPS_LOCALE as glocale
+from .db.summary import (SUMMARY_SORTED_NAME, SUMMARY_LAST_NAME,
+                         SUMMARY_BIRTH_SORTVAL)
 
 #-------------------------------------------------------------------------
 #
@@ -52,6 +54,10 @@ class Sort(object):
     
     def __init__(self, database):
         self.database = database
+        # the summary table of the people, if the database keeps one; only
+        # the rows it already has are used, as computing a row reads far
+        # more than a sort key needs
+        self.summary = database.get_person_summary()
 
 ##    def by_last_name(self, first_id, second_id):
 ##        """Sort routine for comparing two last names. If last names are equal, 
@@ -80,6 +86,10 @@ class Sort(object):
         Sort routine for comparing two last names. If last names are equal, 
         uses the given name and suffix
         """
+        if self.summary is not None and first_id in self.summary:
+            return glocale.sort_key(
+                self.summary.get(first_id)[SUMMARY_LAST_NAME])
+
         first = self.database.get_person_from_handle(first_id)
         
         name1 = first.get_primary_name()
@@ -106,6 +116,9 @@ class Sort(object):
         """
         Sort routine for comparing two displayed names.
         """
+        if self.summary is not None and first_id in self.summary:
+            return glocale.sort_key(
+                self.summary.get(first_id)[SUMMARY_SORTED_NAME])
 
         first = self.database.get_person_from_handle(first_id)
 
@@ -144,6 +157,10 @@ class Sort(object):
         Sort routine for comparing two people by birth dates. If the birth dates
         are equal, sorts by name
         """
+        if self.summary is not None and first_id in self.summary:
+            dsv1 = self.summary.get(first_id)[SUMMARY_BIRTH_SORTVAL]
+            return "%08d" % dsv1 + str(self.by_last_name_key(first_id))
+
         first = self.database.get_person_from_handle(first_id)
 
         birth1 = get_birth_or_fallback(self.database, first)
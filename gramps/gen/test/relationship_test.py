@@ -0,0 +1,92 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for relationship.py """
+
+import unittest
+
+from ..db.test.tree import Tree
+from ..lib import Person
+from ..relationship import RelationshipCalculator
+
+class RelationshipDistanceTest(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Two grandparents, with a son and a daughter, who each have a child.
+        """
+        self.tree = Tree()
+        self.grandfather = self.tree.person(gender=Person.MALE)
+        self.grandmother = self.tree.person(gender=Person.FEMALE)
+        self.son = self.tree.person(gender=Person.MALE)
+        self.daughter = self.tree.person(gender=Person.FEMALE)
+        self.tree.family(self.grandfather, self.grandmother,
+                         [self.son, self.daughter])
+        self.son_child = self.tree.person(gender=Person.MALE)
+        self.daughter_child = self.tree.person(gender=Person.FEMALE)
+        self.tree.family(self.son, self.tree.person(gender=Person.FEMALE),
+                         [self.son_child])
+        self.tree.family(self.tree.person(gender=Person.MALE), self.daughter,
+                         [self.daughter_child])
+        self.calc = RelationshipCalculator()
+
+    def distance(self, orig, other, all_dist):
+        return self.calc.get_relationship_distance_new(
+            self.tree.db, orig, other, all_dist=all_dist)[0]
+
+    def test_closest(self):
+        self.assertEqual(self.distance(self.son_child, self.daughter_child,
+                                       False),
+                         (4, self.grandfather.handle, 'ff', [0, 0],
+                          'mf', [0, 0]))
+        self.assertEqual(self.distance(self.son_child, self.son, False),
+                         (1, self.son.handle, 'f', [0], '', []))
+        self.assertEqual(self.distance(self.son, self.son, False),
+                         (0, self.son.handle, '', [], '', []))
+        stranger = self.tree.person(gender=Person.MALE)
+        self.assertEqual(self.distance(self.son, stranger, False),
+                         (-1, None, '', [], '', []))
+
+    def test_all_distances(self):
+        self.assertEqual([common[1] for common in
+                          self.distance(self.son_child, self.daughter_child,
+                                        True)],
+                         [self.grandfather.handle, self.grandmother.handle])
+
+    def test_depth(self):
+        self.calc.set_depth(2)
+        rel, msg = self.calc.get_relationship_distance_new(
+            self.tree.db, self.son_child, self.daughter_child)
+        self.assertEqual(rel[0], -1)
+        self.assertEqual(len(msg), 1)
+
+    def test_cache_invalidated(self):
+        # as if connected to the database signals
+        self.calc.storemap = True
+        child = self.tree.person(gender=Person.MALE)
+        self.assertEqual(self.distance(child, self.son, False)[0], -1)
+        self.tree.family(self.son, self.tree.person(gender=Person.FEMALE),
+                         [child])
+        # the parent families are kept until the data changes
+        self.assertEqual(self.distance(child, self.son, False)[0], -1)
+        self.calc._datachange_callback()
+        self.assertEqual(self.distance(child, self.son, False)[0], 1)
+        self.assertEqual(self.distance(child, self.son_child, True)[0][0], 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -61,6 +61,11 @@ except ImportError:
     _MAX_SIB_AGE_DIFF     = 20
     _AVG_GENERATION_GAP   = 20
 
+# states of a person in the searches of ProbablyAlive.probably_alive_ranges
+_UNKNOWN = object()
+_SEARCHING = object()
+_LOOP = object()
+
 #-------------------------------------------------------------------------
 #
 # ProbablyAlive class
@@ -451,7 +456,7 @@ class ProbablyAlive(object):
             # then assume our person must be dead too.
             date1, date2, explain, other = ancestors_too_old (person, - self.AVG_GENERATION_GAP)
         except RuntimeError:
-            raise Errors.DatabaseError(
+            raise DatabaseError(
                 _("Database error: loop in %s's ancestors") %
                 name_displayer.display(person))
         if date1 and date2:
@@ -462,6 +467,376 @@ class ProbablyAlive(object):
 
         return (None, None, "", None)
 
+    def probably_alive_ranges(self):
+        """
+        Compute the estimated birth and death dates of all people in the
+        database, as probably_alive_range does for each person.
+
+        Returns a dictionary of (birth_date, death_date, explain_text,
+        related_person) by person handle. People whose dates can only be
+        estimated through a loop in their ancestors or descendants are left
+        out, probably_alive_range reports the loop for them.
+
+        The people, families and events are read once. The evidence each
+        person gives to themselves and to their relatives is kept in lists
+        indexed by person, and the searches of the descendants and ancestors
+        are made once for everybody, each person taking on the result found
+        for the relative searched through.
+        """
+        handles = []
+        index = {}
+        evidence = []
+        parent_families = []
+        families = []
+        for person in self.db.iter_people():
+            index[person.handle] = len(handles)
+            handles.append(person.handle)
+            evidence.append(self.__evidence(person))
+            parent_families.append(person.get_parent_family_handle_list())
+            families.append(person.get_family_handle_list())
+
+        # family handle -> (father, mother, children, event handles)
+        family_data = {}
+        for family in self.db.iter_families():
+            children = [index[child_ref.ref]
+                        for child_ref in family.get_child_ref_list()
+                        if child_ref.ref in index]
+            family_data[family.handle] = (
+                index.get(family.get_father_handle()),
+                index.get(family.get_mother_handle()),
+                children,
+                [ref.ref for ref in family.get_event_ref_list() if ref])
+
+        gap = self.AVG_GENERATION_GAP
+        max_age = self.MAX_AGE_PROB_ALIVE
+        sib_diff = self.MAX_SIB_AGE_DIFF
+
+        # descendants_too_old
+        links = [[child for family_handle in family_list
+                  if family_handle in family_data
+                  for child in family_data[family_handle][2]]
+                 for family_list in families]
+        descendants = self.__search(links,
+                                    [ev[2] for ev in evidence],
+                                    [ev[3] for ev in evidence])
+        # ancestors_too_old
+        links = []
+        for family_list in parent_families:
+            parents = []
+            if family_list and family_list[0] in family_data:
+                father, mother = family_data[family_list[0]][:2]
+                parents = [parent for parent in (father, mother)
+                           if parent is not None]
+            links.append(parents)
+        ancestors = self.__search(links, [ev[4] for ev in evidence], None)
+
+        first_sibling = {}
+        def sibling_range(number):
+            for family_handle in parent_families[number]:
+                if family_handle not in family_data:
+                    continue
+                if family_handle not in first_sibling:
+                    first_sibling[family_handle] = next(
+                        (child for child in family_data[family_handle][2]
+                         if evidence[child][1]), None)
+                child = first_sibling[family_handle]
+                if child is not None:
+                    year, died, explain = evidence[child][1]
+                    if died:
+                        year -= max_age
+                    return (Date().copy_ymd(year - sib_diff),
+                            Date().copy_ymd(year - sib_diff + max_age),
+                            explain, child)
+            return None
+
+        # the ranges of the people as spouses, without the evidence of
+        # their own spouses
+        ranges = [None] * len(handles)
+        direct = [False] * len(handles)
+        for number in range(len(handles)):
+            if evidence[number][0]:
+                ranges[number] = evidence[number][0] + (number,)
+                direct[number] = True
+                continue
+            ranges[number] = sibling_range(number)
+            if ranges[number]:
+                direct[number] = True
+                continue
+            found = descendants[number]
+            if found is None:
+                found = ancestors[number]
+                if found is None:
+                    ranges[number] = (None, None, "", None)
+                elif found is _LOOP:
+                    ranges[number] = _LOOP
+                else:
+                    relative, (birth, dobj, explain), generations = found
+                    offset = gap * generations
+                    if birth:
+                        ranges[number] = (dobj.copy_offset_ymd(offset),
+                                          dobj.copy_offset_ymd(offset +
+                                                               max_age),
+                                          explain, relative)
+                    else:
+                        ranges[number] = (dobj.copy_offset_ymd(offset -
+                                                               max_age),
+                                          dobj.copy_offset_ymd(offset),
+                                          explain, relative)
+            elif found is _LOOP:
+                ranges[number] = _LOOP
+            else:
+                relative, (birth, dobj, explain), generations = found
+                if birth:
+                    date = Date(dobj)
+                    date.set_year(date.get_year() - gap * generations)
+                    ranges[number] = (date, date.copy_offset_ymd(max_age),
+                                      explain, relative)
+                else:
+                    ranges[number] = (dobj.copy_offset_ymd(- gap),
+                                      dobj.copy_offset_ymd(- gap + max_age),
+                                      explain, relative)
+
+        family_years = {}
+        result = {}
+        for number, handle in enumerate(handles):
+            found = ranges[number]
+            if not direct[number]:
+                found = self.__spouse_range(number, families[number],
+                                            family_data, family_years,
+                                            ranges) or found
+            if found is _LOOP:
+                continue
+            date1, date2, explain, relative = found
+            if relative is not None:
+                relative = self.db.get_person_from_handle(handles[relative])
+            result[handle] = (date1, date2, explain, relative)
+        return result
+
+    def __evidence(self, person):
+        """
+        Return the evidence of the events of a person for probably_alive_ranges:
+
+        * (birth_date, death_date, explain) of the person, or None
+        * (year, died, explain) of the person as a sibling, or None
+        * (birth, date, explain) of the person as a descendant, looked at
+          before and after their own descendants, or None
+        * (birth, date, explain) of the person as an ancestor, or None
+        """
+        events = {}
+        for ev_ref in person.get_event_ref_list():
+            events[ev_ref.ref] = self.db.get_event_from_handle(ev_ref.ref)
+        primary = [events[ev_ref.ref]
+                   for ev_ref in person.get_primary_event_ref_list()]
+        birth_ref = person.get_birth_ref()
+        death_ref = person.get_death_ref()
+        birth = events.get(birth_ref.ref) if birth_ref else None
+        death = events.get(death_ref.ref) if death_ref else None
+
+        # as probably_alive_range
+        birth_date = death_date = None
+        explain = ""
+        if death and death_ref.get_role().is_primary():
+            if death.get_date_object().is_valid():
+                death_date = death.get_date_object()
+            else:
+                death_date = Today()
+                death_date.set_modifier(Date.MOD_BEFORE)
+        if not death_date:
+            for ev in primary:
+                if ev and ev.type.is_death_fallback():
+                    death_date = ev.get_date_object()
+                    if not death_date.is_valid():
+                        death_date = Today()
+                        death_date.set_modifier(Date.MOD_BEFORE)
+        if birth and birth_ref.get_role().is_primary() and \
+                birth.get_date_object().get_start_date() != Date.EMPTY:
+            birth_date = birth.get_date_object()
+        if not birth_date:
+            for ev in primary:
+                if ev and ev.type.is_birth_fallback():
+                    birth_date = ev.get_date_object()
+        if not birth_date and death_date:
+            birth_date = death_date.copy_offset_ymd(
+                year=-self.MAX_AGE_PROB_ALIVE)
+            explain = _("death date")
+        if not death_date and birth_date:
+            death_date = birth_date.copy_offset_ymd(
+                year=self.MAX_AGE_PROB_ALIVE)
+            explain = _("birth date")
+        own = None
+        if death_date and birth_date:
+            own = (birth_date, death_date, explain)
+
+        sibling = None
+        for ev in primary:
+            if ev and (ev.type.is_birth() or ev.type.is_death()):
+                dobj = ev.get_date_object()
+                if dobj.get_start_date() != Date.EMPTY and dobj.get_year():
+                    if ev.type.is_birth():
+                        sibling = (dobj.get_year(), False,
+                                   _("sibling birth date"))
+                    else:
+                        sibling = (dobj.get_year(), True,
+                                   _("sibling death date"))
+                    break
+        else:
+            for ev in primary:
+                if ev and (ev.type.is_birth_fallback() or
+                           ev.type.is_death_fallback()):
+                    dobj = ev.get_date_object()
+                    if dobj.get_start_date() != Date.EMPTY and \
+                            dobj.get_year():
+                        if ev.type.is_birth_fallback():
+                            sibling = (dobj.get_year(), False,
+                                       _("sibling birth-related date"))
+                        else:
+                            sibling = (dobj.get_year(), True,
+                                       _("sibling death-related date"))
+                        break
+
+        descendant = None
+        if birth and birth.get_date_object().get_start_date() != Date.EMPTY:
+            descendant = (True, birth.get_date_object(),
+                          _("descendant birth date"))
+        elif death and \
+                death.get_date_object().get_start_date() != Date.EMPTY:
+            descendant = (False, death.get_date_object(),
+                          _("descendant death date"))
+
+        fallback = None
+        for ev in primary:
+            if ev and (ev.type.is_birth_fallback() or
+                       ev.type.is_death_fallback()):
+                dobj = ev.get_date_object()
+                if dobj.get_start_date() != Date.EMPTY:
+                    fallback = ev.type.is_birth_fallback(), dobj
+                    break
+        descendant_fallback = ancestor = None
+        if fallback:
+            descendant_fallback = fallback + (
+                _("descendant birth-related date") if fallback[0] else
+                _("descendant death-related date"),)
+            ancestor = fallback + (
+                _("ancestor birth-related date") if fallback[0] else
+                _("ancestor death-related date"),)
+        if death and death_ref.get_role().is_primary() and \
+                death.get_date_object().get_start_date() != Date.EMPTY:
+            ancestor = (False, death.get_date_object(),
+                        _("ancestor death date"))
+        if birth and birth_ref.get_role().is_primary() and \
+                birth.get_date_object().get_start_date() != Date.EMPTY:
+            ancestor = (True, birth.get_date_object(),
+                        _("ancestor birth date"))
+
+        return own, sibling, descendant, descendant_fallback, ancestor
+
+    @staticmethod
+    def __search(links, before, after):
+        """
+        Search the relatives of each person along links depth first, as
+        descendants_too_old and ancestors_too_old do, for the first
+        evidence found. The evidence of a relative in before is taken before
+        the relatives of the relative are searched, the one in after (if
+        given) when they have none.
+
+        Returns a list of (relative, evidence, generations) by person, or
+        None if nothing is found, or _LOOP if the search runs into a loop
+        first. The result of each person is found once, and used for all
+        the people that search through them.
+        """
+        found = [_UNKNOWN] * len(links)
+        for start in range(len(links)):
+            if found[start] is not _UNKNOWN:
+                continue
+            found[start] = _SEARCHING
+            # [person, position in the relatives of the person]
+            stack = [[start, 0]]
+            while stack:
+                frame = stack[-1]
+                person, position = frame
+                relatives = links[person]
+                result = None
+                while position < len(relatives):
+                    relative = relatives[position]
+                    if before[relative] is not None:
+                        result = (relative, before[relative], 1)
+                        break
+                    state = found[relative]
+                    if state is _UNKNOWN:
+                        # search the relative first, then come back here
+                        break
+                    if state is _SEARCHING or state is _LOOP:
+                        result = _LOOP
+                        break
+                    if state is not None:
+                        result = (state[0], state[1], state[2] + 1)
+                        break
+                    if after is not None and after[relative] is not None:
+                        result = (relative, after[relative], 1)
+                        break
+                    position += 1
+                if result is None and position < len(relatives):
+                    frame[1] = position
+                    found[relative] = _SEARCHING
+                    stack.append([relative, 0])
+                else:
+                    found[person] = result
+                    stack.pop()
+        return found
+
+    def __spouse_range(self, number, family_list, family_data,
+                       family_years, ranges):
+        """
+        Return the range a person gets from their spouses and families in
+        probably_alive_ranges, or None.
+        """
+        gap = self.AVG_GENERATION_GAP
+        max_age = self.MAX_AGE_PROB_ALIVE
+        for family_handle in family_list:
+            if family_handle not in family_data:
+                continue
+            father, mother, children, events = family_data[family_handle]
+            spouse = None
+            if mother == number and father is not None:
+                spouse = father
+            elif father == number and mother is not None:
+                spouse = mother
+            if spouse is not None:
+                found = ranges[spouse]
+                if found is _LOOP:
+                    return _LOOP
+                date1, date2, explain, other = found
+                if date1 and date1.get_year() != 0:
+                    return (Date().copy_ymd(date1.get_year() - gap),
+                            Date().copy_ymd(date1.get_year() - gap + max_age),
+                            _("a spouse's birth-related date, ") + explain,
+                            other)
+                elif date2 and date2.get_year() != 0:
+                    return (Date().copy_ymd(date2.get_year() + gap - max_age),
+                            Date().copy_ymd(date2.get_year() + gap),
+                            _("a spouse's death-related date, ") + explain,
+                            other)
+            if family_handle not in family_years:
+                family_years[family_handle] = 0
+                for event_handle in events:
+                    event = self.db.get_event_from_handle(event_handle)
+                    if event and event.get_date_object().get_year() != 0:
+                        family_years[family_handle] = \
+                            event.get_date_object().get_year()
+                        break
+            year = family_years[family_handle]
+            if year != 0:
+                if mother == number:
+                    other = father
+                elif father == number:
+                    other = mother
+                else:
+                    other = None
+                return (Date().copy_ymd(year - gap),
+                        Date().copy_ymd(year - gap + max_age),
+                        _("event with spouse"), other)
+        return None
+
 #-------------------------------------------------------------------------
 #
 # probably_alive
@@ -473,7 +848,8 @@ def probably_alive(person, db,
                    max_sib_age_diff=None, 
                    max_age_prob_alive=None, 
                    avg_generation_gap=None,
-                   return_range=False):
+                   return_range=False,
+                   ranges=None):
     """
     Return true if the person may be alive on current_date.
 
@@ -487,11 +863,17 @@ def probably_alive(person, db,
     :param max_sib_age_diff: maximum sibling age difference, in years
     :param max_age_prob_alive: maximum age of a person, in years
     :param avg_generation_gap: average generation gap, in years
+    :param ranges: the estimated dates of all people, as returned by
+                   :func:`probably_alive_ranges`, to use instead of
+                   estimating the dates of the person again
     """
-    # First, get the real database to use all people
-    # for determining alive status:
-    birth, death, explain, relative = probably_alive_range(person, db,
-            max_sib_age_diff, max_age_prob_alive, avg_generation_gap)
+    if ranges is not None and person.handle in ranges:
+        birth, death, explain, relative = ranges[person.handle]
+    else:
+        # First, get the real database to use all people
+        # for determining alive status:
+        birth, death, explain, relative = probably_alive_range(person, db,
+                max_sib_age_diff, max_age_prob_alive, avg_generation_gap)
     if current_date is None:
         current_date = Today()
     LOG.debug("%s: b.%s, d.%s - %s".format(
@@ -531,6 +913,24 @@ def probably_alive_range(person, db,
                        max_age_prob_alive, avg_generation_gap)
     return pb.probably_alive_range(person)
 
+def probably_alive_ranges(db,
+                          max_sib_age_diff=None,
+                          max_age_prob_alive=None,
+                          avg_generation_gap=None):
+    """
+    Computes the estimated birth and death dates of all people at once.
+    This is much faster than calling probably_alive_range for each person.
+    Returns: a dictionary of (birth_date, death_date, explain_text,
+    related_person) by person handle, to pass to probably_alive.
+    """
+    from ..proxy.proxybase import ProxyDbBase
+    basedb = db
+    while isinstance(basedb, ProxyDbBase):
+        basedb = basedb.db
+    pb = ProbablyAlive(basedb, max_sib_age_diff,
+                       max_age_prob_alive, avg_generation_gap)
+    return pb.probably_alive_ranges()
+
 def update_constants():
     """
     Used to update the constants that are cached in this module.
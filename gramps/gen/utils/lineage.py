@@ -0,0 +1,173 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Ancestor and descendant lookups.
+
+The functions in this module walk the family graph breadth first, without
+recursion, and read the serialized data of people and families instead of
+building Person and Family objects. The cost of a lookup is proportional to
+the number of people it returns, and deep pedigrees do not run into the
+Python recursion limit.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+from collections import deque
+
+#-------------------------------------------------------------------------
+#
+# Positions in the serialized Person, Family and ChildRef tuples
+#
+#-------------------------------------------------------------------------
+_PERSON_FAMILY_LIST = 8
+_PERSON_PARENT_FAMILY_LIST = 9
+_FAMILY_FATHER = 2
+_FAMILY_MOTHER = 3
+_FAMILY_CHILD_REF_LIST = 4
+_CHILDREF_REF = 3
+
+#-------------------------------------------------------------------------
+#
+# Single step lookups
+#
+#-------------------------------------------------------------------------
+def get_parent_family_handles(db, handle):
+    """
+    Return the handles of the families in which the person is a child, the
+    main family first.
+    """
+    data = db.get_raw_person_data(handle)
+    return data[_PERSON_PARENT_FAMILY_LIST] if data else []
+
+def get_family_handles(db, handle):
+    """
+    Return the handles of the families in which the person is a parent.
+    """
+    data = db.get_raw_person_data(handle)
+    return data[_PERSON_FAMILY_LIST] if data else []
+
+def get_family_parent_handles(db, handle):
+    """
+    Return the handles of the father and mother of a family, leaving out
+    the ones that are not set. Return None if the family does not exist.
+    """
+    data = db.get_raw_family_data(handle)
+    if not data:
+        return None
+    return [parent for parent in (data[_FAMILY_FATHER], data[_FAMILY_MOTHER])
+            if parent]
+
+def get_family_child_handles(db, handle):
+    """
+    Return the handles of the children of a family.
+    """
+    data = db.get_raw_family_data(handle)
+    if not data:
+        return []
+    return [child_ref[_CHILDREF_REF]
+            for child_ref in data[_FAMILY_CHILD_REF_LIST]]
+
+def get_parent_handles(db, handle, main_only=True):
+    """
+    Return the handles of the parents of a person. If main_only is True,
+    only the main parent family is used.
+    """
+    families = get_parent_family_handles(db, handle)
+    if main_only:
+        families = families[:1]
+    parents = []
+    for family_handle in families:
+        parents.extend(get_family_parent_handles(db, family_handle) or [])
+    return parents
+
+def get_child_handles(db, handle):
+    """
+    Return the handles of the children of a person, in all of the families
+    in which the person is a parent.
+    """
+    children = []
+    for family_handle in get_family_handles(db, handle):
+        children.extend(get_family_child_handles(db, family_handle))
+    return children
+
+#-------------------------------------------------------------------------
+#
+# Lineage walks
+#
+#-------------------------------------------------------------------------
+def iter_ancestors(db, handles, min_generations=1, max_generations=None,
+                   main_only=True):
+    """
+    Yield (handle, generation) for the ancestors of the given people.
+
+    Parents are generation 1, grandparents generation 2, and so on; the
+    people themselves are generation 0 and are only yielded if
+    min_generations is 0.  A person is yielded once, with the smallest
+    generation that lies between min_generations and max_generations
+    (inclusive, None meaning no limit), if there is such a line of descent.
+
+    :param main_only: follow only the main parent family of each person.
+    """
+    return _walk(db, handles,
+                 lambda handle: get_parent_handles(db, handle, main_only),
+                 min_generations, max_generations)
+
+def iter_descendants(db, handles, min_generations=1, max_generations=None):
+    """
+    Yield (handle, generation) for the descendants of the given people.
+
+    Generations are counted as for :func:`iter_ancestors`, children being
+    generation 1.
+    """
+    return _walk(db, handles, lambda handle: get_child_handles(db, handle),
+                 min_generations, max_generations)
+
+def _walk(db, handles, step, min_gen, max_gen):
+    """
+    Breadth first walk of the family graph.
+
+    A state is a person together with the generation it was reached at,
+    where all generations of min_gen and above count as one. Every state
+    is visited once, so loops in the data end the walk, and the first
+    visit of a person at min_gen or above has the smallest such generation.
+    """
+    queue = deque()
+    seen = set()
+    for handle in handles:
+        if handle and (handle, 0) not in seen:
+            seen.add((handle, 0))
+            queue.append((handle, 0))
+    done = set()
+    while queue:
+        handle, gen = queue.popleft()
+        if gen >= min_gen and handle not in done:
+            done.add(handle)
+            yield handle, gen
+        if max_gen is not None and gen >= max_gen:
+            continue
+        next_gen = gen + 1
+        state_gen = min(next_gen, min_gen)
+        for next_handle in step(handle):
+            state = (next_handle, state_gen)
+            if state not in seen:
+                seen.add(state)
+                queue.append((next_handle, next_gen))
@@ -0,0 +1,149 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for alive.py """
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import random
+import unittest
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from gramps.gen.db.test.tree import Tree
+from gramps.gen.errors import DatabaseError
+from gramps.gen.lib import EventType, EventRoleType
+from gramps.gen.utils.alive import (ProbablyAlive, probably_alive,
+                                    probably_alive_ranges)
+
+EVENT_TYPES = [EventType.BIRTH, EventType.DEATH, EventType.BAPTISM,
+               EventType.BURIAL, EventType.CHRISTEN, EventType.CAUSE_DEATH,
+               EventType.OCCUPATION, EventType.MARRIAGE]
+
+def random_tree(seed, size):
+    """
+    A tree of people with random events, born in random families of
+    people listed before them.
+    """
+    rnd = random.Random(seed)
+    tree = Tree()
+    people = []
+    for number in range(size):
+        person = tree.person()
+        for count in range(rnd.choice([0, 0, 0, 1, 1, 2])):
+            if rnd.random() < 0.7:
+                ref = tree.event(rnd.choice(EVENT_TYPES),
+                                 year=rnd.randint(1600, 2000))
+            else:
+                ref = tree.event(rnd.choice(EVENT_TYPES), text='unknown')
+            if rnd.random() < 0.2:
+                ref.set_role(EventRoleType(EventRoleType.WITNESS))
+            person.add_event_ref(ref)
+            event = tree.db.event_map[ref.ref]
+            if event.type == EventType.BIRTH and person.birth_ref_index < 0:
+                person.set_birth_ref(ref)
+            elif event.type == EventType.DEATH and person.death_ref_index < 0:
+                person.set_death_ref(ref)
+        people.append(person)
+    for number in range(size // 3):
+        children = rnd.sample(people[1:], rnd.randint(1, 3))
+        first = min(people.index(child) for child in children)
+        family = tree.family(rnd.choice(people[:first]),
+                             rnd.choice(people[:first] + [None]), children)
+        if rnd.random() < 0.3:
+            family.add_event_ref(tree.event(EventType.MARRIAGE,
+                                            year=rnd.randint(1600, 2000)))
+    return tree
+
+class ProbablyAliveRangesTest(unittest.TestCase):
+
+    def assertSameRanges(self, db):
+        prob_alive = ProbablyAlive(db)
+        ranges = prob_alive.probably_alive_ranges()
+        self.assertEqual(len(ranges), len(db.person_map))
+        for person in db.iter_people():
+            expected = prob_alive.probably_alive_range(person)
+            found = ranges[person.handle]
+            for date1, date2 in zip(expected[:2], found[:2]):
+                if date1 is None:
+                    self.assertIsNone(date2)
+                else:
+                    self.assertTrue(date1.is_equal(date2))
+            self.assertEqual(expected[2], found[2])
+            self.assertEqual(expected[3] and expected[3].handle,
+                             found[3] and found[3].handle)
+
+    def test_random_trees(self):
+        for seed in range(20):
+            self.assertSameRanges(random_tree(seed, 60).db)
+
+    def test_evidence(self):
+        tree = Tree()
+        grandfather = tree.person(birth=1800)
+        grandmother = tree.person()
+        father = tree.person()
+        mother = tree.person()
+        uncle = tree.person(death=1890)
+        child = tree.person()
+        grandchild = tree.person(birth=1900)
+        tree.family(grandfather, grandmother, [father, uncle])
+        tree.family(father, mother, [child])
+        tree.family(child, None, [grandchild])
+        ranges = probably_alive_ranges(tree.db)
+        birth, death, explain, relative = ranges[child.handle]
+        self.assertEqual(birth.get_year(), 1880)
+        self.assertEqual(explain, "descendant birth date")
+        self.assertEqual(relative.handle, grandchild.handle)
+        birth, death, explain, relative = ranges[father.handle]
+        self.assertEqual(explain, "sibling death date")
+        self.assertEqual(ranges[mother.handle][2],
+                         "a spouse's birth-related date, sibling death date")
+        self.assertSameRanges(tree.db)
+
+    def test_loop(self):
+        tree = Tree()
+        father = tree.person()
+        son = tree.person()
+        tree.family(father, None, [son])
+        tree.family(son, None, [father])
+        dated = tree.person(birth=1900)
+        ranges = probably_alive_ranges(tree.db)
+        self.assertNotIn(father.handle, ranges)
+        self.assertEqual(ranges[dated.handle][3].handle, dated.handle)
+        self.assertRaises(DatabaseError, probably_alive, father, tree.db,
+                          ranges=ranges)
+
+    def test_probably_alive(self):
+        tree = Tree()
+        dead = tree.person(birth=1700)
+        unknown = tree.person()
+        ranges = probably_alive_ranges(tree.db)
+        self.assertFalse(probably_alive(dead, tree.db, ranges=ranges))
+        self.assertTrue(probably_alive(unknown, tree.db, ranges=ranges))
+        self.assertEqual(probably_alive(dead, tree.db, return_range=True,
+                                        ranges=ranges)[1:4],
+                         probably_alive(dead, tree.db, return_range=True)[1:4])
+
+if __name__ == "__main__":
+    unittest.main()
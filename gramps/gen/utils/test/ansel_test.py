@@ -0,0 +1,82 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for ansel.py """
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import codecs
+import unittest
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from gramps.gen.utils import ansel
+
+class AnselTest(unittest.TestCase):
+
+    def test_one_byte(self):
+        for code, char in ansel._ONE_BYTE.items():
+            data = bytes([code])
+            self.assertEqual(data.decode('ansel'), char)
+            self.assertEqual(char.encode('ansel'), data)
+
+    def test_two_byte(self):
+        for data, char in ansel._TWO_BYTE.items():
+            self.assertEqual(data.decode('ansel'), char)
+            self.assertEqual(char.encode('ansel'), data)
+
+    def test_combiners(self):
+        for code, char in ansel._COMBINERS.items():
+            data = bytes([code]) + b'q'
+            self.assertEqual(data.decode('ansel'), 'q' + char)
+            self.assertEqual(('q' + char).encode('ansel'), data)
+            # combining forms that can't be combined are dropped
+            self.assertEqual((bytes([code]) + b'\n').decode('ansel'), '\n')
+            self.assertEqual(bytes([code]).decode('ansel'), '')
+
+    def test_ascii(self):
+        self.assertEqual(b'0 HEAD\r\n1 NAME\t\x7f\n'.decode('ansel'),
+                         '0 HEAD \n1 NAME  \n')
+        self.assertEqual(b'\x1b\x80\xff'.decode('ansel'), '\x1b\ufffd\ufffd')
+
+    def test_round_trip(self):
+        text = 'Renée Łukasiewicz Æø Jürgen ' \
+               'Dvořák šư\n'
+        data = text.encode('ansel')
+        self.assertEqual(data.decode('ansel'), text)
+        self.assertEqual(ansel.ansel_decode(bytearray(data)),
+                         (text, len(data)))
+
+    def test_encode_errors(self):
+        self.assertRaises(UnicodeEncodeError, '中'.encode, 'ansel')
+        self.assertEqual('a中b'.encode('ansel', 'replace'), b'a?b')
+        self.assertEqual('a中b'.encode('ansel', 'ignore'), b'ab')
+
+    def test_incremental(self):
+        decoder = codecs.getincrementaldecoder('ansel')()
+        self.assertEqual(decoder.decode(b'M\xe8'), 'M')
+        self.assertEqual(decoder.decode(b'uller', final=True), 'üller')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for lineage.py """
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import unittest
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from gramps.gen.lib import Person, Family, ChildRef
+from gramps.gen.utils.lineage import iter_ancestors, iter_descendants
+
+class RawDb(object):
+    """
+    Minimal database giving access to the serialized people and families.
+    """
+    def __init__(self):
+        self.people = {}
+        self.families = {}
+
+    def add_person(self, handle):
+        person = Person()
+        person.set_handle(handle)
+        self.people[handle] = person
+
+    def add_family(self, handle, father, mother, children):
+        family = Family()
+        family.set_handle(handle)
+        family.set_father_handle(father)
+        family.set_mother_handle(mother)
+        for parent in (father, mother):
+            if parent:
+                self.people[parent].add_family_handle(handle)
+        for child in children:
+            child_ref = ChildRef()
+            child_ref.set_reference_handle(child)
+            family.add_child_ref(child_ref)
+            self.people[child].add_parent_family_handle(handle)
+        self.families[handle] = family
+
+    def get_raw_person_data(self, handle):
+        if handle in self.people:
+            return self.people[handle].serialize()
+        return None
+
+    def get_raw_family_data(self, handle):
+        if handle in self.families:
+            return self.families[handle].serialize()
+        return None
+
+class LineageTest(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Build a pedigree with a cousin marriage: A and B are the parents of
+        C and D, D and E the parents of F, C and F the parents of G, and G
+        the father of H.
+        """
+        self.db = RawDb()
+        for handle in "ABCDEFGH":
+            self.db.add_person(handle)
+        self.db.add_family("F1", "A", "B", ["C", "D"])
+        self.db.add_family("F2", "D", "E", ["F"])
+        self.db.add_family("F3", "C", "F", ["G"])
+        self.db.add_family("F4", "G", None, ["H"])
+
+    def ancestors(self, handle, *args):
+        return dict(iter_ancestors(self.db, [handle], *args))
+
+    def descendants(self, handle, *args):
+        return dict(iter_descendants(self.db, [handle], *args))
+
+    def test_ancestors_get_smallest_generation(self):
+        self.assertEqual(self.ancestors("G"),
+                         {"C": 1, "F": 1, "D": 2, "E": 2, "A": 2, "B": 2})
+
+    def test_ancestors_inclusive(self):
+        self.assertEqual(self.ancestors("F", 0),
+                         {"F": 0, "D": 1, "E": 1, "A": 2, "B": 2})
+
+    def test_ancestors_generation_limits(self):
+        self.assertEqual(set(self.ancestors("H", 1, 2)), set("GCF"))
+        # A is reached at generation 3 through C and 4 through F
+        self.assertEqual(self.ancestors("H", 4), {"A": 4, "B": 4})
+
+    def test_descendants(self):
+        self.assertEqual(self.descendants("A"),
+                         {"C": 1, "D": 1, "F": 2, "G": 2, "H": 3})
+        self.assertEqual(set(self.descendants("A", 3)), set("GH"))
+
+    def test_loop_ends(self):
+        self.db.add_family("F5", "H", None, ["A"])
+        self.assertEqual(set(self.ancestors("A")), set("ABCDEFGH"))
+
+if __name__ == "__main__":
+    unittest.main()
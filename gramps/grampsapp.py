@@ -30,10 +30,13 @@
 import sys
 import os
 import signal
+import time
 
 import logging
 
 LOG = logging.getLogger(".")
+STARTUP = logging.getLogger(".startup")
+START_TIME = time.time()
 
 from subprocess import Popen, PIPE
 
@@ -382,6 +385,8 @@ def run():
     argpars = ArgParser(argv_copy)
 
     # Calls to LOG must be after setup_logging() and ArgParser() 
+    STARTUP.debug("Started and parsed the arguments in %.3f seconds",
+                  time.time() - START_TIME)
     LOG = logging.getLogger(".locale")
     LOG.debug("Encoding: %s", glocale.encoding)
     LOG.debug("Translating Gramps to %s", glocale.language[0])
@@ -70,6 +70,9 @@ INVALID_DATE_FORMAT = config.get('preferences.invalid-date-format')
 #
 #-------------------------------------------------------------------------
 class EventModel(FlatBaseModel):
+    sort_table = 'event'
+    # description, ID, type, date, private and last change
+    indexed_columns = (0, 1, 2, 3, 5, 7)
 
     def __init__(self, db, scol=0, order=Gtk.SortType.ASCENDING, search=None,
                  skip=set(), sort_map=None):
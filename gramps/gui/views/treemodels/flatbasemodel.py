@@ -54,6 +54,7 @@ It keeps a FlatNodeMap, and obtains data from database as needed
 import logging
 import bisect
 import time
+import hashlib
 
 _LOG = logging.getLogger(".gui.basetreemodel")
     
@@ -73,6 +74,7 @@ from gi.repository import Gtk
 from gramps.gen.filters import SearchFilter, ExactSearchFilter
 from gramps.gen.constfunc import conv_to_unicode, handle2internal
 from gramps.gen.const import GRAMPS_LOCALE as glocale
+from gramps.gen.display.name import displayer as name_displayer
 
 #-------------------------------------------------------------------------
 #
@@ -450,6 +452,13 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel):
             so as to have localized sort
     """
 
+    # The sort keys of the columns of smap in indexed_columns are stored in
+    # the database, in an index for sort_table (the table the rows come
+    # from). Only columns whose sort key depends on nothing but the data of
+    # the row itself may be listed.
+    sort_table = None
+    indexed_columns = ()
+
     def __init__(self, db, scol=0, order=Gtk.SortType.ASCENDING,
                  search=None, skip=set(),
                  sort_map=None):
@@ -475,6 +484,7 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel):
         # get the function that maps data to sort_keys
         self.sort_func = lambda x: glocale.sort_key(self.smap[col](x))
         self.sort_col = scol
+        self.sort_index = self._sort_index_name(col)
         self.skip = skip
         self._in_build = False
 
@@ -571,13 +581,52 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel):
         be shown. 
         This list is sorted ascending, via localized string sort. 
         """
+        if self.sort_index:
+            stored = self.db.get_sort_key_index(self.sort_table,
+                                                self.sort_index)
+            if stored is not None:
+                return self._update_sort_keys(*stored)
+
         # use cursor as a context manager
         with self.gen_cursor() as cursor:   
             #loop over database and store the sort field, and the handle
             srt_keys=[(self.sort_func(data), key.decode('utf8'))
                       for key, data in cursor]
             srt_keys.sort()
+        if self.sort_index:
+            self.db.set_sort_key_index(self.sort_table, self.sort_index,
+                                       srt_keys)
+        return srt_keys
+
+    def _update_sort_keys(self, srt_keys, changed):
+        """
+        Bring a stored (sort_key, handle) list up to date, given the handles
+        of the rows that were added, changed or deleted since it was stored.
+        """
+        if not changed:
             return srt_keys
+        srt_keys = [key for key in srt_keys if key[1] not in changed]
+        for handle in changed:
+            data = self.map(handle)
+            if data is not None:
+                srt_keys.append((self.sort_func(data), handle))
+        srt_keys.sort()
+        self.db.set_sort_key_index(self.sort_table, self.sort_index, srt_keys)
+        return srt_keys
+
+    def _sort_index_name(self, col):
+        """
+        Return the name of the stored sort key index for sorting on model
+        column col, or None if the column has no index. The name changes
+        with the settings that the sort keys depend on.
+        """
+        if self.sort_table is None or col not in self.indexed_columns:
+            return None
+        settings = (self.__class__.__name__, col, glocale.lang,
+                    getattr(glocale, 'collation', None),
+                    name_displayer.get_default_format(),
+                    name_displayer.get_name_format(True, False, False))
+        return hashlib.md5(repr(settings).encode('utf-8')).hexdigest()
 
     def _rebuild_search(self, ignore=None):
         """ function called when view must be build, given a search text
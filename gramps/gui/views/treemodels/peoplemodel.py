@@ -54,12 +54,13 @@ _LOG = logging.getLogger(".")
 #-------------------------------------------------------------------------
 from gramps.gen.const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
-from gramps.gen.lib import (Name, EventRef, EventType, EventRoleType,
-                            FamilyRelType, ChildRefType, NoteType)
 from gramps.gen.display.name import displayer as name_displayer
-from gramps.gen.display.place import displayer as place_displayer
-from gramps.gen.datehandler import format_time, get_date, get_date_valid
-from .lru import LRU
+from gramps.gen.datehandler import format_time
+from gramps.gen.db.summary import (PersonSummary, SUMMARY_BIRTH,
+                                   SUMMARY_DEATH, SUMMARY_BIRTH_PLACE,
+                                   SUMMARY_DEATH_PLACE, SUMMARY_SPOUSES,
+                                   SUMMARY_PARENTS, SUMMARY_MARRIAGES,
+                                   SUMMARY_CHILDREN, SUMMARY_TODO)
 from .flatbasemodel import FlatBaseModel
 from .treebasemodel import TreeBaseModel
 from gramps.gen.config import config
@@ -96,9 +97,6 @@ class PeopleBaseModel(object):
     """
     _GENDER = [ _('female'), _('male'), _('unknown') ]
 
-    # LRU cache size
-    _CACHE_SIZE = 250
-
     def __init__(self, db):
         """
         Initialize the model building the initial data
@@ -144,13 +142,9 @@ class PeopleBaseModel(object):
             self.column_tag_color,
             ]
 
-        #columns are accessed on every mouse over, so it is worthwhile to
-        #cache columns visible in one screen to avoid expensive database 
-        #lookup of derived values
-        self.lru_name  = LRU(PeopleBaseModel._CACHE_SIZE)
-        self.lru_spouse = LRU(PeopleBaseModel._CACHE_SIZE)
-        self.lru_bdate = LRU(PeopleBaseModel._CACHE_SIZE)
-        self.lru_ddate = LRU(PeopleBaseModel._CACHE_SIZE)
+        #the values derived from other objects are read from the summary
+        #table of the people, which the database keeps up to date
+        self.summary = self._get_summary()
 
     def destroy(self):
         """
@@ -161,7 +155,7 @@ class PeopleBaseModel(object):
         self.map = None
         self.fmap = None
         self.smap = None
-        self.clear_local_cache()
+        self.summary = None
 
     def color_column(self):
         """
@@ -169,30 +163,23 @@ class PeopleBaseModel(object):
         """
         return 15
 
+    def _get_summary(self):
+        """
+        Return the summary table of the people of the database, or a table
+        of this model if the database does not keep one.
+        """
+        summary = self.db.get_person_summary()
+        if summary is None:
+            summary = PersonSummary(self.db)
+        return summary
+
     def clear_local_cache(self, handle=None):
-        """ Clear the LRU cache """
+        """ Clear the summary rows """
         if handle:
-            try:
-                del self.lru_name[handle]
-            except KeyError:
-                pass
-            try:
-                del self.lru_spouse[handle]
-            except KeyError:
-                pass
-            try:
-                del self.lru_bdate[handle]
-            except KeyError:
-                pass
-            try:
-                del self.lru_ddate[handle]
-            except KeyError:
-                pass
-        else:
-            self.lru_name.clear()
-            self.lru_spouse.clear()
-            self.lru_bdate.clear()
-            self.lru_ddate.clear()
+            self.summary.discard([handle])
+        elif self.db is not None:
+            # the database summary may have to follow changed settings
+            self.summary = self._get_summary()
 
     def on_get_n_columns(self):
         """ Return the number of columns in the model """
@@ -206,27 +193,14 @@ class PeopleBaseModel(object):
         return name
 
     def column_name(self, data):
-        handle = data[0]
-        if handle in self.lru_name:
-            name = self.lru_name[handle]
-        else:
-            name = name_displayer.raw_display_name(data[COLUMN_NAME])
-            # internally we work with utf-8 for python 2.7
-            if not isinstance(name, str):
-                name = name.encode('utf-8')
-            if not self._in_build:
-                self.lru_name[handle] = name
+        name = name_displayer.raw_display_name(data[COLUMN_NAME])
+        # internally we work with utf-8 for python 2.7
+        if not isinstance(name, str):
+            name = name.encode('utf-8')
         return name
 
     def column_spouse(self, data):
-        handle = data[0]
-        if handle in self.lru_spouse:
-            value = self.lru_spouse[handle]
-        else:
-            value = self._get_spouse_data(data)
-            if not self._in_build:
-                self.lru_spouse[handle] = value
-        return value
+        return self.summary.get(data[0])[SUMMARY_SPOUSES]
 
     def column_private(self, data):
         if data[COLUMN_PRIV]:
@@ -234,22 +208,6 @@ class PeopleBaseModel(object):
         else:
             # There is a problem returning None here.
             return ''
-    
-    def _get_spouse_data(self, data):
-        spouses_names = ""
-        for family_handle in data[COLUMN_FAMILY]:
-            family = self.db.get_family_from_handle(family_handle)
-            for spouse_id in [family.get_father_handle(),
-                              family.get_mother_handle()]:
-                if not spouse_id:
-                    continue
-                if spouse_id == data[0]:
-                    continue
-                spouse = self.db.get_person_from_handle(spouse_id)
-                if spouses_names:
-                    spouses_names += ", "
-                spouses_names += name_displayer.display(spouse)
-        return spouses_names
 
     def column_id(self, data):
         return data[COLUMN_ID]
@@ -264,232 +222,80 @@ class PeopleBaseModel(object):
         return PeopleBaseModel._GENDER[data[COLUMN_GENDER]]
 
     def column_birth_day(self, data):
-        handle = data[0]
-        if handle in self.lru_bdate:
-            value = self.lru_bdate[handle]
-        else:
-            value = self._get_birth_data(data, False)
-            if not self._in_build:
-                self.lru_bdate[handle] = value
-        return value
-        
+        return self._get_date(self.summary.get(data[0])[SUMMARY_BIRTH], False)
+
     def sort_birth_day(self, data):
-        handle = data[0]
-        return self._get_birth_data(data, True)
-
-    def _get_birth_data(self, data, sort_mode):
-        index = data[COLUMN_BIRTH]
-        if index != -1:
-            try:
-                local = data[COLUMN_EVENT][index]
-                b = EventRef()
-                b.unserialize(local)
-                birth = self.db.get_event_from_handle(b.ref)
-                if sort_mode:
-                    retval = "%09d" % birth.get_date_object().get_sort_value()
-                else:
-                    date_str = get_date(birth)
-                    if date_str != "":
-                        retval = cgi.escape(date_str)
-                if not get_date_valid(birth):
-                    return invalid_date_format % retval
-                else:
-                    return retval
-            except:
-                return ''
-        
-        for event_ref in data[COLUMN_EVENT]:
-            er = EventRef()
-            er.unserialize(event_ref)
-            event = self.db.get_event_from_handle(er.ref)
-            etype = event.get_type()
-            date_str = get_date(event)
-            if (etype in [EventType.BAPTISM, EventType.CHRISTEN]
-                and er.get_role() == EventRoleType.PRIMARY
-                and date_str != ""):
-                if sort_mode:
-                    retval = "%09d" % event.get_date_object().get_sort_value()
-                else:
-                    retval = "<i>%s</i>" % cgi.escape(date_str)
-                if not get_date_valid(event):
-                    return invalid_date_format % retval
-                else:
-                    return retval
-        
-        return ""
+        return self._get_date(self.summary.get(data[0])[SUMMARY_BIRTH], True)
 
     def column_death_day(self, data):
-        handle = data[0]
-        if handle in self.lru_ddate:
-            value = self.lru_ddate[handle]
-        else:
-            value = self._get_death_data(data, False)
-            if not self._in_build:
-                self.lru_ddate[handle] = value
-        return value
-        
+        return self._get_date(self.summary.get(data[0])[SUMMARY_DEATH], False)
+
     def sort_death_day(self, data):
-        handle = data[0]
-        return self._get_death_data(data, True)
-
-    def _get_death_data(self, data, sort_mode):
-        index = data[COLUMN_DEATH]
-        if index != -1:
-            try:
-                local = data[COLUMN_EVENT][index]
-                ref = EventRef()
-                ref.unserialize(local)
-                event = self.db.get_event_from_handle(ref.ref)
-                if sort_mode:
-                    retval = "%09d" % event.get_date_object().get_sort_value()
-                else:
-                    date_str = get_date(event)
-                    if date_str != "":
-                        retval = cgi.escape(date_str)
-                if not get_date_valid(event):
-                    return invalid_date_format % retval
-                else:
-                    return retval
-            except:
-                return ''
-        
-        for event_ref in data[COLUMN_EVENT]:
-            er = EventRef()
-            er.unserialize(event_ref)
-            event = self.db.get_event_from_handle(er.ref)
-            etype = event.get_type()
-            date_str = get_date(event)
-            if (etype in [EventType.BURIAL,
-                          EventType.CREMATION,
-                          EventType.CAUSE_DEATH]
-                and er.get_role() == EventRoleType.PRIMARY
-                and date_str):
-                if sort_mode:
-                    retval = "%09d" % event.get_date_object().get_sort_value()
-                else:
-                    retval = "<i>%s</i>" % cgi.escape(date_str)
-                if not get_date_valid(event):
-                    return invalid_date_format % retval
-                else:
-                    return retval
-        return ""
+        return self._get_date(self.summary.get(data[0])[SUMMARY_DEATH], True)
+
+    def _get_date(self, date, sort_mode):
+        """
+        Return the text or the sort key of a birth or death date of the
+        summary table, in italics for a fallback date.
+        """
+        if date is None:
+            return ''
+        (sortval, date_str, valid, fallback) = date
+        if sort_mode:
+            retval = "%09d" % sortval
+        elif date_str == "":
+            return ''
+        elif fallback:
+            retval = "<i>%s</i>" % cgi.escape(date_str)
+        else:
+            retval = cgi.escape(date_str)
+        if not valid:
+            return invalid_date_format % retval
+        else:
+            return retval
 
     def column_birth_place(self, data):
-        index = data[COLUMN_BIRTH]
-        if index != -1:
-            try:
-                local = data[COLUMN_EVENT][index]
-                br = EventRef()
-                br.unserialize(local)
-                event = self.db.get_event_from_handle(br.ref)
-                if event:
-                    place_title = place_displayer.display_event(self.db, event)
-                    if place_title:
-                        return cgi.escape(place_title)
-            except:
-                return ''
-        
-        for event_ref in data[COLUMN_EVENT]:
-            er = EventRef()
-            er.unserialize(event_ref)
-            event = self.db.get_event_from_handle(er.ref)
-            etype = event.get_type()
-            if (etype in [EventType.BAPTISM, EventType.CHRISTEN] and
-                er.get_role() == EventRoleType.PRIMARY):
-
-                    place_title = place_displayer.display_event(self.db, event)
-                    if place_title:
-                        return "<i>%s</i>" % cgi.escape(place_title)
-        return ""
+        return self._get_place(self.summary.get(data[0])[SUMMARY_BIRTH_PLACE])
 
     def column_death_place(self, data):
-        index = data[COLUMN_DEATH]
-        if index != -1:
-            try:
-                local = data[COLUMN_EVENT][index]
-                dr = EventRef()
-                dr.unserialize(local)
-                event = self.db.get_event_from_handle(dr.ref)
-                if event:
-                    place_title = place_displayer.display_event(self.db, event)
-                    if place_title:
-                        return cgi.escape(place_title)
-            except:
-                return ''
-        
-        for event_ref in data[COLUMN_EVENT]:
-            er = EventRef()
-            er.unserialize(event_ref)
-            event = self.db.get_event_from_handle(er.ref)
-            etype = event.get_type()
-            if (etype in [EventType.BURIAL, EventType.CREMATION,
-                          EventType.CAUSE_DEATH]
-                and er.get_role() == EventRoleType.PRIMARY):
-
-                    place_title = place_displayer.display_event(self.db, event)
-                    if place_title:
-                        return "<i>%s</i>" % cgi.escape(place_title)
-        return ""
-
-    def _get_parents_data(self, data):
-        parents = 0
-        if data[COLUMN_PARENT]:
-            family = self.db.get_family_from_handle(data[COLUMN_PARENT][0])
-            if family.get_father_handle():
-                parents += 1
-            if family.get_mother_handle():
-                parents += 1
-        return parents
-
-    def _get_marriages_data(self, data):
-        marriages = 0
-        for family_handle in data[COLUMN_FAMILY]:
-            family = self.db.get_family_from_handle(family_handle)
-            if int(family.get_relationship()) == FamilyRelType.MARRIED:
-                marriages += 1
-        return marriages
-
-    def _get_children_data(self, data):
-        children = 0
-        for family_handle in data[COLUMN_FAMILY]:
-            family = self.db.get_family_from_handle(family_handle)
-            for child_ref in family.get_child_ref_list():
-                if (child_ref.get_father_relation() == ChildRefType.BIRTH and 
-                    child_ref.get_mother_relation() == ChildRefType.BIRTH):
-                    children += 1
-        return children
-
-    def _get_todo_data(self, data):
-        todo = 0
-        for note_handle in data[COLUMN_NOTES]:
-            note = self.db.get_note_from_handle(note_handle)
-            if int(note.get_type()) == NoteType.TODO:
-                todo += 1
-        return todo
+        return self._get_place(self.summary.get(data[0])[SUMMARY_DEATH_PLACE])
+
+    def _get_place(self, place):
+        """
+        Return the text of a birth or death place of the summary table, in
+        italics for the place of a fallback event.
+        """
+        if place is None:
+            return ''
+        (place_title, fallback) = place
+        if fallback:
+            return "<i>%s</i>" % cgi.escape(place_title)
+        else:
+            return cgi.escape(place_title)
 
     def column_parents(self, data):
-        return str(self._get_parents_data(data))
+        return str(self.summary.get(data[0])[SUMMARY_PARENTS])
 
     def sort_parents(self, data):
-        return '%06d' % self._get_parents_data(data)
+        return '%06d' % self.summary.get(data[0])[SUMMARY_PARENTS]
 
     def column_marriages(self, data):
-        return str(self._get_marriages_data(data))
+        return str(self.summary.get(data[0])[SUMMARY_MARRIAGES])
 
     def sort_marriages(self, data):
-        return '%06d' % self._get_marriages_data(data)
+        return '%06d' % self.summary.get(data[0])[SUMMARY_MARRIAGES]
 
     def column_children(self, data):
-        return str(self._get_children_data(data))
+        return str(self.summary.get(data[0])[SUMMARY_CHILDREN])
 
     def sort_children(self, data):
-        return '%06d' % self._get_children_data(data)
+        return '%06d' % self.summary.get(data[0])[SUMMARY_CHILDREN]
 
     def column_todo(self, data):
-        return str(self._get_todo_data(data))
+        return str(self.summary.get(data[0])[SUMMARY_TODO])
 
     def sort_todo(self, data):
-        return '%06d' % self._get_todo_data(data)
+        return '%06d' % self.summary.get(data[0])[SUMMARY_TODO]
 
     def get_tag_name(self, tag_handle):
         """
@@ -523,6 +329,10 @@ class PersonListModel(PeopleBaseModel, FlatBaseModel):
     """
     Listed people model.
     """
+    sort_table = 'person'
+    # name, ID, gender, private and last change
+    indexed_columns = (0, 1, 2, 12, 14)
+
     def __init__(self, db, scol=0, order=Gtk.SortType.ASCENDING, search=None,
                  skip=set(), sort_map=None):
         PeopleBaseModel.__init__(self, db)
@@ -530,7 +340,7 @@ class PersonListModel(PeopleBaseModel, FlatBaseModel):
                                order=order, sort_map=sort_map)
 
     def clear_cache(self, handle=None):
-        """ Clear the LRU cache """
+        """ Clear the summary rows """
         PeopleBaseModel.clear_local_cache(self, handle)
 
     def destroy(self):
@@ -544,6 +354,8 @@ class PersonTreeModel(PeopleBaseModel, TreeBaseModel):
     """
     Hierarchical people model.
     """
+    lazy_groups = True
+
     def __init__(self, db, scol=0, order=Gtk.SortType.ASCENDING, search=None,
                  skip=set(), sort_map=None):
 
@@ -565,7 +377,7 @@ class PersonTreeModel(PeopleBaseModel, TreeBaseModel):
         self.number_items = self.db.get_number_of_people
 
     def clear_cache(self, handle=None):
-        """ Clear the LRU cache 
+        """ Clear the LRU cache and the summary rows
         overwrite of base methods
         """
         TreeBaseModel.clear_cache(self, handle)
@@ -579,6 +391,12 @@ class PersonTreeModel(PeopleBaseModel, TreeBaseModel):
 
     def column_header(self, node):
         return node.name
+
+    def get_group(self, data):
+        """
+        Return the name of the surname group of a person.
+        """
+        return name_displayer.name_grouping_data(self.db, data[COLUMN_NAME])
     
     def add_row(self, handle, data):
         """
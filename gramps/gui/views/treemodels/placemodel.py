@@ -211,6 +211,11 @@ class PlaceListModel(PlaceBaseModel, FlatBaseModel):
     """
     Flat place model.  (Original code in PlaceBaseModel).
     """
+    sort_table = 'place'
+    # name, ID, title, type, code, latitude, longitude, private and last
+    # change
+    indexed_columns = (0, 1, 2, 3, 4, 5, 6, 7, 9)
+
     def __init__(self, db, scol=0, order=Gtk.SortType.ASCENDING, search=None,
                  skip=set(), sort_map=None):
 
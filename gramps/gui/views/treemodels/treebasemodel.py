@@ -32,6 +32,7 @@ This module provides the model that is used for all hierarchical treeviews.
 # Standard python modules
 #
 #-------------------------------------------------------------------------
+import sys
 import time
 import logging
 
@@ -272,10 +273,22 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel):
     has_secondary  :  If True, the model contains two Gramps object types.
                       The suffix '2' is appended to variables relating to the
                       secondary object type.
+
+    Lazy building:
+    Models with one group level can set lazy_groups to True and implement
+    get_group. When the view is built, only the group nodes are then
+    created, and the handles of the rows of each group are kept in a list.
+    The nodes of the rows of a group are created with add_row the first
+    time the children of the group are asked for, which is when the group
+    is expanded in the view, or when one of its rows is looked up by
+    handle.
     """
 
     # LRU cache size
     _CACHE_SIZE = 250
+
+    # Build the rows of a group only when the group is expanded
+    lazy_groups = False
    
     def __init__(self, db,
                     search=None, skip=set(),
@@ -309,6 +322,9 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel):
         self.tree = {}
         self.nodemap = NodeMap()
         self.handle2node = {}
+        # rows not built yet: group nodeid -> handles, and handle -> nodeid
+        self.pending = {}
+        self.pending_handles = {}
 
         #GTK3 We leak ref, yes??
         #self.set_property("leak_references", False)
@@ -358,6 +374,8 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel):
             self.nodemap.destroy()
         
         self.nodemap = None
+        self.pending = None
+        self.pending_handles = None
         self.rebuild_data = None
         self._build_data = None
         self.search = None
@@ -428,6 +446,8 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel):
         """
         self.tree.clear()
         self.handle2node.clear()
+        self.pending.clear()
+        self.pending_handles.clear()
         self.stamp += 1
         self.nodemap.clear()
         #start with creating the new iters
@@ -520,6 +540,9 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel):
 
         _LOG.debug(self.__class__.__name__ + ' rebuild_data ' +
                     str(time.clock() - cput) + ' sec')
+        if _LOG.isEnabledFor(logging.DEBUG):
+            _LOG.debug("%s memory: %s" % (self.__class__.__name__,
+                                          self.get_memory_stats()))
 
     def _rebuild_search(self, dfilter, dfilter2, skip):
         """
@@ -531,7 +554,7 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel):
         items = self.number_items()
         _LOG.debug("rebuild search primary")
         self.__rebuild_search(dfilter, skip, items, 
-                              self.gen_cursor, self.add_row)
+                              self.gen_cursor, self.__add_func())
 
         if self.has_secondary:
             _LOG.debug("rebuild search secondary")
@@ -579,7 +602,7 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel):
             items = self.number_items()
             _LOG.debug("rebuild filter primary")
             self.__rebuild_filter(dfilter, skip, items, 
-                                  self.gen_cursor, self.map, self.add_row)
+                                  self.gen_cursor, self.map, self.__add_func())
         else:
             # The tree has both primary and secondary data. The navigation type
             # (navtype) which governs the filters that are offered, is for the
@@ -643,6 +666,67 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel):
         status_col.end()
         status.end()
         
+    def __add_func(self):
+        """
+        Return the function that adds the primary rows during a rebuild.
+        """
+        if self.lazy_groups and not self.has_secondary:
+            return self.add_pending_row
+        return self.add_row
+
+    def add_pending_row(self, handle, data):
+        """
+        Add the group node of a row, leaving the row itself to be built
+        when the group is expanded.
+        """
+        group = self.get_group(data)
+        if group not in self.tree:
+            self.add_node(None, group, group, None, add_parent=False)
+        nodeid = id(self.tree[group])
+        self.pending.setdefault(nodeid, []).append(handle)
+        self.pending_handles[handle] = nodeid
+
+    def build_pending(self, node):
+        """
+        Build the rows of a group node that were left for later.
+        """
+        handles = self.pending.pop(id(node), None)
+        if handles is None:
+            return
+        in_build = self._in_build
+        self._in_build = True
+        for handle in handles:
+            del self.pending_handles[handle]
+            data = self.map(handle)
+            if data:
+                self.add_row(handle, data)
+        self._in_build = in_build
+
+    def get_group(self, data):
+        """
+        Return the name of the group of the row with the given data. Must be
+        implemented by models that set lazy_groups.
+        """
+        raise NotImplementedError
+
+    def get_memory_stats(self):
+        """
+        Return a dictionary with the number of nodes, the number of rows that
+        are not built yet, and an estimate of the bytes used by the nodes
+        and the maps of the model.
+        """
+        nodes = self.nodemap.id2node.values()
+        size = sum(sys.getsizeof(node) + sys.getsizeof(node.children)
+                   for node in nodes)
+        for table in (self.tree, self.handle2node, self.nodemap.id2node,
+                      self.pending, self.pending_handles):
+            size += sys.getsizeof(table)
+        size += sum(sys.getsizeof(handles)
+                    for handles in self.pending.values())
+        return {'nodes': len(self.nodemap.id2node),
+                'pending': len(self.pending_handles),
+                'bytes': size}
+
     def add_node(self, parent, child, sortkey, handle, add_parent=True,
                  secondary=False):
         """
@@ -671,6 +755,8 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel):
                                secondary)
         else:
             parent_node = self.tree[parent]
+            if not self._in_build and id(parent_node) in self.pending:
+                self.build_pending(parent_node)
             child_node = Node(child, id(parent_node), sortkey, handle,
                               secondary)
             parent_node.add_child(child_node, self.nodemap)
@@ -877,6 +963,9 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel):
         """
         Get the node for a handle.
         """
+        nodeid = self.pending_handles.get(handle)
+        if nodeid is not None:
+            self.build_pending(self.nodemap.node(nodeid))
         return self.handle2node.get(handle)
 
     def get_iter_from_handle(self, handle):
@@ -1053,6 +1142,7 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel):
             nodeid = id(self.tree[None])
         else:
             nodeparent = self.get_node_from_iter(iterparent)
+            self.build_pending(nodeparent)
             if nodeparent.children:
                 nodeid = nodeparent.children[-1 if self.__reverse else 0][1]
             else:
@@ -1064,7 +1154,7 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel):
         Find if the given node has any children.
         """
         node = self.get_node_from_iter(iter)
-        return True if node.children else False
+        return True if node.children or id(node) in self.pending else False
 
     def do_iter_n_children(self, iter):
         """
@@ -1074,6 +1164,7 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel):
             node = self.tree[None]
         else:
             node = self.get_node_from_iter(iter)
+            self.build_pending(node)
         return len(node.children)
 
     def do_iter_nth_child(self, iterparent, index):
@@ -1084,6 +1175,7 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel):
             node = self.tree[None]
         else:
             node = self.get_node_from_iter(iterparent)
+            self.build_pending(node)
         if node.children:
             if len(node.children) > index:
                 _index = (-index - 1) if self.__reverse else index
@@ -57,6 +57,9 @@ from gramps.gen.utils.place import conv_lat_lon
 from gramps.gen.utils.location import get_main_location
 from gramps.gen.display.place import displayer as place_displayer
 
+# size in bytes of the buffer of the output file
+BUFFER_SIZE = 1024 * 1024
+
 #-------------------------------------------------------------------------
 #
 # GEDCOM tags representing attributes that may take a parameter, value or
@@ -126,25 +129,33 @@ QUALITY_MAP = {
 
 #-------------------------------------------------------------------------
 #
-# sort_handles_by_id
+# iter_sorted_by_id
 #
 #-------------------------------------------------------------------------
-def sort_handles_by_id(handle_list, handle_to_object):
+def iter_sorted_by_id(dbase, obj_name):
     """
-    Sort a list of handles by the Gramps ID. 
-    
-    The function that returns the object from the handle needs to be supplied 
-    so that we get the right object.
-    
+    Return an iterator over the objects of one type, sorted by Gramps ID,
+    and by handle for objects with the same Gramps ID.
+
+    The Gramps IDs are taken from the serialized data of the underlying
+    database, so that every object is only built once, when the iterator
+    reaches it. The handles and the objects come from dbase, so that
+    objects hidden by a proxy database are skipped.
     """
+    rawdb = getattr(dbase, 'basedb', dbase)
+    get_raw_data = getattr(rawdb, 'get_raw_%s_data' % obj_name)
     sorted_list = []
-    for handle in handle_list:
-        obj = handle_to_object(handle)
-        if obj:
-            data = (obj.get_gramps_id(), handle)
-            sorted_list.append (data)
+    for handle in getattr(dbase, 'iter_%s_handles' % obj_name)():
+        data = get_raw_data(handle)
+        if data:
+            sorted_list.append((data[1], handle))
     sorted_list.sort()
-    return sorted_list
+
+    handle_to_object = getattr(dbase, 'get_%s_from_handle' % obj_name)
+    for (gramps_id, handle) in sorted_list:
+        obj = handle_to_object(handle)
+        if obj is not None:
+            yield obj
 
 #-------------------------------------------------------------------------
 #
@@ -239,7 +250,8 @@ class GedcomWriter(UpdateCallback):
         """
 
         self.dirname = os.path.dirname (filename)
-        self.gedcom_file = io.open(filename, "w", encoding='utf-8')
+        self.gedcom_file = io.open(filename, "w", encoding='utf-8',
+                                   buffering=BUFFER_SIZE)
         self._header(filename)
         self._submitter()
         self._individuals()
@@ -389,18 +401,9 @@ class GedcomWriter(UpdateCallback):
         self.reset(_("Writing individuals"))
         self.progress_cnt += 1
         self.update(self.progress_cnt)
-        phandles = self.dbase.iter_person_handles()
-        
-        sorted_list = []
-        for handle in phandles:
-            person = self.dbase.get_person_from_handle(handle)
-            if person:
-                data = (person.get_gramps_id(), handle)
-                sorted_list.append(data)
-        sorted_list.sort()
 
-        for data in sorted_list:
-            self._person(self.dbase.get_person_from_handle(data[1]))
+        for person in iter_sorted_by_id(self.dbase, 'person'):
+            self._person(person)
 
     def _person(self, person):
         """
@@ -741,16 +744,8 @@ class GedcomWriter(UpdateCallback):
         self.reset(_("Writing families"))
         self.progress_cnt += 1
         self.update(self.progress_cnt)
-        # generate a list of (GRAMPS_ID, HANDLE) pairs. This list
-        # can then be sorted by the sort routine, which will use the
-        # first value of the tuple as the sort key. 
-        sorted_list = sort_handles_by_id(self.dbase.get_family_handles(),
-                                         self.dbase.get_family_from_handle)
-
-        # loop through the sorted list, pulling of the handle. This list
-        # has already been sorted by GRAMPS_ID
-        for family_handle in [hndl[1] for hndl in sorted_list]:
-            self._family(self.dbase.get_family_from_handle(family_handle))
+        for family in iter_sorted_by_id(self.dbase, 'family'):
+            self._family(family)
 
     def _family(self, family):
         """
@@ -906,13 +901,8 @@ class GedcomWriter(UpdateCallback):
         self.reset(_("Writing sources"))
         self.progress_cnt += 1
         self.update(self.progress_cnt)
-        sorted_list = sort_handles_by_id(self.dbase.get_source_handles(),
-                                         self.dbase.get_source_from_handle)
-
-        for (source_id, handle) in sorted_list:
-            source = self.dbase.get_source_from_handle(handle)
-            if source is None: continue
-            self._writeln(0, '@%s@' % source_id, 'SOUR')
+        for source in iter_sorted_by_id(self.dbase, 'source'):
+            self._writeln(0, '@%s@' % source.get_gramps_id(), 'SOUR')
             if source.get_title():
                 self._writeln(1, 'TITL', source.get_title())
 
@@ -941,12 +931,7 @@ class GedcomWriter(UpdateCallback):
         self.reset(_("Writing notes"))
         self.progress_cnt += 1
         self.update(self.progress_cnt)
-        sorted_list = sort_handles_by_id(self.dbase.get_note_handles(),
-                                         self.dbase.get_note_from_handle)
-
-        for note_handle in [hndl[1] for hndl in sorted_list]:
-            note = self.dbase.get_note_from_handle(note_handle)
-            if note is None: continue
+        for note in iter_sorted_by_id(self.dbase, 'note'):
             self._note_record(note)
             
     def _note_record(self, note):
@@ -979,15 +964,10 @@ class GedcomWriter(UpdateCallback):
         self.reset(_("Writing repositories"))
         self.progress_cnt += 1
         self.update(self.progress_cnt)
-        sorted_list = sort_handles_by_id(self.dbase.get_repository_handles(),
-                                         self.dbase.get_repository_from_handle)
-
         # GEDCOM only allows for a single repository per source
 
-        for (repo_id, handle) in sorted_list:
-            repo = self.dbase.get_repository_from_handle(handle)
-            if repo is None: continue
-            self._writeln(0, '@%s@' % repo_id, 'REPO' )
+        for repo in iter_sorted_by_id(self.dbase, 'repository'):
+            self._writeln(0, '@%s@' % repo.get_gramps_id(), 'REPO' )
             if repo.get_name():
                 self._writeln(1, 'NAME', repo.get_name())
             for addr in repo.get_address_list():
@@ -38,7 +38,13 @@ Gramps' XML file format.
 import time
 import shutil
 import os
+import io
 import codecs
+import multiprocessing
+import queue
+import threading
+from collections import deque
+from itertools import islice
 from xml.sax.saxutils import escape
 
 #------------------------------------------------------------------------
@@ -57,7 +63,10 @@ LOG = logging.getLogger(".WriteXML")
 from gramps.gen.const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
 from gramps.gen.const import URL_HOMEPAGE
-from gramps.gen.lib import Date, Person
+from gramps.gen.lib import (Date, Person, Family, Event, Citation, Source,
+                            Place, MediaObject, Repository, Note)
+from gramps.gen.config import config
+from gramps.gen.proxy.proxybase import ProxyDbBase
 from gramps.gen.updatecallback import UpdateCallback
 from gramps.gen.db.exceptions import DbWriteFailure
 from gramps.version import VERSION
@@ -77,6 +86,24 @@ try:
 except:
     _gzip_ok = 0
 
+# number of objects rendered at a time by a worker process
+CHUNK_SIZE = 1000
+# size in bytes of the blocks handed to the compression thread
+BUFFER_SIZE = 1024 * 1024
+
+# the methods of the database giving the serialized data of the objects
+RAW_DATA_METHODS = {
+    Person : 'get_raw_person_data',
+    Family : 'get_raw_family_data',
+    Event : 'get_raw_event_data',
+    Citation : 'get_raw_citation_data',
+    Source : 'get_raw_source_data',
+    Place : 'get_raw_place_data',
+    MediaObject : 'get_raw_object_data',
+    Repository : 'get_raw_repository_data',
+    Note : 'get_raw_note_data',
+    }
+
 # table for skipping control chars from XML except 09, 0A, 0D
 strip_dict = dict.fromkeys(list(range(9))+list(range(11,13))+list(range(14, 32)))
 
@@ -87,6 +114,99 @@ def escxml(d):
                    '>' : '&gt;',
                    }) if d else ""
 
+#-------------------------------------------------------------------------
+#
+# Compression thread
+#
+#-------------------------------------------------------------------------
+class CompressedWriter(object):
+    """
+    Binary file object that hands the data written to it to a gzip file in
+    a separate thread, so that the data is compressed while the next part
+    of the XML is rendered.
+    """
+    def __init__(self, gzip_file):
+        self.gzip_file = gzip_file
+        self.__buffer = []
+        self.__size = 0
+        self.__queue = queue.Queue(4)
+        self.__error = None
+        self.__thread = threading.Thread(target=self.__compress)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def __compress(self):
+        while True:
+            data = self.__queue.get()
+            if data is None:
+                break
+            if self.__error is None:
+                try:
+                    self.gzip_file.write(data)
+                except Exception as msg:
+                    self.__error = msg
+
+    def __check(self):
+        if self.__error is not None:
+            raise IOError(str(self.__error))
+
+    def write(self, data):
+        self.__buffer.append(data)
+        self.__size += len(data)
+        if self.__size >= BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        self.__check()
+        if self.__buffer:
+            self.__queue.put(b''.join(self.__buffer))
+            self.__buffer = []
+            self.__size = 0
+
+    def close(self):
+        self.flush()
+        self.__queue.put(None)
+        self.__thread.join()
+        self.gzip_file.close()
+        self.__check()
+
+#-------------------------------------------------------------------------
+#
+# Worker processes
+#
+#-------------------------------------------------------------------------
+_worker_writer = None
+
+def _init_worker(writer):
+    global _worker_writer
+    _worker_writer = writer
+
+def _render_chunk(task):
+    """
+    Return the XML of a list of objects, given their class, the name of the
+    writer method for them, and their serialized data.
+    """
+    obj_class, method, data_list = task
+    output = io.StringIO()
+    _worker_writer.g = output
+    write_obj = getattr(_worker_writer, method)
+    for data in data_list:
+        write_obj(obj_class.create(data), 2)
+    return output.getvalue()
+
+def get_worker_count():
+    """
+    Return the number of worker processes that render the objects of an
+    XML export, or 0 if they are rendered in this process.
+
+    This is only used when the 'export.xml-workers' setting is 2 or more,
+    and the platform can fork.
+    """
+    workers = config.get('export.xml-workers')
+    if workers < 2 or 'fork' not in multiprocessing.get_all_start_methods():
+        return 0
+    return workers
+
 #-------------------------------------------------------------------------
 #
 #
@@ -119,6 +239,8 @@ class GrampsXmlWriter(UpdateCallback):
         self.version = version
 
         self.status = None
+        self.workers = 0
+        self.pool = None
 
     def write(self, filename):
         """
@@ -160,7 +282,7 @@ class GrampsXmlWriter(UpdateCallback):
             try:
                 if self.compress and _gzip_ok:
                     try:
-                        g = gzip.open(filename,"wb")
+                        g = CompressedWriter(gzip.open(filename,"wb"))
                     except:
                         g = open(filename,"w")
                 else:
@@ -185,7 +307,7 @@ class GrampsXmlWriter(UpdateCallback):
 
         if self.compress and _gzip_ok:
             try:
-                g = gzip.GzipFile(mode="wb", fileobj=handle)
+                g = CompressedWriter(gzip.GzipFile(mode="wb", fileobj=handle))
             except:
                 g = handle
         else:
@@ -219,7 +341,25 @@ class GrampsXmlWriter(UpdateCallback):
                       )
 
         self.set_total(total_steps)
-        
+
+        self.workers = get_worker_count()
+        if self.workers and total_steps >= 2 * CHUNK_SIZE:
+            context = multiprocessing.get_context('fork')
+            self.pool = context.Pool(self.workers, _init_worker, (self,))
+        try:
+            self.write_xml_sections(date, owner, tag_len, event_len,
+                                    person_len, family_len, citation_len,
+                                    source_len, place_len, obj_len, repo_len,
+                                    note_len)
+        finally:
+            if self.pool is not None:
+                self.pool.terminate()
+                self.pool.join()
+                self.pool = None
+
+    def write_xml_sections(self, date, owner, tag_len, event_len,
+                           person_len, family_len, citation_len, source_len,
+                           place_len, obj_len, repo_len, note_len):
         self.g.write('<?xml version="1.0" encoding="UTF-8"?>\n')
         self.g.write('<!DOCTYPE database '
                      'PUBLIC "-//Gramps//DTD Gramps XML %s//EN"\n'
@@ -262,10 +402,9 @@ class GrampsXmlWriter(UpdateCallback):
         # Write primary objects
         if event_len > 0:
             self.g.write("  <events>\n")
-            for handle in sorted(self.db.get_event_handles()):
-                event = self.db.get_event_from_handle(handle)
-                self.write_event(event,2)
-                self.update()
+            self.write_objects(sorted(self.db.get_event_handles()), Event,
+                               self.db.get_event_from_handle,
+                               self.write_event)
             self.g.write("  </events>\n")
 
         if person_len > 0:
@@ -274,68 +413,59 @@ class GrampsXmlWriter(UpdateCallback):
             if person:
                 self.g.write(' home="_%s"' % person.handle)
             self.g.write('>\n')
-
-            for handle in sorted(self.db.get_person_handles()):
-                person = self.db.get_person_from_handle(handle)
-                self.write_person(person, 2)
-                self.update()
+            self.write_objects(sorted(self.db.get_person_handles()), Person,
+                               self.db.get_person_from_handle,
+                               self.write_person)
             self.g.write("  </people>\n")
 
         if family_len > 0:
             self.g.write("  <families>\n")
-            for handle in sorted(self.db.iter_family_handles()):
-                family = self.db.get_family_from_handle(handle)
-                self.write_family(family,2)
-                self.update()
+            self.write_objects(sorted(self.db.iter_family_handles()), Family,
+                               self.db.get_family_from_handle,
+                               self.write_family)
             self.g.write("  </families>\n")
 
         if citation_len > 0:
             self.g.write("  <citations>\n")
-            for handle in sorted(self.db.get_citation_handles()):
-                citation = self.db.get_citation_from_handle(handle)
-                self.write_citation(citation,2)
-                self.update()
+            self.write_objects(sorted(self.db.get_citation_handles()),
+                               Citation, self.db.get_citation_from_handle,
+                               self.write_citation)
             self.g.write("  </citations>\n")
 
         if source_len > 0:
             self.g.write("  <sources>\n")
-            for handle in sorted(self.db.get_source_handles()):
-                source = self.db.get_source_from_handle(handle)
-                self.write_source(source,2)
-                self.update()
+            self.write_objects(sorted(self.db.get_source_handles()), Source,
+                               self.db.get_source_from_handle,
+                               self.write_source)
             self.g.write("  </sources>\n")
 
         if place_len > 0:
             self.g.write("  <places>\n")
-            for key in sorted(self.db.get_place_handles()):
-                # try:
-                place = self.db.get_place_from_handle(key)
-                self.write_place_obj(place,2)
-                self.update()
+            self.write_objects(sorted(self.db.get_place_handles()), Place,
+                               self.db.get_place_from_handle,
+                               self.write_place_obj)
             self.g.write("  </places>\n")
 
         if obj_len > 0:
             self.g.write("  <objects>\n")
-            for handle in sorted(self.db.get_media_object_handles()):
-                obj = self.db.get_object_from_handle(handle)
-                self.write_object(obj,2)
-                self.update()
+            self.write_objects(sorted(self.db.get_media_object_handles()),
+                               MediaObject, self.db.get_object_from_handle,
+                               self.write_object)
             self.g.write("  </objects>\n")
 
         if repo_len > 0:
             self.g.write("  <repositories>\n")
-            for key in sorted(self.db.get_repository_handles()):
-                repo = self.db.get_repository_from_handle(key)
-                self.write_repository(repo,2)
-                self.update()
+            self.write_objects(sorted(self.db.get_repository_handles()),
+                               Repository,
+                               self.db.get_repository_from_handle,
+                               self.write_repository)
             self.g.write("  </repositories>\n")
 
         if note_len > 0:
             self.g.write("  <notes>\n")
-            for key in sorted(self.db.get_note_handles()):
-                note = self.db.get_note_from_handle(key)
-                self.write_note(note, 2)
-                self.update()
+            self.write_objects(sorted(self.db.get_note_handles()), Note,
+                               self.db.get_note_from_handle,
+                               self.write_note)
             self.g.write("  </notes>\n")
 
         # Data is written, now write bookmarks.
@@ -347,6 +477,58 @@ class GrampsXmlWriter(UpdateCallback):
 #        self.status.end()
 #        self.status = None
 
+    def write_objects(self, handles, obj_class, get_object, write_obj):
+        """
+        Write the objects with the given handles, in order, with the method
+        write_obj.
+
+        If there are worker processes, the objects are rendered by them, a
+        chunk at a time, and their XML is written in the order of the
+        chunks. The workers get the serialized data of the objects; it is
+        read raw from the database, unless the database is a proxy, which
+        must build the objects it gives.
+        """
+        if self.pool is None:
+            for handle in handles:
+                write_obj(get_object(handle), 2)
+                self.update()
+            return
+
+        get_raw = None
+        if not isinstance(self.db, ProxyDbBase):
+            get_raw = getattr(self.db, RAW_DATA_METHODS[obj_class], None)
+        if get_raw is None:
+            get_raw = lambda handle: get_object(handle).serialize()
+
+        def render(start):
+            task = (obj_class, write_obj.__name__,
+                    [get_raw(handle)
+                     for handle in handles[start:start + CHUNK_SIZE]])
+            return self.pool.apply_async(_render_chunk, (task,))
+
+        # keep the workers busy with a few chunks in advance
+        starts = iter(range(0, len(handles), CHUNK_SIZE))
+        pending = deque(render(start)
+                        for start in islice(starts, 2 * self.workers))
+        written = 0
+        while pending:
+            try:
+                text = pending.popleft().get()
+            except Exception as msg:
+                LOG.warning("The XML export failed in the worker "
+                            "processes: %s", msg)
+                self.pool.terminate()
+                self.pool.join()
+                self.pool = None
+                self.write_objects(handles[written:], obj_class, get_object,
+                                   write_obj)
+                return
+            pending.extend(render(start) for start in islice(starts, 1))
+            self.g.write(text)
+            for handle in handles[written:written + CHUNK_SIZE]:
+                self.update()
+            written += CHUNK_SIZE
+
     def write_metadata(self):
         """ Method to write out metadata of the database
         """
@@ -0,0 +1,95 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Unittest for export to Gramps XML in worker processes
+"""
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from gramps.gen.config import config
+from gramps.gen.db.test.tree import Tree
+from gramps.gen.lib import Person, EventType, Note
+from gramps.gen.user import User
+from .. import exportxml
+from ..exportxml import XmlWriter, get_worker_count
+
+class ExportXmlWorkersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.workers = config.get('export.xml-workers')
+        self.chunk_size = exportxml.CHUNK_SIZE
+        # small chunks, so that a small tree is split between the workers
+        exportxml.CHUNK_SIZE = 3
+        tree = self.tree = Tree()
+        place = tree.place('London')
+        for number in range(10):
+            father = tree.person('John%d' % number, 'Smith', Person.MALE,
+                                 birth=1800 + number)
+            mother = tree.person('Mary%d' % number, 'Jones', Person.FEMALE)
+            child = tree.person('Ann%d' % number, 'Smith', Person.FEMALE,
+                                death=1900 + number)
+            child.add_event_ref(tree.event(EventType.BAPTISM,
+                                           1850 + number, place))
+            family = tree.family(father, mother, [child])
+            family.add_event_ref(tree.event(EventType.MARRIAGE,
+                                            1840 + number, place))
+            note = Note('Note %d' % number)
+            note.set_handle(tree.handle('N'))
+            tree.db.note_map[note.handle] = note
+            child.add_note(note.handle)
+        for number, obj in enumerate(
+                list(tree.db.person_map.values()) +
+                list(tree.db.family_map.values()) +
+                list(tree.db.event_map.values()) +
+                list(tree.db.place_map.values()) +
+                list(tree.db.note_map.values())):
+            obj.set_gramps_id('X%04d' % number)
+
+    def tearDown(self):
+        config.set('export.xml-workers', self.workers)
+        exportxml.CHUNK_SIZE = self.chunk_size
+        shutil.rmtree(self.path)
+
+    def export(self, workers):
+        """
+        Return the XML document of the tree, exported to a compressed file
+        with the given number of worker processes.
+        """
+        config.set('export.xml-workers', workers)
+        filename = os.path.join(self.path, 'export%d.gramps' % workers)
+        writer = XmlWriter(self.tree.db, User(callback=lambda *args: None),
+                           0, 1)
+        self.assertTrue(writer.write(filename))
+        with gzip.open(filename, 'rb') as xml_file:
+            return xml_file.read()
+
+    def test_same_document(self):
+        config.set('export.xml-workers', 3)
+        if not get_worker_count():
+            self.skipTest('worker processes need the fork start method')
+        sequential = self.export(1)
+        self.assertIn(b'Note 9', sequential)
+        self.assertEqual(self.export(3), sequential)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -32,8 +32,11 @@ from gramps.gen.plug import Gramplet
 from gramps.gen.const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.sgettext
 from gramps.gen.utils.file import media_path_full
-from gramps.gen.datehandler import get_date
 from gramps.gen.lib import Person
+from gramps.gen.db.summary import (PersonSummary, SUMMARY_GENDER,
+                                   SUMMARY_SURNAMES, SUMMARY_INCOMPLETE,
+                                   SUMMARY_DISCONNECTED, SUMMARY_NO_BIRTH_DATE,
+                                   SUMMARY_MEDIA)
 
 #------------------------------------------------------------------------
 #
@@ -68,7 +71,9 @@ class StatsGramplet(Gramplet):
     def main(self):
         self.set_text(_("Processing..."))
         database = self.dbstate.db
-        personList = database.iter_people()
+        summary = database.get_person_summary()
+        if summary is None:
+            summary = PersonSummary(database)
 
         with_media = 0
         total_media = 0
@@ -79,7 +84,7 @@ class StatsGramplet(Gramplet):
         females = 0
         unknowns = 0
         bytes = 0
-        namelist = []
+        namelist = set()
         notfound = []
 
         mobjects = database.get_number_of_media_objects()
@@ -96,44 +101,29 @@ class StatsGramplet(Gramplet):
             except OSError:
                 notfound.append(media.get_path())
 
-        for cnt, person in enumerate(personList):
-            length = len(person.get_media_list())
+        people = (summary.get(handle)
+                  for handle in database.iter_person_handles())
+        for cnt, row in enumerate(people):
+            length = row[SUMMARY_MEDIA]
             if length > 0:
                 with_media += 1
                 total_media += length
 
-            for name in [person.get_primary_name()] + person.get_alternate_names():
-
             # Count unique surnames
-                if not name.get_surname().strip() in namelist \
-                    and not name.get_surname().strip() == "":
-                    namelist.append(name.get_surname().strip())
+            namelist.update(surname for surname in row[SUMMARY_SURNAMES]
+                            if surname)
+            incomp_names += row[SUMMARY_INCOMPLETE]
 
-                if name.get_first_name().strip() == "":
-                    incomp_names += 1
-                else:
-                    if name.get_surname_list():
-                        for surname in name.get_surname_list():
-                            if surname.get_surname().strip() == "":
-                                incomp_names += 1
-                    else:
-                        incomp_names += 1
-                    
-            if (not person.get_main_parents_family_handle() and 
-                not len(person.get_family_handle_list())):
+            if row[SUMMARY_DISCONNECTED]:
                 disconnected += 1
-                
-            birth_ref = person.get_birth_ref()
-            if birth_ref:
-                birth = database.get_event_from_handle(birth_ref.ref)
-                if not get_date(birth):
-                    missing_bday += 1
-            else:
+
+            if row[SUMMARY_NO_BIRTH_DATE]:
                 missing_bday += 1
-                
-            if person.get_gender() == Person.FEMALE:
+
+            gender = row[SUMMARY_GENDER]
+            if gender == Person.FEMALE:
                 females += 1
-            elif person.get_gender() == Person.MALE:
+            elif gender == Person.MALE:
                 males += 1
             else:
                 unknowns += 1
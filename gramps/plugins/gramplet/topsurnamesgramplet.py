@@ -27,6 +27,8 @@ from gramps.gen.plug import Gramplet
 from gramps.gen.const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.sgettext
 from gramps.gen.config import config
+from gramps.gen.constfunc import handle2internal
+from gramps.gen.db.summary import PersonSummary, SUMMARY_GROUP_NAMES
 
 #------------------------------------------------------------------------
 #
@@ -66,13 +68,19 @@ class TopSurnamesGramplet(Gramplet):
         surnames = defaultdict(int)
         representative_handle = {}
 
+        db = self.dbstate.db
+        summary = db.get_person_summary()
+        if summary is None:
+            summary = PersonSummary(db)
+        people = ((handle2internal(handle),
+                   summary.get(handle)[SUMMARY_GROUP_NAMES])
+                  for handle in db.iter_person_handles())
+
         cnt = 0
-        for person in self.dbstate.db.iter_people():
-            allnames = [person.get_primary_name()] + person.get_alternate_names()
-            allnames = set([name.get_group_name().strip() for name in allnames])
+        for handle, allnames in people:
             for surname in allnames:
                 surnames[surname] += 1
-                representative_handle[surname] = person.handle
+                representative_handle[surname] = handle
             cnt += 1
             if not cnt % _YIELD_INTERVAL:
                 yield True
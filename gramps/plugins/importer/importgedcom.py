@@ -99,11 +99,18 @@ def importData(database, filename, user):
     try:
         ifile = open(filename, "rb")
         stage_one = libgedcom.GedcomStageOne(ifile)
-        stage_one.parse()
+        # read the file through a memory map, so that it is read and
+        # decoded only once, if it can be mapped
+        mapped = stage_one.parse_mapped()
+        if mapped is None:
+            stage_one.parse()
+            ifile.seek(0)
+        else:
+            ifile.close()
+            ifile = mapped
 
         if code_set:
             stage_one.set_encoding(code_set)
-        ifile.seek(0)
         if database.get_feature("skip-import-additions"): # don't add source or tags
             gedparse = libgedcom.GedcomParser(
                 database, ifile, filename, user, stage_one, None, None)
@@ -31,6 +31,7 @@
 import os
 import sys
 import time
+import struct
 from xml.parsers.expat import ExpatError, ParserCreate
 from xml.sax.saxutils import escape
 from gramps.gen.const import URL_WIKISTRING
@@ -88,7 +89,9 @@ try:
 except:
     GZIP_OK = False
 
-PERSON_RE = re.compile(r"\s*\<person\s(.*)$")
+# average size in bytes of the XML of a person with its events, families,
+# citations and so on, to estimate the number of people from the file size
+PERSON_XML_SIZE = 1300
 
 CHILD_REL_MAP = {
     "Birth"     : ChildRefType(ChildRefType.BIRTH), 
@@ -119,7 +122,6 @@ def importData(database, filename, user):
     database.smap = {}
     database.pmap = {}
     database.fmap = {}
-    line_cnt = 0
     person_cnt = 0
     
     with ImportOpenFileContextManager(filename, user) as xml_file:
@@ -138,15 +140,13 @@ def importData(database, filename, user):
                                    config.get('preferences.tag-on-import') else None))
 
         if filename != '-':
-            linecounter = LineParser(filename)
-            line_cnt = linecounter.get_count()
-            person_cnt = linecounter.get_person_count()
+            person_cnt = estimate_person_count(filename)
     
         read_only = database.readonly
         database.readonly = False
         
         try:
-            info = parser.parse(xml_file, line_cnt, person_cnt)
+            info = parser.parse(xml_file, personcount=person_cnt)
         except GrampsImportError as err: # version error
             user.notify_error(*err.messages())
             return
@@ -244,6 +244,7 @@ class ImportInfo(object):
         self.data_families = ''
         self.expl_note = ''
         self.data_relpath = False
+        self.seconds = None
         
     def add(self, category, key, obj, sec_obj=None):
         """
@@ -335,6 +336,12 @@ class ImportInfo(object):
                      "number in parentheses. Where possible these\n"
                      "'Unkown' objects are referenced by note %(unknown)s.\n"
                      ) % {'new': sum(self.data_unknownobject), 'unknown': self.expl_note}
+        if self.seconds:
+            count = sum(self.data_newobject)
+            txt += _("\n%(count)d objects imported in %(seconds).1f seconds, "
+                     "%(rate)d objects per second.\n") % {
+                        'count': count, 'seconds': self.seconds,
+                        'rate': count / self.seconds}
         if self.data_relpath:
             txt += _("\nMedia objects with relative paths have been\n"
                      "imported. These paths are considered relative to\n"
@@ -359,58 +366,22 @@ class ImportInfo(object):
         
         return txt
 
-class LineParser(object):
-    def __init__(self, filename):
-
-        self.count = 0
-        self.person_count = 0
-
-        if GZIP_OK:
-            use_gzip = 1
-            try:
-                f = gzip.open(filename, "r")
-                f.read(1)
-                f.close()
-            except IOError as msg:
-                use_gzip = 0
-            except ValueError as msg:
-                use_gzip = 1
-        else:
-            use_gzip = 0
-
-        try:
-            if use_gzip:
-                import io
-                # Bug 6255. TextIOWrapper is required for python3 to
-                #           present file contents as text, otherwise they
-                #           are read as binary. However due to a missing
-                #           method (read1) in early python3 versions this
-                #           try block will fail.
-                #           Gramps will still import XML files using python
-                #           versions < 3.3.0 but the file progress meter
-                #           will not work properly, going immediately to
-                #           100%.
-                #           It should work correctly from version 3.3.
-                ofile = io.TextIOWrapper(gzip.open(filename, "rb"))
-            else:
-                ofile = open(filename, "r")
-
-            for line in ofile:
-                self.count += 1
-                if PERSON_RE.match(line):
-                    self.person_count += 1
-        except:
-            self.count = 0
-            self.person_count = 0
-        finally:
-            # Ensure the file handle is always closed
-            ofile.close()
-
-    def get_count(self):
-        return self.count
-
-    def get_person_count(self):
-        return self.person_count
+def estimate_person_count(filename):
+    """
+    Estimate the number of people in the XML file from its size, without
+    reading it. The size of the uncompressed data of a gzip file is in its
+    last four bytes, modulo 4 GiB.
+    """
+    try:
+        with open(filename, "rb") as ofile:
+            magic = ofile.read(2)
+            size = ofile.seek(0, os.SEEK_END)
+            if magic == b'\x1f\x8b' and size >= 4:
+                ofile.seek(-4, os.SEEK_END)
+                size = max(size, struct.unpack('<I', ofile.read(4))[0])
+    except (IOError, OSError):
+        return 0
+    return size // PERSON_XML_SIZE
 
 #-------------------------------------------------------------------------
 #
@@ -927,14 +898,39 @@ class GrampsParser(UpdateCallback):
         Parse the xml file
         :param ifile: must be a file handle that is already open, with position
                       at the start of the file
-        """
+        :param linecount: the number of lines of the file, to show the
+                          progress by line number. By default the progress
+                          is the position in the file, compressed or not.
+        :param personcount: the (estimated) number of people in the file
+        """
+        start = time.time()
+        # the file read by a GzipFile, whose position is in compressed bytes
+        rawfile = getattr(ifile, 'fileobj', ifile)
+        if linecount:
+            total = linecount
+            self.__position = lambda: self.p.CurrentLineNumber
+        else:
+            try:
+                total = os.fstat(rawfile.fileno()).st_size
+                rawfile.tell()
+            except (AttributeError, IOError, OSError, ValueError):
+                total = 0
+            if total:
+                self.__position = rawfile.tell
+            else:
+                # a pipe, such as the standard input
+                self.__position = lambda: None
         if personcount < 1000:
             no_magic = True
         else:
             no_magic = False
+        # building the reference map again at the end is faster than keeping
+        # it up to date, unless the family tree is large compared to the file
+        bulk_load = (not no_magic and
+                     personcount >= self.db.get_number_of_people())
         with DbTxn(_("Gramps XML import"), self.db, batch=True,
-                   no_magic=no_magic) as self.trans:
-            self.set_total(linecount)
+                   no_magic=no_magic, bulk_load=bulk_load) as self.trans:
+            self.set_total(total)
 
             self.db.disable_signals()
 
@@ -984,8 +980,12 @@ class GrampsParser(UpdateCallback):
             del self.func_list
             del self.p
             del self.update
+            del self.__position
         self.db.enable_signals()
         self.db.request_rebuild()
+        self.info.seconds = time.time() - start
+        LOG.debug("%d objects imported in %.1f seconds",
+                  sum(self.info.data_newobject), self.info.seconds)
         return self.info
 
     def start_database(self, attrs):
@@ -1158,7 +1158,7 @@ class GrampsParser(UpdateCallback):
         # GRAMPS LEGACY: title in the placeobj tag
         self.placeobj.title = attrs.get('title', '')
         self.locations = 0
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.__position())
         return self.placeobj
             
     def start_location(self, attrs):
@@ -1264,7 +1264,7 @@ class GrampsParser(UpdateCallback):
             self.info.add('new-object', EVENT_KEY, self.event)
         else:
             # This is new event, with ID and handle already existing
-            self.update(self.p.CurrentLineNumber)
+            self.update(self.__position())
             self.event = Event()
             if 'handle' in attrs:
                 orig_handle = attrs['handle'].replace('_', '')
@@ -1461,7 +1461,7 @@ class GrampsParser(UpdateCallback):
         Add a person to db if it doesn't exist yet and assign
         id, privacy and changetime.
         """
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.__position())
         self.person = Person()
         if 'handle' in attrs:
             orig_handle = attrs['handle'].replace('_', '')
@@ -1595,7 +1595,7 @@ class GrampsParser(UpdateCallback):
         Add a family object to db if it doesn't exist yet and assign
         id, privacy and changetime.
         """
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.__position())
         self.family = Family()
         if 'handle' in attrs:
             orig_handle = attrs['handle'].replace('_', '')
@@ -1858,7 +1858,7 @@ class GrampsParser(UpdateCallback):
         self.in_note = 0
         if 'handle' in attrs:
             # This is new note, with ID and handle already existing
-            self.update(self.p.CurrentLineNumber)
+            self.update(self.__position())
             self.note = Note()
             if 'handle' in attrs:
                 orig_handle = attrs['handle'].replace('_', '')
@@ -2056,7 +2056,7 @@ class GrampsParser(UpdateCallback):
         Add a citation object to db if it doesn't exist yet and assign
         id, privacy and changetime.
         """
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.__position())
         self.citation = Citation()
         orig_handle = attrs['handle'].replace('_', '')
         is_merge_candidate = (self.replace_import_handle and
@@ -2109,7 +2109,7 @@ class GrampsParser(UpdateCallback):
         Add a source object to db if it doesn't exist yet and assign
         id, privacy and changetime.
         """
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.__position())
         self.source = Source()
         if 'handle' in attrs:
             orig_handle = attrs['handle'].replace('_', '')
@@ -2251,7 +2251,7 @@ class GrampsParser(UpdateCallback):
         pass
 
     def stop_database(self, *tag):
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.__position())
 
     def stop_object(self, *tag):
         self.db.commit_media_object(self.object, self.trans, 
@@ -90,11 +90,11 @@ all lines until the next level 2 token is found (in this case, skipping the
 import os
 import re
 import time
+import mmap
 import codecs
 from xml.parsers.expat import ParserCreate
-from collections import defaultdict
+from collections import defaultdict, deque
 import string
-from io import StringIO
 from urllib.parse import urlparse
 
 #------------------------------------------------------------------------
@@ -126,6 +126,7 @@ from gramps.gen.updatecallback import UpdateCallback
 from gramps.gen.mime import get_type
 from gramps.gen.utils.id import create_id
 from gramps.gen.utils.lds import TEMPLES
+import gramps.gen.utils.ansel # registers the 'ansel' codec
 from gramps.gen.utils.unknown import make_unknown, create_explanation_note
 from gramps.gen.datehandler._dateparser import DateParser
 from gramps.gen.db.dbconst import EVENT_KEY
@@ -564,6 +565,8 @@ LDS_STATUS = {
 # table for skipping illegal control chars in GEDCOM import
 # Only 09, 0A, 0D are allowed.
 STRIP_DICT = dict.fromkeys(list(range(9))+list(range(11, 13))+list(range(14, 32)))
+# the same characters, to remove them from a whole block of text at once
+STRIP_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
 
 #-------------------------------------------------------------------------
 #
@@ -655,6 +658,23 @@ SPAN2  = re.compile(r"\s*FROM\s+@#D?([^@]+)@\s*(.*)\s+TO\s+\s*(.*)$")
 NAME_RE    = re.compile(r"/?([^/]*)(/([^/]*)(/([^/]*))?)?")
 SURNAME_RE = re.compile(r"/([^/]*)/([^/]*)")
 
+# One GEDCOM line, with its terminator. According to the GEDCOM 5.5 standard,
+# Chapter 1 subsection Grammar, "leading whitespace preceeding a GEDCOM line
+# should be ignored". There should only be one space after the level and the
+# tag, but more are ignored after the level. The xref_id can have spaces in
+# it, and a meaningless @IDENT@ on a CONT or CONC line is ignored, as noted
+# at http://www.tamurajones.net/IdentCONT.xhtml
+# The groups are level, xref_id, CONT/CONC after an xref_id, tag and value.
+# Lines without level match the last alternative, with empty groups.
+LINE_RE = re.compile(r"""
+    [ ]*(\d+)
+    (?:[ ]+
+       (?:(@[^@\n]*@)[^\S\n]*(?:(CONT|CONC)[ ])?
+         |(?!@)([^ \r\n]*)[ ]?)
+       ([^\r\n]*(?:\r+[^\r\n]+)*))?
+    \r*\n
+    |[^\n]*\n""", re.VERBOSE)
+
 #-----------------------------------------------------------------------
 #
 # GedcomDateParser
@@ -674,10 +694,20 @@ class GedcomDateParser(DateParser):
 #
 #-------------------------------------------------------------------------
 class Lexer(object):
+    """
+    Split the text of a GEDCOM file into lines of (level, token, value, tag,
+    line number).
+
+    The reader is read a block at a time, each block is tokenized with
+    LINE_RE, and CONT and CONC lines are folded into the line they continue
+    on the way. The lines wait in a deque for :meth:`readline`, which
+    always keeps the last one back until the next block is read, as the
+    next block may continue it.
+    """
 
     def __init__(self, ifile):
         self.ifile = ifile
-        self.current_list = []
+        self.current_list = deque()
         self.eof = False
         self.cnv = None
         self.cnt = 0
@@ -691,18 +721,18 @@ class Lexer(object):
         if len(self.current_list) <= 1 and not self.eof:
             self.__readahead()
         try:
-            return GedLine(self.current_list.pop())
+            return GedLine(self.current_list.popleft())
         except:
             LOG.debug('Error in reading Gedcom line', exc_info=True)
             return None
 
     def __fix_token_cont(self, data):
-        line = self.current_list[0]
+        line = self.current_list[-1]
         new_value = line[2] + '\n' + data[2]
-        self.current_list[0] = (line[0], line[1], new_value, line[3], line[4])
+        self.current_list[-1] = (line[0], line[1], new_value, line[3], line[4])
 
     def __fix_token_conc(self, data):
-        line = self.current_list[0]
+        line = self.current_list[-1]
         if len(line[2]) == 4:
             # This deals with lines of the form
             # 0 @<XREF:NOTE>@ NOTE
@@ -714,59 +744,40 @@ class Lexer(object):
             new_value = line[2] + ' ' + data[2]
         else:
             new_value = line[2] + data[2]
-        self.current_list[0] = (line[0], line[1], new_value, line[3], line[4])
+        self.current_list[-1] = (line[0], line[1], new_value, line[3], line[4])
 
     def __readahead(self):
-        while len(self.current_list) < 5:
-            line = self.ifile.readline()
-            self.index += 1
-            if not line:
+        while len(self.current_list) <= 1:
+            block = self.ifile.readblock()
+            if not block:
                 self.eof = True
                 return
+            if not block.endswith('\n'):
+                block += '\n'
+            self.__tokenize(block)
 
-            try:
-                # According to the GEDCOM 5.5 standard,
-                # Chapter 1 subsection Grammar
-                #"leading whitespace preceeding a GEDCOM line should be ignored"
-                # We will also strip the terminator which is any combination
-                # of carriage_return and line_feed
-                line = line.lstrip(' ').rstrip('\n\r')
-                # split into level+delim+rest
-                line = line.partition(' ')
-                level = int(line[0])
-                # there should only be one space after the level,
-                # but we can ignore more,
-                line = line[2].lstrip(' ')
-                # then split into tag+delim+line_value
-                # or xfef_id+delim+rest
-                # the xref_id can have spaces in it
-                if line.startswith('@'):
-                    line = line.split('@', 2)
-                    # line is now [None, alphanum+pointer_string, rest]
-                    tag = '@' + line[1] + '@'
-                    line_value = line[2].lstrip()
-                    ## Ignore meaningless @IDENT@ on CONT or CONC line
-                    ## as noted at http://www.tamurajones.net/IdentCONT.xhtml
-                    if (line_value.lstrip().startswith("CONT ") or 
-                        line_value.lstrip().startswith("CONC ")):
-                        line = line_value.lstrip().partition(' ')
-                        tag = line[0]
-                        line_value = line[2]
-                else:
-                    line = line.partition(' ')
-                    tag = line[0]
-                    line_value = line[2]
-            except:
+    def __tokenize(self, block):
+        """
+        Add the lines of block, which ends with a line terminator, to the
+        deque.
+        """
+        current_list = self.current_list
+        func_map = self.func_map
+        index = self.index
+        for level, xref, ident, tag, line_value in LINE_RE.findall(block):
+            index += 1
+            if not level:
                 continue
-
+            if xref:
+                tag = ident or xref
             token = TOKENS.get(tag, TOKEN_UNKNOWN)
-            data = (level, token, line_value, tag, self.index)
+            data = (int(level), token, line_value, tag, index)
 
-            func = self.func_map.get(data[1])
-            if func:
-                func(data)
+            if token in func_map and current_list:
+                func_map[token](data)
             else:
-                self.current_list.insert(0, data)
+                current_list.append(data)
+        self.index = index
 
     def clean_up(self):
         """
@@ -1212,6 +1223,9 @@ class GedInfoParser(object):
 # File Readers
 #
 #-------------------------------------------------------------------------
+# number of bytes read at a time by the lexer
+BLOCK_SIZE = 1024 * 1024
+
 class BaseReader(object):
     def __init__(self, ifile, encoding):
         self.ifile = ifile
@@ -1225,6 +1239,15 @@ class BaseReader(object):
         line = line.decode(self.enc, errors='replace')
         return line.translate(STRIP_DICT)
 
+    def readblock(self):
+        """
+        Return the decoded text of the next lines of the file, about
+        BLOCK_SIZE bytes of whole lines, or an empty string at the end.
+        """
+        block = self.ifile.read(BLOCK_SIZE) + self.ifile.readline()
+        block = block.decode(self.enc, errors='replace')
+        return STRIP_RE.sub('', block)
+
 class UTF8Reader(BaseReader):
 
     def __init__(self, ifile):
@@ -1256,6 +1279,15 @@ class UTF16Reader(BaseReader):
         else:
             return self.ifile.readline()
 
+    def readblock(self):
+        """
+        Return the text of the next lines of the file. The recoder returns
+        the text as UTF-8.
+        """
+        block = self.ifile.read(BLOCK_SIZE) + self.ifile.readline()
+        block = block.decode('utf8', errors='replace')
+        return STRIP_RE.sub('', block)
+
 class AnsiReader(BaseReader):
 
     def __init__(self, ifile):
@@ -1263,263 +1295,12 @@ class AnsiReader(BaseReader):
     
 class AnselReader(BaseReader):
     """
-    ANSEL to Unicode Conversion
-    
-    ANSEL references:
-    http://lcweb2.loc.gov/diglib/codetables/45.html
-    http://www.gymel.com/charsets/ANSEL.html
-    
-    list of ANSEL codes that replicate ASCII
-    note that DEL (127=0x7F) is a control char
-    Note: spec allows control-chars that Gramps probably doesn't use
-    but 10=0x0A _is_ needed (!)
-    ---
-    Also: there are two additional control chars 0x98,0x9c (unicode same)
-    which we also ignore for now (start/emd of string (or sort sequence)
-    ---
-    TODO: should we allow TAB, as a Gramps extension?
+    ANSEL to Unicode Conversion, with the ansel codec registered by
+    gramps.gen.utils.ansel
     """
-    __printable_ascii = list(map(chr, list(range(32, 127)))) # note: up thru 126
-    __use_ASCII = list(map(chr, [10, 27, 29 , 30, 31])) + __printable_ascii
-    
-    # mappings of single byte ANSEL codes to unicode
-    __onebyte = {
-         b'\xA1' : '\u0141',   b'\xA2' : '\u00d8',   b'\xA3' : '\u0110',   
-         b'\xA4' : '\u00de',   b'\xA5' : '\u00c6',   b'\xA6' : '\u0152',   
-         b'\xA7' : '\u02b9',   b'\xA8' : '\u00b7',   b'\xA9' : '\u266d',   
-         b'\xAA' : '\u00ae',   b'\xAB' : '\u00b1',   b'\xAC' : '\u01a0',   
-         b'\xAD' : '\u01af',   b'\xAE' : '\u02bc',   b'\xB0' : '\u02bb',   
-         b'\xB1' : '\u0142',   b'\xB2' : '\u00f8',   b'\xB3' : '\u0111',   
-         b'\xB4' : '\u00fe',   b'\xB5' : '\u00e6',   b'\xB6' : '\u0153',   
-         b'\xB7' : '\u02ba',   b'\xB8' : '\u0131',   b'\xB9' : '\u00a3',   
-         b'\xBA' : '\u00f0',   b'\xBC' : '\u01a1',   b'\xBD' : '\u01b0',   
-         b'\xC0' : '\u00b0',   b'\xC1' : '\u2113',   b'\xC2' : '\u2117',   
-         b'\xC3' : '\u00a9',   b'\xC4' : '\u266f',   b'\xC5' : '\u00bf',   
-         b'\xC6' : '\u00a1',   b'\xC7' : '\u00df',   b'\xC8' : '\u20ac',  
-        }
-    
-    # combining forms (in ANSEL, they precede the modified ASCII character
-    # whereas the unicode combining term follows the character modified
-    # Note: unicode allows multiple modifiers, but ANSEL may not (TDB?), 
-    # so we ignore multiple combining forms in this module
-    #  8d & 8e are zero-width joiner (ZWJ), and zero-width non-joiner ZWNJ
-    #  (strange things) probably not commonly found in our needs, unless one
-    #   starts writing persian (or???) poetry in ANSEL
-    __acombiners = {
-         b'\x8D' : '\u200d',   b'\x8E' : '\u200c',   b'\xE0' : '\u0309',   
-         b'\xE1' : '\u0300',   b'\xE2' : '\u0301',   b'\xE3' : '\u0302',   
-         b'\xE4' : '\u0303',   b'\xE5' : '\u0304',   b'\xE6' : '\u0306',   
-         b'\xE7' : '\u0307',   b'\xE8' : '\u0308',   b'\xE9' : '\u030c',   
-         b'\xEA' : '\u030a',   b'\xEB' : '\ufe20',   b'\xEC' : '\ufe21',   
-         b'\xED' : '\u0315',   b'\xEE' : '\u030b',   b'\xEF' : '\u0310',   
-         b'\xF0' : '\u0327',   b'\xF1' : '\u0328',   b'\xF2' : '\u0323',   
-         b'\xF3' : '\u0324',   b'\xF4' : '\u0325',   b'\xF5' : '\u0333',   
-         b'\xF6' : '\u0332',   b'\xF7' : '\u0326',   b'\xF8' : '\u031c',   
-         b'\xF9' : '\u032e',   b'\xFA' : '\ufe22',   b'\xFB' : '\ufe23',   
-         b'\xFE' : '\u0313',  
-       }
-    
-    # mappings of two byte (precomposed forms) ANSEL codes to unicode
-    __twobyte = {
-         b'\xE0\x41' : '\u1ea2',   b'\xE0\x45' : '\u1eba',
-         b'\xE0\x49' : '\u1ec8',   b'\xE0\x4F' : '\u1ece',
-         b'\xE0\x55' : '\u1ee6',   b'\xE0\x59' : '\u1ef6',
-         b'\xE0\x61' : '\u1ea3',   b'\xE0\x65' : '\u1ebb',
-         b'\xE0\x69' : '\u1ec9',   b'\xE0\x6F' : '\u1ecf',
-         b'\xE0\x75' : '\u1ee7',   b'\xE0\x79' : '\u1ef7',
-         b'\xE1\x41' : '\u00c0',   b'\xE1\x45' : '\u00c8',
-         b'\xE1\x49' : '\u00cc',   b'\xE1\x4F' : '\u00d2',
-         b'\xE1\x55' : '\u00d9',   b'\xE1\x57' : '\u1e80',
-         b'\xE1\x59' : '\u1ef2',   b'\xE1\x61' : '\u00e0',
-         b'\xE1\x65' : '\u00e8',   b'\xE1\x69' : '\u00ec',
-         b'\xE1\x6F' : '\u00f2',   b'\xE1\x75' : '\u00f9',
-         b'\xE1\x77' : '\u1e81',   b'\xE1\x79' : '\u1ef3',
-         b'\xE2\x41' : '\u00c1',   b'\xE2\x43' : '\u0106',
-         b'\xE2\x45' : '\u00c9',   b'\xE2\x47' : '\u01f4',
-         b'\xE2\x49' : '\u00cd',   b'\xE2\x4B' : '\u1e30',
-         b'\xE2\x4C' : '\u0139',   b'\xE2\x4D' : '\u1e3e',
-         b'\xE2\x4E' : '\u0143',   b'\xE2\x4F' : '\u00d3',
-         b'\xE2\x50' : '\u1e54',   b'\xE2\x52' : '\u0154',
-         b'\xE2\x53' : '\u015a',   b'\xE2\x55' : '\u00da',
-         b'\xE2\x57' : '\u1e82',   b'\xE2\x59' : '\u00dd',
-         b'\xE2\x5A' : '\u0179',   b'\xE2\x61' : '\u00e1',
-         b'\xE2\x63' : '\u0107',   b'\xE2\x65' : '\u00e9',
-         b'\xE2\x67' : '\u01f5',   b'\xE2\x69' : '\u00ed',
-         b'\xE2\x6B' : '\u1e31',   b'\xE2\x6C' : '\u013a',
-         b'\xE2\x6D' : '\u1e3f',   b'\xE2\x6E' : '\u0144',
-         b'\xE2\x6F' : '\u00f3',   b'\xE2\x70' : '\u1e55',
-         b'\xE2\x72' : '\u0155',   b'\xE2\x73' : '\u015b',
-         b'\xE2\x75' : '\u00fa',   b'\xE2\x77' : '\u1e83',
-         b'\xE2\x79' : '\u00fd',   b'\xE2\x7A' : '\u017a',
-         b'\xE2\xA5' : '\u01fc',   b'\xE2\xB5' : '\u01fd',
-         b'\xE3\x41' : '\u00c2',   b'\xE3\x43' : '\u0108',
-         b'\xE3\x45' : '\u00ca',   b'\xE3\x47' : '\u011c',
-         b'\xE3\x48' : '\u0124',   b'\xE3\x49' : '\u00ce',
-         b'\xE3\x4A' : '\u0134',   b'\xE3\x4F' : '\u00d4',
-         b'\xE3\x53' : '\u015c',   b'\xE3\x55' : '\u00db',
-         b'\xE3\x57' : '\u0174',   b'\xE3\x59' : '\u0176',
-         b'\xE3\x5A' : '\u1e90',   b'\xE3\x61' : '\u00e2',
-         b'\xE3\x63' : '\u0109',   b'\xE3\x65' : '\u00ea',
-         b'\xE3\x67' : '\u011d',   b'\xE3\x68' : '\u0125',
-         b'\xE3\x69' : '\u00ee',   b'\xE3\x6A' : '\u0135',
-         b'\xE3\x6F' : '\u00f4',   b'\xE3\x73' : '\u015d',
-         b'\xE3\x75' : '\u00fb',   b'\xE3\x77' : '\u0175',
-         b'\xE3\x79' : '\u0177',   b'\xE3\x7A' : '\u1e91',
-         b'\xE4\x41' : '\u00c3',   b'\xE4\x45' : '\u1ebc',
-         b'\xE4\x49' : '\u0128',   b'\xE4\x4E' : '\u00d1',
-         b'\xE4\x4F' : '\u00d5',   b'\xE4\x55' : '\u0168',
-         b'\xE4\x56' : '\u1e7c',   b'\xE4\x59' : '\u1ef8',
-         b'\xE4\x61' : '\u00e3',   b'\xE4\x65' : '\u1ebd',
-         b'\xE4\x69' : '\u0129',   b'\xE4\x6E' : '\u00f1',
-         b'\xE4\x6F' : '\u00f5',   b'\xE4\x75' : '\u0169',
-         b'\xE4\x76' : '\u1e7d',   b'\xE4\x79' : '\u1ef9',
-         b'\xE5\x41' : '\u0100',   b'\xE5\x45' : '\u0112',
-         b'\xE5\x47' : '\u1e20',   b'\xE5\x49' : '\u012a',
-         b'\xE5\x4F' : '\u014c',   b'\xE5\x55' : '\u016a',
-         b'\xE5\x61' : '\u0101',   b'\xE5\x65' : '\u0113',
-         b'\xE5\x67' : '\u1e21',   b'\xE5\x69' : '\u012b',
-         b'\xE5\x6F' : '\u014d',   b'\xE5\x75' : '\u016b',
-         b'\xE5\xA5' : '\u01e2',   b'\xE5\xB5' : '\u01e3',
-         b'\xE6\x41' : '\u0102',   b'\xE6\x45' : '\u0114',   
-         b'\xE6\x47' : '\u011e',   b'\xE6\x49' : '\u012c',
-         b'\xE6\x4F' : '\u014e',   b'\xE6\x55' : '\u016c',
-         b'\xE6\x61' : '\u0103',   b'\xE6\x65' : '\u0115',
-         b'\xE6\x67' : '\u011f',   b'\xE6\x69' : '\u012d',
-         b'\xE6\x6F' : '\u014f',   b'\xE6\x75' : '\u016d',
-         b'\xE7\x42' : '\u1e02',   b'\xE7\x43' : '\u010a',
-         b'\xE7\x44' : '\u1e0a',   b'\xE7\x45' : '\u0116',
-         b'\xE7\x46' : '\u1e1e',   b'\xE7\x47' : '\u0120',
-         b'\xE7\x48' : '\u1e22',   b'\xE7\x49' : '\u0130',
-         b'\xE7\x4D' : '\u1e40',   b'\xE7\x4E' : '\u1e44',
-         b'\xE7\x50' : '\u1e56',   b'\xE7\x52' : '\u1e58',
-         b'\xE7\x53' : '\u1e60',   b'\xE7\x54' : '\u1e6a',
-         b'\xE7\x57' : '\u1e86',   b'\xE7\x58' : '\u1e8a',
-         b'\xE7\x59' : '\u1e8e',   b'\xE7\x5A' : '\u017b',
-         b'\xE7\x62' : '\u1e03',   b'\xE7\x63' : '\u010b',
-         b'\xE7\x64' : '\u1e0b',   b'\xE7\x65' : '\u0117',
-         b'\xE7\x66' : '\u1e1f',   b'\xE7\x67' : '\u0121',
-         b'\xE7\x68' : '\u1e23',   b'\xE7\x6D' : '\u1e41',
-         b'\xE7\x6E' : '\u1e45',   b'\xE7\x70' : '\u1e57',
-         b'\xE7\x72' : '\u1e59',   b'\xE7\x73' : '\u1e61',
-         b'\xE7\x74' : '\u1e6b',   b'\xE7\x77' : '\u1e87',
-         b'\xE7\x78' : '\u1e8b',   b'\xE7\x79' : '\u1e8f',
-         b'\xE7\x7A' : '\u017c',   b'\xE8\x41' : '\u00c4',
-         b'\xE8\x45' : '\u00cb',   b'\xE8\x48' : '\u1e26',
-         b'\xE8\x49' : '\u00cf',   b'\xE8\x4F' : '\u00d6',
-         b'\xE8\x55' : '\u00dc',   b'\xE8\x57' : '\u1e84',
-         b'\xE8\x58' : '\u1e8c',   b'\xE8\x59' : '\u0178',
-         b'\xE8\x61' : '\u00e4',   b'\xE8\x65' : '\u00eb',
-         b'\xE8\x68' : '\u1e27',   b'\xE8\x69' : '\u00ef',
-         b'\xE8\x6F' : '\u00f6',   b'\xE8\x74' : '\u1e97',
-         b'\xE8\x75' : '\u00fc',   b'\xE8\x77' : '\u1e85',
-         b'\xE8\x78' : '\u1e8d',   b'\xE8\x79' : '\u00ff',
-         b'\xE9\x41' : '\u01cd',   b'\xE9\x43' : '\u010c',
-         b'\xE9\x44' : '\u010e',   b'\xE9\x45' : '\u011a',
-         b'\xE9\x47' : '\u01e6',   b'\xE9\x49' : '\u01cf',
-         b'\xE9\x4B' : '\u01e8',   b'\xE9\x4C' : '\u013d',
-         b'\xE9\x4E' : '\u0147',   b'\xE9\x4F' : '\u01d1',
-         b'\xE9\x52' : '\u0158',   b'\xE9\x53' : '\u0160',
-         b'\xE9\x54' : '\u0164',   b'\xE9\x55' : '\u01d3',
-         b'\xE9\x5A' : '\u017d',   b'\xE9\x61' : '\u01ce',
-         b'\xE9\x63' : '\u010d',   b'\xE9\x64' : '\u010f',
-         b'\xE9\x65' : '\u011b',   b'\xE9\x67' : '\u01e7',
-         b'\xE9\x69' : '\u01d0',   b'\xE9\x6A' : '\u01f0',
-         b'\xE9\x6B' : '\u01e9',   b'\xE9\x6C' : '\u013e',
-         b'\xE9\x6E' : '\u0148',   b'\xE9\x6F' : '\u01d2',
-         b'\xE9\x72' : '\u0159',   b'\xE9\x73' : '\u0161',
-         b'\xE9\x74' : '\u0165',   b'\xE9\x75' : '\u01d4',
-         b'\xE9\x7A' : '\u017e',   b'\xEA\x41' : '\u00c5',
-         b'\xEA\x61' : '\u00e5',   b'\xEA\x75' : '\u016f',
-         b'\xEA\x77' : '\u1e98',   b'\xEA\x79' : '\u1e99',
-         b'\xEA\xAD' : '\u016e',   b'\xEE\x4F' : '\u0150',
-         b'\xEE\x55' : '\u0170',   b'\xEE\x6F' : '\u0151',
-         b'\xEE\x75' : '\u0171',   b'\xF0\x20' : '\u00b8',
-         b'\xF0\x43' : '\u00c7',   b'\xF0\x44' : '\u1e10',
-         b'\xF0\x47' : '\u0122',   b'\xF0\x48' : '\u1e28',
-         b'\xF0\x4B' : '\u0136',   b'\xF0\x4C' : '\u013b',
-         b'\xF0\x4E' : '\u0145',   b'\xF0\x52' : '\u0156',   
-         b'\xF0\x53' : '\u015e',   b'\xF0\x54' : '\u0162',
-         b'\xF0\x63' : '\u00e7',   b'\xF0\x64' : '\u1e11',
-         b'\xF0\x67' : '\u0123',   b'\xF0\x68' : '\u1e29',
-         b'\xF0\x6B' : '\u0137',   b'\xF0\x6C' : '\u013c',
-         b'\xF0\x6E' : '\u0146',   b'\xF0\x72' : '\u0157',
-         b'\xF0\x73' : '\u015f',   b'\xF0\x74' : '\u0163',
-         b'\xF1\x41' : '\u0104',   b'\xF1\x45' : '\u0118',
-         b'\xF1\x49' : '\u012e',   b'\xF1\x4F' : '\u01ea',
-         b'\xF1\x55' : '\u0172',   b'\xF1\x61' : '\u0105',
-         b'\xF1\x65' : '\u0119',   b'\xF1\x69' : '\u012f',
-         b'\xF1\x6F' : '\u01eb',   b'\xF1\x75' : '\u0173',
-         b'\xF2\x41' : '\u1ea0',   b'\xF2\x42' : '\u1e04',
-         b'\xF2\x44' : '\u1e0c',   b'\xF2\x45' : '\u1eb8',
-         b'\xF2\x48' : '\u1e24',   b'\xF2\x49' : '\u1eca',
-         b'\xF2\x4B' : '\u1e32',   b'\xF2\x4C' : '\u1e36',
-         b'\xF2\x4D' : '\u1e42',   b'\xF2\x4E' : '\u1e46',
-         b'\xF2\x4F' : '\u1ecc',   b'\xF2\x52' : '\u1e5a',
-         b'\xF2\x53' : '\u1e62',   b'\xF2\x54' : '\u1e6c',
-         b'\xF2\x55' : '\u1ee4',   b'\xF2\x56' : '\u1e7e',
-         b'\xF2\x57' : '\u1e88',   b'\xF2\x59' : '\u1ef4',
-         b'\xF2\x5A' : '\u1e92',   b'\xF2\x61' : '\u1ea1',
-         b'\xF2\x62' : '\u1e05',   b'\xF2\x64' : '\u1e0d',
-         b'\xF2\x65' : '\u1eb9',   b'\xF2\x68' : '\u1e25',
-         b'\xF2\x69' : '\u1ecb',   b'\xF2\x6B' : '\u1e33',
-         b'\xF2\x6C' : '\u1e37',   b'\xF2\x6D' : '\u1e43',
-         b'\xF2\x6E' : '\u1e47',   b'\xF2\x6F' : '\u1ecd',
-         b'\xF2\x72' : '\u1e5b',   b'\xF2\x73' : '\u1e63',
-         b'\xF2\x74' : '\u1e6d',   b'\xF2\x75' : '\u1ee5',
-         b'\xF2\x76' : '\u1e7f',   b'\xF2\x77' : '\u1e89',
-         b'\xF2\x79' : '\u1ef5',   b'\xF2\x7A' : '\u1e93',
-         b'\xF3\x55' : '\u1e72',   b'\xF3\x75' : '\u1e73',
-         b'\xF4\x41' : '\u1e00',   b'\xF4\x61' : '\u1e01',
-         b'\xF9\x48' : '\u1e2a',   b'\xF9\x68' : '\u1e2b',  
-       }
-
-    @staticmethod
-    def __ansel_to_unicode(s):
-        """ Convert an ANSEL encoded string to unicode """
-    
-        buff = StringIO()
-        while s:
-            if ord(s[0]) < 128:
-                if s[0] in AnselReader.__use_ASCII:
-                    head = s[0]
-                else:
-                    # substitute space for disallowed (control) chars
-                    head = ' '
-                s = s[1:]
-            else:
-                if s[0:2] in AnselReader.__twobyte:
-                    head = AnselReader.__twobyte[s[0:2]]
-                    s = s[2:]
-                elif s[0] in AnselReader.__onebyte:
-                    head = AnselReader.__onebyte[s[0]]
-                    s = s[1:]
-                elif s[0] in AnselReader.__acombiners:
-                    c =  AnselReader.__acombiners[s[0]]
-                    # always consume the combiner
-                    s = s[1:]
-                    next = s[0]
-                    if next in AnselReader.__printable_ascii:
-                        # consume next as well
-                        s = s[1:]
-                        # unicode: combiner follows base-char
-                        head = next + c
-                    else:
-                        # just drop the unexpected combiner
-                        continue 
-                else:
-                    head = '\ufffd' # "Replacement Char"
-                    s = s[1:]
-            buff.write(head.encode("utf-8"))
-        ans = buff.getvalue().decode("utf-8")
-        buff.close()
-        return ans
-
     def __init__(self, ifile):
-        BaseReader.__init__(self, ifile, "")
+        BaseReader.__init__(self, ifile, 'ansel')
 
-    def readline(self):
-        return self.__ansel_to_unicode(self.ifile.readline())
-    
 #-------------------------------------------------------------------------
 #
 # CurrentState
@@ -2650,9 +2431,10 @@ class GedcomParser(UpdateCallback):
           0 TRLR                                          {1:1}
 
         """
-        no_magic = self.maxpeople < 1000
+        # The parser looks up backlinks during the import, so the reference
+        # map indices must stay connected, whatever the number of people
         with DbTxn(_("GEDCOM import"), self.dbase, not use_trans,
-                   no_magic=no_magic) as self.trans:
+                   no_magic=True) as self.trans:
 
             self.dbase.disable_signals()
             self.__parse_header_head()
@@ -7632,6 +7414,10 @@ class GedcomParser(UpdateCallback):
 # GedcomStageOne
 #
 #-------------------------------------------------------------------------
+# the character set and the individual records, searched in the raw file
+_CHAR_RE = re.compile(br'(?:^|\n)[ \t]*1[ \t]+CHAR[ \t]+([^\r\n]*)')
+_INDI_RE = re.compile(br'(?:^|\n)[ \t]*0[ \t]+@[^@\n]*@[ \t]+INDI(?:VIDUAL)?\b')
+
 class GedcomStageOne(object):
     """
     The GedcomStageOne parser scans the file quickly, looking for a few things.
@@ -7725,6 +7511,58 @@ class GedcomStageOne(object):
                 assert(isinstance(value, str))
                 self.enc = value
 
+    def parse_mapped(self):
+        """
+        Scan the input file through a read-only memory map of it, and return
+        the map, at its start, so that the GedcomParser can read the file
+        from it.
+
+        The encoding, the number of lines and the number of people are found
+        by searching the raw bytes of the map, without decoding them, so the
+        file is only decoded once, by the reader of the GedcomParser. The
+        child and spouse family maps are not collected; the parser adds the
+        missing references when it checks the cross references at the end
+        of the import.
+
+        Return None if the file can not be mapped, for example when it is not
+        a regular file or when it is UTF-16 encoded. The parse method should
+        be used instead then.
+        """
+        try:
+            size = os.fstat(self.ifile.fileno()).st_size
+        except (AttributeError, OSError, ValueError):
+            return None
+        if size == 0:
+            raise GedcomError(self.__EMPTY_GED)
+        try:
+            data = mmap.mmap(self.ifile.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        start = data[:2]
+        if start == b"\xff\xfe":
+            data.close()
+            return None
+        elif b"\x00" in start:
+            data.close()
+            raise GedcomError(self.__BAD_UTF16)
+
+        if data[:3] == b"\xef\xbb\xbf":
+            self.enc = "UTF8"
+        else:
+            match = _CHAR_RE.search(data)
+            if match:
+                self.enc = match.group(1).strip().decode('utf8', 'replace')
+        self.pcnt = len(_INDI_RE.findall(data))
+        self.lcnt = 0 if data[-1:] == b"\n" else 1
+        while True:
+            block = data.read(BLOCK_SIZE)
+            if not block:
+                break
+            self.lcnt += block.count(b"\n")
+        data.seek(0)
+        return data
+
     def get_famc_map(self):
         """
         Return the Person to Child Family map
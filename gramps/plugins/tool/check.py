@@ -30,6 +30,7 @@
 #
 #-------------------------------------------------------------------------
 import os
+import pickle
 from io import StringIO
 import time
 from collections import defaultdict
@@ -59,7 +60,7 @@ ngettext = glocale.translation.ngettext # else "nearby" comments are ignored
 from gramps.gen.lib import (Citation, Event, EventType, Family, MediaObject,
                             Name, Note, Person, Place, Repository, Source,
                             StyledText, Tag)
-from gramps.gen.db import DbTxn
+from gramps.gen.db import DbTxn, KEY_TO_CLASS_MAP
 from gramps.gen.config import config
 from gramps.gen.utils.id import create_id
 from gramps.gen.utils.db import family_name
@@ -77,10 +78,31 @@ from gramps.gen.constfunc import handle2internal, conv_to_unicode
 # All except 09, 0A, 0D are replaced with space.
 strip_dict = dict.fromkeys(list(range(9))+list(range(11,13))+list(range(14, 32)),  " ")
 
+# the attributes of CheckIntegrity with the problems found, which are kept in
+# the checkpoint
+RESULTS = ('bad_photo', 'replaced_photo', 'removed_photo', 'empty_family',
+           'broken_links', 'duplicate_links', 'broken_parent_links', 'fam_rel',
+           'invalid_events', 'invalid_birth_events', 'invalid_death_events',
+           'invalid_person_references', 'invalid_family_references',
+           'invalid_place_references', 'invalid_source_references',
+           'invalid_citation_references', 'invalid_repo_references',
+           'invalid_media_references', 'invalid_note_references',
+           'invalid_tag_references', 'invalid_dates', 'removed_name_format',
+           'empty_objects', 'replaced_sourceref')
+
+# name of the file, in the database directory, keeping the time of the last
+# complete check, and the progress of an interrupted one
+CHECKPOINT = "check.pkl"
+CHECKPOINT_VERSION = 1
+# number of objects checked for reference problems between two saves of the
+# checkpoint
+CHECKPOINT_STEP = 1000
+
 class ProgressMeter(object):
-    def __init__(self, *args): pass
+    def __init__(self, *args, **kwargs): pass
     def set_pass(self, *args): pass
     def step(self): pass
+    def get_cancelled(self): return False
     def close(self): pass
 
 #-------------------------------------------------------------------------
@@ -161,46 +183,45 @@ class Check(tool.BatchTool):
         with DbTxn(_("Check Integrity"), self.db, batch=True) as trans:
             self.db.disable_signals()
             checker = CheckIntegrity(dbstate, uistate, trans)
-            # start with empty objects, broken links can be corrected below
-            # then. This is done before fixing encoding and missing photos,
-            # since otherwise we will be trying to fix empty records which are
-            # then going to be deleted.
-            checker.cleanup_empty_objects()
-            checker.fix_encoding()
-            checker.fix_ctrlchars_in_notes()
-            checker.cleanup_missing_photos(cli)
-            checker.cleanup_deleted_name_formats()
-            
-            prev_total = -1
-            total = 0
-        
-            while prev_total != total:
-                prev_total = total
-                
-                checker.check_for_broken_family_links()
-                checker.check_parent_relationships()
-                checker.cleanup_empty_families(cli)
-                checker.cleanup_duplicate_spouses()
-    
-                total = checker.family_errors()
-
-            checker.check_events()
-            checker.check_person_references()
-            checker.check_family_references()
-            checker.check_place_references()
-            checker.check_source_references()
-            checker.check_citation_references()
-            checker.check_media_references()
-            checker.check_repo_references()
-            checker.check_note_references()
-            checker.check_tag_references()
-            checker.check_checksum()
-            checker.check_media_sourceref()
+            if checker.was_interrupted() and user.prompt(
+                    _('Continue the interrupted check'),
+                    _('The last check of this Family Tree was interrupted. '
+                      'It can be continued where it stopped, or started '
+                      'again from the beginning.'),
+                    _('_Continue'), _('_Start again')):
+                checker.resume()
+            else:
+                if self.options.handler.options_dict['changed']:
+                    checker.check_changed_only()
+                # start with empty objects, broken links can be corrected
+                # below then. This is done before fixing encoding and missing
+                # photos, since otherwise we will be trying to fix empty
+                # records which are then going to be deleted.
+                checker.cleanup_empty_objects()
+                checker.fix_encoding()
+                checker.fix_ctrlchars_in_notes()
+                checker.cleanup_missing_photos(cli)
+                checker.cleanup_deleted_name_formats()
+
+                prev_total = -1
+                total = 0
+
+                while prev_total != total:
+                    prev_total = total
+
+                    checker.check_for_broken_family_links()
+                    checker.check_parent_relationships()
+                    checker.cleanup_empty_families(cli)
+                    checker.cleanup_duplicate_spouses()
+
+                    total = checker.family_errors()
+
+            checker.check_references()
         self.db.enable_signals()
         self.db.request_rebuild()
 
         errs = checker.build_report(uistate)
-        if errs:
+        if errs or checker.interrupted:
             Report(uistate, checker.text.getvalue(), cli)
 
 #-------------------------------------------------------------------------
@@ -238,12 +259,108 @@ class CheckIntegrity(object):
         self.empty_objects = defaultdict(list)
         self.replaced_sourceref = []
         self.last_img_dir = config.get('behavior.addmedia-image-dir')
-        self.progress = ProgressMeter(_('Checking Database'),'')
+        self.progress = ProgressMeter(_('Checking Database'), '',
+                                      can_cancel=True)
         self.explanation = Note(_('Objects referenced by this note '
             'were referenced but missing so that is why they have been created '
             'when you ran Check and Repair on %s.') %
             time.strftime('%x %X', time.localtime()))
         self.explanation.set_handle(create_id())
+        # whether the explanation note was added to the database
+        self.explained = False
+        self.known_handles = {}
+        # the time the check started, and the time after which the objects
+        # must have been changed to be checked for reference problems
+        self.start = int(time.time())
+        self.since = None
+        # the table and the handle of the last object checked for reference
+        # problems
+        self.position = (0, None)
+        self.interrupted = False
+        self.checkpoint_name = None
+        self.checkpoint = self.read_checkpoint()
+
+    def read_checkpoint(self):
+        """
+        Return the content of the checkpoint of the database, an empty
+        dictionary if it has none.
+        """
+        try:
+            path = self.db.get_save_path()
+        except NotImplementedError:
+            path = None
+        if not path or not os.path.isdir(path):
+            return {}
+        self.checkpoint_name = os.path.join(path, CHECKPOINT)
+        try:
+            with open(self.checkpoint_name, 'rb') as checkpoint_file:
+                checkpoint = pickle.load(checkpoint_file)
+        except (IOError, OSError):
+            return {}
+        except Exception as msg:
+            logging.warning('Checkpoint of the check is damaged: %s' % msg)
+            return {}
+        if (not isinstance(checkpoint, dict) or
+                checkpoint.get('version') != CHECKPOINT_VERSION):
+            return {}
+        return checkpoint
+
+    def save_checkpoint(self, finished=False):
+        """
+        Save the results of the check so far and the position of the last
+        object checked for reference problems in the checkpoint, or only the
+        time the check started if it is finished.
+        """
+        if self.checkpoint_name is None:
+            return
+        if finished:
+            self.checkpoint = {'last_check' : self.start}
+        else:
+            self.checkpoint['run'] = {
+                'start' : self.start,
+                'since' : self.since,
+                'position' : self.position,
+                'explanation' : self.explanation.handle,
+                'explained' : self.explained,
+                'results' : dict((name, getattr(self, name))
+                                 for name in RESULTS),
+                }
+        self.checkpoint['version'] = CHECKPOINT_VERSION
+        try:
+            with open(self.checkpoint_name + '.new', 'wb') as checkpoint_file:
+                pickle.dump(self.checkpoint, checkpoint_file,
+                            pickle.HIGHEST_PROTOCOL)
+            os.replace(self.checkpoint_name + '.new', self.checkpoint_name)
+        except (IOError, OSError) as msg:
+            logging.warning("Can't save the checkpoint of the check: %s" % msg)
+
+    def was_interrupted(self):
+        """
+        Return True if the last check of the database was interrupted.
+        """
+        return 'run' in self.checkpoint
+
+    def resume(self):
+        """
+        Continue the interrupted check: take over its results, and check for
+        reference problems from the object where it stopped.
+        """
+        run = self.checkpoint['run']
+        for name in RESULTS:
+            setattr(self, name, run['results'][name])
+        self.start = run['start']
+        self.since = run['since']
+        self.position = run['position']
+        self.explanation.set_handle(run['explanation'])
+        self.explained = run['explained']
+        logging.info('Continuing the interrupted check')
+
+    def check_changed_only(self):
+        """
+        Only check the objects changed since the last complete check for
+        reference problems. The other checks are done on all objects.
+        """
+        self.since = self.checkpoint.get('last_check')
 
     def family_errors(self):
         return (len(self.broken_parent_links) +
@@ -978,1004 +1095,483 @@ class CheckIntegrity(object):
         if previous_errors == len(self.fam_rel):
             logging.info('    OK: no broken parent relationships found')
 
-    def check_events(self):
-        self.progress.set_pass(_('Looking for event problems'),
-                               self.db.get_number_of_people()
-                               +self.db.get_number_of_families())
-        logging.info('Looking for event problems')
-        
-        for bkey in self.db.get_person_handles(sort_handles=False):
-            key = handle2internal(bkey)
-            self.progress.step()
-            
-            person = self.db.get_person_from_handle(key)
-            birth_ref = person.get_birth_ref()
-            none_handle = False
-            if birth_ref:
-                newref = birth_ref
-                if birth_ref.ref is None:
-                    none_handle = True
-                    birth_ref.ref = create_id()
-                birth_handle = birth_ref.ref
-                birth = self.db.get_event_from_handle(birth_handle)
-                if not birth:
-                    # The birth event referenced by the birth handle
-                    # does not exist in the database
-                    # This is tested by TestcaseGenerator person "Broken11"
-                    make_unknown(birth_handle, self.explanation.handle,
-                            self.class_event, self.commit_event, self.trans,
-                            type=EventType.BIRTH)
-                    logging.warning('    FAIL: the person "%(gid)s" refers to '
-                                    'a birth event "%(hand)s" which does not '
-                                    'exist in the database' % 
-                                    {'gid' : person.gramps_id,
-                                     'hand' : birth_handle})
-                    self.invalid_events.add(key)
-                else:
-                    if int(birth.get_type()) != EventType.BIRTH:
-                        # Birth event was not of the type "Birth"
-                        # This is tested by TestcaseGenerator person "Broken14"
-                        logging.warning('    FAIL: the person "%(gid)s" refers '
-                                        'to a birth event which is of type '
-                                        '"%(type)s" instead of Birth' % 
-                                        {'gid' : person.gramps_id,
-                                         'type' : int(birth.get_type())})
-                        birth.set_type(EventType(EventType.BIRTH))
-                        self.db.commit_event(birth, self.trans)
-                        self.invalid_birth_events.add(key)
-            if none_handle:
-                person.set_birth_ref(newref)
-                self.db.commit_person(person, self.trans)
+    def check_references(self):
+        """
+        Look for reference problems in all the tables.
+
+        Every table is read once: each object is unserialized a single time,
+        all the checks that apply to its type are run on it, and it is
+        committed if any of them changed it. Missing objects are created as
+        soon as a reference to them is found.
+
+        The progress is saved in the checkpoint as the objects are checked,
+        so that an interrupted check continues where it stopped, see
+        read_checkpoint and resume. If since is set, only the objects
+        changed after that time are checked, with the objects that refer to
+        objects removed since then; the checksums of all the media files are
+        checked anyway, as the files can change without their objects.
+        """
+        _db = self.db
+        table = (
+            # Dispatch table of the reference checks. Each entry is a tuple
+            # containing:
+            #    0. the table of the objects
+            #    1. class of the objects
+            #    2. position of the change column in the data of the objects
+            #    3. function to commit a changed object
+            #    4. the checks to run, each returning True if it changed
+            #       the object
+            #    5. the checks to run on the objects that were not changed
+            #       since the last check
+
+            (_db.person_map, Person, 17, _db.commit_person,
+                (self.check_person_events, self.check_person_references,
+                 self.check_lds_ord_references, self.check_secondary_references),
+                ()),
+            (_db.family_map, Family, 12, _db.commit_family,
+                (self.check_family_events, self.check_lds_ord_references,
+                 self.check_secondary_references), ()),
+            (_db.event_map, Event, 10, _db.commit_event,
+                (self.check_event_place, self.check_secondary_references), ()),
+            (_db.place_map, Place, 15, _db.commit_place,
+                (self.check_enclosing_places, self.check_secondary_references),
+                ()),
+            (_db.citation_map, Citation, 9, _db.commit_citation,
+                (self.check_citation_source, self.check_secondary_references),
+                ()),
+            # the source citations of the media references must be converted
+            # before the citations are checked
+            (_db.source_map, Source, 8, _db.commit_source,
+                (self.check_media_sourceref, self.check_repo_references,
+                 self.check_secondary_references), ()),
+            (_db.media_map, MediaObject, 9, _db.commit_media_object,
+                (self.check_checksum, self.check_secondary_references),
+                (self.check_checksum,)),
+            (_db.repository_map, Repository, 7, _db.commit_repository,
+                (self.check_secondary_references,), ()),
+            (_db.note_map, Note, 5, _db.commit_note,
+                (self.check_secondary_references,), ()),
+            )
 
-            none_handle = False
-            death_ref = person.get_death_ref()
-            if death_ref:
-                newref = death_ref
-                if death_ref.ref is None:
-                    none_handle = True
-                    death_ref.ref = create_id()
-                death_handle = death_ref.ref
-                death = self.db.get_event_from_handle(death_handle)
-                if not death:
-                    # The death event referenced by the death handle
-                    # does not exist in the database
-                    # This is tested by TestcaseGenerator person "Broken12"
-                    logging.warning('    FAIL: the person "%(gid)s" refers to '
-                                    'a death event "%(hand)s" which does not '
-                                    'exist in the database' % 
-                                    {'gid' : person.gramps_id,
-                                     'hand' : death_handle})
-                    make_unknown(death_handle, self.explanation.handle,
-                            self.class_event, self.commit_event, self.trans,
-                            type=EventType.DEATH)
-                    self.invalid_events.add(key)
+        start, last = self.position
+        handle_lists = []
+        for index, entry in enumerate(table):
+            if index < start:
+                handle_lists.append([])
+            elif index == start and last is not None:
+                handle_lists.append(sorted(key for key in entry[0].keys()
+                                           if key > last))
+            else:
+                handle_lists.append(sorted(entry[0].keys()))
+
+        self.progress.set_pass(_('Looking for reference problems'),
+                               sum(len(handles) for handles in handle_lists))
+        logging.info('Looking for reference problems')
+        self.save_checkpoint()
+        if self.since is not None:
+            referrers = self._dangling_referrers()
+
+        count = 0
+        for index, (the_map, obj_class, change_pos, commit_func,
+                    checks, unchanged_checks) in enumerate(table):
+            for bhandle in handle_lists[index]:
+                self.progress.step()
+                data = the_map.get(bhandle)
+                if data is None:
+                    to_run = ()
+                elif (self.since is None or data[change_pos] >= self.since or
+                          handle2internal(bhandle) in referrers):
+                    to_run = checks
                 else:
-                    if int(death.get_type()) != EventType.DEATH:
-                        # Death event was not of the type "Death"
-                        # This is tested by TestcaseGenerator person "Broken15"
-                        logging.warning('    FAIL: the person "%(gid)s" refers '
-                                        'to a death event which is of type '
-                                        '"%(type)s" instead of Death' % 
-                                        {'gid' : person.gramps_id,
-                                         'type' : int(death.get_type())})
-                        death.set_type(EventType(EventType.DEATH))
-                        self.db.commit_event(death, self.trans)
-                        self.invalid_death_events.add(key)
-            if none_handle:
-                person.set_death_ref(newref)
-                self.db.commit_person(person, self.trans)
-
-            none_handle = False
-            newlist = []
-            if person.get_event_ref_list():
-                for event_ref in person.get_event_ref_list():
-                    newlist.append(event_ref)
-                    if event_ref.ref is None:
-                        none_handle = True
-                        event_ref.ref = create_id()
-                    event_handle = event_ref.ref
-                    event = self.db.get_event_from_handle(event_handle)
-                    if not event:
-                        # The event referenced by the person
-                        # does not exist in the database
-                        #TODO: There is no better way?
-                        # This is tested by TestcaseGenerator person "Broken11"
-                        # This is tested by TestcaseGenerator person "Broken12"
-                        # This is tested by TestcaseGenerator person "Broken13"
-                        logging.warning('    FAIL: the person "%(gid)s" refers '
-                                        'to an event "%(hand)s" which does not '
-                                        'exist in the database' % 
-                                        { 'gid' : person.gramps_id,
-                                         'hand' : event_handle})
-                        make_unknown(event_handle,
-                                self.explanation.handle, self.class_event,
-                                self.commit_event, self.trans)
-                        self.invalid_events.add(key)
-                if none_handle:
-                    person.set_event_ref_list(newlist)
-                    self.db.commit_person(person, self.trans)
-            elif not isinstance(person.get_event_ref_list(), list):
-                # event_list is None or other garbage
-                logging.warning('    FAIL: the person "%s" has an event ref list'
-                    ' which is invalid' % (person.gramps_id))
-                person.set_event_ref_list([])
-                self.db.commit_person(person, self.trans)
-                self.invalid_events.add(key)
-
-        for bkey in self.db.get_family_handles():
-            key = handle2internal(bkey)
-            self.progress.step()
-            family = self.db.get_family_from_handle(key)
-            if family.get_event_ref_list():
-                none_handle = False
-                newlist = []
-                for event_ref in family.get_event_ref_list():
-                    newlist.append(event_ref)
-                    if event_ref.ref is None:
-                        none_handle = True
-                        event_ref.ref = create_id()
-                    event_handle = event_ref.ref
-                    event = self.db.get_event_from_handle(event_handle)
-                    if not event:
-                        # The event referenced by the family
-                        # does not exist in the database
-                        logging.warning('    FAIL: the family "%(gid)s" refers '
-                                        'to an event "%(hand)s" which does not '
-                                        'exist in the database' % 
-                                        {'gid' : family.gramps_id,
-                                         'hand' : event_handle})
-                        make_unknown(event_handle, self.explanation.handle,
-                                self.class_event, self.commit_event, self.trans)
-                        self.invalid_events.add(key)
-                if none_handle:
-                    family.set_event_ref_list(newlist)
-                    self.db.commit_family(family, self.trans)
-            elif not isinstance(family.get_event_ref_list(), list):
-                # event_list is None or other garbage
-                logging.warning('    FAIL: the family "%s" has an event ref list'
-                    ' which is invalid' % (family.gramps_id))
-                family.set_event_ref_list([])
-                self.db.commit_family(family, self.trans)
-                self.invalid_events.add(key)
-
-        if len (self.invalid_birth_events) + len(self.invalid_death_events) +\
-                len(self.invalid_events) == 0:
-            logging.info('    OK: no event problems found')
-
-    def check_person_references(self):
-        plist = self.db.get_person_handles()
-        
-        self.progress.set_pass(_('Looking for person reference problems'),
-                               len(plist))
-        logging.info('Looking for person reference problems')
-        
-        for bkey in plist:
-            key = handle2internal(bkey)
-            self.progress.step()
-            none_handle = False
-            newlist = []
-            person = self.db.get_person_from_handle(key)
-            for pref in person.get_person_ref_list():
-                newlist.append(pref)
-                if pref.ref is None:
-                    none_handle = True
-                    pref.ref = create_id()
-                p = self.db.get_person_from_handle( pref.ref)
-                if not p:
-                    # The referenced person does not exist in the database
-                    make_unknown(pref.ref, self.explanation.handle,
-                            self.class_person, self.commit_person, self.trans)
-                    self.invalid_person_references.add(key)
-            if none_handle:
-                person.set_person_ref_list(newlist)
-                self.db.commit_person(person, self.trans)
-
-        if len (self.invalid_person_references) == 0:
-            logging.info('    OK: no event problems found')
-
-    def check_family_references(self):
-        plist = self.db.get_person_handles()
-
-        self.progress.set_pass(_('Looking for family reference problems'),
-                               len(plist))
-        logging.info('Looking for family reference problems')
-
-        for bkey in plist:
-            key = handle2internal(bkey)
-            self.progress.step()
-            person = self.db.get_person_from_handle(key)
-            for ordinance in person.get_lds_ord_list():
-                family_handle = ordinance.get_family_handle()
-                if family_handle:
-                    family = self.db.get_family_from_handle(family_handle)
-                    if not family:
-                        # The referenced family does not exist in the database
-                        make_unknown(family_handle,
-                                self.explanation.handle, self.class_family,
-                                self.commit_family, self.trans, db=self.db)
-                        self.invalid_family_references.add(key)
-
-        if len (self.invalid_family_references) == 0:
-            logging.info('    OK: no event problems found')
-
-    def check_repo_references(self):
-        slist = self.db.get_source_handles()
-        
-        self.progress.set_pass(_('Looking for repository reference problems'),
-                               len(slist))
-        logging.info('Looking for repository reference problems')
-        
-        for bkey in slist:
-            key = handle2internal(bkey)
-            self.progress.step()
-            none_handle = False
-            newlist = []
-            source = self.db.get_source_from_handle(key)
-            for reporef in source.get_reporef_list():
-                newlist.append(reporef)
-                if reporef.ref is None:
-                    none_handle = True
-                    reporef.ref = create_id()
-                r = self.db.get_repository_from_handle(reporef.ref)
-                if not r:
-                    # The referenced repository does not exist in the database
-                    make_unknown(reporef.ref, self.explanation.handle,
-                            self.class_repo, self.commit_repo, self.trans)
-                    self.invalid_repo_references.add(key)
-            if none_handle:
-                source.set_reporef_list(newlist);
-                self.db.commit_source(source, self.trans)
-
-        if len (self.invalid_repo_references) == 0:
-            logging.info('    OK: no repository reference problems found')
-
-    def check_place_references(self):
-        plist = self.db.get_person_handles()
-        flist = self.db.get_family_handles()
-        elist = self.db.get_event_handles()
-        llist = self.db.get_place_handles()
-        self.progress.set_pass(_('Looking for place reference problems'),
-                               len(elist)+len(plist)+len(flist)+len(llist))
-        logging.info('Looking for place reference problems')
-
-        for bkey in llist:
-            key = handle2internal(bkey)
-            self.progress.step()
-            none_handle = False
-            newlist = []
-            place = self.db.get_place_from_handle(key)
-            for placeref in place.get_placeref_list():
-                newlist.append(placeref)
-                if placeref.ref is None:
-                    none_handle = True
-                    placeref.ref = create_id()
-                parent_place = self.db.get_place_from_handle(placeref.ref)
-                if not parent_place:
-                    # The referenced place does not exist in the database
-                    make_unknown(placeref.ref,
-                            self.explanation.handle, self.class_place,
-                            self.commit_place, self.trans)
-                    logging.warning('    FAIL: the place "%(gid)s" refers '
-                                    'to a parent place "%(hand)s" which '
-                                    'does not exist in the database' %
-                                    {'gid' : place.gramps_id,
-                                        'hand' : placeref.ref})
-                    self.invalid_place_references.add(key)
-            if none_handle:
-                place.set_placeref_list(newlist);
-                self.db.commit_place(place, self.trans)
-
-        # check persons -> the LdsOrd references a place
-        for bkey in plist:
-            key = handle2internal(bkey)
-            self.progress.step()
-            person = self.db.get_person_from_handle(key)
-            for ordinance in person.lds_ord_list:
-                place_handle = ordinance.get_place_handle()
-                if place_handle:
-                    place = self.db.get_place_from_handle(place_handle)
-                    if not place:
-                        # The referenced place does not exist in the database
-                        # This is tested by TestcaseGenerator person "Broken17"
-                        # This is tested by TestcaseGenerator person "Broken18"
-                        make_unknown(place_handle,
-                                self.explanation.handle, self.class_place,
-                                self.commit_place, self.trans)
-                        logging.warning('    FAIL: the person "%(gid)s" refers '
-                                        'to an LdsOrd place "%(hand)s" which '
-                                        'does not exist in the database' % 
-                                        {'gid' : person.gramps_id,
-                                         'hand' : place_handle})
-                        self.invalid_place_references.add(key)
-        # check families -> the LdsOrd references a place
-        for bkey in flist:
-            key = handle2internal(bkey)
-            self.progress.step()
-            family = self.db.get_family_from_handle(key)
-            for ordinance in family.lds_ord_list:
-                place_handle = ordinance.get_place_handle()
-                if place_handle:
-                    place = self.db.get_place_from_handle(place_handle)
-                    if not place:
-                        # The referenced place does not exist in the database
-                        make_unknown(place_handle,
-                                self.explanation.handle, self.class_place,
-                                self.commit_place, self.trans)
-                        logging.warning('    FAIL: the family "%(gid)s" refers '
-                                        'to an LdsOrd place "%(hand)s" which '
-                                        'does not exist in the database' % 
-                                        {'gid' : family.gramps_id,
-                                         'hand' : place_handle})
-                        self.invalid_place_references.add(key)
-        # check events
-        for bkey in elist:
-            key = handle2internal(bkey)
-            self.progress.step()
-            event = self.db.get_event_from_handle(key)
-            place_handle = event.get_place_handle()
-            if place_handle:
-                place = self.db.get_place_from_handle(place_handle)
-                if not place:
-                    # The referenced place does not exist in the database
-                    make_unknown(place_handle,
-                            self.explanation.handle, self.class_place,
-                            self.commit_place, self.trans)
-                    logging.warning('    FAIL: the event "%(gid)s" refers '
-                                    'to an LdsOrd place "%(hand)s" which '
-                                    'does not exist in the database' % 
-                                    {'gid' : event.gramps_id,
-                                     'hand' : place_handle})
-                    self.invalid_place_references.add(key)
-
-        if len (self.invalid_place_references) == 0:
-            logging.info('    OK: no place reference problems found')
-
-    def check_citation_references(self):
-        known_handles = [handle2internal(key) for key in 
-                                self.db.get_citation_handles()]
-
-        total = (
-                self.db.get_number_of_people() +
-                self.db.get_number_of_families() +
-                self.db.get_number_of_events() +
-                self.db.get_number_of_places() +
-                self.db.get_number_of_citations() +
-                self.db.get_number_of_sources() +
-                self.db.get_number_of_media_objects() +
-                self.db.get_number_of_repositories()
-                )
-
-        self.progress.set_pass(_('Looking for citation reference problems'),
-                               total)
-        logging.info('Looking for citation reference problems')
-
-        for bhandle in self.db.person_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.person_map[bhandle]
-            person = Person()
-            person.unserialize(info)
-            handle_list = person.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Citation':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        person.replace_citation_references(None, new_handle)
-                        self.db.commit_person(person, self.trans)
-                        self.invalid_citation_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_citation_references.add(item[1])
-
-        for bhandle in self.db.family_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.family_map[bhandle]
-            family = Family()
-            family.unserialize(info)
-            handle_list = family.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Citation':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        family.replace_citation_references(None, new_handle)
-                        self.db.commit_family(family, self.trans)
-                        self.invalid_citation_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_citation_references.add(item[1])
-
-        for bhandle in self.db.place_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.place_map[bhandle]
-            place = Place()
-            place.unserialize(info)
-            handle_list = place.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Citation':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        place.replace_citation_references(None, new_handle)
-                        self.db.commit_place(place, self.trans)
-                        self.invalid_citation_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_citation_references.add(item[1])
-
-        for bhandle in self.db.citation_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.citation_map[bhandle]
-            citation = Citation()
-            citation.unserialize(info)
-            handle_list = citation.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Citation':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        citation.replace_citation_references(None, new_handle)
-                        self.db.commit_citation(citation, self.trans)
-                        self.invalid_citation_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_citation_references.add(item[1])
-
-        for bhandle in self.db.repository_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.repository_map[bhandle]
-            repository = Repository()
-            repository.unserialize(info)
-            handle_list = repository.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Citation':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        repository.replace_citation_references(None, new_handle)
-                        self.db.commit_repository(repository, self.trans)
-                        self.invalid_citation_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_citation_references.add(item[1])
-
-        for bhandle in self.db.media_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.media_map[bhandle]
-            obj = MediaObject()
-            obj.unserialize(info)
-            handle_list = obj.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Citation':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        obj.replace_citation_references(None, new_handle)
-                        self.db.commit_media_object(obj, self.trans)
-                        self.invalid_citation_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_citation_references.add(item[1])
-
-        for bhandle in self.db.event_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.event_map[bhandle]
-            event = Event()
-            event.unserialize(info)
-            handle_list = event.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Citation':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        event.replace_citation_references(None, new_handle)
-                        self.db.commit_event(event, self.trans)
-                        self.invalid_citation_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_citation_references.add(item[1])
-
-        for bad_handle in self.invalid_citation_references:
-            created = make_unknown(bad_handle, self.explanation.handle,
-                        self.class_citation, self.commit_citation, self.trans,
-                        source_class_func=self.class_source,
-                        source_commit_func=self.commit_source,
-                        source_class_arg=create_id())
-            self.invalid_source_references.add(created[0].handle)
-
-        if len(self.invalid_citation_references) == 0:
-            logging.info('   OK: no citation reference problems found')
-
-    def check_source_references(self):
-        clist = self.db.get_citation_handles()
-        self.progress.set_pass(_('Looking for source reference problems'),
-                               len(clist))
-        logging.info('Looking for source reference problems')
-
-        for bkey in clist:
-            key = handle2internal(bkey)
-            self.progress.step()
-            citation = self.db.get_citation_from_handle(key)
-            source_handle = citation.get_reference_handle()
-            if source_handle is None:
-                source_handle = create_id()
-                citation.set_reference_handle(source_handle)
-                self.db.commit_citation(citation, self.trans)
-            if source_handle:
-                source = self.db.get_source_from_handle(source_handle)
-                if not source:
-                    # The referenced source does not exist in the database
-                    make_unknown(source_handle, self.explanation.handle,
-                            self.class_source, self.commit_source, self.trans)
-                    logging.warning('    FAIL: the citation "%(gid)s" refers '
-                                    'to source "%(hand)s" which does not exist '
-                                    'in the database' %
-                                    {'gid' : citation.gramps_id,
-                                     'hand' : source_handle})
-                    self.invalid_source_references.add(key)
-        if len(self.invalid_source_references) == 0:
-            logging.info('   OK: no source reference problems found')
-
-    def check_media_references(self):
-        known_handles = [handle2internal(key) for key in 
-                            self.db.get_media_object_handles(False)]
-
-        total = (
-                self.db.get_number_of_people() + 
-                self.db.get_number_of_families() +
-                self.db.get_number_of_events() + 
-                self.db.get_number_of_places() +
-                self.db.get_number_of_citations() +
-                self.db.get_number_of_sources()
-                )
-
-        self.progress.set_pass(_('Looking for media object reference problems'),
-                               total)
-        logging.info('Looking for media object reference problems')
-        
-        for bhandle in self.db.person_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.person_map[bhandle]
-            person = Person()
-            person.unserialize(info)
-            handle_list = person.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'MediaObject':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        person.replace_media_references(None, new_handle)
-                        self.db.commit_person(person, self.trans)
-                        self.invalid_media_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_media_references.add(item[1])
-
-        for bhandle in self.db.family_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.family_map[bhandle]
-            family = Family()
-            family.unserialize(info)
-            handle_list = family.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'MediaObject':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        family.replace_media_references(None, new_handle)
-                        self.db.commit_family(family, self.trans)
-                        self.invalid_media_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_media_references.add(item[1])
-
-        for bhandle in self.db.place_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.place_map[bhandle]
-            place = Place()
-            place.unserialize(info)
-            handle_list = place.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'MediaObject':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        place.replace_media_references(None, new_handle)
-                        self.db.commit_place(place, self.trans)
-                        self.invalid_media_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_media_references.add(item[1])
-        
-        for bhandle in self.db.event_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.event_map[bhandle]
-            event = Event()
-            event.unserialize(info)
-            handle_list = event.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'MediaObject':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        event.replace_media_references(None, new_handle)
-                        self.db.commit_event(event, self.trans)
-                        self.invalid_media_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_media_references.add(item[1])
-        
-        for bhandle in self.db.citation_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.citation_map[bhandle]
-            citation = Citation()
-            citation.unserialize(info)
-            handle_list = citation.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'MediaObject':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        citation.replace_media_references(None, new_handle)
-                        self.db.commit_citation(citation, self.trans)
-                        self.invalid_media_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_media_references.add(item[1])
-
-        for bhandle in self.db.source_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.source_map[bhandle]
-            source = Source()
-            source.unserialize(info)
-            handle_list = source.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'MediaObject':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        source.replace_media_references(None, new_handle)
-                        self.db.commit_source(source, self.trans)
-                        self.invalid_media_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_media_references.add(item[1])
-
-        for bad_handle in self.invalid_media_references:
-            make_unknown(bad_handle, self.explanation.handle,
-                               self.class_object, self.commit_object, self.trans)
-
-        if len (self.invalid_media_references) == 0:
-            logging.info('    OK: no media reference problems found')
-
-    def check_note_references(self):
-        # Here I assume check note_references runs after all the next checks.
-        missing_references = (len(self.invalid_person_references) +
-                len(self.invalid_family_references) +
-                len(self.invalid_birth_events) +
-                len(self.invalid_death_events) +
-                len(self.invalid_events) +
-                len(self.invalid_place_references) +
-                len(self.invalid_citation_references) +
-                len(self.invalid_source_references) +
-                len(self.invalid_repo_references) +
-                len(self.invalid_media_references))
-        if missing_references:
-            self.db.add_note(self.explanation, self.trans, set_gid=True)
-
-        known_handles = [handle2internal(key) for key in 
-                                    self.db.get_note_handles()]
-        bad_handles = []
-
-        total = (
-                self.db.get_number_of_people() + 
-                self.db.get_number_of_families() +
-                self.db.get_number_of_events() + 
-                self.db.get_number_of_places() +
-                self.db.get_number_of_media_objects() +
-                self.db.get_number_of_citations() +
-                self.db.get_number_of_sources() +
-                self.db.get_number_of_repositories()
-                )
-
-        self.progress.set_pass(_('Looking for note reference problems'),
-                               total)
-        logging.info('Looking for note reference problems')
-        
-        for bhandle in self.db.person_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.person_map[bhandle]
-            person = Person()
-            person.unserialize(info)
-            handle_list = person.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Note':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        person.replace_note_references(None, new_handle)
-                        self.db.commit_person(person, self.trans)
-                        self.invalid_note_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_note_references.add(item[1])
-
-        for bhandle in self.db.family_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.family_map[bhandle]
-            family = Family()
-            family.unserialize(info)
-            handle_list = family.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Note':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        family.replace_note_references(None, new_handle)
-                        self.db.commit_family(family, self.trans)
-                        self.invalid_note_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_note_references.add(item[1])
-
-        for bhandle in self.db.place_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.place_map[bhandle]
-            place = Place()
-            place.unserialize(info)
-            handle_list = place.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Note':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        place.replace_note_references(None, new_handle)
-                        self.db.commit_place(place, self.trans)
-                        self.invalid_note_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_note_references.add(item[1])
-
-        for bhandle in self.db.citation_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.citation_map[bhandle]
-            citation = Citation()
-            citation.unserialize(info)
-            handle_list = citation.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Note':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        citation.replace_note_references(None, new_handle)
-                        self.db.commit_citation(citation, self.trans)
-                        self.invalid_note_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_note_references.add(item[1])
-
-        for bhandle in self.db.source_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.source_map[bhandle]
-            source = Source()
-            source.unserialize(info)
-            handle_list = source.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Note':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        source.replace_note_references(None, new_handle)
-                        self.db.commit_source(source, self.trans)
-                        self.invalid_note_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_note_references.add(item[1])
-
-        for bhandle in self.db.media_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.media_map[bhandle]
-            obj = MediaObject()
-            obj.unserialize(info)
-            handle_list = obj.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Note':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        obj.replace_note_references(None, new_handle)
-                        self.db.commit_media_object(obj, self.trans)
-                        self.invalid_note_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_note_references.add(item[1])
-
-        for bhandle in self.db.event_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.event_map[bhandle]
-            event = Event()
-            event.unserialize(info)
-            handle_list = event.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Note':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        event.replace_note_references(None, new_handle)
-                        self.db.commit_event(event, self.trans)
-                        self.invalid_note_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_note_references.add(item[1])
-
-        for bhandle in self.db.repository_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.repository_map[bhandle]
-            repo = Repository()
-            repo.unserialize(info)
-            handle_list = repo.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Note':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        repo.replace_note_references(None, new_handle)
-                        self.db.commit_repository(repo, self.trans)
-                        self.invalid_note_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_note_references.add(item[1])
-
-        for bad_handle in self.invalid_note_references:
-            make_unknown(bad_handle, self.explanation.handle,
-                               self.class_note, self.commit_note, self.trans)
-
-        if len (self.invalid_note_references) == 0:
-            logging.info('    OK: no note reference problems found')
+                    to_run = unchanged_checks
+                if to_run:
+                    obj = obj_class()
+                    obj.unserialize(data)
+                    changed = False
+                    for check in to_run:
+                        if check(obj):
+                            changed = True
+                    if changed:
+                        commit_func(obj, self.trans)
+                count += 1
+                cancelled = self.progress.get_cancelled()
+                if cancelled or count % CHECKPOINT_STEP == 0:
+                    self.position = (index, bhandle)
+                    self.save_checkpoint()
+                if cancelled:
+                    logging.warning('    Check interrupted, it will continue '
+                                    'from here when it is run again')
+                    self.interrupted = True
+                    return
+            if index >= start:
+                self.position = (index + 1, None)
+
+        self.save_checkpoint(finished=True)
+
+    def _dangling_referrers(self):
+        """
+        Return the set of the handles of the objects that refer to objects
+        which are not in the database, according to the reference map.
+        """
+        referrers = set()
+        with self.db.get_reference_map_cursor() as cursor:
+            for key, data in cursor:
+                (class_key, handle), (ref_class_key, ref_handle) = data
+                ref_handle = handle2internal(ref_handle)
+                if ref_handle not in self._known(
+                        KEY_TO_CLASS_MAP[ref_class_key]):
+                    referrers.add(handle2internal(handle))
+        return referrers
+
+    def _known(self, class_name):
+        """
+        Return the set of the handles of the objects of the class that are
+        in the database, or were created by the check.
+        """
+        if class_name not in self.known_handles:
+            the_map = {
+                'Person' : self.db.person_map,
+                'Family' : self.db.family_map,
+                'Event' : self.db.event_map,
+                'Place' : self.db.place_map,
+                'Source' : self.db.source_map,
+                'Citation' : self.db.citation_map,
+                'MediaObject' : self.db.media_map,
+                'Repository' : self.db.repository_map,
+                'Note' : self.db.note_map,
+                'Tag' : self.db.tag_map,
+                }[class_name]
+            self.known_handles[class_name] = set(handle2internal(key)
+                                                 for key in the_map.keys())
+        return self.known_handles[class_name]
+
+    def _make_unknown(self, class_name, handle, class_func, commit_func,
+                      **argv):
+        """
+        Create the missing object of the class with the given handle, and
+        return the list of the created objects. The note explaining why is
+        added to the database with the first object that needs it.
+        """
+        if class_name == 'Tag':
+            explanation = None
         else:
-            if not missing_references:
+            if not self.explained:
                 self.db.add_note(self.explanation, self.trans, set_gid=True)
+                self.explained = True
+            explanation = self.explanation.handle
+        created = make_unknown(handle, explanation, class_func, commit_func,
+                               self.trans, **argv)
+        for obj in created:
+            self._known(obj.__class__.__name__).add(obj.handle)
+        return created
+
+    def _check_event_ref(self, obj, event_ref, event_type=None):
+        """
+        Check that the event referenced by the event reference exists, and
+        is of event_type if given; create or fix it if not. Return True if
+        the reference was changed.
+        """
+        none_handle = event_ref.ref is None
+        if none_handle:
+            event_ref.ref = create_id()
+        event_handle = event_ref.ref
+        if event_handle not in self._known('Event'):
+            # The event referenced by the object does not exist in the
+            # database
+            # This is tested by TestcaseGenerator person "Broken11"
+            # This is tested by TestcaseGenerator person "Broken12"
+            # This is tested by TestcaseGenerator person "Broken13"
+            logging.warning('    FAIL: the %(class)s "%(gid)s" refers to '
+                            'an event "%(hand)s" which does not exist in the '
+                            'database' %
+                            {'class' : obj.__class__.__name__.lower(),
+                             'gid' : obj.gramps_id, 'hand' : event_handle})
+            if event_type is None:
+                self._make_unknown('Event', event_handle, self.class_event,
+                                   self.commit_event)
+            else:
+                self._make_unknown('Event', event_handle, self.class_event,
+                                   self.commit_event, type=event_type)
+            self.invalid_events.add(obj.handle)
+        elif event_type is not None:
+            event = self.db.get_event_from_handle(event_handle)
+            if int(event.get_type()) != event_type:
+                # The birth or death event was not of that type
+                # This is tested by TestcaseGenerator person "Broken14"
+                # This is tested by TestcaseGenerator person "Broken15"
+                logging.warning('    FAIL: the person "%(gid)s" refers '
+                                'to a %(role)s event which is of type '
+                                '"%(type)s" instead of %(role)s' %
+                                {'gid' : obj.gramps_id,
+                                 'role' : EventType(event_type).xml_str(),
+                                 'type' : int(event.get_type())})
+                event.set_type(EventType(event_type))
+                self.db.commit_event(event, self.trans)
+                if event_type == EventType.BIRTH:
+                    self.invalid_birth_events.add(obj.handle)
+                else:
+                    self.invalid_death_events.add(obj.handle)
+        return none_handle
 
-    def check_checksum(self):
-        self.progress.set_pass(_('Updating checksums on media'),
-                               len(self.db.get_media_object_handles()))
-        for bObjectId in self.db.get_media_object_handles():
-            self.progress.step()
-            ObjectId = handle2internal(bObjectId)
-            obj = self.db.get_object_from_handle(ObjectId)
-            full_path = media_path_full(self.db, obj.get_path())
-            new_checksum = create_checksum(full_path)
-            if new_checksum != obj.checksum:
-                logging.info('checksum: updating ' + obj.gramps_id)
-                obj.checksum = new_checksum
-                self.db.commit_media_object(obj, self.trans)
-
-    def check_tag_references(self):
-        known_handles = [handle2internal(key) for key in 
-                                    self.db.get_tag_handles()]
-
-        total = (
-                self.db.get_number_of_people() +
-                self.db.get_number_of_families() +
-                self.db.get_number_of_media_objects() +
-                self.db.get_number_of_notes()
-                )
-
-        self.progress.set_pass(_('Looking for tag reference problems'),
-                               total)
-        logging.info('Looking for tag reference problems')
-
-        for bhandle in self.db.person_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.person_map[bhandle]
-            person = Person()
-            person.unserialize(info)
-            handle_list = person.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Tag':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        person.replace_tag_references(None, new_handle)
-                        self.db.commit_person(person, self.trans)
-                        self.invalid_tag_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_tag_references.add(item[1])
-
-        for bhandle in self.db.family_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.family_map[bhandle]
-            family = Family()
-            family.unserialize(info)
-            handle_list = family.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Tag':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        family.replace_tag_references(None, new_handle)
-                        self.db.commit_family(family, self.trans)
-                        self.invalid_tag_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_tag_references.add(item[1])
+    def _check_event_ref_list(self, obj):
+        """
+        Check the events referenced by a person or family.
+        """
+        if not isinstance(obj.get_event_ref_list(), list):
+            # event_list is None or other garbage
+            logging.warning('    FAIL: the %(class)s "%(gid)s" has an event '
+                            'ref list which is invalid' %
+                            {'class' : obj.__class__.__name__.lower(),
+                             'gid' : obj.gramps_id})
+            obj.set_event_ref_list([])
+            self.invalid_events.add(obj.handle)
+            return True
+        changed = False
+        for event_ref in obj.get_event_ref_list():
+            if self._check_event_ref(obj, event_ref):
+                changed = True
+        return changed
+
+    def check_person_events(self, person):
+        """
+        Look for missing events, and birth or death events of another type.
+        """
+        changed = False
+        for event_ref, event_type, set_ref in (
+                (person.get_birth_ref(), EventType.BIRTH,
+                 person.set_birth_ref),
+                (person.get_death_ref(), EventType.DEATH,
+                 person.set_death_ref)):
+            if event_ref and self._check_event_ref(person, event_ref,
+                                                   event_type):
+                set_ref(event_ref)
+                changed = True
+        if self._check_event_ref_list(person):
+            changed = True
+        return changed
+
+    def check_family_events(self, family):
+        """
+        Look for missing events.
+        """
+        return self._check_event_ref_list(family)
 
-        for bhandle in self.db.media_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.media_map[bhandle]
-            obj = MediaObject()
-            obj.unserialize(info)
-            handle_list = obj.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Tag':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        obj.replace_tag_references(None, new_handle)
-                        self.db.commit_media_object(obj, self.trans)
-                        self.invalid_tag_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_tag_references.add(item[1])
+    def check_person_references(self, person):
+        """
+        Look for associations with missing people.
+        """
+        changed = False
+        for pref in person.get_person_ref_list():
+            if pref.ref is None:
+                changed = True
+                pref.ref = create_id()
+            if pref.ref not in self._known('Person'):
+                # The referenced person does not exist in the database
+                self._make_unknown('Person', pref.ref, self.class_person,
+                                   self.commit_person)
+                self.invalid_person_references.add(person.handle)
+        return changed
+
+    def check_lds_ord_references(self, obj):
+        """
+        Look for LDS ordinances of a person or family that refer to a missing
+        family or place.
+        """
+        for ordinance in obj.get_lds_ord_list():
+            family_handle = ordinance.get_family_handle()
+            if family_handle and family_handle not in self._known('Family'):
+                # The referenced family does not exist in the database
+                self._make_unknown('Family', family_handle, self.class_family,
+                                   self.commit_family, db=self.db)
+                self.invalid_family_references.add(obj.handle)
+            place_handle = ordinance.get_place_handle()
+            if place_handle and place_handle not in self._known('Place'):
+                # The referenced place does not exist in the database
+                # This is tested by TestcaseGenerator person "Broken17"
+                # This is tested by TestcaseGenerator person "Broken18"
+                self._make_unknown('Place', place_handle, self.class_place,
+                                   self.commit_place)
+                logging.warning('    FAIL: the %(class)s "%(gid)s" refers '
+                                'to an LdsOrd place "%(hand)s" which '
+                                'does not exist in the database' %
+                                {'class' : obj.__class__.__name__.lower(),
+                                 'gid' : obj.gramps_id,
+                                 'hand' : place_handle})
+                self.invalid_place_references.add(obj.handle)
+        return False
+
+    def check_event_place(self, event):
+        """
+        Look for an event that takes place in a missing place.
+        """
+        place_handle = event.get_place_handle()
+        if place_handle and place_handle not in self._known('Place'):
+            # The referenced place does not exist in the database
+            self._make_unknown('Place', place_handle, self.class_place,
+                               self.commit_place)
+            logging.warning('    FAIL: the event "%(gid)s" refers '
+                            'to a place "%(hand)s" which '
+                            'does not exist in the database' %
+                            {'gid' : event.gramps_id, 'hand' : place_handle})
+            self.invalid_place_references.add(event.handle)
+        return False
+
+    def check_enclosing_places(self, place):
+        """
+        Look for a place enclosed by a missing place.
+        """
+        changed = False
+        for placeref in place.get_placeref_list():
+            if placeref.ref is None:
+                changed = True
+                placeref.ref = create_id()
+            if placeref.ref not in self._known('Place'):
+                # The referenced place does not exist in the database
+                self._make_unknown('Place', placeref.ref, self.class_place,
+                                   self.commit_place)
+                logging.warning('    FAIL: the place "%(gid)s" refers '
+                                'to a parent place "%(hand)s" which '
+                                'does not exist in the database' %
+                                {'gid' : place.gramps_id,
+                                 'hand' : placeref.ref})
+                self.invalid_place_references.add(place.handle)
+        return changed
+
+    def check_citation_source(self, citation):
+        """
+        Look for a citation of a missing source.
+        """
+        changed = False
+        source_handle = citation.get_reference_handle()
+        if source_handle is None:
+            source_handle = create_id()
+            citation.set_reference_handle(source_handle)
+            changed = True
+        if source_handle and source_handle not in self._known('Source'):
+            # The referenced source does not exist in the database
+            self._make_unknown('Source', source_handle, self.class_source,
+                               self.commit_source)
+            logging.warning('    FAIL: the citation "%(gid)s" refers '
+                            'to source "%(hand)s" which does not exist '
+                            'in the database' %
+                            {'gid' : citation.gramps_id,
+                             'hand' : source_handle})
+            self.invalid_source_references.add(citation.handle)
+        return changed
+
+    def check_repo_references(self, source):
+        """
+        Look for a source kept in a missing repository.
+        """
+        changed = False
+        for reporef in source.get_reporef_list():
+            if reporef.ref is None:
+                changed = True
+                reporef.ref = create_id()
+            if reporef.ref not in self._known('Repository'):
+                # The referenced repository does not exist in the database
+                self._make_unknown('Repository', reporef.ref, self.class_repo,
+                                   self.commit_repo)
+                self.invalid_repo_references.add(source.handle)
+        return changed
+
+    def check_secondary_references(self, obj):
+        """
+        Look for references to missing citations, media objects, notes and
+        tags, in the object and its secondary objects.
+        """
+        changed = False
+        replaced = set()
+        for class_name, handle in obj.get_referenced_handles_recursively():
+            if class_name == 'Citation':
+                invalid = self.invalid_citation_references
+                replace_func = obj.replace_citation_references
+            elif class_name == 'MediaObject':
+                invalid = self.invalid_media_references
+                replace_func = obj.replace_media_references
+            elif class_name == 'Note':
+                invalid = self.invalid_note_references
+                replace_func = obj.replace_note_references
+            elif class_name == 'Tag':
+                invalid = self.invalid_tag_references
+                replace_func = obj.replace_tag_references
+            else:
+                continue
+            if handle is None:
+                # all the references without handle get the same new one
+                if class_name in replaced:
+                    continue
+                replaced.add(class_name)
+                handle = create_id()
+                replace_func(None, handle)
+                changed = True
+            elif handle in self._known(class_name):
+                continue
+            invalid.add(handle)
+            if class_name == 'Citation':
+                created = self._make_unknown(class_name, handle,
+                            self.class_citation, self.commit_citation,
+                            source_class_func=self.class_source,
+                            source_commit_func=self.commit_source,
+                            source_class_arg=create_id())
+                self.invalid_source_references.add(created[0].handle)
+            elif class_name == 'MediaObject':
+                self._make_unknown(class_name, handle, self.class_object,
+                                   self.commit_object)
+            elif class_name == 'Note':
+                self._make_unknown(class_name, handle, self.class_note,
+                                   self.commit_note)
+            else:
+                self._make_unknown(class_name, handle, self.class_tag,
+                                   self.commit_tag)
+        return changed
 
-        for bhandle in self.db.note_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.note_map[bhandle]
-            note = Note()
-            note.unserialize(info)
-            handle_list = note.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Tag':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        note.replace_tag_references(None, new_handle)
-                        self.db.commit_note(note, self.trans)
-                        self.invalid_tag_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_tag_references.add(item[1])
-
-        for bad_handle in self.invalid_tag_references:
-            make_unknown(bad_handle, None, self.class_tag,
-                               self.commit_tag, self.trans)
-
-        if len(self.invalid_tag_references) == 0:
-            logging.info('   OK: no tag reference problems found')
-
-    def check_media_sourceref(self):
+    def check_checksum(self, obj):
+        """
+        Update the checksum of the file of a media object.
+        """
+        full_path = media_path_full(self.db, obj.get_path())
+        new_checksum = create_checksum(full_path)
+        if new_checksum != obj.checksum:
+            logging.info('checksum: updating ' + obj.gramps_id)
+            obj.checksum = new_checksum
+            return True
+        return False
+
+    def check_media_sourceref(self, source):
         """
         This repairs a problem with database upgrade from database schema
         version 15 to 16. Mediarefs on source primary objects can contain
         sourcerefs, and these were not converted to citations.
         """
-        total = (
-                self.db.get_number_of_sources()
-                )
-
-        self.progress.set_pass(_('Looking for media source reference problems'),
-                               total)
-        logging.info('Looking for media source reference problems')
-
-        for handle in self.db.source_map.keys():
-            self.progress.step()
-            info = self.db.source_map[handle]
-            source = Source()
-            source.unserialize(info)
-            new_media_ref_list = []
-            for media_ref in source.get_media_list():
-                citation_list = media_ref.get_citation_list()
-                new_citation_list = []
-                for citation_handle in citation_list:
-                    # Either citation_handle is a handle, in which case it has
-                    # been converted, or it is a 6-tuple, in which case it now
-                    # needs to be converted.
-                    if len(citation_handle) == 6:
-                        if len(citation_handle) == 6:
-                            sourceref = citation_handle
-                        else:
-                            sourceref = eval(citation_handle)
-                        new_citation = Citation()
-                        new_citation.set_date_object(sourceref[0])
-                        new_citation.set_privacy(sourceref[1])
-                        new_citation.set_note_list(sourceref[2])
-                        new_citation.set_confidence_level(sourceref[3])
-                        new_citation.set_reference_handle(sourceref[4])
-                        new_citation.set_page(sourceref[5])
-                        citation_handle = create_id()
-                        new_citation.set_handle(citation_handle)
-                        self.replaced_sourceref.append(handle)
-                        logging.warning('    FAIL: the source "%s" has a media '
-                                        'reference with a source citation '
-                                        'which is invalid' % (source.gramps_id))
-                        self.db.add_citation(new_citation, self.trans)
-                        
-                    new_citation_list.append(citation_handle)
-                
-                media_ref.set_citation_list(new_citation_list)
-                new_media_ref_list.append(media_ref)
-                
-            source.set_media_list(new_media_ref_list)
-            self.db.commit_source(source, self.trans)
-
-        if len(self.replaced_sourceref) > 0:
-            logging.info('    OK: no broken source citations on mediarefs found')
+        changed = False
+        for media_ref in source.get_media_list():
+            new_citation_list = []
+            for citation_handle in media_ref.get_citation_list():
+                # Either citation_handle is a handle, in which case it has
+                # been converted, or it is a 6-tuple, in which case it now
+                # needs to be converted.
+                if len(citation_handle) == 6:
+                    sourceref = citation_handle
+                    new_citation = Citation()
+                    new_citation.set_date_object(sourceref[0])
+                    new_citation.set_privacy(sourceref[1])
+                    new_citation.set_note_list(sourceref[2])
+                    new_citation.set_confidence_level(sourceref[3])
+                    new_citation.set_reference_handle(sourceref[4])
+                    new_citation.set_page(sourceref[5])
+                    citation_handle = create_id()
+                    new_citation.set_handle(citation_handle)
+                    self.replaced_sourceref.append(source.handle)
+                    logging.warning('    FAIL: the source "%s" has a media '
+                                    'reference with a source citation '
+                                    'which is invalid' % (source.gramps_id))
+                    self.db.add_citation(new_citation, self.trans)
+                    self._known('Citation').add(citation_handle)
+                    changed = True
+                new_citation_list.append(citation_handle)
+            media_ref.set_citation_list(new_citation_list)
+        return changed
 
     def class_person(self, handle):
         person = Person()
@@ -2094,7 +1690,7 @@ class CheckIntegrity(object):
                   invalid_dates + source_references
                  )
         
-        if errors == 0:
+        if errors == 0 and not self.interrupted:
             if uistate:
                 OkDialog(_("No errors were found"),
                          _('The database has passed internal checks'),
@@ -2104,6 +1700,9 @@ class CheckIntegrity(object):
             return 0
 
         self.text = StringIO()
+        if self.interrupted:
+            self.text.write(_("The check was interrupted, run Check and "
+                              "Repair again to continue it.\n"))
         if blink > 0:
             self.text.write(
                 # translators: leave all/any {...} untranslated
@@ -2448,3 +2047,16 @@ class CheckOptions(tool.ToolOptions):
 
     def __init__(self, name, person_id=None):
         tool.ToolOptions.__init__(self, name, person_id)
+
+        # Options specific for this report
+        self.options_dict = {
+            'changed' : 0,
+        }
+        self.options_help = {
+            'changed' : ("=0/1", "Which objects to check for reference "
+                         "problems",
+                         ["All objects", "Only the objects changed since "
+                          "the last check, or referring to objects removed "
+                          "since then"],
+                         True),
+            }
@@ -22,6 +22,15 @@
 
 """Tools/Database Processing/Find Possible Duplicate People"""
 
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import multiprocessing
+import logging
+LOG = logging.getLogger(".finddupes")
+
 #-------------------------------------------------------------------------
 #
 # GNOME libraries
@@ -39,6 +48,7 @@ from gramps.gen.lib import Event, Person
 from gramps.gui.utils import ProgressMeter
 from gramps.gui.plug import tool
 from gramps.gen.soundex import soundex, compare
+from gramps.gen.utils.lineage import iter_ancestors
 from gramps.gen.display.name import displayer as name_displayer
 from gramps.gui.dialog import OkDialog
 from gramps.gui.listmodel import ListModel
@@ -65,6 +75,9 @@ _val2label = {
 WIKI_HELP_PAGE = '%s_-_Tools' % URL_MANUAL_PAGE
 WIKI_HELP_SEC = _('manual|Find_Possible_Duplicate_People...')
 
+# number of pairs of people scored in one go by a worker process
+PAIR_CHUNK_SIZE = 20000
+
 #-------------------------------------------------------------------------
 #
 #
@@ -79,6 +92,41 @@ def is_initial(name):
     else:
         return name[0] == name[0].upper()
 
+def get_initials(name):
+    """
+    Return the first letters of the given names. Two names only match if
+    they have one in common, or if they have no given names at all.
+    """
+    initials = set(first[0] for first in name.get_first_name().split())
+    return initials or set([None])
+
+def get_year_key(date):
+    """
+    Return the year of a plain date. Two such dates only match if their
+    years are equal. Return None for other dates, which match any year.
+    """
+    if (date.is_empty() or date.is_compound() or
+            date.get_modifier() == date.MOD_TEXTONLY):
+        return None
+    return date.get_year()
+
+class _Features(object):
+    """
+    The data of a person that is compared by the tool.
+    """
+    __slots__ = ('handle', 'gender', 'name', 'birth', 'death', 'birth_place',
+                 'death_place', 'parents', 'spouses', 'block_keys')
+
+#-------------------------------------------------------------------------
+#
+# Worker processes
+#
+#-------------------------------------------------------------------------
+_scorer = None
+
+def _score_chunk(pairs):
+    return _scorer.score_chunk(pairs)
+
 #-------------------------------------------------------------------------
 #
 # The Actual tool.
@@ -102,6 +150,9 @@ class Merge(tool.Tool,ManagedWindow):
         self.removed = {}
         self.update = callback
         self.use_soundex = 1
+        self.features = {}
+        self.places = {}
+        self.ancestors = {}
 
         top = Glade()
 
@@ -147,16 +198,19 @@ class Merge(tool.Tool,ManagedWindow):
         
         display_help(WIKI_HELP_PAGE , WIKI_HELP_SEC)
 
-    def ancestors_of(self, p1_id, id_list):
-        if (not p1_id) or (p1_id in id_list):
-            return
-        id_list.append(p1_id)
-        p1 = self.db.get_person_from_handle(p1_id)
-        f1_id = p1.get_main_parents_family_handle()
-        if f1_id:
-            f1 = self.db.get_family_from_handle(f1_id)
-            self.ancestors_of(f1.get_father_handle(),id_list)
-            self.ancestors_of(f1.get_mother_handle(),id_list)
+    def is_related(self, p1_id, p2_id):
+        """
+        Return True if one of the people is an ancestor of the other, along
+        the main parent families.
+        """
+        return (p2_id in self.get_ancestors(p1_id) or
+                p1_id in self.get_ancestors(p2_id))
+
+    def get_ancestors(self, p1_id):
+        if p1_id not in self.ancestors:
+            self.ancestors[p1_id] = set(
+                handle for handle, gen in iter_ancestors(self.db, [p1_id], 0))
+        return self.ancestors[p1_id]
 
     def on_merge_ok_clicked(self, obj):
         threshold = self.menu.get_model()[self.menu.get_active()][1]
@@ -185,59 +239,82 @@ class Merge(tool.Tool,ManagedWindow):
                 pass
     
     def find_potentials(self, thresh):
+        """
+        Fill self.map with the best match of each person that may be a
+        duplicate of another one.
+
+        The people are first grouped in blocks of people of the same sex
+        that share the surname key, an initial of a given name and the birth
+        year (people without a plain birth date are put in every year).
+        Only the people in the same block can reach a positive score in
+        :meth:`compare_people`, so only those pairs are scored, once each.
+        """
         self.progress = ProgressMeter(_('Find Duplicates'),
                                       _('Looking for duplicate people')
                                      )
-
-        index = 0
-        males = {}
-        females = {}
+        self.features = {}
+        self.places = {}
+        self.ancestors = {}
+        order = []
+        blocks = {}
 
         length = self.db.get_number_of_people()
 
         self.progress.set_pass(_('Pass 1: Building preliminary lists'),
                                length)
-        
+
         for p1_id in self.db.iter_person_handles():
             self.progress.step()
             p1 = self.db.get_person_from_handle(p1_id)
-            key = self.gen_key(get_surnames(p1.get_primary_name()))
-            if p1.get_gender() == Person.MALE:
-                if key in males:
-                    males[key].append(p1_id)
-                else:
-                    males[key] = [p1_id]
-            else:
-                if key in females:
-                    females[key].append(p1_id)
-                else:
-                    females[key] = [p1_id]
-                
+            feat = self.get_features(p1)
+            order.append(p1_id)
+            year = get_year_key(feat.birth)
+            for key in feat.block_keys:
+                blocks.setdefault(key, {}).setdefault(year, []).append(p1_id)
+
         self.progress.set_pass(_('Pass 2: Calculating potential matches'),
                                length)
 
-        for p1key in self.db.iter_person_handles():
+        position = dict((handle, index) for index, handle in enumerate(order))
+        candidates = {}
+        pairs = []
+        for p1key in order:
             self.progress.step()
-            p1 = self.db.get_person_from_handle(p1key)
-
-            key = self.gen_key(get_surnames(p1.get_primary_name()))
-            if p1.get_gender() == Person.MALE:
-                remaining = males[key]
-            else:
-                remaining = females[key]
-
-            #index = 0
-            for p2key in remaining:
-                #index += 1
-                if p1key == p2key:
-                    continue
-                p2 = self.db.get_person_from_handle(p2key)
+            feat = self.features[p1key]
+            year = get_year_key(feat.birth)
+            found = set()
+            for key in feat.block_keys:
+                years = blocks[key]
+                if year is None:
+                    for handles in years.values():
+                        found.update(handles)
+                else:
+                    found.update(years.get(year, []))
+                    found.update(years.get(None, []))
+            found.discard(p1key)
+            candidates[p1key] = sorted(found, key=position.get)
+            for p2key in candidates[p1key]:
+                if position[p2key] > position[p1key]:
+                    pairs.append((p1key, p2key))
+                elif self.features[p2key].gender != feat.gender:
+                    # the score depends on the order of people of different
+                    # sex, see compare_features
+                    pairs.append((p1key, p2key))
+
+        scores = self.score_pairs(pairs)
+
+        for p1key in order:
+            for p2key in candidates[p1key]:
                 if p2key in self.map:
                     (v,c) = self.map[p2key]
                     if v == p1key:
                         continue
-                    
-                chance = self.compare_people(p1,p2)
+
+                chance = scores.get((p1key, p2key))
+                if chance is None:
+                    chance = scores[(p2key, p1key)]
+                if chance >= thresh and self.is_related(p1key, p2key):
+                    chance = -1
                 if chance >= thresh:
                     if p1key in self.map:
                         val = self.map[p1key]
@@ -250,6 +327,53 @@ class Merge(tool.Tool,ManagedWindow):
         self.length = len(self.list)
         self.progress.close()
 
+    def score_pairs(self, pairs):
+        """
+        Return a dictionary with the score of each pair of handles, computed
+        by :meth:`compare_features`. The pairs are split into chunks that are
+        scored in worker processes if the 'workers' option is 2 or more.
+        """
+        global _scorer
+        chunks = [pairs[start:start + PAIR_CHUNK_SIZE]
+                  for start in range(0, len(pairs), PAIR_CHUNK_SIZE)]
+        self.progress.set_pass(_('Pass 3: Comparing people'), len(chunks))
+
+        workers = self.options.handler.options_dict['workers']
+        scores = {}
+        if (workers > 1 and len(chunks) > 1 and
+                'fork' in multiprocessing.get_all_start_methods()):
+            # the workers are forked, so they get the features without
+            # pickling them
+            _scorer = self
+            pool = multiprocessing.get_context('fork').Pool(
+                min(workers, len(chunks)))
+            try:
+                for chunk, values in zip(chunks,
+                                         pool.imap(_score_chunk, chunks)):
+                    self.progress.step()
+                    scores.update(zip(chunk, values))
+                pool.close()
+                return scores
+            except Exception as msg:
+                LOG.warning("Comparing in worker processes failed: %s", msg)
+                pool.terminate()
+                scores = {}
+                self.progress.set_pass(_('Pass 3: Comparing people'),
+                                       len(chunks))
+            finally:
+                pool.join()
+                _scorer = None
+
+        for chunk in chunks:
+            self.progress.step()
+            scores.update(zip(chunk, self.score_chunk(chunk)))
+        return scores
+
+    def score_chunk(self, pairs):
+        features = self.features
+        return [self.compare_features(features[p1key], features[p2key])
+                for p1key, p2key in pairs]
+
     def gen_key(self, val):
         if self.use_soundex:
             try:
@@ -259,143 +383,127 @@ class Merge(tool.Tool,ManagedWindow):
         else:
             return val
 
-    def compare_people(self, p1, p2):
+    def get_features(self, person):
+        """
+        Return the data of the person used in the comparisons, reading it
+        from the database the first time.
+        """
+        handle = person.get_handle()
+        if handle in self.features:
+            return self.features[handle]
+
+        feat = _Features()
+        feat.handle = handle
+        feat.gender = person.get_gender()
+        feat.name = person.get_primary_name()
+
+        birth = self.get_event(person.get_birth_ref())
+        death = self.get_event(person.get_death_ref())
+        feat.birth = birth.get_date_object()
+        feat.death = death.get_date_object()
+        feat.birth_place = birth.get_place_handle()
+        feat.death_place = death.get_place_handle()
+        for place_id in (feat.birth_place, feat.death_place):
+            if place_id and place_id not in self.places:
+                place = self.db.get_place_from_handle(place_id)
+                self.places[place_id] = place.get_title()
+
+        feat.parents = None
+        fam_id = person.get_main_parents_family_handle()
+        if fam_id:
+            family = self.db.get_family_from_handle(fam_id)
+            feat.parents = (self.get_name(family.get_father_handle()),
+                            self.get_name(family.get_mother_handle()))
+
+        feat.spouses = []
+        for fam_id in person.get_family_handle_list():
+            family = self.db.get_family_from_handle(fam_id)
+            father_id = family.get_father_handle()
+            mother_id = family.get_mother_handle()
+            feat.spouses.append((father_id, self.get_name(father_id),
+                                 mother_id, self.get_name(mother_id)))
+
+        sex = feat.gender == Person.MALE
+        key = self.gen_key(get_surnames(feat.name))
+        feat.block_keys = [(sex, key, initial)
+                           for initial in get_initials(feat.name)]
+
+        self.features[handle] = feat
+        return feat
+
+    def get_event(self, event_ref):
+        if event_ref:
+            return self.db.get_event_from_handle(event_ref.ref)
+        return Event()
+
+    def get_name(self, handle):
+        if handle:
+            return get_name_obj(self.db.get_person_from_handle(handle))
+        return None
 
-        name1 = p1.get_primary_name()
-        name2 = p2.get_primary_name()
+    def compare_people(self, p1, p2):
+        chance = self.compare_features(self.get_features(p1),
+                                       self.get_features(p2))
+        if chance == -1 or self.is_related(p1.get_handle(), p2.get_handle()):
+            return -1
+        return chance
 
-        chance = self.name_match(name1, name2)
+    def compare_features(self, p1, p2):
+        """
+        Score the similarity of the people with the features p1 and p2, as
+        :meth:`compare_people` does, apart from the check that one of them is
+        an ancestor of the other one.
+        """
+        chance = self.name_match(p1.name, p2.name)
         if chance == -1  :
             return -1
 
-        birth1_ref = p1.get_birth_ref()
-        if birth1_ref:
-            birth1 = self.db.get_event_from_handle(birth1_ref.ref)
-        else:
-            birth1 = Event()
-
-        death1_ref = p1.get_death_ref()
-        if death1_ref:
-            death1 = self.db.get_event_from_handle(death1_ref.ref)
-        else:
-            death1 = Event()
-
-        birth2_ref = p2.get_birth_ref()
-        if birth2_ref:
-            birth2 = self.db.get_event_from_handle(birth2_ref.ref)
-        else:
-            birth2 = Event()
-
-        death2_ref = p2.get_death_ref()
-        if death2_ref:
-            death2 = self.db.get_event_from_handle(death2_ref.ref)
-        else:
-            death2 = Event()
-
-        value = self.date_match(birth1.get_date_object(),
-                                birth2.get_date_object())
+        value = self.date_match(p1.birth, p2.birth)
         if value == -1 :
             return -1
         chance += value
 
-        value = self.date_match(death1.get_date_object(),
-                                death2.get_date_object()) 
+        value = self.date_match(p1.death, p2.death)
         if value == -1 :
             return -1
         chance += value
 
-        value = self.place_match(birth1.get_place_handle(),
-                                 birth2.get_place_handle()) 
+        value = self.place_match(p1.birth_place, p2.birth_place)
         if value == -1 :
             return -1
         chance += value
 
-        value = self.place_match(death1.get_place_handle(),
-                                 death2.get_place_handle()) 
+        value = self.place_match(p1.death_place, p2.death_place)
         if value == -1 :
             return -1
         chance += value
 
-        ancestors = []
-        self.ancestors_of(p1.get_handle(),ancestors)
-        if p2.get_handle() in ancestors:
-            return -1
-
-        ancestors = []
-        self.ancestors_of(p2.get_handle(),ancestors)
-        if p1.get_handle() in ancestors:
-            return -1
-        
-        f1_id = p1.get_main_parents_family_handle()
-        f2_id = p2.get_main_parents_family_handle()
-
-        if f1_id and f2_id:
-            f1 = self.db.get_family_from_handle(f1_id)
-            f2 = self.db.get_family_from_handle(f2_id)
-            dad1_id = f1.get_father_handle()
-            if dad1_id:
-                dad1 = get_name_obj(self.db.get_person_from_handle(dad1_id))
-            else:
-                dad1 = None
-            dad2_id = f2.get_father_handle()
-            if dad2_id:
-                dad2 = get_name_obj(self.db.get_person_from_handle(dad2_id))
-            else:
-                dad2 = None
-            
-            value = self.name_match(dad1,dad2)
-            
+        if p1.parents and p2.parents:
+            value = self.name_match(p1.parents[0], p2.parents[0])
             if value == -1:
                 return -1
-
             chance += value
-            
-            mom1_id = f1.get_mother_handle()
-            if mom1_id:
-                mom1 = get_name_obj(self.db.get_person_from_handle(mom1_id))
-            else:
-                mom1 = None
-            mom2_id = f2.get_mother_handle()
-            if mom2_id:
-                mom2 = get_name_obj(self.db.get_person_from_handle(mom2_id))
-            else:
-                mom2 = None
 
-            value = self.name_match(mom1,mom2)
+            value = self.name_match(p1.parents[1], p2.parents[1])
             if value == -1:
                 return -1
-            
             chance += value
 
-        for f1_id in p1.get_family_handle_list():
-            f1 = self.db.get_family_from_handle(f1_id)
-            for f2_id in p2.get_family_handle_list():
-                f2 = self.db.get_family_from_handle(f2_id)
-                if p1.get_gender() == Person.FEMALE:
-                    father1_id = f1.get_father_handle()
-                    father2_id = f2.get_father_handle()
+        for (father1_id, fname1, mother1_id, mname1) in p1.spouses:
+            for (father2_id, fname2, mother2_id, mname2) in p2.spouses:
+                if p1.gender == Person.FEMALE:
                     if father1_id and father2_id:
                         if father1_id == father2_id:
                             chance += 1
                         else:
-                            father1 = self.db.get_person_from_handle(father1_id)
-                            father2 = self.db.get_person_from_handle(father2_id)
-                            fname1 = get_name_obj(father1)
-                            fname2 = get_name_obj(father2)
                             value = self.name_match(fname1,fname2)
                             if value != -1:
                                 chance += value
                 else:
-                    mother1_id = f1.get_mother_handle()
-                    mother2_id = f2.get_mother_handle()
                     if mother1_id and mother2_id:
                         if mother1_id == mother2_id:
                             chance += 1
                         else:
-                            mother1 = self.db.get_person_from_handle(mother1_id)
-                            mother2 = self.db.get_person_from_handle(mother2_id)
-                            mname1 = get_name_obj(mother1)
-                            mname2 = get_name_obj(mother2)
                             value = self.name_match(mname1,mname2)
                             if value != -1:
                                 chance += value
@@ -484,17 +592,8 @@ class Merge(tool.Tool,ManagedWindow):
         if p1_id == p2_id:
             return 1
         
-        if not p1_id:
-            name1 = ""
-        else:
-            p1 = self.db.get_place_from_handle(p1_id)
-            name1 = p1.get_title()
-
-        if not p2_id:
-            name2 = ""
-        else:
-            p2 = self.db.get_place_from_handle(p2_id)
-            name2 = p2.get_title()
+        name1 = self.places[p1_id] if p1_id else ""
+        name2 = self.places[p2_id] if p2_id else ""
         
         if not (name1 and name2):
             return 0
@@ -679,11 +778,14 @@ class MergeOptions(tool.ToolOptions):
         self.options_dict = {
             'soundex'   : 1,
             'threshold' : 0.25,
+            'workers'   : 0,
         }
         self.options_help = {
             'soundex'   : ("=0/1","Whether to use SoundEx codes",
                            ["Do not use SoundEx","Use SoundEx"],
                            True),
             'threshold' : ("=num","Threshold for tolerance",
-                           "Floating point number")
+                           "Floating point number"),
+            'workers'   : ("=num","Number of processes comparing people",
+                           "0 or 1 to compare them in this process"),
             }
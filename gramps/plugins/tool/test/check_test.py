@@ -0,0 +1,224 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Unittest for the reference checks of the Check and Repair tool
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from gramps.gen.db import PERSON_KEY, NOTE_KEY
+from gramps.gen.lib import Person, MediaObject, Note
+from ..check import CheckIntegrity, CHECKPOINT
+
+class Cursor(object):
+    """
+    Cursor over the rows of the reference map.
+    """
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def __iter__(self):
+        return iter(self.rows.items())
+
+class Database(object):
+    """
+    Tables of serialized objects, with the methods of a database used by the
+    reference checks.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.person_map = {}
+        self.family_map = {}
+        self.event_map = {}
+        self.place_map = {}
+        self.citation_map = {}
+        self.source_map = {}
+        self.media_map = {}
+        self.repository_map = {}
+        self.note_map = {}
+        self.tag_map = {}
+        self.references = {}
+
+    def get_save_path(self):
+        return self.path
+
+    def get_mediapath(self):
+        return self.path
+
+    def get_reference_map_cursor(self):
+        return Cursor(self.references)
+
+    def commit(self, the_map, obj):
+        the_map[obj.handle] = obj.serialize()
+
+    def commit_person(self, person, trans):
+        self.commit(self.person_map, person)
+
+    def commit_family(self, family, trans):
+        self.commit(self.family_map, family)
+
+    def commit_event(self, event, trans):
+        self.commit(self.event_map, event)
+
+    def commit_place(self, place, trans):
+        self.commit(self.place_map, place)
+
+    def commit_citation(self, citation, trans):
+        self.commit(self.citation_map, citation)
+
+    def commit_source(self, source, trans):
+        self.commit(self.source_map, source)
+
+    def commit_media_object(self, media, trans):
+        self.commit(self.media_map, media)
+
+    def commit_repository(self, repository, trans):
+        self.commit(self.repository_map, repository)
+
+    def commit_note(self, note, trans):
+        self.commit(self.note_map, note)
+
+    def add_note(self, note, trans, set_gid=True):
+        self.commit(self.note_map, note)
+
+    def person(self, handle, change, note_handle=None):
+        person = Person()
+        person.set_handle(handle)
+        person.change = change
+        if note_handle is not None:
+            person.add_note(note_handle)
+            self.references[(handle, note_handle)] = (
+                (PERSON_KEY, handle), (NOTE_KEY, note_handle))
+        self.person_map[handle] = person.serialize()
+
+    def note(self, handle):
+        note = Note()
+        note.set_handle(handle)
+        self.note_map[handle] = note.serialize()
+
+    def media(self, handle, change):
+        media = MediaObject()
+        media.set_handle(handle)
+        media.change = change
+        self.media_map[handle] = media.serialize()
+
+class DbState(object):
+    def __init__(self, db):
+        self.db = db
+
+class Progress(object):
+    """
+    Progress meter that cancels the check after a number of objects.
+    """
+    def __init__(self, steps):
+        self.steps = steps
+
+    def set_pass(self, *args):
+        pass
+
+    def step(self):
+        self.steps -= 1
+
+    def get_cancelled(self):
+        return self.steps <= 0
+
+    def close(self):
+        pass
+
+class CheckReferencesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.db = Database(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def checker(self):
+        return CheckIntegrity(DbState(self.db), None, None)
+
+    def spy(self, checker, name, checked):
+        """
+        Record the handles of the objects the check is run on.
+        """
+        check = getattr(checker, name)
+        def spy_check(obj):
+            checked.append(obj.handle)
+            return check(obj)
+        setattr(checker, name, spy_check)
+
+    def test_resume(self):
+        for number in range(3):
+            self.db.person('P%d' % number, 0, 'N%d' % number)
+
+        checker = self.checker()
+        checker.progress = Progress(1)
+        checker.check_references()
+        self.assertTrue(checker.interrupted)
+        self.assertEqual(checker.invalid_note_references, set(['N0']))
+
+        checker = self.checker()
+        self.assertTrue(checker.was_interrupted())
+        checker.resume()
+        checked = []
+        self.spy(checker, 'check_person_references', checked)
+        checker.check_references()
+        self.assertFalse(checker.interrupted)
+        self.assertEqual(checked, ['P1', 'P2'])
+        self.assertEqual(checker.invalid_note_references,
+                         set(['N0', 'N1', 'N2']))
+        # a single explanation note for the created notes
+        self.assertEqual(len(self.db.note_map), 4)
+        self.assertFalse(self.checker().was_interrupted())
+        self.assertTrue(os.path.exists(os.path.join(self.path, CHECKPOINT)))
+
+    def test_changed_only(self):
+        checker = self.checker()
+        checker.start = 1000
+        checker.save_checkpoint(finished=True)
+
+        self.db.note('N0')
+        self.db.person('P0', 500, 'N0')
+        self.db.person('P1', 1500)
+        # the note was removed since the last check
+        self.db.person('P2', 500, 'N2')
+        self.db.media('M0', 500)
+
+        checker = self.checker()
+        checker.check_changed_only()
+        self.assertEqual(checker.since, 1000)
+        checked = []
+        self.spy(checker, 'check_secondary_references', checked)
+        checksums = []
+        self.spy(checker, 'check_checksum', checksums)
+        checker.check_references()
+        self.assertEqual(checked, ['P1', 'P2'])
+        self.assertEqual(checksums, ['M0'])
+        self.assertEqual(checker.invalid_note_references, set(['N2']))
+
+if __name__ == "__main__":
+    unittest.main()
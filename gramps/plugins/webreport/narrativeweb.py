@@ -77,10 +77,13 @@ import shutil
 import codecs
 import tarfile
 import tempfile
+import multiprocessing
+import multiprocessing.util
 from io import StringIO, BytesIO, TextIOWrapper
 from textwrap import TextWrapper
 from unicodedata import normalize
-from collections import defaultdict
+from collections import defaultdict, deque
+from itertools import islice
 from xml.sax.saxutils import escape
 
 from operator import itemgetter
@@ -113,11 +116,12 @@ from gramps.gen.plug.report import ( Report, Bibliography)
 from gramps.gen.plug.report import utils as ReportUtils
 from gramps.gen.plug.report import MenuReportOptions
 from gramps.gen.plug.report import stdoptions
+from gramps.gen.user import User
 
 from gramps.gen.utils.config import get_researcher
 from gramps.gen.utils.string import conf_strings
 from gramps.gen.utils.file import media_path_full
-from gramps.gen.utils.alive import probably_alive
+from gramps.gen.utils.alive import probably_alive, probably_alive_ranges
 from gramps.gen.utils.db import get_source_and_citation_referents
 from gramps.gen.constfunc import win, conv_to_unicode, get_curr_dir
 from gramps.gen.config import config
@@ -128,6 +132,7 @@ from gramps.gen.display.name import displayer as _nd
 from gramps.gen.display.place import displayer as _pd
 from gramps.gen.datehandler import displayer as _dd
 from gramps.gen.proxy import LivingProxyDb
+from gramps.gen.proxy.proxybase import ProxyDbBase
 from gramps.plugins.lib.libhtmlconst import _CHARACTER_SETS, _CC, _COPY_OPTIONS
 
 # import HTML Class from src/plugins/lib/libhtml.py
@@ -429,6 +434,8 @@ _HGAP = 30
 _SHADOW = 5
 _XOFFSET = 5
 _WRONGMEDIAPATH = []
+# number of pages rendered at a time by a worker process
+_PAGE_CHUNK_SIZE = 50
 
 _NAME_STYLE_SHORT = 2
 _NAME_STYLE_DEFAULT = 1
@@ -537,18 +544,76 @@ def copy_thumbnail(report, handle, photo, region=None):
         )
     
     if photo.get_mime_type():
-        from_path = get_thumbnail_path(media_path_full(
-                                                  report.database,
-                                                  photo.get_path()),
-                                                  photo.get_mime_type(),
-                                                  region)
-        if not os.path.isfile(from_path):
-            from_path = CSS["Document"]["filename"]
+        report.copy_thumbnail_file(media_path_full(report.database,
+                                                   photo.get_path()),
+                                   photo.get_mime_type(), region, to_path)
     else:
-        from_path = CSS["Document"]["filename"]
-    report.copy_file(from_path, to_path)
+        report.copy_file(CSS["Document"]["filename"], to_path)
     return to_path
 
+#-------------------------------------------------------------------------
+#
+# Worker processes
+#
+#-------------------------------------------------------------------------
+_worker_report = None
+
+def _snapshot_path(dbase):
+    """
+    Return the directory of the database dbase if worker processes can open
+    a snapshot of it, see DbBsddb.open_snapshot, or else None.
+    """
+    try:
+        from gramps.gen.db import DbBsddb
+    except ImportError:
+        return None
+    if (isinstance(dbase, DbBsddb) and dbase.is_open() and
+            dbase.get_save_path() and dbase.txn is None):
+        return dbase.get_save_path()
+    return None
+
+def _init_worker(report, path):
+    """
+    Set up a worker process. The handles to the database inherited from the
+    parent must not be used after the fork, so the worker opens a snapshot
+    of the database in path, and the report reads it through its proxies.
+    """
+    global _worker_report
+    from gramps.gen.db import DbBsddb
+    dbase = DbBsddb()
+    dbase.open_snapshot(path)
+    multiprocessing.util.Finalize(None, dbase.close, exitpriority=10)
+
+    if isinstance(report.database, ProxyDbBase):
+        proxy = report.database
+        while True:
+            proxy.basedb = dbase
+            if not isinstance(proxy.db, ProxyDbBase):
+                break
+            proxy = proxy.db
+        proxy.db = dbase
+    else:
+        # the tabs keep the database they were displayed with
+        for tab in report.tab.values():
+            for name in ('db', 'dbase_'):
+                if getattr(tab, name, None) is report.database:
+                    setattr(tab, name, dbase)
+        report.database = dbase
+
+    _worker_report = report
+    # a worker must not open dialogs of its own
+    report.user = User()
+
+def _render_pages(task):
+    """
+    Render a chunk of pages, given the name of their tab, the name of the
+    page method and the arguments of each page. Return the output of the
+    report for them, see NavWebReport.render_pages.
+    """
+    tab_name, method, title, args_list = task
+    page = getattr(_worker_report.tab[tab_name], method)
+    return _worker_report.render_pages(page, title, args_list)
+
 '''
 #    Manages all the functions, variables, and everything needed 
 #    for all of the classes contained within this plugin
@@ -1952,7 +2017,7 @@ class BasePage(object):
                     return image   
 
                 except (IOError, OSError) as msg:
-                    self.report.user.warn(_("Could not add photo to page"), 
+                    self.report.warn(_("Could not add photo to page"), 
                                           str(msg))
 
         # no image to return
@@ -2137,7 +2202,7 @@ class BasePage(object):
                                                  descr, uplink = self.up, usedescr = False)
 
                         except (IOError, OSError) as msg:
-                            self.report.user.warn(_("Could not add photo to page"), str(msg))
+                            self.report.warn(_("Could not add photo to page"), str(msg))
             else:
                 # begin hyperlink
                 snapshot += self.doc_link(photo_handle, descr, uplink = self.up, usedescr = False)
@@ -2191,13 +2256,13 @@ class BasePage(object):
                         # begin hyperlink
                         section += self.media_link(photo_handle, url, descr, uplink = self.up, usedescr = True)
                     except (IOError, OSError) as msg:
-                        self.report.user.warn(_("Could not add photo to page"), str(msg))
+                        self.report.warn(_("Could not add photo to page"), str(msg))
                 else:
                     try:
                         # begin hyperlink
                         section += self.doc_link(photo_handle, descr, uplink = self.up)
                     except (IOError, OSError) as msg:
-                        self.report.user.warn(_("Could not add photo to page"), str(msg))
+                        self.report.warn(_("Could not add photo to page"), str(msg))
                 displayed.append(photo_handle)
 
         # add fullclear for proper styling
@@ -3041,9 +3106,9 @@ class FamilyPages(BasePage):
             self.FamilyListPage(self.report, title,
                                 self.report.obj_dict[Family].keys())
 
-            for family_handle in self.report.obj_dict[Family]:
-                step()
-                self.FamilyPage(self.report, title, family_handle)
+            self.report.write_pages("Family", "FamilyPage", title,
+                                    [(family_handle,) for family_handle
+                                     in self.report.obj_dict[Family]], step)
     
     def FamilyListPage(self, report, title, fam_list):
         self.dbase_ = report.database
@@ -3321,9 +3386,9 @@ class PlacePages(BasePage):
             self.PlaceListPage(self.report, title,
                                self.report.obj_dict[Place].keys())
 
-            for place_handle in self.report.obj_dict[Place]:
-                step()
-                self.PlacePage(self.report, title, place_handle)
+            self.report.write_pages("Place", "PlacePage", title,
+                                    [(place_handle,) for place_handle
+                                     in self.report.obj_dict[Place]], step)
         pass
 
     def PlaceListPage(self, report, title, place_handles):
@@ -3604,9 +3669,9 @@ class EventPages(BasePage):
                                   len(event_handle_list) + 1) as step:
             self.EventListPage(self.report, title, event_types, event_handle_list)
 
-            for event_handle in event_handle_list:
-                step()
-                self.EventPage(self.report, title, event_handle)
+            self.report.write_pages("Event", "EventPage", title,
+                                    [(event_handle,) for event_handle
+                                     in event_handle_list], step)
 
     
     def EventListPage(self, report, title, event_types, event_handle_list):
@@ -4149,9 +4214,9 @@ class SourcePages(BasePage):
             self.SourceListPage(self.report, title,
                                 self.report.obj_dict[Source].keys())
 
-            for source_handle in self.report.obj_dict[Source]:
-                step()
-                self.SourcePage(self.report, title, source_handle)
+            self.report.write_pages("Source", "SourcePage", title,
+                                    [(source_handle,) for source_handle
+                                     in self.report.obj_dict[Source]], step)
 
     
     def SourceListPage(self, report, title, source_handles):
@@ -4756,7 +4821,7 @@ class MediaPages(BasePage):
 
         fullpath = media_path_full(self.dbase_, photo.get_path())
         if not os.path.isfile(fullpath):
-            _WRONGMEDIAPATH.append([ photo.get_gramps_id(), fullpath])
+            self.report.add_missing_media(photo.get_gramps_id(), fullpath)
             return None
         try:
             if self.report.archive:
@@ -4771,7 +4836,7 @@ class MediaPages(BasePage):
         except (IOError, OSError) as msg:
             error = _("Missing media object:") +                               \
                      "%s (%s)" % (photo.get_description(), photo.get_gramps_id())
-            self.report.user.warn(error, str(msg))
+            self.report.warn(error, str(msg))
             return None
 
 class ThumbnailPreviewPage(BasePage):
@@ -5177,10 +5242,11 @@ class PersonPages(BasePage):
                                   len(self.report.obj_dict[Person]) + 1) as step:
             self.IndividualListPage(self.report, title,
                                     self.report.obj_dict[Person].keys())
-            for person_handle in self.report.obj_dict[Person]:
-                step()
-                person = self.report.database.get_person_from_handle(person_handle)
-                self.IndividualPage(self.report, title, person)
+            self.report.alive_ranges = probably_alive_ranges(
+                                                    self.report.database)
+            self.report.write_pages("Person", "IndividualPage", title,
+                                    [(person_handle,) for person_handle
+                                     in self.report.obj_dict[Person]], step)
         
 #################################################
 #
@@ -5400,7 +5466,8 @@ class PersonPages(BasePage):
         Person.UNKNOWN : _('unknown'),
         }
 
-    def IndividualPage(self, report, title, person):
+    def IndividualPage(self, report, title, person_handle):
+        person = report.database.get_person_from_handle(person_handle)
         place_lat_long = []
         self.dbase_ = report.database
         BasePage.__init__(self, report, title, person.get_gramps_id())
@@ -6242,7 +6309,8 @@ class PersonPages(BasePage):
                         birth_date = birth.get_date_object()
 
                 if birth_date and birth_date is not Date.EMPTY:
-                    alive = probably_alive(self.person, self.dbase_, Today() )
+                    alive = probably_alive(self.person, self.dbase_, Today(),
+                                           ranges = self.report.alive_ranges)
 
                     death_date = _find_death_date(self.dbase_, self.person)
                     if not alive and death_date is not None:
@@ -6881,6 +6949,9 @@ class NavWebReport(Report):
                                           livinginfo,
                                           None,
                                           yearsafterdeath)
+        # the estimated birth and death dates of all people, found before
+        # the individual pages are written
+        self.alive_ranges = None
 
         filters_option = menu.get_option_by_name('filter')
         self.filter = filters_option.get_filter()
@@ -6970,6 +7041,11 @@ class NavWebReport(Report):
             self.html_dir = self.target_path
         self.warn_dir = True        # Only give warning once.
 
+        # number of processes rendering the pages of each object, if 2 or
+        # more, and the output of the pages rendered by a worker process
+        self.workers = self.options['workers']
+        self.__output = None
+
     def write_report(self):
 
         _WRONGMEDIAPATH = []
@@ -7860,7 +7936,7 @@ class NavWebReport(Report):
             self.cur_fname = os.path.join(subdir, fname) + ext
         else:
             self.cur_fname = fname + ext
-        if self.archive:
+        if self.archive or self.__output is not None:
             string_io = BytesIO()
             of = TextIOWrapper(string_io, encoding=self.encoding,
                                errors='xmlcharrefreplace')
@@ -7880,7 +7956,12 @@ class NavWebReport(Report):
         will close any file passed to it
         """
 
-        if self.archive:
+        if self.__output is not None:
+            of.flush()
+            self.__output.append(("add_page",
+                                  (self.cur_fname, string_io.getvalue())))
+            of.close()
+        elif self.archive:
             of.flush()
             tarinfo = tarfile.TarInfo(self.cur_fname)
             tarinfo.size = len(string_io.getvalue())
@@ -7894,6 +7975,28 @@ class NavWebReport(Report):
         else:
             of.close()
 
+    def add_page(self, fname, data):
+        """
+        Add a page rendered by a worker process to the web site.
+
+        @param: fname -- the name of the file, as in create_file
+        @param: data -- the encoded content of the page
+        """
+        if self.archive:
+            tarinfo = tarfile.TarInfo(fname)
+            tarinfo.size = len(data)
+            tarinfo.mtime = time.time()
+            if not win():
+                tarinfo.uid = os.getuid()
+                tarinfo.gid = os.getgid()
+            self.archive.addfile(tarinfo, BytesIO(data))
+        else:
+            fname = os.path.join(self.html_dir, fname)
+            if not os.path.isdir(os.path.dirname(fname)):
+                os.makedirs(os.path.dirname(fname))
+            with open(fname, 'wb') as of:
+                of.write(data)
+
     def prepare_copy_media(self, photo):
         """
         prepares a media object to copy
@@ -7917,7 +8020,9 @@ class NavWebReport(Report):
         be prepended before 'to_fname'.
         """
         # log.debug("copying '%s' to '%s/%s'" % (from_fname, to_dir, to_fname))
-        if self.archive:
+        if self.__output is not None:
+            self.__output.append(("copy_file", (from_fname, to_fname, to_dir)))
+        elif self.archive:
             dest = os.path.join(to_dir, to_fname)
             self.archive.add(from_fname, dest)
         else:
@@ -7944,6 +8049,115 @@ class NavWebReport(Report):
                       "web pages."))
                 self.warn_dir = False
 
+    def copy_thumbnail_file(self, from_fname, mime_type, region, to_fname):
+        """
+        Make (if needed) an up-to-date cache of the thumbnail of a media file,
+        and copy it to the report destination.
+        """
+        if self.__output is not None:
+            self.__output.append(("copy_thumbnail_file",
+                                  (from_fname, mime_type, region, to_fname)))
+            return
+        from_path = get_thumbnail_path(from_fname, mime_type, region)
+        if not os.path.isfile(from_path):
+            from_path = CSS["Document"]["filename"]
+        self.copy_file(from_path, to_fname)
+
+    def warn(self, title, warning=""):
+        """
+        Warn the user. The warnings of a page rendered by a worker process
+        are given when its files are written.
+        """
+        if self.__output is not None:
+            self.__output.append(("warn", (title, warning)))
+        else:
+            self.user.warn(title, warning)
+
+    def add_missing_media(self, gramps_id, fullpath):
+        """
+        Record a media object whose file is missing, for the warning given
+        at the end of the report.
+        """
+        if self.__output is not None:
+            self.__output.append(("add_missing_media", (gramps_id, fullpath)))
+        else:
+            _WRONGMEDIAPATH.append([gramps_id, fullpath])
+
+    def write_pages(self, tab_name, method, title, args_list, step):
+        """
+        Write the pages of a tab, calling its page method with the report,
+        the title and each item of args_list, and step after each page.
+
+        If there are at least two workers, the pages are rendered by a pool
+        of forked processes, a chunk at a time. A worker keeps the files,
+        copies, thumbnails and warnings of its pages, and they are written
+        here in the order of the chunks, so that the web site, the archive
+        and the warnings are the same as with a single process. Each worker
+        reads its own snapshot of the database, see DbBsddb.open_snapshot,
+        so this is only done for a database on disk.
+        """
+        page = getattr(self.tab[tab_name], method)
+        basedb = getattr(self.database, 'basedb', self.database)
+        path = _snapshot_path(basedb)
+        if (self.workers < 2 or len(args_list) < 2 * _PAGE_CHUNK_SIZE or
+                path is None or
+                'fork' not in multiprocessing.get_all_start_methods()):
+            for args in args_list:
+                step()
+                page(self, title, *args)
+            return
+
+        # the workers read the table files, not the cache of this process
+        basedb.flush()
+        context = multiprocessing.get_context('fork')
+        pool = context.Pool(self.workers, _init_worker, (self, path))
+        try:
+            def render(start):
+                task = (tab_name, method, title,
+                        args_list[start:start + _PAGE_CHUNK_SIZE])
+                return pool.apply_async(_render_pages, (task,))
+
+            # keep the workers busy with a few chunks in advance
+            starts = iter(range(0, len(args_list), _PAGE_CHUNK_SIZE))
+            pending = deque(render(start)
+                            for start in islice(starts, 2 * self.workers))
+            written = 0
+            while pending:
+                try:
+                    output = pending.popleft().get()
+                except Exception as msg:
+                    log.warning("Rendering the pages in the worker "
+                                "processes failed: %s", msg)
+                    for args in args_list[written:]:
+                        step()
+                        page(self, title, *args)
+                    return
+                pending.extend(render(start) for start in islice(starts, 1))
+                for page_output in output:
+                    step()
+                    for name, args in page_output:
+                        getattr(self, name)(*args)
+                written += _PAGE_CHUNK_SIZE
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def render_pages(self, page, title, args_list):
+        """
+        Render pages in a worker process. Return for each page the list of
+        the (method name, arguments) of this report that write its files,
+        copies and thumbnails, and give its warnings, in order.
+        """
+        outputs = []
+        try:
+            for args in args_list:
+                self.__output = []
+                page(self, title, *args)
+                outputs.append(self.__output)
+            return outputs
+        finally:
+            self.__output = None
+
     def person_in_webreport(self, person_handle):
         return person_handle in self.obj_dict[Person]
 
@@ -8314,6 +8528,13 @@ class NavWebOptions(MenuReportOptions):
                                    "events."))
         addopt( "inc_addressbook", inc_addressbook )
 
+        workers = NumberOption(_("Worker processes"), 0, 0, 64)
+        workers.set_help(_("The number of processes rendering the individual, "
+                           "family, place, event and source pages at the "
+                           "same time. With less than 2, the pages are "
+                           "rendered by Gramps itself."))
+        addopt( "workers", workers )
+
     def __add_place_map_options(self, menu):
         """
         options for the Place Map tab.
@@ -42,25 +42,31 @@ from gramps.gen.db import (PERSON_KEY,
                     REPOSITORY_KEY,
                     NOTE_KEY)
 from gramps.gen.utils.id import create_id
-from gramps.webapp.libdjango import DjangoInterface
+from gramps.webapp.libdjango import DjangoInterface, DjangoBatch, BATCH_SIZE
 from django.db import transaction
 
 class Cursor(object):
-    def __init__(self, model, func):
+    """
+    Iterate over the handles and raw data of the rows of a model, which are
+    read in batches.
+    """
+    def __init__(self, model):
         self.model = model
-        self.func = func
     def __enter__(self):
         return self
     def __iter__(self):
         return self.__next__()
     def __next__(self):
-        for item in self.model.all():
-            yield (item.handle, self.func(item.handle))
+        batch = DjangoBatch()
+        for objects in batch.iter_batches(self.model):
+            for item, data in zip(objects,
+                                  batch.get_raw_list(self.model, objects)):
+                yield (item.handle, data)
     def __exit__(self, *args, **kwargs):
         pass
     def iter(self):
-        for item in self.model.all():
-            yield (item.handle, self.func(item.handle))
+        for item in self.__next__():
+            yield item
         yield None
 
 class Bookmarks:
@@ -828,72 +834,118 @@ class DbDjango(DbWriteBase, DbReadBase):
     def get_default_person(self):
         return None
 
+    def make_objects(self, name, objects):
+        """
+        Return the Gramps objects of the rows of the model name, e.g.
+        "Person", read with DjangoBatch.select(). Those that are not
+        cached are built together by a DjangoBatch.
+        """
+        model = self.dji.get_model(name)
+        class_func = self._tables[name]["class_func"]
+        use_db_cache = self.use_db_cache and name != "Tag"
+        batch = [obj for obj in objects
+                 if obj.handle not in self.import_cache and
+                    not (use_db_cache and obj.cache)]
+        data = dict(zip([obj.handle for obj in batch],
+                        DjangoBatch().get_raw_list(model, batch)))
+        retval = []
+        for obj in objects:
+            if obj.handle in self.import_cache:
+                retval.append(self.import_cache[obj.handle])
+            elif obj.handle in data:
+                retval.append(class_func.create(data[obj.handle]))
+            else:
+                retval.append(class_func.create(obj.from_cache()))
+        return retval
+
+    def get_objects_from_handles(self, name, handles):
+        """
+        Return the Gramps objects of the model name, e.g. "Person", with the
+        handles, in the same order, leaving out the handles that are not
+        found. They are read with a fixed number of queries for every
+        BATCH_SIZE handles.
+        """
+        model = self.dji.get_model(name)
+        handles = list(handles)
+        retval = []
+        for start in range(0, len(handles), BATCH_SIZE):
+            chunk = handles[start:start + BATCH_SIZE]
+            objects = DjangoBatch().select(model).filter(handle__in=chunk)
+            objects = dict((obj.handle, obj) for obj in
+                           self.make_objects(name, list(objects)))
+            for handle in chunk:
+                if handle in self.import_cache:
+                    retval.append(self.import_cache[handle])
+                elif handle in objects:
+                    retval.append(objects[handle])
+        return retval
+
+    def iter_objects(self, name):
+        """
+        Iterate over the Gramps objects of the model name, e.g. "Person",
+        which are read in batches of BATCH_SIZE.
+        """
+        batch = DjangoBatch()
+        for objects in batch.iter_batches(self.dji.get_model(name)):
+            for obj in self.make_objects(name, objects):
+                yield obj
+
     def iter_people(self):
-        return (self.get_person_from_handle(person.handle) 
-                for person in self.dji.Person.all())
+        return self.iter_objects("Person")
 
     def iter_person_handles(self):
         return (person.handle for person in self.dji.Person.all())
 
     def iter_families(self):
-        return (self.get_family_from_handle(family.handle) 
-                for family in self.dji.Family.all())
+        return self.iter_objects("Family")
 
     def iter_family_handles(self):
         return (family.handle for family in self.dji.Family.all())
 
     def iter_notes(self):
-        return (self.get_note_from_handle(note.handle) 
-                for note in self.dji.Note.all())
+        return self.iter_objects("Note")
 
     def iter_note_handles(self):
         return (note.handle for note in self.dji.Note.all())
 
     def iter_events(self):
-        return (self.get_event_from_handle(event.handle) 
-                for event in self.dji.Event.all())
+        return self.iter_objects("Event")
 
     def iter_event_handles(self):
         return (event.handle for event in self.dji.Event.all())
 
     def iter_places(self):
-        return (self.get_place_from_handle(place.handle) 
-                for place in self.dji.Place.all())
+        return self.iter_objects("Place")
 
     def iter_place_handles(self):
         return (place.handle for place in self.dji.Place.all())
 
     def iter_repositories(self):
-        return (self.get_repository_from_handle(repository.handle) 
-                for repository in self.dji.Repository.all())
+        return self.iter_objects("Repository")
 
     def iter_repository_handles(self):
         return (repository.handle for repository in self.dji.Repository.all())
 
     def iter_sources(self):
-        return (self.get_source_from_handle(source.handle) 
-                for source in self.dji.Source.all())
+        return self.iter_objects("Source")
 
     def iter_source_handles(self):
         return (source.handle for source in self.dji.Source.all())
 
     def iter_citations(self):
-        return (self.get_citation_from_handle(citation.handle) 
-                for citation in self.dji.Citation.all())
+        return self.iter_objects("Citation")
 
     def iter_citation_handles(self):
         return (citation.handle for citation in self.dji.Citation.all())
 
     def iter_tags(self):
-        return (self.get_tag_from_handle(tag.handle) 
-                for tag in self.dji.Tag.all())
+        return self.iter_objects("Tag")
 
     def iter_tag_handles(self):
         return (tag.handle for tag in self.dji.Tag.all())
 
     def iter_media_objects(self):
-        return (self.get_media_from_handle(media.handle) 
-                for media in self.dji.Media.all())
+        return self.iter_objects("Media")
 
     def get_tag_from_name(self, name):
         try:
@@ -944,34 +996,34 @@ class DbDjango(DbWriteBase, DbReadBase):
         return self.dji.Repository.count()
 
     def get_place_cursor(self):
-        return Cursor(self.dji.Place, self.get_raw_place_data).iter()
+        return Cursor(self.dji.get_model("Place")).iter()
 
     def get_person_cursor(self):
-        return Cursor(self.dji.Person, self.get_raw_person_data).iter()
+        return Cursor(self.dji.get_model("Person")).iter()
 
     def get_family_cursor(self):
-        return Cursor(self.dji.Family, self.get_raw_family_data).iter()
+        return Cursor(self.dji.get_model("Family")).iter()
 
     def get_event_cursor(self):
-        return Cursor(self.dji.Event, self.get_raw_event_data).iter()
+        return Cursor(self.dji.get_model("Event")).iter()
 
     def get_citation_cursor(self):
-        return Cursor(self.dji.Citation, self.get_raw_citation_data).iter()
+        return Cursor(self.dji.get_model("Citation")).iter()
 
     def get_source_cursor(self):
-        return Cursor(self.dji.Source, self.get_raw_source_data).iter()
+        return Cursor(self.dji.get_model("Source")).iter()
 
     def get_note_cursor(self):
-        return Cursor(self.dji.Note, self.get_raw_note_data).iter()
+        return Cursor(self.dji.get_model("Note")).iter()
 
     def get_tag_cursor(self):
-        return Cursor(self.dji.Tag, self.get_raw_tag_data).iter()
+        return Cursor(self.dji.get_model("Tag")).iter()
 
     def get_repository_cursor(self):
-        return Cursor(self.dji.Repository, self.get_raw_repository_data).iter()
+        return Cursor(self.dji.get_model("Repository")).iter()
 
     def get_media_cursor(self):
-        return Cursor(self.dji.Media, self.get_raw_object_data).iter()
+        return Cursor(self.dji.get_model("Media")).iter()
 
     def has_gramps_id(self, obj_key, gramps_id):
         key2table = {
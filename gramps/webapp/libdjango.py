@@ -303,6 +303,15 @@ class DjangoInterface(object):
             return obj.place.handle
         return ''
 
+    def get_locations(self, obj): # place or address
+        return obj.location_set.all().order_by("order")
+
+    def get_markups(self, note):
+        return models.Markup.objects.filter(note=note).order_by("order")
+
+    def get_surname_list(self, name):
+        return name.make_surname_list()
+
     ## Packers:
 
     def get_event(self, event):
@@ -325,7 +334,7 @@ class DjangoInterface(object):
 
     def get_note_markup(self, note):
         retval = []
-        markups = models.Markup.objects.filter(note=note).order_by("order")
+        markups = self.get_markups(note)
         for markup in markups:
             if markup.string and markup.string.isdigit():
                 value = int(markup.string)
@@ -521,7 +530,7 @@ class DjangoInterface(object):
                 obj.text, obj.sortval, obj.newyear)
 
     def get_place(self, place):
-        locations = place.location_set.all().order_by("order")
+        locations = self.get_locations(place)
         alt_location_list = [self.pack_location(location, True) for location in locations]
         url_list = self.get_url_list(place)
         media_list = self.get_media_list(place)
@@ -631,7 +640,7 @@ class DjangoInterface(object):
         citation_list = self.get_citation_list(address)
         date = self.get_date(address)
         note_list = self.get_note_list(address)
-        locations = address.location_set.all().order_by("order")
+        locations = self.get_locations(address)
         if len(locations) > 0:
             location = self.pack_location(locations[0], with_parish)
         else:
@@ -674,7 +683,7 @@ class DjangoInterface(object):
         note_list = self.get_note_list(name)
         date = self.get_date(name)
         return (name.private, citation_list, note_list, date,
-                name.first_name, name.make_surname_list(), name.suffix,
+                name.first_name, self.get_surname_list(name), name.suffix,
                 name.title, tuple(name.name_type), 
                 name.group_as, name.sort_as.val, 
                 name.display_as.val, name.call, name.nick, 
@@ -2052,3 +2061,271 @@ class DjangoInterface(object):
                 item.save()
             count += 1
         callback(100 * (count/total if total else 0))
+
+#-------------------------------------------------------------------------
+#
+# Batch reading
+#
+#-------------------------------------------------------------------------
+
+# Number of objects read at a time; keeps the IN clauses under the
+# limit of 999 variables of SQLite
+BATCH_SIZE = 500
+
+# The foreign keys of a model that are read with its rows
+RELATED = {
+    models.Person: ("gender_type",),
+    models.Family: ("father", "mother", "family_rel_type"),
+    models.Event: ("event_type", "place"),
+    models.Place: ("place_type",),
+    models.Repository: ("repository_type",),
+    models.Citation: ("source",),
+    models.Note: ("note_type",),
+    models.Name: ("name_type", "sort_as", "display_as"),
+    models.Surname: ("name_origin_type",),
+    models.Url: ("url_type",),
+    models.Lds: ("lds_type", "status", "place", "famc"),
+    models.MyFamilies: ("family",),
+    models.MyParentFamilies: ("family",),
+    models.Markup: ("styled_text_tag_type",),
+    models.Attribute: ("attribute_type",),
+    models.NoteRef: ("ref_object",),
+    models.CitationRef: ("citation",),
+    models.EventRef: ("ref_object", "role_type"),
+    models.MediaRef: ("ref_object",),
+    models.PersonRef: ("ref_object",),
+    models.ChildRef: ("ref_object", "father_rel_type", "mother_rel_type"),
+    models.RepositoryRef: ("ref_object", "source_media_type"),
+    models.PlaceRef: ("ref_object",),
+    }
+
+# The rows that belong to an object of a model through a foreign key:
+# (model of the rows, name of the foreign key, ordering)
+OWNED = {
+    models.Person: [(models.Name, "person", "order"),
+                    (models.Address, "person", "order"),
+                    (models.Url, "person", "order"),
+                    (models.Lds, "person", "order"),
+                    (models.MyFamilies, "person", "order"),
+                    (models.MyParentFamilies, "person", "order")],
+    models.Family: [(models.Lds, "family", "order")],
+    models.Place: [(models.Location, "place", "order"),
+                   (models.Url, "place", "order")],
+    models.Repository: [(models.Address, "repository", "order"),
+                        (models.Url, "repository", "order")],
+    models.Source: [(models.SourceAttribute, "source", "order")],
+    models.Citation: [(models.CitationAttribute, "citation", "order")],
+    models.Note: [(models.Markup, "note", "order")],
+    models.Name: [(models.Surname, "name", "id")],
+    models.Address: [(models.Location, "address", "order")],
+    }
+
+# The rows that belong to an object of a model through its content type
+# and id: (model of the rows, ordering)
+REFERENCES = {
+    models.Person: [(models.NoteRef, "id"), (models.CitationRef, "order"),
+                    (models.Attribute, "id"), (models.EventRef, "order"),
+                    (models.MediaRef, "id"), (models.PersonRef, "id")],
+    models.Family: [(models.NoteRef, "id"), (models.CitationRef, "order"),
+                    (models.Attribute, "id"), (models.EventRef, "order"),
+                    (models.MediaRef, "id"), (models.ChildRef, "order")],
+    models.Event: [(models.NoteRef, "id"), (models.CitationRef, "order"),
+                   (models.Attribute, "id"), (models.MediaRef, "id")],
+    models.Place: [(models.NoteRef, "id"), (models.CitationRef, "order"),
+                   (models.MediaRef, "id"), (models.PlaceRef, "id")],
+    models.Source: [(models.NoteRef, "id"), (models.MediaRef, "id"),
+                    (models.RepositoryRef, "id")],
+    models.Citation: [(models.NoteRef, "id"), (models.MediaRef, "id")],
+    models.Repository: [(models.NoteRef, "id")],
+    models.Media: [(models.NoteRef, "id"), (models.CitationRef, "order"),
+                   (models.Attribute, "id")],
+    models.Name: [(models.NoteRef, "id"), (models.CitationRef, "order")],
+    models.Address: [(models.NoteRef, "id"), (models.CitationRef, "order")],
+    models.Lds: [(models.NoteRef, "id"), (models.CitationRef, "order")],
+    models.Attribute: [(models.NoteRef, "id"), (models.CitationRef, "order")],
+    models.EventRef: [(models.NoteRef, "id"), (models.Attribute, "id")],
+    models.MediaRef: [(models.NoteRef, "id"), (models.CitationRef, "order"),
+                      (models.Attribute, "id")],
+    models.PersonRef: [(models.NoteRef, "id"), (models.CitationRef, "order")],
+    models.ChildRef: [(models.NoteRef, "id"), (models.CitationRef, "order")],
+    models.RepositoryRef: [(models.NoteRef, "id")],
+    }
+
+class DjangoBatch(DjangoInterface):
+    """
+    DjangoInterface building the Gramps Raw Data of many objects at once.
+
+    Building the raw data of one object with DjangoInterface takes a query
+    for every list of secondary objects and references, and for every list
+    of theirs. DjangoBatch first reads the rows of all these lists for a
+    whole batch of objects, with a query for each kind of list, and the
+    get_ITEM methods then find them in memory.
+
+    >>> batch = DjangoBatch()
+    >>> for people in batch.iter_batches(models.Person):
+    ...     data = batch.get_raw_list(models.Person, people)
+    """
+    def __init__(self):
+        DjangoInterface.__init__(self)
+        self.__rows = {}
+
+    def select(self, model):
+        """
+        Return the query of the rows of the model, with their foreign keys
+        and tags.
+        """
+        query = model.objects.select_related(*RELATED.get(model, ()))
+        if issubclass(model, models.PrimaryObject):
+            query = query.prefetch_related("tags")
+        return query
+
+    def iter_batches(self, model):
+        """
+        Iterate over all the rows of the model, read with select(), in lists
+        of at most BATCH_SIZE rows.
+        """
+        query = self.select(model).order_by("id")
+        last = 0
+        while True:
+            objects = list(query.filter(id__gt=last)[:BATCH_SIZE])
+            if not objects:
+                return
+            yield objects
+            last = objects[-1].id
+
+    def get_raw_list(self, model, objects):
+        """
+        Return the list of the Gramps Raw Data of the objects of the model,
+        read with select().
+        """
+        self.__rows = {}
+        self.load(model, objects)
+        get_item = getattr(self, "get_" + model.__name__.lower())
+        return [get_item(obj) for obj in objects]
+
+    def load(self, model, objects):
+        """
+        Read the rows belonging to the objects of the model, and the rows
+        belonging to those, with a query for each kind of row.
+        """
+        if not objects:
+            return
+        ids = [obj.id for obj in objects]
+        obj_type = ContentType.objects.get_for_model(model)
+        for ref_model, order in REFERENCES.get(model, []):
+            rows = self.__read(ref_model, order, "object_id", ids,
+                               object_type=obj_type)
+            self.__group(rows, model, "object_id")
+            self.load(ref_model, rows)
+        for row_model, key, order in OWNED.get(model, []):
+            rows = self.__read(row_model, order, key + "_id", ids)
+            self.__group(rows, model, key + "_id")
+            self.load(row_model, rows)
+
+    def __read(self, model, order, key, ids, **kwargs):
+        rows = []
+        for start in range(0, len(ids), BATCH_SIZE):
+            kwargs[key + "__in"] = ids[start:start + BATCH_SIZE]
+            query = model.objects.filter(**kwargs)
+            rows.extend(query.select_related(*RELATED.get(model, ()))
+                             .order_by(order))
+        return rows
+
+    def __group(self, rows, model, key):
+        for row in rows:
+            self.__rows.setdefault((row.__class__, model, getattr(row, key)),
+                                   []).append(row)
+
+    def get_rows(self, model, obj):
+        """
+        Return the rows of the model belonging to obj, read by load().
+        """
+        return self.__rows.get((model, obj.__class__, obj.id), [])
+
+    # -----------------------------------------------
+    # Get methods reading the loaded rows
+    # -----------------------------------------------
+
+    def get_attribute_list(self, obj):
+        return list(map(self.pack_attribute,
+                        self.get_rows(models.Attribute, obj)))
+
+    def get_names(self, person, preferred):
+        names = [name for name in self.get_rows(models.Name, person)
+                 if name.preferred == preferred]
+        if preferred:
+            if len(names) > 0:
+                return self.pack_name(names[0])
+            else:
+                return Name().serialize()
+        else:
+            return list(map(self.pack_name, names))
+
+    def get_surname_list(self, name):
+        return [(x.surname, x.prefix, x.primary, 
+                 tuple(x.name_origin_type), x.connector) for x in
+                self.get_rows(models.Surname, name)]
+
+    def get_source_attribute_list(self, source): 
+        return [(map.private, map.key, map.value) for map in
+                self.get_rows(models.SourceAttribute, source)]
+
+    def get_citation_attribute_list(self, citation): 
+        return [(map.private, map.key, map.value) for map in
+                self.get_rows(models.CitationAttribute, citation)]
+
+    def get_media_list(self, obj):
+        return list(map(self.pack_media_ref,
+                        self.get_rows(models.MediaRef, obj)))
+
+    def get_note_list(self, obj):
+        return [noteref.ref_object.handle for noteref in
+                self.get_rows(models.NoteRef, obj)]
+
+    def get_repository_ref_list(self, obj):
+        return list(map(self.pack_repository_ref,
+                        self.get_rows(models.RepositoryRef, obj)))
+
+    def get_place_ref_list(self, obj):
+        return list(map(self.pack_place_ref,
+                        self.get_rows(models.PlaceRef, obj)))
+
+    def get_url_list(self, obj):
+        return list(map(self.pack_url, self.get_rows(models.Url, obj)))
+
+    def get_address_list(self, obj, with_parish): # person or repository
+        return [self.pack_address(address, with_parish)
+                    for address in self.get_rows(models.Address, obj)]
+
+    def get_locations(self, obj): # place or address
+        return self.get_rows(models.Location, obj)
+
+    def get_markups(self, note):
+        return self.get_rows(models.Markup, note)
+
+    def get_child_ref_list(self, family):
+        return list(map(self.pack_child_ref,
+                        self.get_rows(models.ChildRef, family)))
+
+    def get_citation_list(self, obj):
+        return [citationref.citation.handle for citationref in
+                self.get_rows(models.CitationRef, obj)]
+
+    def get_event_ref_list(self, obj):
+        return list(map(self.pack_event_ref,
+                        self.get_rows(models.EventRef, obj)))
+
+    def get_family_list(self, person): # person has families
+        return [fam.family.handle for fam in
+                self.get_rows(models.MyFamilies, person)]
+    
+    def get_parent_family_list(self, person): # person's parents has families
+        return [fam.family.handle for fam in
+                self.get_rows(models.MyParentFamilies, person)]
+
+    def get_person_ref_list(self, person):
+        return list(map(self.pack_person_ref,
+                        self.get_rows(models.PersonRef, person)))
+
+    def get_lds_list(self, obj): # person or family
+        return list(map(self.pack_lds, self.get_rows(models.Lds, obj)))
@@ -0,0 +1,84 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+# test/gedcom_lexer_bench.py
+
+"""
+Measure the throughput of the GEDCOM lexer.
+
+Every file is lexed as the GEDCOM import does, and the time spent is
+reported with the number of lines and megabytes per second. A small file,
+such as the example, can be repeated in memory to make a large sample:
+
+    python3 test/gedcom_lexer_bench.py --repeat 300 example/gedcom/sample.ged
+"""
+
+import io
+import os
+import sys
+import time
+from optparse import OptionParser
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+os.environ['GRAMPS_RESOURCES'] = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), '..')
+
+from gramps.plugins.lib.libgedcom import (Lexer, AnselReader, UTF8Reader,
+                                          UTF16Reader, AnsiReader)
+
+READERS = {
+    'ANSEL' : AnselReader,
+    'UTF-8' : UTF8Reader,
+    'UTF-16' : UTF16Reader,
+    'ANSI' : AnsiReader,
+    }
+
+def lex(reader):
+    """
+    Read all the lines of the reader, return the number of lines.
+    """
+    lexer = Lexer(reader)
+    count = 0
+    while lexer.readline() is not None:
+        count += 1
+    return count
+
+def main():
+    parser = OptionParser(usage="usage: %prog [options] FILE...")
+    parser.add_option("-e", "--encoding", dest="encoding", default="UTF-8",
+                      help="encoding of the files: %s" %
+                           ", ".join(sorted(READERS)))
+    parser.add_option("-r", "--repeat", type="int", dest="repeat", default=1,
+                      help="lex the content of each file this many times "
+                           "in a row")
+    (options, args) = parser.parse_args()
+    if not args or options.encoding not in READERS:
+        parser.error("give the GEDCOM files and a known encoding")
+
+    for filename in args:
+        with open(filename, 'rb') as ifile:
+            data = ifile.read() * options.repeat
+        start = time.time()
+        count = lex(READERS[options.encoding](io.BytesIO(data)))
+        seconds = max(time.time() - start, 1e-6)
+        print("%s: %d lines, %.1f MB in %.2f s: %d lines/s, %.1f MB/s" %
+              (filename, count, len(data) / 1e6, seconds, count / seconds,
+               len(data) / 1e6 / seconds))
+
+if __name__ == '__main__':
+    main()